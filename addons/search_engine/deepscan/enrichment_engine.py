@@ -11,6 +11,8 @@ Funktionen:
 
 import json
 import math
+import re
+import sys
 from typing import List, Dict, Tuple, Optional, Set
 from pathlib import Path
 from collections import defaultdict
@@ -28,6 +30,11 @@ except ImportError:
         FUZZY_AVAILABLE = False
         print("⚠️  Warnung: rapidfuzz/fuzzywuzzy nicht installiert. String-Matching limitiert.")
 
+# Name-Blocking aus deepscan/ (Duplikate ohne Koordinaten)
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'deepscan'))
+from name_blocking import NameBlocker, name_similarity
+from json_writer import write_json
+
 
 class LocationEnricher:
     """
@@ -44,6 +51,10 @@ class LocationEnricher:
     FUZZY_MEDIUM = 75         # >= 75 = gute Übereinstimmung
     FUZZY_LOW = 60            # >= 60 = mögliche Übereinstimmung
 
+    # Website/ref verbinden nur Locations innerhalb dieser Distanz (in Metern);
+    # Wikidata-QIDs gelten immer
+    DISTANCE_IDENTIFIER = 2000
+
     # Prioritäten für Metadaten (höher = bevorzugt)
     SOURCE_PRIORITY = {
         'seed': 3,       # Manuell kuratiert = höchste Qualität
@@ -59,6 +70,8 @@ class LocationEnricher:
             'exact_matches': 0,
             'close_matches': 0,
             'near_matches': 0,
+            'name_matches': 0,
+            'identifier_matches': 0,
         }
 
     def haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -108,6 +121,118 @@ class LocationEnricher:
 
         return normalized
 
+    @staticmethod
+    def normalize_website(url: str) -> str:
+        """
+        Normalisiert URLs für den ID-Join (ohne Schema, www., Query und Slash am Ende)
+        """
+        url = (url or '').strip().lower()
+        url = re.sub(r'^[a-z]+://', '', url)
+        url = url.split('#', 1)[0].split('?', 1)[0].rstrip('/')
+        if url.startswith('www.'):
+            url = url[4:]
+        return url
+
+    def identifier_keys(self, loc: Dict) -> List[Tuple[str, str]]:
+        """
+        Eindeutige Kennungen einer Location: Wikidata-QID, Website, ref
+
+        ref ist nur innerhalb einer Kategorie eindeutig ("1" gibt es oft).
+        """
+        keys = []
+
+        qid = loc.get('wikidata') or ''
+        if not qid and loc.get('source') == 'wikidata':
+            qid = loc.get('sourceId') or ''
+        if not qid and str(loc.get('id', '')).startswith('wikidata-'):
+            qid = loc['id'][len('wikidata-'):]
+        for part in qid.split(';'):
+            part = part.strip().upper()
+            if re.fullmatch(r'Q\d+', part):
+                keys.append(('wikidata', part))
+
+        website = self.normalize_website(loc.get('website', ''))
+        if website:
+            keys.append(('website', website))
+
+        ref = (loc.get('ref') or '').strip().lower()
+        if ref:
+            keys.append(('ref', f"{loc.get('category', '')}:{ref}"))
+
+        return keys
+
+    def _within_identifier_distance(self, members: List[Dict]) -> bool:
+        """Alle Locations mit Koordinaten liegen nahe der ersten"""
+        located = [loc for loc in members if self.has_coordinates(loc)]
+        if len(located) < 2:
+            return True
+        first = located[0]
+        return all(
+            self.haversine_distance(first['latitude'], first['longitude'],
+                                    loc['latitude'], loc['longitude']) <= self.DISTANCE_IDENTIFIER
+            for loc in located[1:]
+        )
+
+    def join_by_identifier(self, locations: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Hash-Join über Wikidata-QID, Website und ref vor der Fuzzy-Suche (O(n))
+
+        Verbindet Locations mit gleicher Kennung per Union-Find und merged
+        jede Gruppe zu einer Location. Website und ref verbinden nur, wenn
+        jede Quelle höchstens einmal vorkommt (sonst z.B. Stadtportal für
+        viele Orte) und alle innerhalb von DISTANCE_IDENTIFIER liegen.
+
+        Returns:
+            (locations mit gemergten Gruppen, gemergte Locations)
+        """
+        parent = list(range(len(locations)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets = defaultdict(list)
+        for index, loc in enumerate(locations):
+            for key in self.identifier_keys(loc):
+                buckets[key].append(index)
+
+        for (kind, _), indices in buckets.items():
+            if len(indices) < 2:
+                continue
+            if kind != 'wikidata':
+                members = [locations[i] for i in indices]
+                sources = [loc.get('source', 'unknown') for loc in members]
+                if len(set(sources)) != len(sources) or not self._within_identifier_distance(members):
+                    continue
+            root = find(indices[0])
+            for index in indices[1:]:
+                other = find(index)
+                if other != root:
+                    parent[other] = root
+
+        groups = defaultdict(list)
+        for index in range(len(locations)):
+            groups[find(index)].append(index)
+
+        result = []
+        joined = []
+        for index, loc in enumerate(locations):
+            members = groups[find(index)]
+            if len(members) == 1:
+                result.append(loc)
+            elif members[0] == index:
+                merged = self.merge_location_data([locations[i] for i in members])
+                result.append(merged)
+                joined.append(merged)
+                self.stats['duplicates_found'] += len(members) - 1
+                self.stats['identifier_matches'] += len(members) - 1
+
+        print(f"🔑 ID-Join: {len(buckets)} Kennungen, {len(joined)} Gruppen, "
+              f"{self.stats['identifier_matches']} Duplikate\n")
+        return result, joined
+
     def calculate_match_score(self, loc1: Dict, loc2: Dict) -> Tuple[float, str]:
         """
         Berechnet einen Match-Score zwischen zwei Locations
@@ -160,6 +285,40 @@ class LocationEnricher:
             else:
                 return 0.0, f"near_no_name_match ({distance:.0f}m, name:{fuzzy_score}%)"
 
+    def has_coordinates(self, loc: Dict) -> bool:
+        """Prüft ob eine Location verwertbare Koordinaten hat"""
+        return loc.get('latitude') is not None and loc.get('longitude') is not None
+
+    def calculate_name_match_score(self, loc1: Dict, loc2: Dict) -> Tuple[float, str]:
+        """
+        Match-Score nur über Namen (für Locations ohne Koordinaten)
+
+        Verlangt einen sehr ähnlichen Namen und - wenn bekannt - gleiche Stadt
+        und Kategorie, da Namen wie "Stadtkirche" in vielen Orten vorkommen.
+        """
+        city1 = (loc1.get('city') or '').lower()
+        city2 = (loc2.get('city') or '').lower()
+        if city1 and city2 and city1 != city2:
+            return 0.0, "name_andere_stadt"
+
+        cat1, cat2 = loc1.get('category'), loc2.get('category')
+        if cat1 and cat2 and cat1 != cat2:
+            return 0.0, "name_andere_kategorie"
+
+        name1 = self.normalize_name(loc1.get('name', ''))
+        name2 = self.normalize_name(loc2.get('name', ''))
+        if not name1 or not name2:
+            return 0.0, "name_fehlt"
+
+        if FUZZY_AVAILABLE:
+            similarity = fuzz.token_sort_ratio(name1, name2)
+        else:
+            similarity = round(name_similarity(name1, name2) * 100)
+
+        if similarity >= self.FUZZY_HIGH:
+            return 0.75, f"name_match (name:{similarity}%)"
+        return 0.0, f"name_no_match (name:{similarity}%)"
+
     def merge_location_data(self, locations: List[Dict]) -> Dict:
         """
         Merged mehrere Locations zu einer einzigen, bevorzugt hochwertige Quellen
@@ -183,11 +342,12 @@ class LocationEnricher:
         merged['original_ids'] = []
         merged['sources'] = []
 
+        # Bereits gemergte Locations (ID-Join) bringen ihre Herkunft mit
         for loc in sorted_locs:
-            merged['original_ids'].append(loc.get('id', 'unknown'))
-            source = loc.get('source', 'unknown')
-            if source not in merged['sources']:
-                merged['sources'].append(source)
+            merged['original_ids'].extend(loc.get('original_ids') or [loc.get('id', 'unknown')])
+            for source in loc.get('sources') or [loc.get('source', 'unknown')]:
+                if source not in merged['sources']:
+                    merged['sources'].append(source)
 
         # Ergänze fehlende Felder aus niedrigeren Prioritäten
         for loc in sorted_locs[1:]:
@@ -204,6 +364,54 @@ class LocationEnricher:
 
         return merged
 
+    def _match_by_name(self, locations: List[Dict], duplicate_groups: List[List[Dict]],
+                       processed: Set[int], min_score: float) -> None:
+        """
+        Ordnet Locations ohne Koordinaten per Name-Blocking bestehenden
+        Gruppen oder anderen Locations zu (ergänzt duplicate_groups in-place)
+        """
+        without_coords = [loc for loc in locations if not self.has_coordinates(loc)]
+        if not without_coords:
+            return
+
+        blocker = NameBlocker()
+        for index, loc in enumerate(locations):
+            blocker.add(index, loc.get('name', ''))
+
+        group_of = {}
+        for group in duplicate_groups:
+            for member in group:
+                group_of[id(member)] = group
+
+        pairs = 0
+        for loc in without_coords:
+            if id(loc) in processed:
+                continue
+            processed.add(id(loc))
+
+            for index in sorted(blocker.query(loc.get('name', ''))):
+                candidate = locations[index]
+                if candidate is loc:
+                    continue
+                pairs += 1
+                score, reason = self.calculate_name_match_score(loc, candidate)
+                if score < min_score:
+                    continue
+
+                group = group_of.get(id(candidate))
+                if group is None:
+                    group = [candidate]
+                    duplicate_groups.append(group)
+                    group_of[id(candidate)] = group
+                    processed.add(id(candidate))
+                group.append(loc)
+                group_of[id(loc)] = group
+                self.stats['duplicates_found'] += 1
+                self.stats['name_matches'] += 1
+                break
+
+        print(f"🔤 Name-Blocking: {len(without_coords)} ohne Koordinaten, {pairs} Vergleiche\n")
+
     def deduplicate_locations(self, locations: List[Dict],
                              min_score: float = 0.70) -> Tuple[List[Dict], List[Dict]]:
         """
@@ -225,10 +433,16 @@ class LocationEnricher:
         print(f"   Min-Score: {min_score}")
         print(f"   Fuzzy-Matching: {'✓' if FUZZY_AVAILABLE else '✗ (deaktiviert)'}\n")
 
+        # Gleiche Kennung (QID, Website, ref) = sicheres Duplikat, vorab mergen;
+        # die Fuzzy-Suche sieht jede Gruppe nur noch als eine Location
+        locations, joined = self.join_by_identifier(locations)
+
         # Clustere nach groben Koordinaten (0.01° ≈ 1km)
         # Reduziert Vergleiche von O(n²) auf O(n*k) wo k << n
         grid = defaultdict(list)
         for loc in locations:
+            if not self.has_coordinates(loc):
+                continue
             lat_grid = round(loc['latitude'] * 100)  # 0.01° Raster
             lon_grid = round(loc['longitude'] * 100)
             grid[(lat_grid, lon_grid)].append(loc)
@@ -280,6 +494,9 @@ class LocationEnricher:
                     duplicate_groups.append(group)
                     self.stats['duplicates_found'] += len(group) - 1
 
+        # Locations ohne Koordinaten: Kandidaten über Name-Blocking
+        self._match_by_name(locations, duplicate_groups, processed, min_score)
+
         # Merge Duplikate
         print(f"🔗 Gefundene Duplikat-Gruppen: {len(duplicate_groups)}")
 
@@ -302,7 +519,7 @@ class LocationEnricher:
                 'merged_id': merged.get('id'),
                 'merged_name': merged.get('name'),
                 'sources': merged.get('sources', []),
-                'original_count': len(group),
+                'original_count': len(merged.get('original_ids', [])),
                 'original_ids': merged.get('original_ids', [])
             })
 
@@ -311,11 +528,25 @@ class LocationEnricher:
             if id(loc) not in all_merged_ids:
                 unique_locations.append(loc)
 
+        # Gruppen aus dem ID-Join ohne weiteren Fuzzy-Treffer
+        for merged in joined:
+            if id(merged) in all_merged_ids:
+                continue
+            duplicate_info.append({
+                'merged_id': merged.get('id'),
+                'merged_name': merged.get('name'),
+                'sources': merged.get('sources', []),
+                'original_count': len(merged.get('original_ids', [])),
+                'original_ids': merged.get('original_ids', [])
+            })
+
         print(f"✅ Ergebnis: {len(unique_locations)} eindeutige Locations")
         print(f"   Duplikate entfernt: {self.stats['duplicates_found']}")
         print(f"   Exact Matches: {self.stats['exact_matches']}")
         print(f"   Close Matches: {self.stats['close_matches']}")
-        print(f"   Near Matches: {self.stats['near_matches']}\n")
+        print(f"   Near Matches: {self.stats['near_matches']}")
+        print(f"   Name Matches: {self.stats['name_matches']}")
+        print(f"   ID Matches: {self.stats['identifier_matches']}\n")
 
         return unique_locations, duplicate_info
 
@@ -419,18 +650,17 @@ def merge_all_sources(output_dir: Path) -> None:
 
     # JSON
     output_json = merged_dir / f'msh_merged_{timestamp}.json'
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump({
-            'meta': {
-                'created_at': datetime.now().isoformat(),
-                'source': 'MSH DeepScan Merged',
-                'version': '1.0',
-                'total_locations': len(unique_locations),
-                'source_stats': source_stats,
-                'duplicates_removed': enricher.stats['duplicates_found'],
-            },
-            'data': unique_locations
-        }, f, ensure_ascii=False, indent=2)
+    write_json(output_json, {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'source': 'MSH DeepScan Merged',
+            'version': '1.0',
+            'total_locations': len(unique_locations),
+            'source_stats': source_stats,
+            'duplicates_removed': enricher.stats['duplicates_found'],
+        },
+        'data': unique_locations
+    })
 
     print(f"\n💾 Gespeichert:")
     print(f"   JSON: {output_json.name}")
@@ -449,27 +679,25 @@ def merge_all_sources(output_dir: Path) -> None:
             'properties': {k: v for k, v in loc.items() if k not in ['latitude', 'longitude']}
         })
 
-    with open(output_geojson, 'w', encoding='utf-8') as f:
-        json.dump({
-            'type': 'FeatureCollection',
-            'metadata': {
-                'created_at': datetime.now().isoformat(),
-                'total_locations': len(unique_locations),
-            },
-            'features': features
-        }, f, ensure_ascii=False, indent=2)
+    write_json(output_geojson, {
+        'type': 'FeatureCollection',
+        'metadata': {
+            'created_at': datetime.now().isoformat(),
+            'total_locations': len(unique_locations),
+        },
+        'features': features
+    })
 
     print(f"   GeoJSON: {output_geojson.name}")
 
     # Duplikat-Info
     if duplicate_info:
         dup_file = merged_dir / f'duplicates_{timestamp}.json'
-        with open(dup_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'total_groups': len(duplicate_info),
-                'total_duplicates': enricher.stats['duplicates_found'],
-                'groups': duplicate_info
-            }, f, ensure_ascii=False, indent=2)
+        write_json(dup_file, {
+            'total_groups': len(duplicate_info),
+            'total_duplicates': enricher.stats['duplicates_found'],
+            'groups': duplicate_info
+        })
         print(f"   Duplicates: {dup_file.name}")
 
     print("\n✅ Merge abgeschlossen!\n")
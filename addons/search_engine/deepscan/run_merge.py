@@ -21,8 +21,12 @@ if os.name == 'nt':
 
 # Füge Parent-Dir zu sys.path für Import hinzu
 sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'deepscan'))
 
 from enrichment_engine import LocationEnricher
+from search_index import build_search_index, save_search_index
+from telemetry import get_telemetry
+from json_writer import write_json
 
 
 def find_latest_file(directory: Path, pattern: str) -> Path | None:
@@ -88,12 +92,14 @@ def main():
     ]
 
     # 2. Lade Daten
+    telemetry = get_telemetry()
     all_locations = []
     source_stats = {}
 
     for source_name, file_path in sources:
         if file_path:
-            locations = load_locations_from_file(file_path, source_name)
+            with telemetry.timer("load"):
+                locations = load_locations_from_file(file_path, source_name)
             all_locations.extend(locations)
             source_stats[source_name] = len(locations)
             print(f"   ✓ {source_name:10s}: {len(locations):5d} Locations")
@@ -110,10 +116,15 @@ def main():
 
     # 3. Deduplizierung
     enricher = LocationEnricher()
-    unique_locations, duplicate_info = enricher.deduplicate_locations(
-        all_locations,
-        min_score=0.70
-    )
+    with telemetry.timer("deduplicate"):
+        unique_locations, duplicate_info = enricher.deduplicate_locations(
+            all_locations,
+            min_score=0.70
+        )
+    telemetry.count("input_locations", len(all_locations))
+    telemetry.count("unique_locations", len(unique_locations))
+    for key, value in enricher.stats.items():
+        telemetry.count(key, value)
 
     # 4. Statistiken
     from collections import defaultdict
@@ -166,31 +177,31 @@ def main():
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
 
     # JSON
-    output_json = merged_dir / f'msh_merged_{timestamp}.json'
-    with open(output_json, 'w', encoding='utf-8') as f:
-        json.dump({
-            'meta': {
-                'created_at': datetime.now().isoformat(),
-                'source': 'MSH DeepScan Merged',
-                'version': '2.0',
-                'total_locations': len(unique_locations),
-                'source_stats': source_stats,
-                'duplicates_removed': enricher.stats['duplicates_found'],
-                'merge_stats': {
-                    'exact_matches': enricher.stats['exact_matches'],
-                    'close_matches': enricher.stats['close_matches'],
-                    'near_matches': enricher.stats['near_matches'],
-                }
-            },
-            'data': unique_locations
-        }, f, ensure_ascii=False, indent=2)
+    output_json = merged_dir / f'msh_sources_merged_{timestamp}.json'
+    write_json(output_json, {
+        'meta': {
+            'created_at': datetime.now().isoformat(),
+            'source': 'MSH DeepScan Merged',
+            'version': '2.0',
+            'total_locations': len(unique_locations),
+            'source_stats': source_stats,
+            'duplicates_removed': enricher.stats['duplicates_found'],
+            'merge_stats': {
+                'exact_matches': enricher.stats['exact_matches'],
+                'close_matches': enricher.stats['close_matches'],
+                'near_matches': enricher.stats['near_matches'],
+                'name_matches': enricher.stats['name_matches'],
+            }
+        },
+        'data': unique_locations
+    })
 
     print(f"\n💾 Gespeichert:")
     print(f"   JSON: {output_json.name}")
     print(f"   Pfad: {output_json}")
 
     # GeoJSON
-    output_geojson = merged_dir / f'msh_merged_{timestamp}.geojson'
+    output_geojson = merged_dir / f'msh_sources_merged_{timestamp}.geojson'
     features = []
 
     for loc in unique_locations:
@@ -203,31 +214,39 @@ def main():
             'properties': {k: v for k, v in loc.items() if k not in ['latitude', 'longitude']}
         })
 
-    with open(output_geojson, 'w', encoding='utf-8') as f:
-        json.dump({
-            'type': 'FeatureCollection',
-            'metadata': {
-                'created_at': datetime.now().isoformat(),
-                'total_locations': len(unique_locations),
-            },
-            'features': features
-        }, f, ensure_ascii=False, indent=2)
+    write_json(output_geojson, {
+        'type': 'FeatureCollection',
+        'metadata': {
+            'created_at': datetime.now().isoformat(),
+            'total_locations': len(unique_locations),
+        },
+        'features': features
+    })
 
     print(f"   GeoJSON: {output_geojson.name}")
     print(f"   Pfad: {output_geojson}")
 
+    # Suchindex für die App (minifiziert, einmal laden)
+    output_index = merged_dir / f'msh_search_index_{timestamp}.json'
+    with telemetry.timer("search_index"):
+        search_index = build_search_index(unique_locations)
+        index_size = save_search_index(search_index, output_index)
+    telemetry.gauge("search_index_bytes", index_size)
+
+    print(f"   Suchindex: {output_index.name} ({len(search_index['terms'])} Terme, {index_size / 1024:.0f} KB)")
+    print(f"   Pfad: {output_index}")
+
     # Duplikat-Info
     if duplicate_info:
         dup_file = merged_dir / f'msh_duplicates_{timestamp}.json'
-        with open(dup_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'meta': {
-                    'created_at': datetime.now().isoformat(),
-                    'total_groups': len(duplicate_info),
-                    'total_duplicates': enricher.stats['duplicates_found'],
-                },
-                'groups': duplicate_info
-            }, f, ensure_ascii=False, indent=2)
+        write_json(dup_file, {
+            'meta': {
+                'created_at': datetime.now().isoformat(),
+                'total_groups': len(duplicate_info),
+                'total_duplicates': enricher.stats['duplicates_found'],
+            },
+            'groups': duplicate_info
+        })
         print(f"   Duplicates: {dup_file.name}")
         print(f"   Pfad: {dup_file}")
 
@@ -250,14 +269,14 @@ def main():
             'exact_matches': enricher.stats['exact_matches'],
             'close_matches': enricher.stats['close_matches'],
             'near_matches': enricher.stats['near_matches'],
+            'name_matches': enricher.stats['name_matches'],
         }
     }
 
     report_file = output_dir / 'analytics' / f'merge_report_{timestamp}.json'
     report_file.parent.mkdir(exist_ok=True)
 
-    with open(report_file, 'w', encoding='utf-8') as f:
-        json.dump(quality_report, f, ensure_ascii=False, indent=2)
+    write_json(report_file, quality_report)
 
     print(f"   Report: {report_file.name}")
     print(f"   Pfad: {report_file}")
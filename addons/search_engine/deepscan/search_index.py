@@ -0,0 +1,322 @@
+"""
+MSH DeepScan - Vorberechneter Suchindex für die App
+
+Aufbau (minifiziertes JSON, einmal laden, danach nur Lookups):
+- docs:      [id, name, kategorie_idx, stadt_idx, lat, lon] pro Location
+- terms:     sortierte, gefaltete Tokens (ä→ae, ß→ss, ...)
+- postings:  pro Term delta-kodierte Einträge (doc << 1 | name_flag)
+- prefixes:  1-3 Zeichen Präfix → [von, bis) Bereich in terms
+- trigrams:  Trigramm → delta-kodierte Term-Indizes (Tippfehler-Toleranz)
+- facets:    Kategorie/Stadt → delta-kodierte Doc-Listen
+"""
+
+import json
+import re
+import sys
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional, Set, Tuple
+
+# JSON-Writer aus deepscan/
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / 'deepscan'))
+from json_writer import write_json
+
+INDEX_VERSION = 1
+
+# Präfix-Tabelle bis zu dieser Länge, längere Präfixe per Binärsuche
+PREFIX_TABLE_LENGTH = 3
+
+# Mindest-Überlappung der Trigramme für unscharfe Treffer
+TRIGRAM_MIN_SIMILARITY = 0.5
+
+# Stoppwörter ohne Suchwert (sonst riesige Postings)
+STOPWORDS = {'der', 'die', 'das', 'und', 'am', 'an', 'im', 'in', 'zu', 'zum', 'zur', 'von', 'the'}
+
+_UMLAUT_FOLD = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+_TOKEN_SPLIT = re.compile(r'[^0-9a-z]+')
+
+
+def _strip_accents(text: str) -> str:
+    return ''.join(c for c in unicodedata.normalize('NFKD', text) if not unicodedata.combining(c))
+
+
+def fold(text: str) -> str:
+    """Kleinschreibung + deutsche Umlaut/ß-Faltung (Müller → mueller)"""
+    return _strip_accents(text.lower().translate(_UMLAUT_FOLD))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Zerlegt Text in gefaltete Tokens.
+
+    Für Wörter mit Umlaut wird zusätzlich die Variante ohne 'e' erzeugt
+    (Müller → mueller + muller), damit beide Schreibweisen gefunden werden.
+    """
+    if not text:
+        return []
+    lowered = text.lower()
+    tokens = [t for t in _TOKEN_SPLIT.split(fold(lowered)) if t]
+    if any(c in lowered for c in 'äöü'):
+        tokens += [t for t in _TOKEN_SPLIT.split(_strip_accents(lowered.replace('ß', 'ss'))) if t]
+    return tokens
+
+
+def _query_groups(query: str) -> List[List[str]]:
+    """Suchtokens als Gruppen gleichwertiger Schreibweisen ([mueller, muller])"""
+    lowered = query.lower()
+    primary = [t for t in _TOKEN_SPLIT.split(fold(lowered)) if t]
+    plain = [t for t in _TOKEN_SPLIT.split(_strip_accents(lowered.replace('ß', 'ss'))) if t]
+    if len(plain) != len(primary):
+        plain = primary
+    groups = [list(dict.fromkeys(pair)) for pair in zip(primary, plain)]
+    return [g for g in groups if g[0] not in STOPWORDS]
+
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f' {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _delta_encode(values: List[int]) -> List[int]:
+    result, prev = [], 0
+    for v in values:
+        result.append(v - prev)
+        prev = v
+    return result
+
+
+def _delta_decode(values: List[int]) -> List[int]:
+    result, acc = [], 0
+    for v in values:
+        acc += v
+        result.append(acc)
+    return result
+
+
+def build_search_index(locations: List[Dict]) -> Dict:
+    """Baut den Suchindex aus den deduplizierten Locations"""
+    categories: List[str] = []
+    cities: List[str] = []
+    category_idx: Dict[str, int] = {}
+    city_idx: Dict[str, int] = {}
+
+    docs = []
+    # term -> {doc: name_flag}
+    term_docs: Dict[str, Dict[int, int]] = defaultdict(dict)
+    category_docs: Dict[int, List[int]] = defaultdict(list)
+    city_docs: Dict[int, List[int]] = defaultdict(list)
+
+    for doc_id, loc in enumerate(locations):
+        category = loc.get('category') or 'other'
+        city = loc.get('city') or ''
+
+        if category not in category_idx:
+            category_idx[category] = len(categories)
+            categories.append(category)
+        if city not in city_idx:
+            city_idx[city] = len(cities)
+            cities.append(city)
+
+        cat_i, city_i = category_idx[category], city_idx[city]
+        category_docs[cat_i].append(doc_id)
+        city_docs[city_i].append(doc_id)
+
+        name = loc.get('displayName') or loc.get('name') or ''
+        docs.append([
+            loc.get('id', ''),
+            name,
+            cat_i,
+            city_i,
+            round(loc['latitude'], 5) if loc.get('latitude') is not None else None,
+            round(loc['longitude'], 5) if loc.get('longitude') is not None else None,
+        ])
+
+        # Name-Tokens markieren (höheres Gewicht), Rest nur als Kontext
+        for token in tokenize(name) + tokenize(loc.get('name', '')):
+            if token not in STOPWORDS:
+                term_docs[token][doc_id] = 1
+
+        context = [category, city] + list(loc.get('tags') or [])
+        for text in context:
+            for token in tokenize(text):
+                if token not in STOPWORDS:
+                    term_docs[token].setdefault(doc_id, 0)
+
+    terms = sorted(term_docs)
+    postings = [
+        _delta_encode([(doc << 1) | flag for doc, flag in sorted(term_docs[t].items())])
+        for t in terms
+    ]
+
+    # Präfix-Bereiche: terms ist sortiert, daher ist jeder Präfix ein zusammenhängender Bereich
+    prefixes: Dict[str, List[int]] = {}
+    for i, term in enumerate(terms):
+        for length in range(1, min(PREFIX_TABLE_LENGTH, len(term)) + 1):
+            prefix = term[:length]
+            if prefix in prefixes:
+                prefixes[prefix][1] = i + 1
+            else:
+                prefixes[prefix] = [i, i + 1]
+
+    trigram_terms: Dict[str, List[int]] = defaultdict(list)
+    for i, term in enumerate(terms):
+        for gram in sorted(_trigrams(term)):
+            trigram_terms[gram].append(i)
+
+    return {
+        'v': INDEX_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'fields': ['id', 'name', 'category', 'city', 'lat', 'lon'],
+        'docs': docs,
+        'categories': categories,
+        'cities': cities,
+        'terms': terms,
+        'postings': postings,
+        'prefixes': prefixes,
+        'trigrams': {g: _delta_encode(ids) for g, ids in sorted(trigram_terms.items())},
+        'facets': {
+            'category': [_delta_encode(category_docs[i]) for i in range(len(categories))],
+            'city': [_delta_encode(city_docs[i]) for i in range(len(cities))],
+        },
+    }
+
+
+def save_search_index(index: Dict, path: Path) -> int:
+    """Schreibt den Index minifiziert; gibt die Dateigröße in Bytes zurück"""
+    write_json(path, index, pretty=False)
+    return Path(path).stat().st_size
+
+
+class SearchIndex:
+    """
+    Abfrage-Seite des Index (Referenz-Implementierung für den Client).
+
+    Postings werden beim Laden einmal dekodiert, danach sind Abfragen
+    reine Dict-/Set-Operationen.
+    """
+
+    def __init__(self, index: Dict):
+        if index.get('v') != INDEX_VERSION:
+            raise ValueError(f"Suchindex-Version {index.get('v')} nicht unterstützt")
+
+        self.docs = index['docs']
+        self.categories = index['categories']
+        self.cities = index['cities']
+        self.terms = index['terms']
+        self.term_ids = {t: i for i, t in enumerate(self.terms)}
+        self.prefixes = index['prefixes']
+
+        # (doc, name_flag) pro Term
+        self.postings: List[Dict[int, int]] = []
+        for encoded in index['postings']:
+            self.postings.append({v >> 1: v & 1 for v in _delta_decode(encoded)})
+
+        self.trigrams = {g: _delta_decode(ids) for g, ids in index['trigrams'].items()}
+        self.category_docs = {
+            self.categories[i]: set(_delta_decode(ids))
+            for i, ids in enumerate(index['facets']['category'])
+        }
+        self.city_docs = {
+            self.cities[i]: set(_delta_decode(ids))
+            for i, ids in enumerate(index['facets']['city'])
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> 'SearchIndex':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def _prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Bereich aller Terme mit diesem Präfix in der sortierten Termliste"""
+        if prefix in self.prefixes and len(prefix) <= PREFIX_TABLE_LENGTH:
+            return tuple(self.prefixes[prefix])
+        head = self.prefixes.get(prefix[:PREFIX_TABLE_LENGTH])
+        if head is None:
+            return 0, 0
+        lo = bisect_left(self.terms, prefix, head[0], head[1])
+        hi = bisect_left(self.terms, prefix + '\uffff', lo, head[1])
+        return lo, hi
+
+    def _fuzzy_terms(self, token: str) -> List[int]:
+        """Terme mit ähnlichen Trigrammen (Tippfehler)"""
+        grams = _trigrams(token)
+        counts: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for term_id in self.trigrams.get(gram, ()):
+                counts[term_id] += 1
+
+        result = []
+        for term_id, shared in counts.items():
+            union = len(grams) + len(_trigrams(self.terms[term_id])) - shared
+            if shared / union >= TRIGRAM_MIN_SIMILARITY:
+                result.append(term_id)
+        return result
+
+    def _token_matches(self, token: str, is_prefix: bool) -> Dict[int, int]:
+        """doc -> name_flag für ein Suchtoken (exakt, Präfix, sonst unscharf)"""
+        term_ids: List[int] = []
+        if token in self.term_ids:
+            term_ids.append(self.term_ids[token])
+        if is_prefix:
+            lo, hi = self._prefix_range(token)
+            term_ids.extend(range(lo, hi))
+        if not term_ids:
+            term_ids = self._fuzzy_terms(token)
+
+        matches: Dict[int, int] = {}
+        for term_id in term_ids:
+            for doc, flag in self.postings[term_id].items():
+                if flag >= matches.get(doc, 0):
+                    matches[doc] = flag
+        return matches
+
+    def search(self, query: str, category: Optional[str] = None,
+               city: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """
+        Sucht Locations (alle Tokens müssen passen, letztes Token als Präfix).
+
+        Returns:
+            Liste von Dicts mit id, name, category, city, lat, lon, score
+        """
+        groups = _query_groups(query)
+
+        candidates: Optional[Set[int]] = None
+        if category:
+            candidates = set(self.category_docs.get(category, ()))
+        if city:
+            city_set = self.city_docs.get(city, set())
+            candidates = city_set if candidates is None else candidates & city_set
+
+        scores: Dict[int, int] = {}
+        for i, variants in enumerate(groups):
+            # Umlaut-Varianten eines Wortes sind Alternativen (ODER)
+            matches: Dict[int, int] = {}
+            for token in variants:
+                for doc, flag in self._token_matches(token, is_prefix=(i == len(groups) - 1)).items():
+                    if flag >= matches.get(doc, 0):
+                        matches[doc] = flag
+            docs = set(matches) if candidates is None else candidates & set(matches)
+            candidates = docs
+            for doc in docs:
+                scores[doc] = scores.get(doc, 0) + 1 + matches[doc]
+
+        if candidates is None:
+            return []
+
+        ranked = sorted(candidates, key=lambda d: (-scores.get(d, 0), len(self.docs[d][1]), d))
+        results = []
+        for doc in ranked[:limit]:
+            doc_id, name, cat_i, city_i, lat, lon = self.docs[doc]
+            results.append({
+                'id': doc_id,
+                'name': name,
+                'category': self.categories[cat_i],
+                'city': self.cities[city_i],
+                'lat': lat,
+                'lon': lon,
+                'score': scores.get(doc, 0),
+            })
+        return results
@@ -1,18 +1,35 @@
 # MSH Map - Data Scraper
 # Fokus: Familienaktivitäten & Kinderfreundliche Orte in Mansfeld-Südharz
+#
+# Nicht eigenständig: braucht deepscan/keyword_matcher.py, json_writer.py und
+# html_parsing.py aus diesem Repository (werden über sys.path aus ../deepscan geladen)
 
 import requests
 from bs4 import BeautifulSoup
-import json
+import asyncio
+import sys
 import time
 import re
 from datetime import datetime
 from urllib.parse import urlparse, urljoin
 from urllib.robotparser import RobotFileParser
 from dataclasses import dataclass, asdict
-from typing import Optional, List
+from typing import Optional, List, Dict
+from pathlib import Path
 import hashlib
 
+# Keyword-Matcher, JSON-Writer und HTML-Parsing aus deepscan/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'deepscan'))
+from keyword_matcher import KeywordMatcher
+from json_writer import write_json
+import html_parsing
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # KONFIGURATION
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -23,6 +40,14 @@ HEADERS = {'User-Agent': USER_AGENT}
 # Politeness: Sekunden zwischen Requests (anpassen je nach Server)
 REQUEST_DELAY = 1.5
 
+# Async-Engine: Verbindungen gesamt (pro Domain immer nur ein Request gleichzeitig)
+MAX_CONNECTIONS = 20
+REQUEST_TIMEOUT = 15
+
+# Listen-Container auf Quellseiten; nur diese Elemente werden geparst
+LISTING_TAGS = ['article', 'div']
+LISTING_CLASS = re.compile(r'(item|card|entry|listing)')
+
 # MSH Bounding Box für Geo-Validierung
 MSH_BOUNDS = {
     'lat_min': 51.25,
@@ -95,6 +120,9 @@ class MSHScraperBase:
         self.robots_cache = {}
         self.request_count = 0
         self.start_time = datetime.now()
+        # Connection-Pool statt einzelner requests.get-Aufrufe
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
     
     def is_allowed_by_robots(self, url: str) -> bool:
         """Prüft robots.txt der Domain."""
@@ -117,6 +145,11 @@ class MSHScraperBase:
         return self.robots_cache[domain].can_fetch(USER_AGENT, url)
     
     def fetch_page(self, url: str) -> Optional[BeautifulSoup]:
+        """Ruft Seite ab und parst den kompletten Baum."""
+        html = self.fetch_html(url)
+        return html_parsing.parse_html(html) if html else None
+    
+    def fetch_html(self, url: str) -> Optional[str]:
         """Ruft Seite ab mit Compliance-Check und Rate-Limiting."""
         
         # 1. Robots.txt prüfen
@@ -130,10 +163,10 @@ class MSHScraperBase:
         # 3. Request
         try:
             self.request_count += 1
-            response = requests.get(url, headers=HEADERS, timeout=15)
+            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
             print(f"  [OK] {url}")
-            return BeautifulSoup(response.text, 'html.parser')
+            return response.text
         except requests.exceptions.RequestException as e:
             print(f"  [ERROR] {url}: {e}")
             return None
@@ -150,12 +183,12 @@ class MSHScraperBase:
                 'scraped_at': datetime.now().isoformat(),
                 'request_count': self.request_count,
                 'duration_seconds': (datetime.now() - self.start_time).seconds,
-                'item_count': len(data)
+                'item_count': len(data),
+                'crawl': getattr(self, 'crawl_report', {}),
             },
             'data': data
         }
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+        write_json(filename, output)
         print(f"\n[SAVED] {len(data)} Einträge -> {filename}")
     
     def extract_coordinates_from_text(self, text: str) -> tuple:
@@ -174,6 +207,175 @@ class MSHScraperBase:
         return (None, None)
 
 
+# ═══════════════════════════════════════════════════════════════════════════════
+# ASYNC CRAWL ENGINE
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class DomainStats:
+    """Durchsatz einer Domain."""
+
+    def __init__(self):
+        self.pages = 0
+        self.errors = 0
+        self.blocked = 0
+        self.bytes = 0
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+
+    @property
+    def pages_per_second(self) -> float:
+        if not self.pages or self.first_start is None or self.last_end is None:
+            return 0.0
+        elapsed = self.last_end - self.first_start
+        return self.pages / elapsed if elapsed > 0 else float(self.pages)
+
+
+class AsyncCrawlEngine:
+    """
+    Crawlt mehrere Domains gleichzeitig, bleibt pro Domain aber höflich:
+    - robots.txt aller Domains wird vorab parallel geladen (inkl. Crawl-delay)
+    - pro Domain nur ein Request gleichzeitig, dazwischen mindestens REQUEST_DELAY
+    - eine aiohttp-Session mit Connection-Pool für alle Requests
+    """
+
+    def __init__(self, delay: float = REQUEST_DELAY, timeout: float = REQUEST_TIMEOUT,
+                 max_connections: int = MAX_CONNECTIONS):
+        self.delay = delay
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.robots: Dict[str, Optional[RobotFileParser]] = {}
+        self.domain_delay: Dict[str, float] = {}
+        self.stats: Dict[str, DomainStats] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._last_request: Dict[str, float] = {}
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=1)
+        self.session = aiohttp.ClientSession(
+            headers=HEADERS,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+
+    async def _load_robots(self, scheme: str, domain: str) -> None:
+        robots_url = f"{scheme}://{domain}/robots.txt"
+        print(f"  [ROBOTS] Prüfe: {robots_url}")
+        try:
+            async with self.session.get(robots_url) as response:
+                if response.status in (401, 403):
+                    # Wie RobotFileParser.read(): Zugriff verweigert = alles verboten
+                    rp = RobotFileParser()
+                    rp.disallow_all = True
+                elif response.status >= 400:
+                    rp = None
+                else:
+                    rp = RobotFileParser()
+                    rp.parse((await response.text(errors='replace')).splitlines())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"  [WARN] robots.txt nicht lesbar ({e}) - erlaube Zugriff")
+            rp = None
+
+        self.robots[domain] = rp
+        crawl_delay = rp.crawl_delay(USER_AGENT) if rp else None
+        self.domain_delay[domain] = max(self.delay, float(crawl_delay or 0))
+
+    async def prefetch_robots(self, urls: List[str]) -> None:
+        """Lädt robots.txt aller Domains parallel."""
+        domains = {}
+        for url in urls:
+            parsed = urlparse(url)
+            domains.setdefault(parsed.netloc, parsed.scheme)
+        await asyncio.gather(*(
+            self._load_robots(scheme, domain)
+            for domain, scheme in domains.items() if domain not in self.robots
+        ))
+
+    def is_allowed(self, url: str) -> bool:
+        rp = self.robots.get(urlparse(url).netloc)
+        return rp.can_fetch(USER_AGENT, url) if rp else True
+
+    async def fetch(self, url: str) -> Optional[str]:
+        """Holt eine Seite unter Einhaltung von robots.txt und Domain-Delay."""
+        domain = urlparse(url).netloc
+        stats = self.stats.setdefault(domain, DomainStats())
+
+        if not self.is_allowed(url):
+            stats.blocked += 1
+            print(f"  [BLOCKED] {url} - robots.txt verbietet Zugriff")
+            return None
+
+        lock = self._locks.setdefault(domain, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            last = self._last_request.get(domain)
+            if last is not None:
+                wait = last + self.domain_delay.get(domain, self.delay) - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+            start = loop.time()
+            if stats.first_start is None:
+                stats.first_start = start
+            try:
+                async with self.session.get(url) as response:
+                    response.raise_for_status()
+                    body = await response.read()
+                    html = body.decode(response.get_encoding() or 'utf-8', errors='replace')
+                stats.pages += 1
+                stats.bytes += len(body)
+                print(f"  [OK] {url}")
+                return html
+            except (aiohttp.ClientError, asyncio.TimeoutError, LookupError) as e:
+                stats.errors += 1
+                print(f"  [ERROR] {url}: {e}")
+                return None
+            finally:
+                self._last_request[domain] = stats.last_end = loop.time()
+
+    async def crawl(self, urls: List[str]) -> Dict[str, Optional[str]]:
+        """Crawlt alle URLs; Domains parallel, innerhalb einer Domain nacheinander."""
+        await self.prefetch_robots(urls)
+
+        by_domain: Dict[str, List[str]] = {}
+        for url in urls:
+            by_domain.setdefault(urlparse(url).netloc, []).append(url)
+
+        pages: Dict[str, Optional[str]] = {}
+
+        async def crawl_domain(domain_urls: List[str]):
+            for url in domain_urls:
+                pages[url] = await self.fetch(url)
+
+        await asyncio.gather(*(crawl_domain(u) for u in by_domain.values()))
+        return pages
+
+    def print_report(self) -> None:
+        print("\n" + "="*60)
+        print("CRAWL-DURCHSATZ")
+        print("="*60)
+        for domain, stats in sorted(self.stats.items()):
+            print(f"  {domain}: {stats.pages} Seiten, {stats.pages_per_second:.2f} Seiten/s, "
+                  f"{stats.bytes / 1024:.0f} KB, {stats.errors} Fehler, {stats.blocked} blockiert")
+
+    def report(self) -> Dict[str, dict]:
+        return {
+            domain: {
+                'pages': stats.pages,
+                'pages_per_second': round(stats.pages_per_second, 3),
+                'bytes': stats.bytes,
+                'errors': stats.errors,
+                'blocked': stats.blocked,
+                'delay': self.domain_delay.get(domain, self.delay),
+            }
+            for domain, stats in self.stats.items()
+        }
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # FAMILIEN-AKTIVITÄTEN SCRAPER
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -197,6 +399,40 @@ class FamilyActivityScraper(MSHScraperBase):
         'adventure': ['kletterpark', 'hochseilgarten', 'sommerrodelbahn'],
     }
     
+    # Altersangaben (erste passende Gruppe gewinnt)
+    AGE_RANGES = {
+        '0-3': ['kleinkind', 'baby', '0-3', 'unter 3'],
+        '3-6': ['kindergarten', '3-6', 'vorschul'],
+        '6-12': ['grundschul', '6-10', '6-12'],
+        '12+': ['jugend', 'teenager', '12+'],
+        'alle': ['alle alter', 'familien', 'jedes alter'],
+    }
+    
+    # Einrichtungen vor Ort
+    FACILITIES = {
+        'wc': ['wc', 'toilette', 'sanitär'],
+        'parking': ['parkplatz', 'parken', 'stellplatz'],
+        'changing_table': ['wickel', 'wickeltisch'],
+        'cafe': ['café', 'cafe', 'kiosk', 'imbiss'],
+        'barrier_free': ['barrierefrei', 'rollstuhl', 'behindertengerecht'],
+        'playground': ['spielplatz', 'spielgeräte'],
+        'picnic': ['picknick', 'grillplatz', 'rastplatz'],
+    }
+    
+    # Einzelne Merkmale
+    FLAGS = {
+        'free': ['kostenlos', 'gratis', 'eintritt frei'],
+        'barrier_free': ['barrierefrei'],
+    }
+    
+    # Alle Tabellen einmal kompiliert, ein Durchlauf pro Text
+    KEYWORDS = KeywordMatcher({
+        'category': CATEGORIES,
+        'age': AGE_RANGES,
+        'facility': FACILITIES,
+        'flag': FLAGS,
+    })
+    
     # Bekannte Quellen für MSH
     SOURCES = [
         # Tourismus-Seiten
@@ -230,48 +466,24 @@ class FamilyActivityScraper(MSHScraperBase):
     def __init__(self):
         super().__init__()
         self.results: List[FamilyActivity] = []
+        self.crawl_report: Dict[str, dict] = {}
     
     def detect_category(self, text: str) -> str:
         """Erkennt Kategorie anhand von Keywords."""
-        text_lower = text.lower()
-        for category, keywords in self.CATEGORIES.items():
-            if any(kw in text_lower for kw in keywords):
-                return category
-        return 'other'
+        return self.KEYWORDS.first('category', text, 'other')
     
     def detect_age_range(self, text: str) -> Optional[str]:
         """Versucht Altersangaben zu erkennen."""
-        text_lower = text.lower()
-        if any(w in text_lower for w in ['kleinkind', 'baby', '0-3', 'unter 3']):
-            return '0-3'
-        if any(w in text_lower for w in ['kindergarten', '3-6', 'vorschul']):
-            return '3-6'
-        if any(w in text_lower for w in ['grundschul', '6-10', '6-12']):
-            return '6-12'
-        if any(w in text_lower for w in ['jugend', 'teenager', '12+']):
-            return '12+'
-        if any(w in text_lower for w in ['alle alter', 'familien', 'jedes alter']):
-            return 'alle'
-        return None
+        return self.KEYWORDS.first('age', text)
     
     def detect_facilities(self, text: str) -> List[str]:
         """Erkennt vorhandene Einrichtungen."""
-        facilities = []
-        mappings = {
-            'wc': ['wc', 'toilette', 'sanitär'],
-            'parking': ['parkplatz', 'parken', 'stellplatz'],
-            'changing_table': ['wickel', 'wickeltisch'],
-            'cafe': ['café', 'cafe', 'kiosk', 'imbiss'],
-            'barrier_free': ['barrierefrei', 'rollstuhl', 'behindertengerecht'],
-            'playground': ['spielplatz', 'spielgeräte'],
-            'picnic': ['picknick', 'grillplatz', 'rastplatz'],
-        }
-        text_lower = text.lower()
-        for facility, keywords in mappings.items():
-            if any(kw in text_lower for kw in keywords):
-                facilities.append(facility)
-        return facilities
+        return self.KEYWORDS.labels('facility', text)
     
+    def source_urls(self, source: dict) -> List[str]:
+        """Alle Seiten-URLs einer Quelle."""
+        return [urljoin(source['base_url'], path) for path in source['paths']]
+
     def scrape_source(self, source: dict) -> List[FamilyActivity]:
         """Scrapt eine einzelne Quelle."""
         if not source.get('enabled', False):
@@ -284,94 +496,136 @@ class FamilyActivityScraper(MSHScraperBase):
         
         activities = []
         
-        for path in source['paths']:
-            url = urljoin(source['base_url'], path)
-            soup = self.fetch_page(url)
+        for url in self.source_urls(source):
+            html = self.fetch_html(url)
             
-            if not soup:
+            if not html:
                 continue
             
-            # Generische Extraktion - muss pro Quelle angepasst werden
-            # Dies ist ein Template, das verfeinert werden muss
-            
-            # Versuche typische Strukturen zu finden
-            for article in soup.find_all(['article', 'div'], class_=re.compile(r'(item|card|entry|listing)')):
-                try:
-                    # Name extrahieren
-                    title_elem = article.find(['h1', 'h2', 'h3', 'h4', 'a'])
-                    if not title_elem:
-                        continue
-                    name = title_elem.get_text(strip=True)
-                    
-                    if len(name) < 3 or len(name) > 200:
-                        continue
-                    
-                    # Beschreibung
-                    desc_elem = article.find(['p', 'div'], class_=re.compile(r'(desc|text|content|excerpt)'))
-                    description = desc_elem.get_text(strip=True) if desc_elem else None
-                    
-                    # Kategorie erkennen
-                    full_text = article.get_text()
-                    category = self.detect_category(full_text)
-                    
-                    # Link zur Detailseite
-                    link = article.find('a', href=True)
-                    detail_url = urljoin(url, link['href']) if link else url
-                    
-                    # Koordinaten versuchen zu extrahieren
-                    lat, lng = self.extract_coordinates_from_text(full_text)
-                    
-                    activity = FamilyActivity(
-                        id=self.generate_id(name, category),
-                        name=name,
-                        category=category,
-                        description=description[:500] if description else None,
-                        address=None,  # Müsste aus Detailseite extrahiert werden
-                        latitude=lat,
-                        longitude=lng,
-                        city=None,
-                        age_range=self.detect_age_range(full_text),
-                        is_free=any(w in full_text.lower() for w in ['kostenlos', 'gratis', 'eintritt frei']),
-                        is_outdoor='outdoor' in category or category in ['playground', 'nature', 'zoo'],
-                        is_indoor='indoor' in category or category in ['museum'],
-                        is_barrier_free='barrierefrei' in full_text.lower(),
-                        source_url=detail_url,
-                        scraped_at=datetime.now().isoformat(),
-                        tags=[],
-                        activity_type=category,
-                        opening_hours=None,
-                        price_info=None,
-                        contact_phone=None,
-                        contact_email=None,
-                        website=detail_url if detail_url != url else None,
-                        facilities=self.detect_facilities(full_text)
-                    )
-                    
-                    # Nur hinzufügen wenn in MSH Region (oder ohne Koordinaten)
-                    if activity.is_in_msh_region():
-                        activities.append(activity)
-                        print(f"    + {name} [{category}]")
-                    
-                except Exception as e:
-                    print(f"    [WARN] Parsing-Fehler: {e}")
+            activities.extend(self.parse_page(url, self.parse_listing(html)))
+        
+        return activities
+    
+    def parse_listing(self, html: str) -> BeautifulSoup:
+        """Baut nur die Listen-Container auf (SoupStrainer), nicht Navigation, Footer etc."""
+        return html_parsing.parse_listing(html, LISTING_TAGS, LISTING_CLASS)
+    
+    def parse_page(self, url: str, soup: BeautifulSoup) -> List[FamilyActivity]:
+        """Extrahiert Aktivitäten aus einer geladenen Seite."""
+        activities = []
+        
+        # Generische Extraktion - muss pro Quelle angepasst werden
+        # Dies ist ein Template, das verfeinert werden muss
+        
+        # Versuche typische Strukturen zu finden
+        for article in soup.find_all(LISTING_TAGS, class_=LISTING_CLASS):
+            try:
+                # Name extrahieren
+                title_elem = article.find(['h1', 'h2', 'h3', 'h4', 'a'])
+                if not title_elem:
                     continue
+                name = title_elem.get_text(strip=True)
+                
+                if len(name) < 3 or len(name) > 200:
+                    continue
+                
+                # Beschreibung
+                desc_elem = article.find(['p', 'div'], class_=re.compile(r'(desc|text|content|excerpt)'))
+                description = desc_elem.get_text(strip=True) if desc_elem else None
+                
+                # Kategorie, Alter, Einrichtungen: ein Keyword-Durchlauf
+                full_text = article.get_text()
+                hits = self.KEYWORDS.scan(full_text)
+                category = hits.first('category', 'other')
+                
+                # Link zur Detailseite
+                link = article.find('a', href=True)
+                detail_url = urljoin(url, link['href']) if link else url
+                
+                # Koordinaten versuchen zu extrahieren
+                lat, lng = self.extract_coordinates_from_text(full_text)
+                
+                activity = FamilyActivity(
+                    id=self.generate_id(name, category),
+                    name=name,
+                    category=category,
+                    description=description[:500] if description else None,
+                    address=None,  # Müsste aus Detailseite extrahiert werden
+                    latitude=lat,
+                    longitude=lng,
+                    city=None,
+                    age_range=hits.first('age'),
+                    is_free='free' in hits.labels('flag'),
+                    is_outdoor='outdoor' in category or category in ['playground', 'nature', 'zoo'],
+                    is_indoor='indoor' in category or category in ['museum'],
+                    is_barrier_free='barrier_free' in hits.labels('flag'),
+                    source_url=detail_url,
+                    scraped_at=datetime.now().isoformat(),
+                    tags=[],
+                    activity_type=category,
+                    opening_hours=None,
+                    price_info=None,
+                    contact_phone=None,
+                    contact_email=None,
+                    website=detail_url if detail_url != url else None,
+                    facilities=hits.labels('facility')
+                )
+                
+                # Nur hinzufügen wenn in MSH Region (oder ohne Koordinaten)
+                if activity.is_in_msh_region():
+                    activities.append(activity)
+                    print(f"    + {name} [{category}]")
+                
+            except Exception as e:
+                print(f"    [WARN] Parsing-Fehler: {e}")
+                continue
+        
+        return activities
+    
+    def scrape_async(self) -> List[FamilyActivity]:
+        """Lädt alle Quellen über die AsyncCrawlEngine, parst in Quellen-Reihenfolge."""
+        sources = [s for s in self.SOURCES if s.get('enabled', False)]
+        urls = [url for source in sources for url in self.source_urls(source)]
+        
+        async def crawl():
+            async with AsyncCrawlEngine() as engine:
+                pages = await engine.crawl(urls)
+            return engine, pages
+        
+        engine, pages = asyncio.run(crawl())
+        self.request_count += sum(s.pages + s.errors for s in engine.stats.values())
+        self.crawl_report = engine.report()
+        
+        activities = []
+        for source in sources:
+            print(f"\n[PARSE] {source['name']}")
+            for url in self.source_urls(source):
+                html = pages.get(url)
+                if html:
+                    activities.extend(self.parse_page(url, self.parse_listing(html)))
         
+        engine.print_report()
         return activities
     
-    def run(self, output_file: str = 'msh_family_activities.json'):
-        """Führt das Scraping aller Quellen durch."""
+    def run(self, output_file: str = 'msh_family_activities.json', use_async: bool = True):
+        """Führt das Scraping aller Quellen durch (Domains parallel, falls aiohttp installiert)."""
         print("\n" + "="*60)
         print("MSH FAMILY ACTIVITY SCRAPER")
         print("="*60)
         print(f"Quellen: {len([s for s in self.SOURCES if s.get('enabled')])}")
         print(f"User-Agent: {USER_AGENT}")
-        print(f"Rate-Limit: {REQUEST_DELAY}s")
+        print(f"Rate-Limit: {REQUEST_DELAY}s pro Domain")
         
         all_activities = []
         
-        for source in self.SOURCES:
-            activities = self.scrape_source(source)
-            all_activities.extend(activities)
+        if use_async and HAS_AIOHTTP:
+            all_activities = self.scrape_async()
+        else:
+            if use_async:
+                print("[INFO] aiohttp nicht installiert - sequentielles Crawling")
+            for source in self.SOURCES:
+                activities = self.scrape_source(source)
+                all_activities.extend(activities)
         
         # Duplikate entfernen (nach ID)
         seen_ids = set()
@@ -1033,8 +1287,7 @@ def create_seed_data(output_file: str = 'msh_seed_data.json'):
         'data': seed_data
     }
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    write_json(output_file, output)
     
     print(f"\n[SAVED] {len(seed_data)} Einträge -> {output_file}")
 
@@ -1051,6 +1304,7 @@ if __name__ == '__main__':
     parser.add_argument('--scrape', action='store_true', help='Web-Scraping durchführen')
     parser.add_argument('--all', action='store_true', help='Beides')
     parser.add_argument('--output', default='msh_data', help='Output-Prefix')
+    parser.add_argument('--sync', action='store_true', help='Sequentiell statt Async-Engine crawlen')
     
     args = parser.parse_args()
     
@@ -1059,6 +1313,6 @@ if __name__ == '__main__':
     
     if args.scrape or args.all:
         scraper = FamilyActivityScraper()
-        scraper.run(f'{args.output}_scraped.json')
+        scraper.run(f'{args.output}_scraped.json', use_async=not args.sync)
     
     print("\n[DONE] Scraping abgeschlossen!")
\ No newline at end of file
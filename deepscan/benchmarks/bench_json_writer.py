@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - Benchmark JSON-Writer
+
+Vergleicht Schreibzeit und Dateigröße der JSON-Backends (orjson, msgspec,
+stdlib) für pretty und kompakt, jeweils als write_json und als Stream
+(JsonArrayWriter), gegen das bisherige json.dump(..., indent=2).
+
+Verwendung:
+    python benchmarks/bench_json_writer.py                 # neueste msh_merged_*.json
+    python benchmarks/bench_json_writer.py --n 100000      # synthetische POIs
+    python benchmarks/bench_json_writer.py --input datei.json
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEEPSCAN_DIR = BENCH_DIR.parent
+RESULTS_DIR = DEEPSCAN_DIR / "output" / "benchmarks"
+
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(DEEPSCAN_DIR))
+
+from json_writer import JsonArrayWriter, available_backends, write_json
+from synthetic_data import DataProfile, generate_pois
+
+
+def load_input(args) -> Dict[str, Any]:
+    if args.n:
+        return {"meta": {"generated_at": datetime.now().isoformat()},
+                "data": generate_pois(args.n, DataProfile.load())}
+    path = Path(args.input) if args.input else sorted((DEEPSCAN_DIR / "output" / "merged").glob("msh_merged_*.json"))[-1]
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def time_write(write: Callable[[Path], None], path: Path, repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        write(path)
+        timings.append(time.perf_counter() - start)
+    return {"min_seconds": round(min(timings), 5),
+            "median_seconds": round(statistics.median(timings), 5),
+            "bytes": path.stat().st_size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON-Writer')
+    parser.add_argument('--input', help='JSON-Datei mit {"meta", "data"} (Standard: neueste Merge-Ausgabe)')
+    parser.add_argument('--n', type=int, help='Stattdessen n synthetische POIs')
+    parser.add_argument('--repeat', type=int, default=5, help='Wiederholungen')
+    args = parser.parse_args()
+
+    data = load_input(args)
+    items = data.get("data", [])
+    header = {k: v for k, v in data.items() if k != "data"}
+
+    def legacy(path: Path) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    cases = [("json.dump (bisher)", "pretty", legacy)]
+    for name, backend in available_backends().items():
+        for pretty in (True, False):
+            fmt = "pretty" if pretty else "compact"
+            cases.append((f"{name} write_json", fmt,
+                          lambda path, b=backend, p=pretty: write_json(path, data, p, b)))
+
+            def stream(path: Path, b=backend, p=pretty) -> None:
+                with JsonArrayWriter(path, header=header, pretty=p, backend=b) as writer:
+                    writer.extend(items)
+
+            cases.append((f"{name} stream", fmt, stream))
+
+    print(f"📦 {len(items):,} Einträge, {args.repeat} Wiederholungen\n")
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "out.json"
+        for label, fmt, write in cases:
+            result = time_write(write, path, args.repeat)
+            result.update({"case": label, "format": fmt})
+            results.append(result)
+
+    reference = results[0]["median_seconds"]
+    print(f"{'Variante':<26} {'Format':<8} {'Median':>10} {'Größe':>12} {'Speedup':>8}")
+    print("-" * 68)
+    for r in results:
+        speedup = reference / r["median_seconds"] if r["median_seconds"] else 0
+        print(f"{r['case']:<26} {r['format']:<8} {r['median_seconds']:>9.4f}s "
+              f"{r['bytes'] / 1024:>9.0f} KB {speedup:>7.1f}x")
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output_file = RESULTS_DIR / f"json_writer_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    write_json(output_file, {"created_at": datetime.now().isoformat(), "items": len(items),
+                             "repeat": args.repeat, "results": results})
+    print(f"\n💾 {output_file}")
+
+
+if __name__ == "__main__":
+    main()
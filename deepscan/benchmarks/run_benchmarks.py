@@ -0,0 +1,535 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - Benchmarks
+
+Misst die Hot Paths (Merge, Dedup, Export) auf synthetischen Daten in
+wachsender Größe. Jede Messung läuft mit frischen Eingaben (Setup zählt
+nicht mit), berichtet wird Minimum und Median über mehrere Wiederholungen.
+
+Ergebnisse landen in output/benchmarks/results_<timestamp>.json und werden
+mit der Baseline (baseline.json, sonst dem letzten Lauf) verglichen.
+
+Verwendung:
+    python benchmarks/run_benchmarks.py                      # 1k, 10k, 100k, 1M
+    python benchmarks/run_benchmarks.py --sizes 1k,10k       # nur kleine Größen
+    python benchmarks/run_benchmarks.py --only notices       # Filter nach Name
+    python benchmarks/run_benchmarks.py --save-baseline      # Ergebnis als Baseline
+    python benchmarks/run_benchmarks.py --fail-on-regression # Exit 1 bei Regression
+    python benchmarks/run_benchmarks.py --list
+
+Quadratische Pfade haben eine Größengrenze (max_n). Würde die nächste
+Größe schon bei linearer Hochrechnung das Zeitbudget überschreiten, werden
+die größeren Stufen dieses Benchmarks übersprungen. --no-limit hebt beides auf.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEEPSCAN_DIR = BENCH_DIR.parent
+PROJECT_ROOT = DEEPSCAN_DIR.parent
+RESULTS_DIR = DEEPSCAN_DIR / "output" / "benchmarks"
+BASELINE_FILE = RESULTS_DIR / "baseline.json"
+
+# Keine Telemetrie-Dateien und kein tracemalloc während der Messung
+os.environ.setdefault("DEEPSCAN_TELEMETRY", "0")
+os.environ.setdefault("DEEPSCAN_TRACEMALLOC", "0")
+
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(DEEPSCAN_DIR))
+sys.path.insert(0, str(DEEPSCAN_DIR / "scrapers"))
+sys.path.insert(0, str(DEEPSCAN_DIR / "tools"))
+sys.path.insert(0, str(PROJECT_ROOT / "addons" / "search_engine" / "deepscan"))
+
+from json_writer import write_json
+from synthetic_data import (DataProfile, generate_pois, generate_health, generate_notices,
+                            generate_trails, generate_opening_hours_osm, STREETS)
+
+REGRESSION_THRESHOLD = 1.2   # Median > 20% langsamer als Baseline
+
+
+class Benchmark:
+    """Ein Hot Path: setup(n) baut Eingaben, run(inputs) wird gemessen"""
+
+    def __init__(self, name: str, setup: Callable[[int], Any], run: Callable[[Any], Any],
+                 max_n: Optional[int] = None, description: str = ""):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.max_n = max_n
+        self.description = description
+
+
+# --- Datenquellen (pro Größe einmal erzeugt, pro Messung kopiert) ---------
+
+@lru_cache(maxsize=1)
+def _profile() -> DataProfile:
+    return DataProfile.load()
+
+
+@lru_cache(maxsize=8)
+def _dataset(kind: str, n: int) -> tuple:
+    generator = {
+        "pois": generate_pois,
+        "health": generate_health,
+        "notices": generate_notices,
+        "trails": generate_trails,
+        "opening_hours": generate_opening_hours_osm,
+    }[kind]
+    return tuple(generator(n, _profile()))
+
+
+def _copy(kind: str, n: int) -> List[Dict]:
+    # Die Hot Paths verändern ihre Eingaben (_priority, source_urls, ...)
+    return [dict(item) for item in _dataset(kind, n)]
+
+
+# --- Benchmarks ------------------------------------------------------------
+
+def _merge_exporter():
+    from merge_and_export import MergeAndExport
+    return MergeAndExport()
+
+
+def _setup_dedup_by_location(n):
+    pois = _copy("pois", n)
+    seed = [dict(p, source="seed") for p in pois[: max(1, n // 20)]]
+    return _merge_exporter(), pois, seed
+
+
+def _run_dedup_by_location(inputs):
+    exporter, pois, seed = inputs
+    return exporter.deduplicate_by_location(pois, reference=seed)
+
+
+def _setup_health_merge(n):
+    from health_merge import HealthMerger
+    entries = _copy("health", n)
+    split = n * 3 // 10
+    return HealthMerger(), entries[:split], entries[split:]
+
+
+def _run_health_merge(inputs):
+    merger, manual, osm = inputs
+    return merger.merge_entries(manual, osm)
+
+
+def _run_dedup_notices(notices):
+    from notice_dedup import deduplicate_notices
+    return deduplicate_notices(notices)
+
+
+def _setup_merge_notices(n):
+    notices = _copy("notices", n)
+    split = max(1, n // 10)
+    return notices[:split], notices[split:]
+
+
+def _run_merge_notices(inputs):
+    from notice_dedup import merge_notices
+    return merge_notices(*inputs)
+
+
+def _setup_match_and_enrich(n):
+    from opening_hours_batch import OpeningHoursBatch
+    batch = OpeningHoursBatch()
+    items = [{k: v for k, v in poi.items() if k != "openingHours"} for poi in _copy("pois", n)]
+    handle, path = tempfile.mkstemp(suffix=".json", prefix="bench_oh_")
+    os.close(handle)
+    write_json(path, {"data": items}, pretty=False)
+    return batch, _copy("opening_hours", n), path
+
+
+def _run_match_and_enrich(inputs):
+    batch, osm_data, path = inputs
+    try:
+        return batch.match_and_enrich(osm_data, path)
+    finally:
+        os.unlink(path)
+
+
+def _setup_opening_hours_index(n):
+    from opening_hours import compile_opening_hours
+    return [compile_opening_hours(poi.get("openingHours")) for poi in _dataset("pois", n)]
+
+
+def _run_opening_hours_index(hours):
+    from opening_hours import OpeningHoursIndex
+    index = OpeningHoursIndex(hours)
+    return index.open_at(datetime(2026, 6, 3, 10, 30))
+
+
+@lru_cache(maxsize=1)
+def _gazetteer():
+    from gazetteer import Gazetteer, GazetteerEntry
+    entries = [GazetteerEntry(city, "place", lat, lon) for city, (lat, lon) in _profile().cities.items()]
+    entries += [GazetteerEntry(street, "road") for street in STREETS]
+    entries += [GazetteerEntry(f"{kind} {number}", "road") for kind in "BLK" for number in range(1, 300)]
+    return Gazetteer(entries)
+
+
+def _setup_gazetteer(n):
+    return _gazetteer(), [f"{notice['title']} {notice['description']} {notice['affected_area']}"
+                          for notice in _dataset("notices", n)]
+
+
+def _run_gazetteer(inputs):
+    gazetteer, texts = inputs
+    return [gazetteer.find(text) for text in texts]
+
+
+def _setup_local_geocoder(n):
+    from local_geocoder import LocalGeocoder
+    cities = _profile().cities
+    items = [{"kind": "place", "name": city, "lat": lat, "lon": lon, "towns": [city]}
+             for city, (lat, lon) in cities.items()]
+    items += [{"kind": "address", "name": f"{street} {number}", "street": street, "housenumber": str(number),
+               "lat": lat, "lon": lon, "towns": [city]}
+              for city, (lat, lon) in cities.items() for street in STREETS for number in range(1, 40)]
+    pois = [poi for poi in _dataset("pois", n) if poi.get("latitude")]
+    items += [{"kind": "poi", "name": poi["name"], "lat": poi["latitude"], "lon": poi["longitude"],
+               "towns": [poi["city"]]} for poi in pois]
+    towns = list(cities)
+    queries = [f"{poi['name']}, {poi['city']}" for poi in pois[::2]]
+    queries += [f"{STREETS[i % len(STREETS)]} {i % 50}, {towns[i % len(towns)]}" for i in range(n // 2)]
+    return LocalGeocoder(items), queries
+
+
+def _run_local_geocoder(inputs):
+    geocoder, queries = inputs
+    return [geocoder.geocode(query) for query in queries]
+
+
+def _setup_spatial_index(n):
+    from spatial_index import KDTree
+    points = [(poi["latitude"], poi["longitude"]) for poi in _dataset("pois", n) if poi.get("latitude")]
+    return KDTree(list(_profile().cities.values())), points
+
+
+def _run_spatial_index(inputs):
+    tree, points = inputs
+    return tree.nearest_many(points)
+
+
+def _setup_coverage(n):
+    from collections import defaultdict
+    facilities = defaultdict(list)
+    for entry in _dataset("health", n):
+        if entry.get("latitude"):
+            facilities[entry["type"]].append((entry["latitude"], entry["longitude"]))
+    return dict(facilities)
+
+
+def _run_coverage(facilities):
+    from coverage_analysis import CoverageAnalyzer
+    analyzer = CoverageAnalyzer()
+    analyzer.compute(facilities)
+    return {layer: analyzer.underserved(layer) for layer in analyzer.distances}
+
+
+def _setup_enricher(n):
+    from enrichment_engine import LocationEnricher
+    return LocationEnricher(), _copy("pois", n)
+
+
+def _run_enricher(inputs):
+    enricher, pois = inputs
+    return enricher.deduplicate_locations(pois, min_score=0.70)
+
+
+def _run_trail_geometry(trails):
+    from trail_geometry import build_trail_geometry
+    return [build_trail_geometry(trail) for trail in trails]
+
+
+def _run_search_index(pois):
+    from search_index import build_search_index
+    return build_search_index(pois)
+
+
+def _setup_suspicious(n):
+    return [f"{p.get('name') or ''} {p.get('description') or ''}" for p in _dataset("pois", n)]
+
+
+def _run_suspicious(texts):
+    from fake_checker import check_suspicious_patterns
+    return [check_suspicious_patterns(text) for text in texts]
+
+
+def _setup_export(n):
+    handle, path = tempfile.mkstemp(suffix=".geojson", prefix="bench_export_")
+    os.close(handle)
+    return _merge_exporter(), _copy("pois", n), Path(path)
+
+
+def _run_export_geojson(inputs):
+    exporter, pois, path = inputs
+    try:
+        exporter.export_geojson(pois, path)
+    finally:
+        path.unlink()
+
+
+def _run_export_firestore(inputs):
+    exporter, pois, path = inputs
+    try:
+        exporter.export_firestore_format(pois, path)
+    finally:
+        path.unlink()
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("merge.deduplicate_by_location", _setup_dedup_by_location, _run_dedup_by_location,
+              max_n=10_000, description="merge_and_export: Nähe + Name-Blocking"),
+    Benchmark("health.merge_entries", _setup_health_merge, _run_health_merge,
+              max_n=10_000, description="health_merge: manuell + OSM"),
+    Benchmark("notices.deduplicate", lambda n: _copy("notices", n), _run_dedup_notices,
+              description="notice_dedup: Jaccard über Inverted Index"),
+    Benchmark("notices.merge", _setup_merge_notices, _run_merge_notices,
+              description="notice_dedup: Präfix-Merge"),
+    Benchmark("opening_hours.match_and_enrich", _setup_match_and_enrich, _run_match_and_enrich,
+              max_n=10_000, description="opening_hours_batch: POI-Matching"),
+    Benchmark("opening_hours.index_open_at", _setup_opening_hours_index, _run_opening_hours_index,
+              description="opening_hours: Bitmap-Index + open_at"),
+    Benchmark("gazetteer.find", _setup_gazetteer, _run_gazetteer,
+              description="gazetteer: Orte + Straßen in Notice-Texten (ein Durchlauf)"),
+    Benchmark("local_geocoder.geocode", _setup_local_geocoder, _run_local_geocoder,
+              description="local_geocoder: Adressen + POIs ohne Nominatim"),
+    Benchmark("spatial_index.nearest", _setup_spatial_index, _run_spatial_index,
+              description="spatial_index: nächster bekannter Ort (KD-Tree)"),
+    Benchmark("coverage.raster", _setup_coverage, _run_coverage,
+              max_n=100_000, description="coverage_analysis: 500-m-Raster, Distanz je Schicht + Polygone"),
+    Benchmark("enrichment.deduplicate_locations", _setup_enricher, _run_enricher,
+              max_n=100_000, description="enrichment_engine: Grid + Fuzzy"),
+    Benchmark("trails.build_geometry", lambda n: _copy("trails", n // 10), _run_trail_geometry,
+              max_n=100_000, description="trail_geometry: Stitching + Simplify (n/10 Trails)"),
+    Benchmark("search_index.build", lambda n: _copy("pois", n), _run_search_index,
+              description="search_index: Tokenisierung + Postings"),
+    Benchmark("fake_checker.suspicious_patterns", _setup_suspicious, _run_suspicious,
+              description="keyword_matcher: verdächtige Muster in Name + Beschreibung"),
+    Benchmark("export.geojson", _setup_export, _run_export_geojson,
+              description="merge_and_export: GeoJSON"),
+    Benchmark("export.firestore", _setup_export, _run_export_firestore,
+              description="merge_and_export: Firestore-Format"),
+]
+
+
+# --- Messung ---------------------------------------------------------------
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower().replace("_", "")
+    factor = 1
+    if value.endswith("k"):
+        factor, value = 1_000, value[:-1]
+    elif value.endswith("m"):
+        factor, value = 1_000_000, value[:-1]
+    return int(float(value) * factor)
+
+
+def measure(bench: Benchmark, n: int, repeat: int) -> Dict[str, Any]:
+    """Führt einen Benchmark `repeat`-mal mit frischen Eingaben aus"""
+    timings = []
+    for _ in range(repeat):
+        inputs = bench.setup(n)
+        # Die Hot Paths loggen ausführlich, das soll die Messung nicht stören
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            bench.run(inputs)
+            timings.append(time.perf_counter() - start)
+
+    best = min(timings)
+    return {
+        "benchmark": bench.name,
+        "n": n,
+        "status": "ok",
+        "repeat": repeat,
+        "min_seconds": round(best, 6),
+        "median_seconds": round(statistics.median(timings), 6),
+        "items_per_second": round(n / best, 1) if best > 0 else None,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True, timeout=10)
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_all(benchmarks: List[Benchmark], sizes: List[int], repeat: int,
+            max_seconds: float, no_limit: bool) -> List[Dict[str, Any]]:
+    results = []
+    for bench in benchmarks:
+        over_budget = False
+        for index, n in enumerate(sizes):
+            key = f"{bench.name}@{n}"
+            if not no_limit and bench.max_n and n > bench.max_n:
+                results.append({"benchmark": bench.name, "n": n, "status": "skipped",
+                                "reason": f"n > max_n ({bench.max_n})"})
+                print(f"   [SKIP] {key}: n > {bench.max_n}")
+                continue
+            if over_budget:
+                results.append({"benchmark": bench.name, "n": n, "status": "skipped",
+                                "reason": f"Hochrechnung > {max_seconds}s"})
+                print(f"   [SKIP] {key}: Zeitbudget")
+                continue
+
+            # Große Eingaben nur einmal messen
+            runs = repeat if n < 100_000 else 1
+            try:
+                result = measure(bench, n, runs)
+            except ImportError as e:
+                results.append({"benchmark": bench.name, "n": n, "status": "unavailable", "reason": str(e)})
+                print(f"   [SKIP] {bench.name}: {e}")
+                break
+
+            results.append(result)
+            print(f"   {key:<45} {result['median_seconds']:>10.4f}s  "
+                  f"({result['items_per_second']:,.0f}/s)")
+            # Lineare Hochrechnung ist optimistisch, quadratische Pfade werden noch langsamer
+            if index + 1 < len(sizes) and not no_limit:
+                projected = result["median_seconds"] * sizes[index + 1] / n
+                over_budget = projected > max_seconds
+    return results
+
+
+# --- Ergebnis-Ablage und Vergleich -----------------------------------------
+
+def load_reference(current_file: Path) -> Optional[Dict[str, Any]]:
+    """Baseline, sonst der letzte Lauf vor diesem"""
+    candidates = [BASELINE_FILE] if BASELINE_FILE.exists() else []
+    candidates += sorted((p for p in RESULTS_DIR.glob("results_*.json") if p != current_file), reverse=True)
+    for path in candidates:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            data["_file"] = path.name
+            return data
+        except (OSError, json.JSONDecodeError):
+            continue
+    return None
+
+
+def compare(results: List[Dict], reference: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Verhältnis Median aktuell / Referenz pro Benchmark und Größe"""
+    previous = {
+        (r["benchmark"], r["n"]): r for r in reference.get("results", []) if r.get("status") == "ok"
+    }
+    rows = []
+    for result in results:
+        if result.get("status") != "ok":
+            continue
+        before = previous.get((result["benchmark"], result["n"]))
+        if not before or not before.get("median_seconds"):
+            continue
+        ratio = result["median_seconds"] / before["median_seconds"]
+        rows.append({
+            "benchmark": result["benchmark"],
+            "n": result["n"],
+            "baseline_seconds": before["median_seconds"],
+            "current_seconds": result["median_seconds"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > threshold,
+        })
+    return rows
+
+
+def print_comparison(rows: List[Dict[str, Any]], reference_name: str) -> None:
+    print(f"\n📊 Vergleich mit {reference_name}")
+    print("-" * 80)
+    for row in rows:
+        flag = "❌ REGRESSION" if row["regression"] else ("✅ schneller" if row["ratio"] < 0.9 else "")
+        print(f"   {row['benchmark'] + '@' + str(row['n']):<45} "
+              f"{row['baseline_seconds']:>9.4f}s → {row['current_seconds']:>9.4f}s  "
+              f"x{row['ratio']:<6} {flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MSH DeepScan Benchmarks')
+    parser.add_argument('--sizes', default='1k,10k,100k,1M',
+                        help='Datensatzgrößen, z.B. 1k,10k (Standard: 1k,10k,100k,1M)')
+    parser.add_argument('--only', help='Nur Benchmarks, deren Name diesen Text enthält')
+    parser.add_argument('--repeat', type=int, default=3, help='Wiederholungen (< 100k)')
+    parser.add_argument('--max-seconds', type=float, default=60.0,
+                        help='Zeitbudget pro Messung, danach größere Stufen überspringen')
+    parser.add_argument('--no-limit', action='store_true', help='max_n und Zeitbudget ignorieren')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Regressionsschwelle als Faktor (Standard: 1.2)')
+    parser.add_argument('--save-baseline', action='store_true', help='Ergebnis als baseline.json speichern')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit-Code 1 bei Regression')
+    parser.add_argument('--list', action='store_true', help='Benchmarks anzeigen')
+    args = parser.parse_args()
+
+    benchmarks = [b for b in BENCHMARKS if not args.only or args.only in b.name]
+    if args.list:
+        for bench in benchmarks:
+            limit = f"max {bench.max_n:,}" if bench.max_n else "unbegrenzt"
+            print(f"{bench.name:<35} {limit:<14} {bench.description}")
+        return 0
+
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+    profile = _profile()
+
+    print("=" * 80)
+    print("MSH DeepScan Benchmarks")
+    print("=" * 80)
+    print(f"Profil: {profile.summary()}")
+    print(f"Größen: {', '.join(f'{n:,}' for n in sizes)}\n")
+
+    results = run_all(benchmarks, sizes, args.repeat, args.max_seconds, args.no_limit)
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    output_file = RESULTS_DIR / f"results_{timestamp}.json"
+    report = {
+        "created_at": datetime.now().isoformat(),
+        "git_commit": _git_commit(),
+        "machine": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "profile": profile.summary(),
+        "sizes": sizes,
+        "results": results,
+    }
+
+    reference = load_reference(output_file)
+    rows = []
+    if reference:
+        rows = compare(results, reference, args.threshold)
+        report["compared_to"] = reference["_file"]
+        report["comparison"] = rows
+        print_comparison(rows, reference["_file"])
+
+    write_json(output_file, report)
+    print(f"\n💾 {output_file}")
+
+    if args.save_baseline:
+        write_json(BASELINE_FILE, report)
+        print(f"💾 Baseline: {BASELINE_FILE}")
+
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"\n❌ {len(regressions)} Regression(en) über x{args.threshold}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
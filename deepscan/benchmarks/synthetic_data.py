@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - Synthetische Benchmark-Daten
+
+Erzeugt realistische POI-, Health-, Notice- und Trail-Datensätze in
+beliebiger Größe (1k bis 1M). Kategorien, Städte, Namen und Koordinaten
+werden aus den echten MSH-Daten abgeleitet (Verteilung statt Kopie),
+ein fester Seed macht die Daten reproduzierbar.
+
+Damit die Deduplizierung echte Arbeit hat, wird ein Anteil Duplikate
+eingestreut: leicht verschobene Koordinaten, Namensvarianten und
+Einträge ohne Koordinaten.
+
+Verwendung:
+    from synthetic_data import DataProfile, generate_pois
+    profile = DataProfile.load()
+    pois = generate_pois(10_000, profile, seed=42)
+"""
+
+import json
+import math
+import random
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Any, Tuple
+
+DEEPSCAN_DIR = Path(__file__).resolve().parent.parent
+PROJECT_ROOT = DEEPSCAN_DIR.parent
+
+MERGED_DIR = DEEPSCAN_DIR / "output" / "merged"
+HEALTH_DIR = PROJECT_ROOT / "assets" / "data" / "health"
+NOTICES_FILE = PROJECT_ROOT / "data" / "notices" / "notices_current.json"
+
+# MSH Bounding Box (wie merge_and_export.py)
+BBOX = {"south": 51.25, "west": 10.80, "north": 51.70, "east": 11.80}
+
+# Fallback, falls keine echten Daten vorliegen
+DEFAULT_CATEGORIES = {"restaurant": 309, "castle": 138, "baeckerei": 127, "imbiss": 121,
+                      "viewpoint": 104, "culture": 93, "cafe": 81, "sport": 76, "museum": 68}
+DEFAULT_CITIES = {"Sangerhausen": (51.472, 11.297), "Lutherstadt Eisleben": (51.527, 11.546),
+                  "Hettstedt": (51.650, 11.511), "Mansfeld": (51.593, 11.453),
+                  "Südharz": (51.520, 11.050), "Allstedt": (51.403, 11.385)}
+DEFAULT_NAMES = ["Gasthof Zur Linde", "Bäckerei Müller", "Burgruine Grillenburg",
+                 "Café am Markt", "Museum im Schloss", "Aussichtspunkt Kyffhäuser"]
+
+HEALTH_TYPES = {"doctor": 115, "pharmacy": 40, "physiotherapy": 30, "care_service": 20,
+                "fitness": 15, "hospital": 5}
+SPECIALIZATIONS = ["allgemein", "zahn", "kinder", "augen", "hno", "frauen",
+                   "orthopaedie", "haut", "innere", "neurologie"]
+FIRST_NAMES = ["Anna", "Peter", "Ada", "Klaus", "Maria", "Thomas", "Sabine", "Jürgen",
+               "Kerstin", "Frank", "Heike", "Uwe", "Petra", "Andreas", "Claudia"]
+LAST_NAMES = ["Müller", "Schmidt", "Volkmann", "Schulze", "Fischer", "Weber", "Becker",
+              "Hoffmann", "Krüger", "Lehmann", "Wolf", "Neumann", "Schwarz", "Zimmermann"]
+STREETS = ["Kylische Straße", "Göpenstraße", "Markt", "Bahnhofstraße", "Hallesche Straße",
+           "Sangerhäuser Straße", "Lindenstraße", "Am Rosarium", "Hauptstraße", "Schloßplatz",
+           "Karl-Liebknecht-Straße", "Riestedter Straße", "Mühlweg", "Freiesleben-Straße"]
+
+NOTICE_TYPES = {"sperrung": 6, "baustelle": 5, "umleitung": 3, "veranstaltung": 2, "warnung": 1}
+NOTICE_REASONS = ["Vollsperrung", "Abrissarbeiten", "Kanalbauarbeiten", "Fahrbahnsanierung",
+                  "halbseitige Sperrung", "Umleitung", "Brückenprüfung", "Baumfällarbeiten",
+                  "Leitungsbau", "Straßenfest"]
+NOTICE_SOURCES = ["https://www.mansfeldsuedharz.de", "https://www.eisleben.eu",
+                  "https://www.sangerhausen.de", "https://www.hettstedt.de"]
+
+OPENING_HOURS = ["Mo-Fr 08:00-18:00", "Mo-Fr 08:30-18:30; Sa 08:30-14:00",
+                 "Mo-Sa 06:00-18:00; Su 07:00-11:00", "Tu-Su 11:00-22:00", "24/7",
+                 "Mo,Tu,Th 08:00-12:00,14:00-18:00; We,Fr 08:00-12:00"]
+
+
+def _load_json(path: Path) -> Any:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _records(data: Any, key: str = "data") -> List[Dict]:
+    if isinstance(data, dict):
+        data = data.get(key) or data.get("locations") or []
+    return [item for item in data or [] if isinstance(item, dict)]
+
+
+class DataProfile:
+    """Verteilungen aus den echten Daten (Kategorien, Städte, Namen)"""
+
+    def __init__(self, categories: Dict[str, int], cities: Dict[str, Tuple[float, float]],
+                 city_weights: Dict[str, int], names_by_category: Dict[str, List[str]],
+                 coordinates: List[Tuple[float, float]], source: str):
+        self.categories = categories
+        self.cities = cities
+        self.city_weights = city_weights
+        self.names_by_category = names_by_category
+        self.coordinates = coordinates
+        self.source = source
+
+    @classmethod
+    def load(cls, merged_file: Path = None) -> "DataProfile":
+        """Liest die neueste msh_merged_*.json (sonst Fallback-Werte)"""
+        if merged_file is None:
+            files = sorted(MERGED_DIR.glob("msh_merged_*.json"))
+            merged_file = files[-1] if files else None
+
+        locations = _records(_load_json(merged_file)) if merged_file else []
+        if not locations:
+            return cls.default()
+
+        categories = Counter(loc.get("category") for loc in locations if loc.get("category"))
+        names = defaultdict(list)
+        city_points = defaultdict(list)
+        coordinates = []
+        for loc in locations:
+            if loc.get("name"):
+                names[loc.get("category")].append(loc["name"])
+            lat, lon = loc.get("latitude"), loc.get("longitude")
+            if lat and lon:
+                coordinates.append((lat, lon))
+                if loc.get("city"):
+                    city_points[loc["city"]].append((lat, lon))
+
+        # Stadtzentrum = Mittelwert der Orte der Stadt
+        cities = {
+            city: (sum(p[0] for p in pts) / len(pts), sum(p[1] for p in pts) / len(pts))
+            for city, pts in city_points.items()
+        }
+        weights = {city: len(pts) for city, pts in city_points.items()}
+
+        return cls(dict(categories), cities or DEFAULT_CITIES, weights or {c: 1 for c in DEFAULT_CITIES},
+                   dict(names), coordinates, str(merged_file.name))
+
+    @classmethod
+    def default(cls) -> "DataProfile":
+        return cls(DEFAULT_CATEGORIES, DEFAULT_CITIES, {c: 1 for c in DEFAULT_CITIES},
+                   {cat: DEFAULT_NAMES for cat in DEFAULT_CATEGORIES},
+                   list(DEFAULT_CITIES.values()), "default")
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "categories": len(self.categories),
+            "cities": len(self.cities),
+            "names": sum(len(v) for v in self.names_by_category.values()),
+        }
+
+
+class _Sampler:
+    """Gewichtetes Ziehen mit vorberechneten Kumulativ-Gewichten"""
+
+    def __init__(self, rng: random.Random, weights: Dict[Any, float]):
+        self.rng = rng
+        self.values = list(weights)
+        total = 0.0
+        self.cum = []
+        for value in self.values:
+            total += weights[value]
+            self.cum.append(total)
+
+    def __call__(self):
+        return self.rng.choices(self.values, cum_weights=self.cum, k=1)[0]
+
+
+def _jitter(rng: random.Random, lat: float, lon: float, meters: float) -> Tuple[float, float]:
+    """Verschiebt einen Punkt um bis zu `meters`"""
+    dlat = rng.uniform(-meters, meters) / 111320
+    dlon = rng.uniform(-meters, meters) / (111320 * math.cos(math.radians(lat)))
+    return round(lat + dlat, 7), round(lon + dlon, 7)
+
+
+def _point_near(rng: random.Random, center: Tuple[float, float], spread_m: float) -> Tuple[float, float]:
+    lat, lon = center
+    lat += rng.gauss(0, spread_m) / 111320
+    lon += rng.gauss(0, spread_m) / (111320 * math.cos(math.radians(center[0])))
+    lat = min(max(lat, BBOX["south"]), BBOX["north"])
+    lon = min(max(lon, BBOX["west"]), BBOX["east"])
+    return round(lat, 7), round(lon, 7)
+
+
+def _name_variant(rng: random.Random, name: str) -> str:
+    """Schreibvariante wie zwischen OSM und Seed üblich"""
+    variant = rng.randrange(4)
+    if variant == 0:
+        return name.lower()
+    if variant == 1:
+        return name.replace("ß", "ss").replace("ä", "ae").replace("ö", "oe").replace("ü", "ue")
+    if variant == 2:
+        return f"{name} "
+    return name.replace("-", " ")
+
+
+def _compose_name(rng: random.Random, pool: List[str], index: int) -> str:
+    """Neuer Name aus Kopf und Rest zweier echter Namen"""
+    first = rng.choice(pool).split()
+    second = rng.choice(pool).split()
+    head = first[0] if first else "Ort"
+    tail = " ".join(second[1:]) if len(second) > 1 else (second[0] if second else "")
+    # Seltener Zusatz hält die Namensblöcke realistisch klein
+    suffix = f" {index % 997}" if rng.random() < 0.3 else ""
+    return f"{head} {tail}{suffix}".strip()
+
+
+def generate_pois(n: int, profile: DataProfile = None, seed: int = 42,
+                  duplicate_rate: float = 0.15, missing_coords_rate: float = 0.02,
+                  source: str = "osm") -> List[Dict[str, Any]]:
+    """POIs im Format der Merge-Ausgabe (id, name, category, latitude, longitude, city)"""
+    profile = profile or DataProfile.load()
+    rng = random.Random(seed)
+    category = _Sampler(rng, profile.categories)
+    city = _Sampler(rng, profile.city_weights)
+    fallback_names = [n for names in profile.names_by_category.values() for n in names] or DEFAULT_NAMES
+
+    pois = []
+    for i in range(n):
+        if pois and rng.random() < duplicate_rate:
+            original = rng.choice(pois)
+            poi = dict(original)
+            poi["id"] = f"{source}_{i}"
+            poi["name"] = _name_variant(rng, original["name"])
+            if original.get("latitude"):
+                poi["latitude"], poi["longitude"] = _jitter(rng, original["latitude"], original["longitude"], 30)
+            pois.append(poi)
+            continue
+
+        cat = category()
+        town = city()
+        lat, lon = _point_near(rng, profile.cities[town], 2500)
+        poi = {
+            "id": f"{source}_{i}",
+            "name": _compose_name(rng, profile.names_by_category.get(cat) or fallback_names, i),
+            "category": cat,
+            "latitude": lat,
+            "longitude": lon,
+            "city": town,
+            "source": source,
+        }
+        if rng.random() < missing_coords_rate:
+            poi["latitude"] = poi["longitude"] = None
+        pois.append(poi)
+
+    return pois
+
+
+def generate_health(n: int, profile: DataProfile = None, seed: int = 42,
+                    duplicate_rate: float = 0.2, missing_coords_rate: float = 0.03) -> List[Dict[str, Any]]:
+    """Health-Einträge im Format von assets/data/health/*.json"""
+    profile = profile or DataProfile.load()
+    rng = random.Random(seed)
+    kind = _Sampler(rng, HEALTH_TYPES)
+    city = _Sampler(rng, profile.city_weights)
+
+    entries = []
+    for i in range(n):
+        if entries and rng.random() < duplicate_rate:
+            original = rng.choice(entries)
+            entry = dict(original)
+            entry["id"] = f"health_{i}"
+            entry["name"] = _name_variant(rng, original["name"])
+            entry["source"] = "openstreetmap"
+            if original.get("latitude"):
+                entry["latitude"], entry["longitude"] = _jitter(rng, original["latitude"], original["longitude"], 40)
+            entries.append(entry)
+            continue
+
+        entry_type = kind()
+        town = city()
+        lat, lon = _point_near(rng, profile.cities[town], 1500)
+        person = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        name = {
+            "doctor": f"Dr. med. {person}",
+            "pharmacy": f"{rng.choice(['Löwen', 'Rosen', 'Markt', 'Stadt', 'Linden'])}-Apotheke {town}",
+            "physiotherapy": f"Physiotherapie {person}",
+            "care_service": f"Pflegedienst {rng.choice(LAST_NAMES)}",
+            "fitness": f"Fitnessstudio {rng.choice(LAST_NAMES)}",
+            "hospital": f"Klinikum {town}",
+        }[entry_type]
+
+        entry = {
+            "id": f"health_{i}",
+            "type": entry_type,
+            "name": name,
+            "latitude": lat,
+            "longitude": lon,
+            "street": f"{rng.choice(STREETS)} {rng.randint(1, 120)}",
+            "postalCode": f"06{rng.randint(500, 599)}",
+            "city": town,
+            "openingHours": rng.choice(OPENING_HOURS),
+            "source": "manual",
+        }
+        if entry_type == "doctor":
+            entry["specialization"] = rng.choice(SPECIALIZATIONS)
+        if rng.random() < missing_coords_rate:
+            entry["latitude"] = entry["longitude"] = None
+        entries.append(entry)
+
+    return entries
+
+
+def generate_notices(n: int, profile: DataProfile = None, seed: int = 42,
+                     duplicate_rate: float = 0.25) -> List[Dict[str, Any]]:
+    """Notices wie notice_scraper sie liefert (Titel mit Straße + Grund)"""
+    profile = profile or DataProfile.load()
+    rng = random.Random(seed)
+    kind = _Sampler(rng, NOTICE_TYPES)
+    city = _Sampler(rng, profile.city_weights)
+
+    notices = []
+    for i in range(n):
+        if notices and rng.random() < duplicate_rate:
+            original = rng.choice(notices)
+            notice = dict(original)
+            notice["id"] = f"notice_{i}"
+            notice["source_url"] = rng.choice(NOTICE_SOURCES)
+            # Gleicher Titel, teils umformatiert (Jaccard bleibt hoch)
+            notice["title"] = original["title"].upper() if rng.random() < 0.5 else f"{original['title']}  "
+            notices.append(notice)
+            continue
+
+        town = city()
+        street = rng.choice(STREETS)
+        lat, lon = _point_near(rng, profile.cities[town], 1500)
+        notices.append({
+            "id": f"notice_{i}",
+            "type": kind(),
+            "title": f"{town} {street} {rng.choice(NOTICE_REASONS)} {i}",
+            "description": f"{rng.choice(NOTICE_REASONS)} im Bereich {street}",
+            "affected_area": f"{town}, {street}",
+            "valid_from": f"2026-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "severity": rng.choice(["info", "warning", "critical"]),
+            "source_url": rng.choice(NOTICE_SOURCES),
+            "latitude": lat,
+            "longitude": lon,
+        })
+
+    return notices
+
+
+def generate_trails(n: int, profile: DataProfile = None, seed: int = 42,
+                    points_per_trail: int = 400, ways_per_trail: int = 8) -> List[Dict[str, Any]]:
+    """Overpass-Relationen (out geom) mit zerstückelten, teils umgedrehten Ways"""
+    profile = profile or DataProfile.load()
+    rng = random.Random(seed)
+    city = _Sampler(rng, profile.city_weights)
+
+    trails = []
+    for i in range(n):
+        lat, lon = _point_near(rng, profile.cities[city()], 5000)
+        heading = rng.uniform(0, 2 * math.pi)
+        points = []
+        for _ in range(points_per_trail):
+            heading += rng.gauss(0, 0.3)
+            lat += math.cos(heading) * 25 / 111320
+            lon += math.sin(heading) * 25 / (111320 * math.cos(math.radians(lat)))
+            points.append({"lat": round(lat, 7), "lon": round(lon, 7)})
+
+        size = max(2, points_per_trail // ways_per_trail)
+        members = []
+        for start in range(0, len(points) - 1, size):
+            geometry = points[start:start + size + 1]
+            if rng.random() < 0.3:
+                geometry = geometry[::-1]
+            members.append({"type": "way", "ref": i * 1000 + start, "role": "", "geometry": geometry})
+        rng.shuffle(members)
+
+        trails.append({
+            "type": "relation",
+            "id": 100000 + i,
+            "tags": {"route": "hiking", "name": f"Wanderweg {i}", "network": "lwn"},
+            "members": members,
+        })
+
+    return trails
+
+
+def generate_opening_hours_osm(n: int, profile: DataProfile = None, seed: int = 42) -> List[Dict[str, Any]]:
+    """OSM-Punkte mit opening_hours (Format von OpeningHoursBatch.fetch_all_opening_hours)"""
+    profile = profile or DataProfile.load()
+    rng = random.Random(seed)
+    pois = generate_pois(n, profile, seed=seed, duplicate_rate=0.0, missing_coords_rate=0.0)
+    return [
+        {
+            "name": poi["name"],
+            "lat": poi["latitude"],
+            "lon": poi["longitude"],
+            "opening_hours": rng.choice(OPENING_HOURS),
+            "amenity": poi["category"],
+            "shop": "",
+            "healthcare": "",
+        }
+        for poi in pois
+    ]
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - Versorgungs-Raster
+
+Rastert die MSH-Region (Standard 500 m) und berechnet für jede Zelle die
+Distanz zur nächsten Apotheke, zum nächsten Arzt (gesamt und je
+Fachrichtung), Krankenhaus und AED. Je Schicht ein KD-Tree
+(spatial_index.py), alle Zellmittelpunkte in einer Abfrage.
+
+Ausgabe nach assets/data/health/coverage/ (noch nicht in pubspec.yaml
+registriert; erst mit Geocoder-Daten einchecken, sonst gilt alles als bewohnt):
+- coverage_grid.json: Heatmap-Schichten, Distanz je Zelle in 100-m-Schritten
+  (zeilenweise von Süd nach Nord, je Zeile von West nach Ost)
+- underserved.geojson: zusammenhängende Gebiete über dem Schwellwert der
+  Schicht als Polygone (mit Löchern), nur bewohnte Zellen
+
+Bewohnt heißt: höchstens SETTLEMENT_KM von einem Ort des lokalen Geocoders
+entfernt (scrapers/geocoder_scraper.py). Ohne Geocoder-Daten zählen alle Zellen.
+
+Verwendung:
+    python coverage_analysis.py                 # Raster + Export
+    python coverage_analysis.py --cell 250      # feineres Raster
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from telemetry import get_telemetry
+from json_writer import write_json
+from spatial_index import KDTree, KM_PER_DEG_LAT, KM_PER_DEG_LON
+
+# Lokaler Geocoder (Orte) aus scrapers/
+sys.path.insert(0, str(Path(__file__).parent / "scrapers"))
+from local_geocoder import get_local_geocoder
+
+PROJECT_ROOT = Path(__file__).parent.parent
+HEALTH_DIR = PROJECT_ROOT / "assets" / "data" / "health"
+OUTPUT_DIR = HEALTH_DIR / "coverage"
+
+# AED-Scraper schreibt nach lib/assets, die ältere Kopie liegt unter assets/
+AED_FILES = [PROJECT_ROOT / "lib" / "assets" / "data" / "health" / "aeds.json",
+             HEALTH_DIR / "aeds.json"]
+
+# Wie MSH_BOUNDS im Notice-Scraper
+BBOX = {
+    "south": 51.35,
+    "west": 10.90,
+    "north": 51.80,
+    "east": 11.85
+}
+
+CELL_M = 500
+
+LAYER_FILES = {
+    "pharmacy": "pharmacies.json",
+    "doctor": "doctors.json",
+    "hospital": "hospitals.json",
+}
+
+LAYER_LABELS = {
+    "pharmacy": "Apotheke",
+    "doctor": "Arzt",
+    "hospital": "Krankenhaus",
+    "aed": "AED",
+}
+
+# Ab dieser Distanz gilt eine bewohnte Zelle als unterversorgt (km)
+UNDERSERVED_KM = {
+    "pharmacy": 10.0,
+    "doctor": 10.0,
+    "doctor:allgemein": 10.0,
+    "hospital": 30.0,
+    "aed": 3.0,
+}
+SPECIALIST_KM = 25.0
+
+SETTLEMENT_KM = 2.0
+
+# Distanzen im Export in 100-m-Schritten (ganze Zahlen statt Floats)
+DISTANCE_STEP_KM = 0.1
+
+
+class Grid(NamedTuple):
+    south: float
+    west: float
+    lat_step: float
+    lon_step: float
+    rows: int
+    cols: int
+
+    @classmethod
+    def for_bbox(cls, bbox: Dict[str, float], cell_m: float) -> "Grid":
+        mid_lat = (bbox["south"] + bbox["north"]) / 2
+        lat_step = cell_m / 1000 / KM_PER_DEG_LAT
+        lon_step = cell_m / 1000 / (KM_PER_DEG_LON * math.cos(math.radians(mid_lat)))
+        rows = math.ceil((bbox["north"] - bbox["south"]) / lat_step)
+        cols = math.ceil((bbox["east"] - bbox["west"]) / lon_step)
+        return cls(bbox["south"], bbox["west"], lat_step, lon_step, rows, cols)
+
+    def centers(self) -> List[Tuple[float, float]]:
+        """Zellmittelpunkte, zeilenweise von Süd nach Nord"""
+        return [(self.south + (r + 0.5) * self.lat_step, self.west + (c + 0.5) * self.lon_step)
+                for r in range(self.rows) for c in range(self.cols)]
+
+    def vertex(self, r: int, c: int) -> List[float]:
+        """Zellecke als GeoJSON-Position [lon, lat]"""
+        return [round(self.west + c * self.lon_step, 5), round(self.south + r * self.lat_step, 5)]
+
+
+def _load_entries(path: Path) -> List[Dict[str, Any]]:
+    if not path.exists():
+        return []
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data if isinstance(data, list) else data.get("data", [])
+
+
+def _points(entries: List[Dict[str, Any]]) -> List[Tuple[float, float]]:
+    return [(e["latitude"], e["longitude"]) for e in entries
+            if e.get("latitude") is not None and e.get("longitude") is not None]
+
+
+def load_facilities(health_dir: Path = HEALTH_DIR) -> Dict[str, List[Tuple[float, float]]]:
+    """Koordinaten je Schicht; Ärzte zusätzlich je Fachrichtung ("doctor:zahn")"""
+    layers = {}
+    for layer, filename in LAYER_FILES.items():
+        entries = _load_entries(health_dir / filename)
+        layers[layer] = _points(entries)
+        if layer == "doctor":
+            by_spec = defaultdict(list)
+            for entry in entries:
+                if entry.get("specialization"):
+                    by_spec[entry["specialization"]].append(entry)
+            for spec, group in sorted(by_spec.items()):
+                layers[f"doctor:{spec}"] = _points(group)
+
+    aed_file = next((path for path in AED_FILES if path.exists()), None)
+    layers["aed"] = _points(_load_entries(aed_file)) if aed_file else []
+    return {layer: points for layer, points in layers.items() if points}
+
+
+def threshold_km(layer: str) -> float:
+    return UNDERSERVED_KM.get(layer, SPECIALIST_KM)
+
+
+def label(layer: str) -> str:
+    base, _, spec = layer.partition(":")
+    return f"{LAYER_LABELS.get(base, base)} ({spec})" if spec else LAYER_LABELS.get(base, base)
+
+
+# ═══════════════════════════════════════════════════════════════
+# Polygone aus Zellmengen
+# ═══════════════════════════════════════════════════════════════
+
+def _components(cells: set) -> List[set]:
+    """Zusammenhängende Zellgruppen (4er-Nachbarschaft)"""
+    remaining = set(cells)
+    components = []
+    while remaining:
+        stack = [remaining.pop()]
+        component = set(stack)
+        while stack:
+            r, c = stack.pop()
+            for neighbour in ((r + 1, c), (r - 1, c), (r, c + 1), (r, c - 1)):
+                if neighbour in remaining:
+                    remaining.remove(neighbour)
+                    component.add(neighbour)
+                    stack.append(neighbour)
+        components.append(component)
+    return components
+
+
+def _rings(cells: set) -> List[List[Tuple[int, int]]]:
+    """Randlinien einer Zellgruppe als Ringe von Zellecken (außen CCW, Löcher CW)"""
+    edges = defaultdict(list)
+    for r, c in cells:
+        if (r - 1, c) not in cells:
+            edges[(r, c)].append((r, c + 1))
+        if (r, c + 1) not in cells:
+            edges[(r, c + 1)].append((r + 1, c + 1))
+        if (r + 1, c) not in cells:
+            edges[(r + 1, c + 1)].append((r + 1, c))
+        if (r, c - 1) not in cells:
+            edges[(r + 1, c)].append((r, c))
+
+    rings = []
+    while edges:
+        start = next(iter(edges))
+        ring = [start]
+        vertex, direction = start, None
+        while True:
+            targets = edges[vertex]
+            if direction is None:
+                target = targets[0]
+            else:
+                # An Ecken, die sich nur diagonal berühren: links vor geradeaus vor rechts
+                dr, dc = direction
+                for turn in ((dc, -dr), (dr, dc), (-dc, dr)):
+                    target = (vertex[0] + turn[0], vertex[1] + turn[1])
+                    if target in targets:
+                        break
+                else:
+                    target = targets[0]
+            targets.remove(target)
+            if not targets:
+                del edges[vertex]
+            direction = (target[0] - vertex[0], target[1] - vertex[1])
+            vertex = target
+            if vertex == start:
+                break
+            ring.append(vertex)
+        rings.append(_drop_collinear(ring))
+    return rings
+
+
+def _drop_collinear(ring: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    kept = []
+    for i, (r, c) in enumerate(ring):
+        pr, pc = ring[i - 1]
+        nr, nc = ring[(i + 1) % len(ring)]
+        if (r - pr) * (nc - c) != (c - pc) * (nr - r):
+            kept.append((r, c))
+    return kept
+
+
+def _signed_area(ring: List[Tuple[int, int]]) -> float:
+    """> 0 für CCW (x = Spalte, y = Zeile)"""
+    return sum(ring[i - 1][1] * r - c * ring[i - 1][0] for i, (r, c) in enumerate(ring)) / 2
+
+
+def _contains(ring: List[Tuple[int, int]], point: Tuple[float, float]) -> bool:
+    y, x = point
+    inside = False
+    for i, (r, c) in enumerate(ring):
+        pr, pc = ring[i - 1]
+        if (r > y) != (pr > y) and x < pc + (y - pr) * (c - pc) / (r - pr):
+            inside = not inside
+    return inside
+
+
+def cells_to_polygons(cells: set) -> List[Tuple[List[List[Tuple[int, int]]], List[Tuple[int, int]]]]:
+    """(Polygon aus äußerem Ring + Löchern in Zellecken-Koordinaten, Zellen) je Gebiet"""
+    polygons = []
+    for component in _components(cells):
+        rings = _rings(component)
+        # Kleinster Ring zuerst: berührt sich ein Gebiet nur diagonal, entstehen mehrere äußere Ringe
+        outers = sorted((ring for ring in rings if _signed_area(ring) > 0), key=_signed_area)
+        holes = [ring for ring in rings if _signed_area(ring) < 0]
+        shapes = [([outer], []) for outer in outers]
+        for hole in holes:
+            # Punkt knapp rechts der ersten Kante liegt im Loch (Ring läuft im Uhrzeigersinn)
+            (r0, c0), (r1, c1) = hole[0], hole[1]
+            dr, dc = (r1 > r0) - (r1 < r0), (c1 > c0) - (c1 < c0)
+            probe = ((r0 + r1) / 2 - 0.25 * dc, (c0 + c1) / 2 + 0.25 * dr)
+            for rings_, _ in shapes:
+                if _contains(rings_[0], probe):
+                    rings_.append(hole)
+                    break
+        if len(shapes) == 1:
+            shapes[0][1].extend(component)
+        else:
+            for r, c in component:
+                for rings_, members in shapes:
+                    if _contains(rings_[0], (r + 0.5, c + 0.5)):
+                        members.append((r, c))
+                        break
+        polygons.extend(shapes)
+    return polygons
+
+
+# ═══════════════════════════════════════════════════════════════
+# Analyse
+# ═══════════════════════════════════════════════════════════════
+
+class CoverageAnalyzer:
+    """Distanz-Raster je Versorgungsart und unterversorgte Gebiete"""
+
+    def __init__(self, bbox: Dict[str, float] = None, cell_m: float = CELL_M):
+        self.bbox = bbox or BBOX
+        self.cell_m = cell_m
+        self.grid = Grid.for_bbox(self.bbox, cell_m)
+        self.distances: Dict[str, List[float]] = {}
+        self.counts: Dict[str, int] = {}
+        self.populated: List[bool] = []
+        self.towns: List[Optional[str]] = []      # nächster Ort je bewohnter Zelle
+
+    def compute(self, facilities: Dict[str, List[Tuple[float, float]]]) -> None:
+        """Ein KD-Tree je Schicht, alle Zellmittelpunkte in einer Abfrage"""
+        centers = self.grid.centers()
+        for layer, points in facilities.items():
+            tree = KDTree(points)
+            self.distances[layer] = [km for _, km in tree.nearest_many(centers)]
+            self.counts[layer] = len(points)
+
+        # Bewohnte Zellen: nahe an einem Ort des lokalen Geocoders
+        towns = {record.name: (record.lat, record.lon) for record in get_local_geocoder().towns.values()}
+        if not towns:
+            print("   ℹ️  Keine Geocoder-Daten (scrapers/geocoder_scraper.py): alle Zellen gelten "
+                  "als bewohnt, underserved_places bleibt leer")
+            self.populated = [True] * len(centers)
+            self.towns = [None] * len(centers)
+            return
+        names = list(towns)
+        nearest = KDTree([towns[name] for name in names]).nearest_many(centers)
+        self.populated = [km <= SETTLEMENT_KM for _, km in nearest]
+        self.towns = [names[index] if km <= SETTLEMENT_KM else None for index, km in nearest]
+
+    def underserved(self, layer: str) -> List[Dict[str, Any]]:
+        """GeoJSON-Features der bewohnten Gebiete über dem Schwellwert"""
+        limit = threshold_km(layer)
+        cols = self.grid.cols
+        distances = self.distances[layer]
+        cells = {(i // cols, i % cols) for i, km in enumerate(distances)
+                 if km > limit and self.populated[i]}
+
+        features = []
+        cell_km2 = (self.cell_m / 1000) ** 2
+        for polygon, members in cells_to_polygons(cells):
+            worst = max(distances[r * cols + c] for r, c in members)
+            places = sorted({self.towns[r * cols + c] for r, c in members} - {None})
+            features.append({
+                "type": "Feature",
+                "geometry": {
+                    "type": "Polygon",
+                    "coordinates": [[self.grid.vertex(r, c) for r, c in ring + ring[:1]] for ring in polygon],
+                },
+                "properties": {
+                    "layer": layer,
+                    "label": label(layer),
+                    "threshold_km": limit,
+                    "max_distance_km": round(worst, 1),
+                    "cells": len(members),
+                    "area_km2": round(len(members) * cell_km2, 1),
+                    "places": places,
+                },
+            })
+        return sorted(features, key=lambda f: -f["properties"]["area_km2"])
+
+    def summary(self, areas: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        """Kennzahlen je Schicht über bewohnte Zellen"""
+        result = {}
+        for layer, distances in self.distances.items():
+            populated = [km for km, flag in zip(distances, self.populated) if flag] or distances
+            result[layer] = {
+                "facilities": self.counts[layer],
+                "mean_km": round(sum(populated) / len(populated), 2),
+                "max_km": round(max(populated), 1),
+                "underserved_areas": len(areas[layer]),
+                "underserved_km2": round(sum(f["properties"]["area_km2"] for f in areas[layer]), 1),
+                "underserved_places": sorted({p for f in areas[layer] for p in f["properties"]["places"]}),
+            }
+        return result
+
+    def run(self, health_dir: Path = HEALTH_DIR) -> Dict[str, Any]:
+        """Raster berechnen; Ergebnis mit Features je Schicht und Kennzahlen"""
+        telemetry = get_telemetry()
+        with telemetry.timer("load"):
+            facilities = load_facilities(health_dir)
+        with telemetry.timer("distances"):
+            self.compute(facilities)
+        with telemetry.timer("polygons"):
+            areas = {layer: self.underserved(layer) for layer in self.distances}
+        telemetry.gauge("cells", self.grid.rows * self.grid.cols)
+        telemetry.gauge("layers", len(self.distances))
+        return {"areas": areas, "summary": self.summary(areas)}
+
+    def export(self, result: Dict[str, Any], output_dir: Path = OUTPUT_DIR) -> None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        meta = {
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "bbox": self.bbox,
+            "cell_m": self.cell_m,
+            "rows": self.grid.rows,
+            "cols": self.grid.cols,
+            "lat_step": self.grid.lat_step,
+            "lon_step": self.grid.lon_step,
+            "distance_step_km": DISTANCE_STEP_KM,
+        }
+        write_json(output_dir / "coverage_grid.json", {
+            "meta": meta,
+            "populated": "".join("1" if flag else "0" for flag in self.populated),
+            "layers": {
+                layer: {
+                    "label": label(layer),
+                    "facilities": self.counts[layer],
+                    "threshold_km": threshold_km(layer),
+                    "distances": [round(km / DISTANCE_STEP_KM) for km in distances],
+                }
+                for layer, distances in self.distances.items()
+            },
+        }, pretty=False)
+        write_json(output_dir / "underserved.geojson", {
+            "type": "FeatureCollection",
+            "metadata": {**meta, "summary": result["summary"]},
+            "features": [feature for features in result["areas"].values() for feature in features],
+        })
+
+
+def load_summary(output_dir: Path = OUTPUT_DIR) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Kennzahlen des letzten Exports, None wenn noch keiner vorliegt"""
+    path = output_dir / "underserved.geojson"
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("metadata", {}).get("summary")
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Versorgungs-Raster Gesundheit")
+    parser.add_argument("--cell", type=float, default=CELL_M, help="Zellgröße in Metern")
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print("🗺️  VERSORGUNGS-RASTER")
+    print("="*60)
+
+    start = time.perf_counter()
+    analyzer = CoverageAnalyzer(cell_m=args.cell)
+    result = analyzer.run()
+    with get_telemetry().timer("export"):
+        analyzer.export(result)
+
+    grid = analyzer.grid
+    print(f"   Raster: {grid.rows} x {grid.cols} Zellen à {args.cell:.0f} m, "
+          f"{sum(analyzer.populated)} bewohnt")
+    for layer, stats in result["summary"].items():
+        print(f"   {label(layer):<28} {stats['facilities']:>4} Einrichtungen, "
+              f"Ø {stats['mean_km']:.1f} km, max {stats['max_km']:.1f} km, "
+              f"{stats['underserved_areas']} Gebiete > {threshold_km(layer):.0f} km")
+    print(f"\n✅ {OUTPUT_DIR} ({time.perf_counter() - start:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
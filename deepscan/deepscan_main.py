@@ -12,6 +12,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any
 
+from telemetry import get_telemetry
+from json_writer import write_json
+
 # Setze UTF-8 für stdout
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
@@ -73,8 +76,7 @@ class DeepScanEngine:
             "meta": data.get('meta', {})
         }
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(geojson, f, ensure_ascii=False, indent=2)
+        write_json(output_file, geojson)
 
         print(f"✅ GeoJSON gespeichert: {output_file}")
 
@@ -119,8 +121,7 @@ class DeepScanEngine:
                 "source": "seed"
             }
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(firestore_data, f, ensure_ascii=False, indent=2)
+        write_json(output_file, firestore_data)
 
         print(f"✅ Firestore-Format gespeichert: {output_file}")
 
@@ -167,8 +168,7 @@ class DeepScanEngine:
 
     def save_analytics(self, analytics: Dict[str, Any], output_file: Path) -> None:
         """Speichert Analytics"""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(analytics, f, ensure_ascii=False, indent=2)
+        write_json(output_file, analytics)
 
         print(f"✅ Analytics gespeichert: {output_file}")
 
@@ -198,15 +198,17 @@ class DeepScanEngine:
         print("\n🚀 MSH DeepScan - Seed-Daten Export\n")
 
         # Seed-Daten laden
-        data = self.load_seed_data()
+        telemetry = get_telemetry()
+        with telemetry.timer("load"):
+            data = self.load_seed_data()
+        telemetry.count("locations", len(data.get('data', [])))
 
         # Timestamp für Dateinamen
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
         # JSON Export
         json_file = self.output_path / "merged" / f"msh_complete_{timestamp}.json"
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        write_json(json_file, data)
         print(f"✅ JSON gespeichert: {json_file}")
 
         # GeoJSON Export
@@ -286,16 +288,23 @@ class DeepScanEngine:
         try:
             if scraper_name == "osm":
                 from scrapers.osm_scraper import OSMScraper
+                from osm_pbf import load_extract
                 scraper = OSMScraper()
+                # Mit DEEPSCAN_OSM_PBF aus dem lokalen Extrakt statt Overpass
+                scrape = lambda: scraper.scrape(load_extract("osm"))
             elif scraper_name == "wikidata":
                 from scrapers.wikidata_scraper import WikidataScraper
                 scraper = WikidataScraper()
+                scrape = scraper.scrape
             else:
                 print(f"❌ Unbekannter Scraper: {scraper_name}")
                 return
 
             # Scraping durchführen
-            locations = scraper.scrape()
+            telemetry = get_telemetry()
+            with telemetry.timer("scrape"):
+                locations = scrape()
+            telemetry.count("locations", len(locations))
 
             if not locations:
                 print("⚠️  Keine Daten gefunden!")
@@ -306,15 +315,14 @@ class DeepScanEngine:
 
             # Als JSON speichern
             output_file = self.output_path / "raw" / f"{scraper_name}_{timestamp}.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "meta": {
-                        "source": scraper_name,
-                        "scraped_at": datetime.now().isoformat(),
-                        "count": len(locations)
-                    },
-                    "data": locations
-                }, f, ensure_ascii=False, indent=2)
+            write_json(output_file, {
+                "meta": {
+                    "source": scraper_name,
+                    "scraped_at": datetime.now().isoformat(),
+                    "count": len(locations)
+                },
+                "data": locations
+            })
 
             print(f"\n✅ Erfolgreich gespeichert: {output_file}")
             print(f"📊 {len(locations)} Locations gefunden")
@@ -11,6 +11,8 @@ Regeln:
 - Manuelle Daten haben Prioritaet (verifiziert)
 - Duplikate werden per Geo-Distance erkannt (100m Radius)
 - Namens-Matching als zusaetzlicher Check
+- Oeffnungszeiten fehlender Eintraege kommen vom OSM-Duplikat,
+  openingHoursCompiled wird hier erzeugt (einziger Schreiber der Dateien)
 - Output geht direkt in assets/data/health/
 """
 
@@ -20,6 +22,16 @@ import time
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 import argparse
+import sys
+
+from name_blocking import NameBlocker, name_similarity
+from telemetry import get_telemetry
+from json_writer import write_json
+from coverage_analysis import CoverageAnalyzer, label, load_summary, threshold_km
+
+# Öffnungszeiten-Compiler aus scrapers/
+sys.path.insert(0, str(Path(__file__).parent / "scrapers"))
+from opening_hours import compile_to_json
 
 
 class HealthMerger:
@@ -33,6 +45,7 @@ class HealthMerger:
 
     # Duplikat-Erkennung
     DUPLICATE_RADIUS_METERS = 100  # Zwei Eintraege < 100m = Duplikat
+    NAME_SIMILARITY_MIN = 0.9      # Ohne Koordinaten: Namen muessen fast gleich sein
 
     def __init__(self):
         self.stats = {
@@ -74,7 +87,7 @@ class HealthMerger:
         lon2 = entry2.get("longitude", 0)
 
         if not all([lat1, lon1, lat2, lon2]):
-            return False
+            return self.is_name_duplicate(entry1, entry2)
 
         # Geo-Distance Check
         distance = self.haversine_distance(lat1, lon1, lat2, lon2)
@@ -101,6 +114,22 @@ class HealthMerger:
 
         return False
 
+    def is_name_duplicate(self, entry1: Dict, entry2: Dict) -> bool:
+        """Duplikat-Check nur ueber Namen (fuer Eintraege ohne Koordinaten)"""
+        # Gleicher Name in anderem Ort ist eine andere Praxis/Filiale
+        for key in ("postalCode", "city"):
+            value1 = (entry1.get(key) or "").strip().lower()
+            value2 = (entry2.get(key) or "").strip().lower()
+            if value1 and value2 and value1 != value2:
+                return False
+
+        name1 = self.normalize_name(entry1.get("name", ""))
+        name2 = self.normalize_name(entry2.get("name", ""))
+        if not name1 or not name2:
+            return False
+
+        return name_similarity(name1, name2) >= self.NAME_SIMILARITY_MIN
+
     def load_osm_data(self, category: str) -> List[Dict]:
         """Laedt OSM-Daten fuer eine Kategorie"""
         filename_map = {
@@ -159,19 +188,32 @@ class HealthMerger:
             entry["_priority"] = 1  # Hohe Prioritaet
             merged.append(entry)
 
+        # Name-Blocking fuer Eintraege ohne Koordinaten
+        blocker = NameBlocker()
+        for index, entry in enumerate(merged):
+            blocker.add(index, entry.get("name", ""))
+
         # 2. OSM-Daten hinzufuegen wenn kein Duplikat
         duplicates = 0
         for osm_entry in osm:
+            if osm_entry.get("latitude") and osm_entry.get("longitude"):
+                candidates = merged
+            else:
+                candidates = [merged[i] for i in sorted(blocker.query(osm_entry.get("name", "")))]
+
             is_dup = False
-            for existing in merged:
+            for existing in candidates:
                 if self.is_duplicate(osm_entry, existing):
                     is_dup = True
                     duplicates += 1
+                    if not existing.get("openingHours") and osm_entry.get("openingHours"):
+                        existing["openingHours"] = osm_entry["openingHours"]
                     break
 
             if not is_dup:
                 osm_entry["_priority"] = 2  # Niedrigere Prioritaet
                 osm_entry["verified"] = False
+                blocker.add(len(merged), osm_entry.get("name", ""))
                 merged.append(osm_entry)
 
         self.stats["duplicates_removed"] += duplicates
@@ -243,6 +285,9 @@ class HealthMerger:
             if entry.get(field):
                 cleaned[field] = entry[field]
 
+        if cleaned.get("openingHours"):
+            cleaned["openingHoursCompiled"] = compile_to_json(cleaned["openingHours"])
+
         return cleaned
 
     def merge_category(self, category: str) -> List[Dict]:
@@ -298,8 +343,7 @@ class HealthMerger:
             "data": data
         }
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(output, f, ensure_ascii=False, indent=2)
+        write_json(filepath, output)
 
         print(f"   [SAVED] {filepath.name}")
 
@@ -312,10 +356,16 @@ class HealthMerger:
         if categories is None:
             categories = ["doctor", "pharmacy", "hospital", "physiotherapy", "care_service", "medical_supply"]
 
+        telemetry = get_telemetry()
         for category in categories:
-            merged = self.merge_category(category)
+            with telemetry.timer(f"merge_{category}"):
+                merged = self.merge_category(category)
             if merged:
-                self.save_category(category, merged, "openstreetmap, arzt-auskunft.de, manual")
+                with telemetry.timer("save"):
+                    self.save_category(category, merged, "openstreetmap, arzt-auskunft.de, manual")
+
+        for key, value in self.stats.items():
+            telemetry.count(key, value)
 
         # Statistik
         print("\n" + "="*60)
@@ -326,8 +376,13 @@ class HealthMerger:
         print(f"   Duplikate entfernt:   {self.stats['duplicates_removed']}")
         print(f"   Gesamt nach Merge:    {self.stats['merged_total']}")
 
-    def find_gaps(self) -> Dict[str, List[str]]:
-        """Findet Luecken in der Abdeckung (Orte ohne Eintraege)"""
+    def find_gaps(self, raster: bool = False) -> Dict[str, Any]:
+        """
+        Findet Luecken in der Abdeckung (Orte ohne Eintraege, unterversorgte Gebiete).
+
+        Die Gebiete kommen aus dem letzten Export der Stufe coverage;
+        raster=True rechnet das Raster hier neu (ohne Export).
+        """
         print("\n" + "="*60)
         print("[GAP ANALYSIS] Suche nach Luecken")
         print("="*60)
@@ -373,6 +428,22 @@ class HealthMerger:
         else:
             print("   [OK] Alle erwarteten Orte haben Eintraege")
 
+        # Raster: Distanz zur naechsten Einrichtung je Zelle (coverage_analysis.py)
+        summary = CoverageAnalyzer().run(self.OUTPUT_DIR)["summary"] if raster else load_summary()
+        if summary is None:
+            print("   [INFO] Kein Versorgungs-Raster, erst coverage_analysis.py ausfuehren (oder --coverage)")
+            return gaps
+        gaps["underserved_areas"] = summary
+        for layer, stats in summary.items():
+            if stats["underserved_areas"]:
+                places = ", ".join(stats["underserved_places"][:5]) or "keine Orte"
+                print(f"   [GAP] {label(layer)} > {threshold_km(layer):.0f} km: "
+                      f"{stats['underserved_km2']} km² ({places})")
+        if any(s["underserved_areas"] for s in summary.values()) and \
+                not any(s["underserved_places"] for s in summary.values()):
+            print("   [INFO] Keine Orte zugeordnet: Raster ohne Geocoder-Daten berechnet "
+                  "(erst scrapers/geocoder_scraper.py ausfuehren)")
+
         return gaps
 
 
@@ -380,19 +451,21 @@ def main():
     parser = argparse.ArgumentParser(description="Health Data Merge Tool")
     parser.add_argument("--category", "-c", help="Nur bestimmte Kategorie mergen")
     parser.add_argument("--gaps", action="store_true", help="Nur Gap-Analyse durchfuehren")
+    parser.add_argument("--coverage", action="store_true",
+                        help="Versorgungs-Raster neu berechnen statt den letzten Export zu lesen")
     args = parser.parse_args()
 
     merger = HealthMerger()
 
     if args.gaps:
-        merger.find_gaps()
+        merger.find_gaps(raster=args.coverage)
     elif args.category:
         merged = merger.merge_category(args.category)
         if merged:
             merger.save_category(args.category, merged, "openstreetmap, arzt-auskunft.de, manual")
     else:
         merger.run()
-        merger.find_gaps()
+        merger.find_gaps(raster=args.coverage)
 
 
 if __name__ == "__main__":
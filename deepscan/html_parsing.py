@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - HTML-Parsing
+
+Schnellere Alternativen zu BeautifulSoup(html, "html.parser") für die
+Scraper, ohne die Extraktionslogik umzuschreiben:
+
+- parse_html:     kompletter Baum, mit lxml als Builder falls installiert
+- parse_listing:  nur die Listen-Container (SoupStrainer, mit lxml), Rest wird nicht aufgebaut
+- find_meta:      Meta-Tags (og:image etc.) über selectolax oder einen <head>-Ausschnitt
+
+Die Rückgabe ist weiterhin ein BeautifulSoup-Objekt (außer find_meta),
+find/find_all/get_text funktionieren also wie bisher.
+tools/check_html_parsing.py prüft die Gleichheit zur bisherigen Extraktion.
+
+Umgebungsvariable:
+    DEEPSCAN_HTML_PARSER   lxml | html.parser (Standard: lxml falls installiert)
+"""
+
+import os
+import re
+from typing import List, Optional, Sequence, Tuple, Union
+
+try:
+    from bs4 import BeautifulSoup, SoupStrainer
+    HAS_BS4 = True
+except ImportError:
+    HAS_BS4 = False
+
+try:
+    import lxml  # noqa: F401 - nur Verfügbarkeit als bs4-Builder
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+try:
+    from selectolax.parser import HTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+
+def default_parser() -> str:
+    forced = os.environ.get("DEEPSCAN_HTML_PARSER")
+    if forced:
+        return forced
+    return "lxml" if HAS_LXML else "html.parser"
+
+
+PARSER = default_parser()
+
+# Ende des <head>; Meta-Tags stehen fast immer davor
+_HEAD_END = re.compile(r"</head\s*>|<body[\s>]", re.IGNORECASE)
+
+ClassPattern = Union[str, re.Pattern, None]
+
+
+def parse_html(html: str, parser: str = None) -> "BeautifulSoup":
+    """Kompletter Baum (für Seiten, die Geschwister/Eltern-Navigation brauchen)"""
+    return BeautifulSoup(html, parser or PARSER)
+
+
+def parse_listing(html: str, tags: Sequence[str], class_: ClassPattern = None,
+                  parser: str = None) -> "BeautifulSoup":
+    """
+    Baut nur Elemente `tags` mit passender Klasse samt Inhalt auf.
+
+    find_all(tags, class_=...) auf dem Ergebnis liefert dieselben Elemente
+    wie auf dem kompletten Baum, auch verschachtelte Treffer.
+    """
+    parser = parser or PARSER
+    if parser == "html.parser":
+        # html.parser schließt offene Tags (<li> ohne </li>) nur im kompletten
+        # Baum korrekt; mit SoupStrainer laufen sie bis zum Dokumentende
+        return BeautifulSoup(html, parser)
+    strainer = SoupStrainer(list(tags), class_=class_) if class_ is not None else SoupStrainer(list(tags))
+    return BeautifulSoup(html, parser, parse_only=strainer)
+
+
+def head_fragment(html: str) -> Optional[str]:
+    """Dokument bis zum Ende des <head>, None wenn nicht erkennbar"""
+    match = _HEAD_END.search(html)
+    return html[:match.start()] if match else None
+
+
+def _meta_soup(html: str, parser: str) -> "BeautifulSoup":
+    return BeautifulSoup(html, parser, parse_only=SoupStrainer("meta"))
+
+
+def _meta_selectolax(html: str, selectors: Sequence[Tuple[str, str]]) -> Optional[str]:
+    metas = HTMLParser(html).css("meta")
+    for attr, value in selectors:
+        # Wie soup.find: nur der erste Treffer zählt
+        meta = next((m for m in metas if m.attributes.get(attr) == value), None)
+        if meta is not None and meta.attributes.get("content"):
+            return meta.attributes["content"]
+    return None
+
+
+def find_meta(html: str, selectors: Sequence[Tuple[str, str]], parser: str = None) -> Optional[str]:
+    """
+    content des ersten passenden Meta-Tags, z.B.
+    find_meta(html, [("property", "og:image"), ("name", "twitter:image")]).
+
+    Für jeden Selektor gilt nur das erste Tag (wie soup.find); erst wenn
+    dessen content leer ist, kommt der nächste Selektor dran.
+    """
+    if HAS_SELECTOLAX and not parser:
+        return _meta_selectolax(html, selectors)
+
+    parser = parser or PARSER
+    head = head_fragment(html)
+    head_soup = _meta_soup(head, parser) if head is not None else None
+    full_soup = None
+    for attr, value in selectors:
+        meta = head_soup.find("meta", attrs={attr: value}) if head_soup is not None else None
+        if meta is None:
+            # Im <head> nicht vorhanden: erst dann das ganze Dokument parsen
+            if full_soup is None:
+                full_soup = _meta_soup(html, parser)
+            meta = full_soup.find("meta", attrs={attr: value})
+        if meta and meta.get("content"):
+            return meta["content"]
+    return None
+
+
+def available_parsers() -> List[str]:
+    parsers = []
+    if HAS_BS4:
+        parsers.append("html.parser")
+        if HAS_LXML:
+            parsers.append("lxml")
+    return parsers
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - JSON Writer
+
+Zentrale Schreibfunktionen für alle JSON-Ausgaben:
+- Backend orjson > msgspec > json (stdlib), Ausgabe jeweils UTF-8 ohne Escapes
+- Atomar: Temp-Datei im Zielverzeichnis + os.replace, nie halb geschriebene Dateien
+- pretty=True  → indent=2 (Review, output/), identisch zu json.dump(..., indent=2)
+- pretty=False → kompakt (Flutter-Assets)
+- JsonArrayWriter streamt große Arrays Element für Element
+
+Verwendung:
+    from json_writer import write_json, JsonArrayWriter
+    write_json(output_file, data)                      # pretty
+    write_json(asset_file, data, pretty=False)         # kompakt
+
+    with JsonArrayWriter(output_file, header={"meta": meta}) as writer:
+        for item in items:
+            writer.write(item)                         # → {"meta": ..., "data": [...]}
+
+Umgebungsvariable:
+    DEEPSCAN_JSON_BACKEND   orjson | msgspec | json (Standard: schnellstes verfügbares)
+"""
+
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import msgspec
+    HAS_MSGSPEC = True
+except ImportError:
+    HAS_MSGSPEC = False
+
+
+def _default(obj: Any) -> Any:
+    """Typen, die in den Daten vorkommen, aber kein JSON sind"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Path):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj, key=str)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JsonBackend:
+    """Stdlib-Encoder (Referenz für Format und Verhalten)"""
+
+    name = "json"
+
+    def dumps(self, data: Any, pretty: bool = True) -> bytes:
+        if pretty:
+            text = json.dumps(data, ensure_ascii=False, indent=2, default=_default)
+        else:
+            text = json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=_default)
+        return text.encode('utf-8')
+
+
+class OrjsonBackend(JsonBackend):
+    name = "orjson"
+
+    def dumps(self, data: Any, pretty: bool = True) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(data, default=_default, option=option)
+        except TypeError:
+            # z.B. Integer > 64 Bit; stdlib kann das
+            return super().dumps(data, pretty)
+
+
+class MsgspecBackend(JsonBackend):
+    name = "msgspec"
+
+    def __init__(self):
+        self.encoder = msgspec.json.Encoder(enc_hook=_default)
+
+    def dumps(self, data: Any, pretty: bool = True) -> bytes:
+        try:
+            encoded = self.encoder.encode(data)
+        except (TypeError, msgspec.EncodeError):
+            return super().dumps(data, pretty)
+        return msgspec.json.format(encoded, indent=2) if pretty else encoded
+
+
+def available_backends() -> Dict[str, JsonBackend]:
+    backends = {}
+    if HAS_ORJSON:
+        backends["orjson"] = OrjsonBackend()
+    if HAS_MSGSPEC:
+        backends["msgspec"] = MsgspecBackend()
+    backends["json"] = JsonBackend()
+    return backends
+
+
+def get_backend(name: Optional[str] = None) -> JsonBackend:
+    """Backend nach Name, sonst das schnellste verfügbare"""
+    backends = available_backends()
+    if name:
+        if name not in backends:
+            raise ValueError(f"JSON-Backend nicht verfügbar: {name} (verfügbar: {', '.join(backends)})")
+        return backends[name]
+    return next(iter(backends.values()))
+
+
+BACKEND = get_backend(os.environ.get("DEEPSCAN_JSON_BACKEND") or None)
+
+
+def dumps(data: Any, pretty: bool = True, backend: JsonBackend = None) -> bytes:
+    return (backend or BACKEND).dumps(data, pretty)
+
+
+def _temp_path(path: Path) -> Path:
+    # Im Zielverzeichnis, damit os.replace atomar bleibt
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+
+def write_json(path, data: Any, pretty: bool = True, backend: JsonBackend = None) -> int:
+    """Schreibt `data` atomar nach `path`; gibt die Dateigröße in Bytes zurück"""
+    path = Path(path)
+    content = dumps(data, pretty, backend)
+    tmp = _temp_path(path)
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(content)
+        os.replace(tmp, path)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+    return len(content)
+
+
+_KEY_ONLY = object()
+
+
+class JsonArrayWriter:
+    """
+    Streamt ein Array in eine Datei, ohne es komplett im Speicher zu halten.
+
+    Ohne header entsteht ein reines Array, mit header ein Objekt aus den
+    header-Feldern und dem Array unter `key`. Das Format entspricht
+    write_json mit derselben pretty-Einstellung.
+    """
+
+    def __init__(self, path, header: Dict[str, Any] = None, key: str = "data",
+                 pretty: bool = True, backend: JsonBackend = None):
+        self.path = Path(path)
+        self.header = header
+        self.key = key
+        self.pretty = pretty
+        self.backend = backend or BACKEND
+        self.count = 0
+        self.bytes_written = 0
+        self._tmp = _temp_path(self.path)
+        self._file = None
+        # Einrückung der Array-Elemente
+        self._depth = 2 if header is not None else 1
+
+    def __enter__(self) -> "JsonArrayWriter":
+        self._file = open(self._tmp, 'wb')
+        if self.header is not None:
+            self._emit(b"{")
+            for name, value in self.header.items():
+                self._emit_field(name, value)
+                self._emit(b",")
+            self._emit_field(self.key)
+        self._emit(b"[")
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                if self.count and self.pretty:
+                    self._emit(b"\n" + b"  " * (self._depth - 1))
+                self._emit(b"]")
+                if self.header is not None:
+                    self._emit(b"\n}" if self.pretty else b"}")
+                self._file.close()
+                os.replace(self._tmp, self.path)
+        finally:
+            if not self._file.closed:
+                self._file.close()
+            if self._tmp.exists():
+                self._tmp.unlink()
+
+    def _emit(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self.bytes_written += len(chunk)
+
+    def _indent(self, encoded: bytes, depth: int) -> bytes:
+        # Strings enthalten nie rohe Zeilenumbrüche, Ersetzen ist sicher
+        return encoded.replace(b"\n", b"\n" + b"  " * depth) if self.pretty else encoded
+
+    def _emit_field(self, name: str, value: Any = _KEY_ONLY) -> None:
+        """Objekt-Feld `"name": value` (ohne value nur der Schlüssel für das Array)"""
+        if self.pretty:
+            self._emit(b"\n  ")
+        self._emit(self.backend.dumps(name, False) + (b": " if self.pretty else b":"))
+        if value is not _KEY_ONLY:
+            self._emit(self._indent(self.backend.dumps(value, self.pretty), 1))
+
+    def write(self, item: Any) -> None:
+        if self.count:
+            self._emit(b",")
+        if self.pretty:
+            self._emit(b"\n" + b"  " * self._depth)
+        self._emit(self._indent(self.backend.dumps(item, self.pretty), self._depth))
+        self.count += 1
+
+    def extend(self, items: Iterable[Any]) -> None:
+        for item in items:
+            self.write(item)
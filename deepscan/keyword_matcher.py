@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - Keyword Matcher
+
+Ersetzt Ketten aus `any(kw in text for kw in keywords)` über mehrere
+Tabellen durch einen Durchlauf: alle Tabellen werden einmal kompiliert,
+scan() sucht jedes Keyword genau einmal, die Tabellen werten danach nur
+noch die Treffermenge aus.
+
+Backends:
+- pyahocorasick (falls installiert): Aho-Corasick-Automat, ein Durchlauf über den Text
+- sonst: Teilstring-Suche je eindeutigem Keyword (str.__contains__ in C);
+  in CPython schneller als ein Automat oder eine Lookahead-Regex in Python
+
+Die Semantik entspricht exakt `kw in text.lower()`, die Reihenfolge der
+Labels in einer Tabelle bestimmt die Priorität (wie bisher die if-Ketten).
+
+Verwendung:
+    from keyword_matcher import KeywordMatcher
+    KEYWORDS = KeywordMatcher({
+        'category': {'playground': ['spielplatz'], 'museum': ['museum']},
+        'suspicious': ['test', 'demo'],             # Liste: Label = Keyword
+    })
+    hits = KEYWORDS.scan(text)
+    hits.first('category', 'other')     # erstes Label mit Treffer
+    hits.labels('category')             # alle Labels mit Treffer, in Tabellen-Reihenfolge
+    hits.keywords('suspicious')         # getroffene Keywords, in Tabellen-Reihenfolge
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple, Union
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+Table = Union[Mapping[str, Iterable[str]], Iterable[str]]
+
+
+class KeywordHits:
+    """Treffer eines Textes, auswertbar für jede Tabelle des Matchers"""
+
+    def __init__(self, matcher: "KeywordMatcher", found: FrozenSet[str]):
+        self.matcher = matcher
+        self.found = found
+
+    def __contains__(self, keyword: str) -> bool:
+        return self.matcher.normalize(keyword) in self.found
+
+    def labels(self, table: str) -> List[str]:
+        return [label for label, keywords in self.matcher.tables[table]
+                if not self.found.isdisjoint(keywords)]
+
+    def first(self, table: str, default: Optional[str] = None) -> Optional[str]:
+        for label, keywords in self.matcher.tables[table]:
+            if not self.found.isdisjoint(keywords):
+                return label
+        return default
+
+    def keywords(self, table: str) -> List[str]:
+        result = []
+        for _, keywords in self.matcher.tables[table]:
+            for keyword in keywords:
+                if keyword in self.found and keyword not in result:
+                    result.append(keyword)
+        return result
+
+
+class KeywordMatcher:
+    """Benannte Keyword-Tabellen, einmal kompiliert"""
+
+    def __init__(self, tables: Mapping[str, Table], lower: bool = True):
+        self.lower = lower
+        self.tables: Dict[str, List[Tuple[str, Tuple[str, ...]]]] = {}
+        for name, table in tables.items():
+            if not isinstance(table, Mapping):
+                table = {keyword: [keyword] for keyword in table}
+            self.tables[name] = [(label, tuple(dict.fromkeys(self.normalize(kw) for kw in keywords)))
+                                 for label, keywords in table.items()]
+
+        self.words: Tuple[str, ...] = tuple(dict.fromkeys(
+            kw for table in self.tables.values() for _, keywords in table for kw in keywords if kw))
+
+        self._automaton = None
+        if HAS_AHOCORASICK and self.words:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.words:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+
+    def normalize(self, text: str) -> str:
+        return text.lower() if self.lower else text
+
+    def scan(self, text: Optional[str]) -> KeywordHits:
+        """Alle Keywords aller Tabellen in einem Durchlauf"""
+        if not text:
+            return KeywordHits(self, frozenset())
+        text = self.normalize(text)
+        if self._automaton is not None:
+            found = frozenset(keyword for _, keyword in self._automaton.iter(text))
+        else:
+            found = frozenset(keyword for keyword in self.words if keyword in text)
+        return KeywordHits(self, found)
+
+    # Kurzformen für einzelne Abfragen
+    def first(self, table: str, text: Optional[str], default: Optional[str] = None) -> Optional[str]:
+        return self.scan(text).first(table, default)
+
+    def labels(self, table: str, text: Optional[str]) -> List[str]:
+        return self.scan(text).labels(table)
+
+    def keywords(self, table: str, text: Optional[str]) -> List[str]:
+        return self.scan(text).keywords(table)
@@ -13,12 +13,20 @@ from pathlib import Path
 from typing import Dict, List, Any
 import math
 
+from name_blocking import NameBlocker, name_similarity
+from telemetry import get_telemetry
+from json_writer import write_json, JsonArrayWriter
+
 # UTF-8 für stdout
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 class MergeAndExport:
     """Merged Datenquellen und exportiert für verschiedene Ziele"""
 
+    # Namensgleiche Einträge mit gültigen Koordinaten sind nur so nah ein Duplikat
+    # (weiter entfernt: eigene Filialen einer Kette, z.B. Bäckereien)
+    NAME_DUPLICATE_METERS = 250
+
     def __init__(self):
         self.base_path = Path(__file__).parent
         self.output_path = self.base_path / "output"
@@ -72,8 +80,23 @@ class MergeAndExport:
         return (self.MSH_BBOX['south'] <= lat <= self.MSH_BBOX['north'] and
                 self.MSH_BBOX['west'] <= lon <= self.MSH_BBOX['east'])
 
-    def deduplicate_by_location(self, locations: List[Dict], threshold_meters: float = 50) -> List[Dict]:
-        """Entfernt Duplikate basierend auf Nähe"""
+    def is_name_duplicate(self, loc: Dict, existing: Dict, min_similarity: float = 0.9) -> bool:
+        """Duplikat über Namen (gleiche Kategorie und Stadt, fast gleicher Name)"""
+        if loc.get('category') != existing.get('category'):
+            return False
+        city1 = (loc.get('city') or '').lower()
+        city2 = (existing.get('city') or '').lower()
+        if not city1 or city1 != city2:
+            return False
+        return name_similarity(loc.get('name', ''), existing.get('name', '')) >= min_similarity
+
+    def deduplicate_by_location(self, locations: List[Dict], threshold_meters: float = 50,
+                                reference: List[Dict] = None) -> List[Dict]:
+        """
+        Entfernt Duplikate basierend auf Nähe, zusätzlich über Name-Blocking
+        (auch gegen `reference`): ohne/mit falschen Koordinaten reicht der
+        Name, sonst höchstens NAME_DUPLICATE_METERS Abstand
+        """
 
         def haversine_distance(lat1, lon1, lat2, lon2):
             """Berechnet Distanz in Metern"""
@@ -88,11 +111,36 @@ class MergeAndExport:
 
             return R * c
 
+        reference = reference or []
+        blocker = NameBlocker()
+        for index, ref in enumerate(reference):
+            blocker.add(('ref', index), ref.get('name', ''))
+
+        def name_candidates(name):
+            for kind, index in sorted(blocker.query(name)):
+                yield reference[index] if kind == 'ref' else unique[index]
+
+        def has_coords(entry):
+            lat, lon = entry.get('latitude'), entry.get('longitude')
+            return bool(lat and lon) and self.is_in_msh(lat, lon)
+
+        def is_name_duplicate(loc, other):
+            if not self.is_name_duplicate(loc, other):
+                return False
+            if not (has_coords(loc) and has_coords(other)):
+                return True
+            return haversine_distance(loc['latitude'], loc['longitude'],
+                                      other['latitude'], other['longitude']) <= self.NAME_DUPLICATE_METERS
+
         unique = []
         for loc in locations:
             lat = loc.get('latitude')
             lon = loc.get('longitude')
 
+            # Namensgleiche Einträge im selben Ort
+            if any(is_name_duplicate(loc, other) for other in name_candidates(loc.get('name', ''))):
+                continue
+
             if not lat or not lon:
                 continue
 
@@ -110,6 +158,7 @@ class MergeAndExport:
                             break
 
             if not is_duplicate:
+                blocker.add(('new', len(unique)), loc.get('name', ''))
                 unique.append(loc)
 
         return unique
@@ -136,7 +185,7 @@ class MergeAndExport:
         print(f"   OSM im MSH-Kerngebiet: {len(osm_in_msh)}")
 
         # Deduplizieren
-        osm_deduplicated = self.deduplicate_by_location(osm_in_msh)
+        osm_deduplicated = self.deduplicate_by_location(osm_in_msh, reference=seed_data)
         print(f"   Nach Deduplizierung: {len(osm_deduplicated)}")
 
         merged.extend(osm_deduplicated)
@@ -181,8 +230,7 @@ class MergeAndExport:
                 "createdAt": datetime.now().isoformat()
             }
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(firestore_data, f, ensure_ascii=False, indent=2)
+        write_json(output_file, firestore_data)
 
         print(f"✅ Gespeichert: {output_file}")
 
@@ -220,8 +268,7 @@ class MergeAndExport:
             }
         }
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(geojson, f, ensure_ascii=False, indent=2)
+        write_json(output_file, geojson)
 
         print(f"✅ Gespeichert: {output_file}")
 
@@ -242,8 +289,8 @@ class MergeAndExport:
             "data": locations  # Key muss "data" sein für LocationsService.dart
         }
 
-        with open(locations_file, 'w', encoding='utf-8') as f:
-            json.dump(locations_data, f, ensure_ascii=False, indent=2)
+        # Kompakt - die Datei wird nur von der App gelesen
+        write_json(locations_file, locations_data, pretty=False)
 
         print(f"✅ {locations_file}")
 
@@ -302,15 +349,21 @@ class MergeAndExport:
         print("\n🚀 MSH DeepScan - Merge & Export\n")
 
         # Daten laden
-        osm_data = self.load_osm_data()
-        seed_data = self.load_seed_data()
+        telemetry = get_telemetry()
+        with telemetry.timer("load"):
+            osm_data = self.load_osm_data()
+            seed_data = self.load_seed_data()
+        telemetry.count("osm_input", len(osm_data))
+        telemetry.count("seed_input", len(seed_data))
 
         if not osm_data and not seed_data:
             print("❌ Keine Daten zum Mergen!")
             return
 
         # Mergen
-        merged = self.merge_data(osm_data, seed_data)
+        with telemetry.timer("merge"):
+            merged = self.merge_data(osm_data, seed_data)
+        telemetry.count("merged_output", len(merged))
 
         # Timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -321,9 +374,8 @@ class MergeAndExport:
 
         # JSON
         json_file = merged_path / f"msh_merged_{timestamp}.json"
-        with open(json_file, 'w', encoding='utf-8') as f:
-            json.dump({"meta": {"generated_at": datetime.now().isoformat()}, "data": merged},
-                     f, ensure_ascii=False, indent=2)
+        with JsonArrayWriter(json_file, header={"meta": {"generated_at": datetime.now().isoformat()}}) as writer:
+            writer.extend(merged)
         print(f"✅ JSON: {json_file}")
 
         # GeoJSON
@@ -344,8 +396,7 @@ class MergeAndExport:
         analytics_path = self.output_path / "analytics"
         analytics_path.mkdir(exist_ok=True)
         analytics_file = analytics_path / f"merged_stats_{timestamp}.json"
-        with open(analytics_file, 'w', encoding='utf-8') as f:
-            json.dump(stats, f, ensure_ascii=False, indent=2)
+        write_json(analytics_file, stats)
         print(f"✅ Analytics: {analytics_file}")
 
         # Zusammenfassung
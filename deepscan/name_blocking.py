@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Name Blocking
+Findet Duplikat-Kandidaten allein über den Namen (ohne Koordinaten).
+
+Jeder Name bekommt mehrere Blocking-Keys:
+- Kölner Phonetik der Wörter (Schreibvarianten: Meier/Mayer/Maier)
+- Sortierte Tokens (Wortreihenfolge egal: "Apotheke am Markt" / "Markt-Apotheke am")
+- MinHash/LSH-Buckets über Zeichen-Trigramme (Tippfehler, Zusätze)
+
+Nur Einträge, die sich mindestens einen Key teilen, werden verglichen.
+Das eigentliche Scoring bleibt bei den bestehenden Mergern.
+"""
+
+import random
+import re
+import zlib
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import List, Dict, Set, Tuple, Hashable
+
+# Titel, Rechtsformen und Füllwörter ohne Unterscheidungskraft
+NOISE_WORDS = {
+    'dr', 'med', 'dipl', 'prof', 'gmbh', 'mbh', 'ag', 'kg', 'ev', 'e', 'v', 'ug',
+    'der', 'die', 'das', 'und', 'am', 'an', 'im', 'in', 'zu', 'zum', 'zur', 'von', 'the',
+}
+
+_UMLAUT_FOLD = str.maketrans({'ä': 'ae', 'ö': 'oe', 'ü': 'ue', 'ß': 'ss'})
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+# MinHash: 8 Bänder à 4 Zeilen → Kandidat ab ~60% Trigramm-Jaccard
+NUM_PERM = 32
+LSH_BANDS = 8
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(42)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+# Blöcke mit mehr Einträgen sind zu unspezifisch (z.B. "Apotheke")
+MAX_BLOCK_SIZE = 50
+
+
+def normalize_name(name: str) -> str:
+    """Kleinschreibung, Umlaute falten, Satzzeichen und Füllwörter entfernen"""
+    if not name:
+        return ""
+    folded = name.lower().translate(_UMLAUT_FOLD)
+    tokens = [t for t in _NON_ALNUM.split(folded) if t and t not in NOISE_WORDS]
+    return ' '.join(tokens)
+
+
+def koelner_phonetik(word: str) -> str:
+    """Kölner Phonetik eines einzelnen Wortes (z.B. Müller → 657)"""
+    word = word.upper().replace('Ä', 'A').replace('Ö', 'O').replace('Ü', 'U').replace('ß', 'S')
+    word = ''.join(c for c in word if 'A' <= c <= 'Z')
+    if not word:
+        return ""
+
+    codes = []
+    for i, c in enumerate(word):
+        prev = word[i - 1] if i > 0 else ''
+        nxt = word[i + 1] if i + 1 < len(word) else ''
+
+        if c in 'AEIJOUY':
+            code = '0'
+        elif c == 'H':
+            code = ''
+        elif c == 'B':
+            code = '1'
+        elif c == 'P':
+            code = '3' if nxt == 'H' else '1'
+        elif c in 'DT':
+            code = '8' if nxt in ('C', 'S', 'Z') else '2'
+        elif c in 'FVW':
+            code = '3'
+        elif c in 'GKQ':
+            code = '4'
+        elif c == 'C':
+            if i == 0:
+                code = '4' if nxt and nxt in 'AHKLOQRUX' else '8'
+            else:
+                code = '4' if nxt and nxt in 'AHKOQUX' and prev not in ('S', 'Z') else '8'
+        elif c == 'X':
+            code = '8' if prev in ('C', 'K', 'Q') else '48'
+        elif c == 'L':
+            code = '5'
+        elif c in 'MN':
+            code = '6'
+        elif c == 'R':
+            code = '7'
+        else:  # S, Z
+            code = '8'
+        codes.append(code)
+
+    # Doppelte Ziffern zusammenfassen, dann '0' außer am Anfang entfernen
+    raw = ''.join(codes)
+    collapsed = []
+    for digit in raw:
+        if not collapsed or collapsed[-1] != digit:
+            collapsed.append(digit)
+    result = collapsed[:1] + [d for d in collapsed[1:] if d != '0']
+    return ''.join(result)
+
+
+def phonetic_key(name: str) -> str:
+    """Sortierte Phonetik-Codes aller Wörter"""
+    codes = {koelner_phonetik(t) for t in normalize_name(name).split()}
+    return ' '.join(sorted(c for c in codes if c))
+
+
+def sorted_token_key(name: str) -> str:
+    """Sortierte, eindeutige Tokens des normalisierten Namens"""
+    return ' '.join(sorted(set(normalize_name(name).split())))
+
+
+def minhash_signature(name: str) -> List[int]:
+    """MinHash über Zeichen-Trigramme des normalisierten Namens"""
+    text = f" {normalize_name(name)} "
+    shingles = {text[i:i + 3] for i in range(len(text) - 2)}
+    if not shingles:
+        return []
+    hashes = [zlib.crc32(s.encode('utf-8')) for s in shingles]
+    return [
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    ]
+
+
+def blocking_keys(name: str) -> List[str]:
+    """Alle Blocking-Keys eines Namens (leer wenn der Name nichts hergibt)"""
+    if not normalize_name(name):
+        return []
+
+    keys = [f"t:{sorted_token_key(name)}"]
+    phon = phonetic_key(name)
+    if phon:
+        keys.append(f"p:{phon}")
+
+    signature = minhash_signature(name)
+    rows = NUM_PERM // LSH_BANDS
+    for band in range(LSH_BANDS):
+        chunk = signature[band * rows:(band + 1) * rows]
+        if chunk:
+            keys.append(f"m{band}:{hash(tuple(chunk))}")
+    return keys
+
+
+def name_similarity(name1: str, name2: str) -> float:
+    """Ähnlichkeit 0.0 - 1.0 der normalisierten Namen (Wortreihenfolge egal)"""
+    a, b = sorted_token_key(name1), sorted_token_key(name2)
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class NameBlocker:
+    """
+    Inverted Index von Blocking-Key → Einträge.
+
+    Einsatz:
+        blocker = NameBlocker()
+        for i, loc in enumerate(locations):
+            blocker.add(i, loc['name'])
+        for i, j in blocker.candidate_pairs():
+            ...  # bestehender Scorer entscheidet
+    """
+
+    def __init__(self, max_block_size: int = MAX_BLOCK_SIZE):
+        self.max_block_size = max_block_size
+        self.blocks: Dict[str, List[Hashable]] = defaultdict(list)
+        self.stats = {"items": 0, "blocks": 0, "skipped_blocks": 0}
+
+    def add(self, item_id: Hashable, name: str) -> None:
+        keys = blocking_keys(name)
+        if keys:
+            self.stats["items"] += 1
+        for key in keys:
+            self.blocks[key].append(item_id)
+
+    def query(self, name: str) -> Set[Hashable]:
+        """Alle bisher hinzugefügten Einträge, die einen Key mit `name` teilen"""
+        result = set()
+        for key in blocking_keys(name):
+            block = self.blocks.get(key)
+            if block and len(block) <= self.max_block_size:
+                result.update(block)
+        return result
+
+    def candidate_pairs(self) -> Set[Tuple[Hashable, Hashable]]:
+        """Alle Kandidaten-Paare (a, b) mit a < b aus gemeinsamen Blöcken"""
+        pairs = set()
+        self.stats["blocks"] = len(self.blocks)
+        self.stats["skipped_blocks"] = 0
+        for block in self.blocks.values():
+            if len(block) < 2:
+                continue
+            if len(block) > self.max_block_size:
+                self.stats["skipped_blocks"] += 1
+                continue
+            members = sorted(set(block))
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    pairs.add((a, b))
+        return pairs
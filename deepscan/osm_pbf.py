@@ -0,0 +1,808 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - OSM PBF Ingestion
+
+Liest einen regionalen .osm.pbf-Extrakt (z.B. sachsen-anhalt-latest.osm.pbf
+von Geofabrik) in einem Durchlauf und verteilt die Elemente an alle
+OSM-Scraper, statt jeden Scraper einzeln gegen Overpass laufen zu lassen.
+
+- Die Filter kommen direkt aus build_overpass_query() der Scraper
+  (node/way/relation, ["k"="v"], ["k"], ["k"~"re"], bbox, out center/geom)
+- Ausgabe im Overpass-JSON-Format: Way-Zentren (out center), Relationen
+  mit Member-Geometrie und Bounds (out geom), die parse_*-Funktionen
+  bleiben unverändert
+- Reiner Python-Decoder (zlib + Protobuf), keine zusätzlichen Abhängigkeiten
+
+Koordinaten werden nur für Knoten in der Vereinigung aller Bounding-Boxen
+(+ MARGIN_DEG) gehalten. Ways und Routen, die darüber hinausreichen, werden
+am Rand abgeschnitten; Overpass liefert dort die volle Geometrie.
+
+Verwendung:
+    python osm_pbf.py sachsen-anhalt-latest.osm.pbf          # alle Scraper
+    python osm_pbf.py extrakt.osm.pbf --only health,aed
+    DEEPSCAN_OSM_PBF=extrakt.osm.pbf python pipeline.py      # Scraper lesen den Extrakt
+
+Die Ergebnisse liegen in output/cache/osm_pbf/<scraper>.json; die Scraper
+holen sie über load_extract(), solange DEEPSCAN_OSM_PBF gesetzt ist. In der
+Pipeline baut die Stufe osm_pbf den Cache vor allen OSM-Scrapern (ohne
+Argument: Pfad aus DEEPSCAN_OSM_PBF, aktueller Cache wird nicht neu gebaut).
+Außerhalb der Pipeline baut ihn der erste load_extract()-Aufruf, parallele
+Scraper warten über eine Lock-Datei darauf statt selbst zu dekodieren.
+"""
+
+import argparse
+import importlib
+import os
+import re
+import struct
+import sys
+import time
+import tracemalloc
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from itertools import accumulate
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEEPSCAN_DIR = Path(__file__).resolve().parent
+CACHE_DIR = DEEPSCAN_DIR / "output" / "cache" / "osm_pbf"
+
+# Knoten außerhalb der Bounding-Boxen, die noch gehalten werden (Grad)
+MARGIN_DEG = 0.1
+
+# Ältere Lock-Datei gilt als verwaist (abgebrochener Durchlauf)
+LOCK_STALE_SECONDS = 3600
+
+# Scraper, die aus dem Extrakt bedient werden: Name → (Modul, Klasse)
+CONSUMERS = {
+    "osm": ("osm_scraper", "OSMScraper"),
+    "health": ("health_scraper", "HealthScraper"),
+    "civic": ("civic_scraper", "CivicScraper"),
+    "aed": ("aed_scraper", "AEDScraper"),
+    "wandernadel": ("wandernadel_scraper", "WandernadelScraper"),
+    "wanderwege": ("wanderwege_scraper", "WanderwegeScraper"),
+    "gazetteer": ("gazetteer_scraper", "GazetteerScraper"),
+    "geocoder": ("geocoder_scraper", "GeocoderScraper"),
+}
+
+Bbox = Tuple[float, float, float, float]   # south, west, north, east
+
+
+# ═══════════════════════════════════════════════════════════════
+# Overpass-Filter
+# ═══════════════════════════════════════════════════════════════
+
+_STATEMENT = re.compile(r'\b(node|way|relation|rel|nwr)\s*((?:\[[^\]]*\]\s*)+)\(\s*([-\d.]+)\s*,\s*([-\d.]+)\s*,'
+                        r'\s*([-\d.]+)\s*,\s*([-\d.]+)\s*\)\s*;')
+_TAG_FILTER = re.compile(r'\[\s*(!?)\s*"((?:[^"\\]|\\.)*)"\s*(?:(=|!=|~|!~)\s*"((?:[^"\\]|\\.)*)"\s*(,\s*i)?)?\s*\]')
+_OUT = re.compile(r'(?<!\[)\bout\b(?!\s*:)([^;]*);')
+
+_TYPES = {"node": ("node",), "way": ("way",), "relation": ("relation",), "rel": ("relation",),
+          "nwr": ("node", "way", "relation")}
+
+
+class OverpassClause:
+    """Ein Statement wie node["amenity"="pharmacy"](s,w,n,e);"""
+
+    def __init__(self, types: Tuple[str, ...], conditions: List[Tuple[str, str, Any]], bbox: Bbox):
+        self.types = types
+        self.conditions = conditions    # (key, op, value/regex)
+        self.bbox = bbox
+
+    def matches(self, tags: Dict[str, str]) -> bool:
+        for key, op, value in self.conditions:
+            current = tags.get(key)
+            if op == "exists":
+                if current is None:
+                    return False
+            elif op == "not_exists":
+                if current is not None:
+                    return False
+            elif op == "=":
+                if current != value:
+                    return False
+            elif op == "!=":
+                if current == value:
+                    return False
+            elif op == "~":
+                if current is None or not value.search(current):
+                    return False
+            elif op == "!~":
+                if current is not None and value.search(current):
+                    return False
+        return True
+
+
+class OverpassQuery:
+    """Die für PBF relevanten Teile einer Overpass-QL-Abfrage"""
+
+    def __init__(self, clauses: List[OverpassClause], out: str = "body"):
+        self.clauses = clauses
+        self.out = out
+        # Keys, ohne die kein Statement greifen kann (für den Vorfilter);
+        # Statements nur mit Negationen greifen auch ohne Tags
+        positive = [[k for k, op, _ in c.conditions if op in ("exists", "=", "~")] for c in clauses]
+        self.keys = {keys[0] for keys in positive if keys}
+        self.match_all = not all(positive)
+        # Statements nach erstem Pflicht-Key, damit pro Element nur wenige geprüft werden
+        self._by_key: Dict[str, List[OverpassClause]] = {}
+        self._unkeyed: List[OverpassClause] = []
+        for clause, keys in zip(clauses, positive):
+            if keys:
+                self._by_key.setdefault(keys[0], []).append(clause)
+            else:
+                self._unkeyed.append(clause)
+
+    @classmethod
+    def parse(cls, query: str) -> "OverpassQuery":
+        query = re.sub(r'//[^\n]*', '', query)
+        if re.search(r'\barea\b|\bis_in\b|\baround\b|\bpoly\s*:', query):
+            raise ValueError("Overpass-Abfrage nutzt area/around/poly - im PBF-Modus nicht unterstützt")
+
+        clauses = []
+        for match in _STATEMENT.finditer(query):
+            conditions = []
+            for negate, key, op, value, case_flag in _TAG_FILTER.findall(match.group(2)):
+                key = key.replace('\\"', '"')
+                if not op:
+                    conditions.append((key, "not_exists" if negate else "exists", None))
+                elif op in ("~", "!~"):
+                    conditions.append((key, op, re.compile(value, re.IGNORECASE if case_flag else 0)))
+                else:
+                    conditions.append((key, op, value.replace('\\"', '"')))
+            bbox = tuple(float(match.group(i)) for i in range(3, 7))
+            clauses.append(OverpassClause(_TYPES[match.group(1)], conditions, bbox))
+        if not clauses:
+            raise ValueError("Keine node/way/relation-Statements mit Bounding-Box gefunden")
+
+        out = "body"
+        out_match = _OUT.search(query)
+        if out_match:
+            modes = out_match.group(1).split()
+            out = "geom" if "geom" in modes else "center" if "center" in modes else "body"
+        return cls(clauses, out)
+
+    def matching(self, osm_type: str, tags: Dict[str, str]) -> List[OverpassClause]:
+        candidates = list(self._unkeyed)
+        for key in tags:
+            candidates.extend(self._by_key.get(key, ()))
+        return [c for c in candidates if osm_type in c.types and c.matches(tags)]
+
+    def types(self) -> set:
+        return {t for c in self.clauses for t in c.types}
+
+
+def _bbox_union(boxes: List[Bbox], margin: float) -> Bbox:
+    return (min(b[0] for b in boxes) - margin, min(b[1] for b in boxes) - margin,
+            max(b[2] for b in boxes) + margin, max(b[3] for b in boxes) + margin)
+
+
+def _in_bbox(lat: float, lon: float, bbox: Bbox) -> bool:
+    return bbox[0] <= lat <= bbox[2] and bbox[1] <= lon <= bbox[3]
+
+
+def _bbox_intersects(a: Bbox, b: Bbox) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+# ═══════════════════════════════════════════════════════════════
+# Protobuf / PBF-Decoder
+# ═══════════════════════════════════════════════════════════════
+
+def _varint(buf, pos: int) -> Tuple[int, int]:
+    result = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _fields(buf) -> Iterator[Tuple[int, Any]]:
+    """(Feldnummer, Wert) einer Protobuf-Nachricht; Wert ist int oder memoryview"""
+    pos, end = 0, len(buf)
+    while pos < end:
+        key, pos = _varint(buf, pos)
+        field, wire = key >> 3, key & 7
+        if wire == 0:
+            value, pos = _varint(buf, pos)
+        elif wire == 2:
+            length, pos = _varint(buf, pos)
+            value = buf[pos:pos + length]
+            pos += length
+        elif wire == 1:
+            value = buf[pos:pos + 8]
+            pos += 8
+        elif wire == 5:
+            value = buf[pos:pos + 4]
+            pos += 4
+        else:
+            raise ValueError(f"Protobuf: Wire-Type {wire} nicht unterstützt")
+        yield field, value
+
+
+def _packed(buf) -> List[int]:
+    """Gepackte Varints"""
+    out = []
+    append = out.append
+    value = shift = 0
+    for byte in bytes(buf):
+        if byte < 0x80:
+            append(value | (byte << shift))
+            value = shift = 0
+        else:
+            value |= (byte & 0x7F) << shift
+            shift += 7
+    return out
+
+
+def _zigzag(values: List[int]) -> List[int]:
+    return [(v >> 1) ^ -(v & 1) for v in values]
+
+
+def _delta(values: List[int]) -> List[int]:
+    return list(accumulate(_zigzag(values)))
+
+
+def _signed(value: int) -> int:
+    # int64 als Varint (negative Werte im Zweierkomplement)
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def read_blobs(path: Path) -> Iterator[Tuple[str, bytes]]:
+    """(Typ, entpackte Daten) je Block, streamend"""
+    with open(path, 'rb') as f:
+        while True:
+            size_bytes = f.read(4)
+            if len(size_bytes) < 4:
+                return
+            header_size = struct.unpack('>I', size_bytes)[0]
+            blob_type, data_size = "", 0
+            for field, value in _fields(memoryview(f.read(header_size))):
+                if field == 1:
+                    blob_type = bytes(value).decode('utf-8')
+                elif field == 3:
+                    data_size = value
+            raw = None
+            for field, value in _fields(memoryview(f.read(data_size))):
+                if field == 1:
+                    raw = bytes(value)
+                elif field == 3:
+                    raw = zlib.decompress(value)
+                elif field in (4, 5, 6, 7):
+                    raise ValueError(f"PBF: Kompression (Feld {field}) nicht unterstützt, nur zlib/raw")
+            yield blob_type, raw
+
+
+class PrimitiveBlock:
+    """Ein OSMData-Block mit String-Tabelle und Koordinaten-Skalierung"""
+
+    def __init__(self, data: bytes):
+        self.strings: List[str] = []
+        self.groups: List[memoryview] = []
+        self.granularity = 100
+        self.lat_offset = 0
+        self.lon_offset = 0
+        for field, value in _fields(memoryview(data)):
+            if field == 1:
+                self.strings = [bytes(s).decode('utf-8', errors='replace') for f, s in _fields(value) if f == 1]
+            elif field == 2:
+                self.groups.append(value)
+            elif field == 17:
+                self.granularity = value
+            elif field == 19:
+                self.lat_offset = _signed(value)
+            elif field == 20:
+                self.lon_offset = _signed(value)
+
+    def coord(self, raw_lat: int, raw_lon: int) -> Tuple[int, int]:
+        """Koordinate in 1e-7 Grad (wie im Knotenspeicher)"""
+        return ((self.lat_offset + self.granularity * raw_lat) // 100,
+                (self.lon_offset + self.granularity * raw_lon) // 100)
+
+
+# ═══════════════════════════════════════════════════════════════
+# Extraktion
+# ═══════════════════════════════════════════════════════════════
+
+def _deg(value: int) -> float:
+    return round(value / 1e7, 7)
+
+
+class _NodeStore:
+    """Knotenkoordinaten in der Region (IDs aufsteigend, wie im PBF sortiert)"""
+
+    def __init__(self):
+        self.ids = array('q')
+        self.lats = array('i')
+        self.lons = array('i')
+        self._sorted = True
+
+    def add(self, node_id: int, lat: int, lon: int) -> None:
+        self.extend([node_id], [lat], [lon])
+
+    def extend(self, ids: List[int], lats: List[int], lons: List[int]) -> None:
+        if not ids:
+            return
+        if (self.ids and ids[0] <= self.ids[-1]) or any(a >= b for a, b in zip(ids, ids[1:])):
+            self._sorted = False
+        self.ids.extend(ids)
+        self.lats.extend(lats)
+        self.lons.extend(lons)
+
+    def finish(self) -> None:
+        if not self._sorted:
+            order = sorted(range(len(self.ids)), key=self.ids.__getitem__)
+            self.ids = array('q', (self.ids[i] for i in order))
+            self.lats = array('i', (self.lats[i] for i in order))
+            self.lons = array('i', (self.lons[i] for i in order))
+            self._sorted = True
+
+    def get(self, node_id: int) -> Optional[Tuple[int, int]]:
+        i = bisect_left(self.ids, node_id)
+        if i < len(self.ids) and self.ids[i] == node_id:
+            return self.lats[i], self.lons[i]
+        return None
+
+
+class _WayStore:
+    """Node-Refs der Ways in der Region, für die Geometrie von Relationen"""
+
+    def __init__(self):
+        self.ids = array('q')
+        self.offsets = array('q', [0])
+        self.refs = array('q')
+
+    def add(self, way_id: int, refs: List[int]) -> None:
+        self.ids.append(way_id)
+        self.refs.extend(refs)
+        self.offsets.append(len(self.refs))
+
+    def get(self, way_id: int) -> Optional[array]:
+        i = bisect_left(self.ids, way_id)
+        if i < len(self.ids) and self.ids[i] == way_id:
+            return self.refs[self.offsets[i]:self.offsets[i + 1]]
+        return None
+
+
+class PbfExtractor:
+    """Ein Durchlauf über den Extrakt, Elemente je Abfrage im Overpass-Format"""
+
+    def __init__(self, queries: Dict[str, OverpassQuery], margin: float = MARGIN_DEG):
+        self.queries = queries
+        self.region = _bbox_union([c.bbox for q in queries.values() for c in q.clauses], margin)
+        self.region_e7 = tuple(round(v * 1e7) for v in self.region)
+        self.keys = set().union(*(q.keys for q in queries.values()))
+        self.match_all = any(q.match_all for q in queries.values())
+        self.keep_way_refs = any(q.out == "geom" and "relation" in q.types() for q in queries.values())
+        self.nodes = _NodeStore()
+        self.ways = _WayStore()
+        self.results: Dict[str, List[Dict[str, Any]]] = {name: [] for name in queries}
+        self.stats = {"blocks": 0, "nodes": 0, "ways": 0, "relations": 0}
+
+    # --- Routing ------------------------------------------------------
+
+    def _route(self, osm_type: str, tags: Dict[str, str], in_bbox, build) -> None:
+        """Element an alle Abfragen, deren Statement greift (build erst bei Treffer)"""
+        built: Dict[str, Dict[str, Any]] = {}
+        for name, query in self.queries.items():
+            clauses = query.matching(osm_type, tags)
+            if clauses and any(in_bbox(c.bbox) for c in clauses):
+                if query.out not in built:
+                    built[query.out] = build(query.out)
+                self.results[name].append(built[query.out])
+
+    def _tags(self, strings: List[str], keys: List[int], vals: List[int]) -> Optional[Dict[str, str]]:
+        """Tags nur bauen, wenn ein gesuchter Key dabei ist"""
+        if not keys:
+            return {} if self.match_all else None
+        if not self.match_all and not any(strings[k] in self.keys for k in keys):
+            return None
+        return {strings[k]: strings[v] for k, v in zip(keys, vals)}
+
+    # --- Knoten ----------------------------------------------------------
+
+    def _node(self, node_id: int, lat: int, lon: int, tags: Optional[Dict[str, str]]) -> None:
+        if not _in_bbox(lat / 1e7, lon / 1e7, self.region):
+            return
+        self.nodes.add(node_id, lat, lon)
+        if tags is not None:
+            self._route_node(node_id, lat, lon, tags)
+
+    def _route_node(self, node_id: int, lat: int, lon: int, tags: Dict[str, str]) -> None:
+        lat_deg, lon_deg = lat / 1e7, lon / 1e7
+
+        def build(out: str) -> Dict[str, Any]:
+            element = {"type": "node", "id": node_id, "lat": _deg(lat), "lon": _deg(lon)}
+            if tags:
+                element["tags"] = tags
+            return element
+
+        self._route("node", tags, lambda bbox: _in_bbox(lat_deg, lon_deg, bbox), build)
+
+    def _dense(self, block: PrimitiveBlock, buf) -> None:
+        ids, raw_lats, raw_lons, keys_vals = [], [], [], []
+        for field, value in _fields(buf):
+            if field == 1:
+                ids = _delta(_packed(value))
+            elif field == 8:
+                raw_lats = _delta(_packed(value))
+            elif field == 9:
+                raw_lons = _delta(_packed(value))
+            elif field == 10:
+                keys_vals = _packed(value)
+        self.stats["nodes"] += len(ids)
+
+        # Koordinaten blockweise umrechnen, Knoten in der Region gesammelt speichern
+        gran, lat_off, lon_off = block.granularity, block.lat_offset, block.lon_offset
+        lats = [(lat_off + gran * v) // 100 for v in raw_lats]
+        lons = [(lon_off + gran * v) // 100 for v in raw_lons]
+        south, west, north, east = self.region_e7
+        inside = [i for i, (lat, lon) in enumerate(zip(lats, lons))
+                  if south <= lat <= north and west <= lon <= east]
+        self.nodes.extend([ids[i] for i in inside], [lats[i] for i in inside], [lons[i] for i in inside])
+
+        if not keys_vals:
+            if self.match_all:
+                for i in inside:
+                    self._route_node(ids[i], lats[i], lons[i], {})
+            return
+        # Tags: pro Knoten Key/Value-Indizes bis zur 0
+        inside_set = set(inside)
+        strings = block.strings
+        pos = 0
+        for i in range(len(ids)):
+            if keys_vals[pos] == 0:
+                pos += 1
+                if self.match_all and i in inside_set:
+                    self._route_node(ids[i], lats[i], lons[i], {})
+                continue
+            end = keys_vals.index(0, pos)
+            if i in inside_set:
+                keys = keys_vals[pos:end:2]
+                vals = keys_vals[pos + 1:end:2]
+                tags = self._tags(strings, keys, vals)
+                if tags is not None:
+                    self._route_node(ids[i], lats[i], lons[i], tags)
+            pos = end + 1
+
+    def _plain_node(self, block: PrimitiveBlock, buf) -> None:
+        node_id = raw_lat = raw_lon = 0
+        keys, vals = [], []
+        for field, value in _fields(buf):
+            if field == 1:
+                node_id = _zigzag([value])[0]
+            elif field == 2:
+                keys = _packed(value)
+            elif field == 3:
+                vals = _packed(value)
+            elif field == 8:
+                raw_lat = _zigzag([value])[0]
+            elif field == 9:
+                raw_lon = _zigzag([value])[0]
+        self.stats["nodes"] += 1
+        lat, lon = block.coord(raw_lat, raw_lon)
+        self._node(node_id, lat, lon, self._tags(block.strings, keys, vals))
+
+    # --- Ways -------------------------------------------------------------
+
+    def _way(self, block: PrimitiveBlock, buf) -> None:
+        way_id = 0
+        keys, vals, refs = [], [], []
+        for field, value in _fields(buf):
+            if field == 1:
+                way_id = value
+            elif field == 2:
+                keys = _packed(value)
+            elif field == 3:
+                vals = _packed(value)
+            elif field == 8:
+                refs = _delta(_packed(value))
+        self.stats["ways"] += 1
+
+        tags = self._tags(block.strings, keys, vals)
+        if tags is None and not self.keep_way_refs:
+            return
+
+        coords = [c for c in map(self.nodes.get, refs) if c is not None]
+        if not coords:
+            return
+        if self.keep_way_refs:
+            self.ways.add(way_id, refs)
+        if tags is None:
+            return
+
+        lats = [c[0] for c in coords]
+        lons = [c[1] for c in coords]
+        bounds = (min(lats) / 1e7, min(lons) / 1e7, max(lats) / 1e7, max(lons) / 1e7)
+
+        def build(out: str) -> Dict[str, Any]:
+            element = {"type": "way", "id": way_id}
+            if out == "center":
+                element["center"] = {"lat": _deg((min(lats) + max(lats)) // 2),
+                                     "lon": _deg((min(lons) + max(lons)) // 2)}
+            elif out == "geom":
+                element["bounds"] = _bounds_dict(lats, lons)
+                element["geometry"] = [{"lat": _deg(lat), "lon": _deg(lon)} for lat, lon in coords]
+            else:
+                element["nodes"] = refs
+            if tags:
+                element["tags"] = tags
+            return element
+
+        self._route("way", tags, lambda bbox: _bbox_intersects(bounds, bbox), build)
+
+    # --- Relationen ----------------------------------------------------------
+
+    def _relation(self, block: PrimitiveBlock, buf) -> None:
+        rel_id = 0
+        keys, vals, roles, memids, types = [], [], [], [], []
+        for field, value in _fields(buf):
+            if field == 1:
+                rel_id = value
+            elif field == 2:
+                keys = _packed(value)
+            elif field == 3:
+                vals = _packed(value)
+            elif field == 8:
+                roles = _packed(value)
+            elif field == 9:
+                memids = _delta(_packed(value))
+            elif field == 10:
+                types = _packed(value)
+        self.stats["relations"] += 1
+
+        tags = self._tags(block.strings, keys, vals)
+        if tags is None:
+            return
+
+        type_names = ("node", "way", "relation")
+        members = []
+        lats: List[int] = []
+        lons: List[int] = []
+        for role, ref, member_type in zip(roles, memids, types):
+            member = {"type": type_names[member_type], "ref": ref, "role": block.strings[role]}
+            if member_type == 0:
+                coord = self.nodes.get(ref)
+                if coord:
+                    member["_coords"] = [coord]
+            elif member_type == 1:
+                way_refs = self.ways.get(ref)
+                if way_refs is not None:
+                    member["_coords"] = [c for c in map(self.nodes.get, way_refs) if c is not None]
+            for lat, lon in member.get("_coords", []):
+                lats.append(lat)
+                lons.append(lon)
+            members.append(member)
+
+        if not lats:
+            return
+        bounds = (min(lats) / 1e7, min(lons) / 1e7, max(lats) / 1e7, max(lons) / 1e7)
+
+        def build(out: str) -> Dict[str, Any]:
+            element = {"type": "relation", "id": rel_id}
+            if out in ("geom", "center"):
+                element["bounds"] = _bounds_dict(lats, lons)
+            if out == "center":
+                element["center"] = {"lat": _deg((min(lats) + max(lats)) // 2),
+                                     "lon": _deg((min(lons) + max(lons)) // 2)}
+            element["members"] = []
+            for member in members:
+                entry = {k: v for k, v in member.items() if k != "_coords"}
+                if out == "geom" and "_coords" in member:
+                    points = [{"lat": _deg(lat), "lon": _deg(lon)} for lat, lon in member["_coords"]]
+                    if entry["type"] == "node":
+                        entry.update(points[0])
+                    else:
+                        entry["geometry"] = points
+                element["members"].append(entry)
+            if tags:
+                element["tags"] = tags
+            return element
+
+        self._route("relation", tags, lambda bbox: _bbox_intersects(bounds, bbox), build)
+
+    # --- Durchlauf -------------------------------------------------------
+
+    def run(self, path: Path, progress: bool = True) -> Dict[str, Dict[str, Any]]:
+        start = time.perf_counter()
+        relations_started = False
+        for blob_type, data in read_blobs(path):
+            if blob_type == "OSMHeader":
+                for field, value in _fields(memoryview(data)):
+                    if field == 4 and bytes(value) not in (b"OsmSchema-V0.6", b"DenseNodes"):
+                        raise ValueError(f"PBF: Feature nicht unterstützt: {bytes(value).decode()}")
+                continue
+            if blob_type != "OSMData":
+                continue
+
+            block = PrimitiveBlock(data)
+            self.stats["blocks"] += 1
+            for group in block.groups:
+                for field, value in _fields(group):
+                    if field == 2:
+                        self._dense(block, value)
+                    elif field == 1:
+                        self._plain_node(block, value)
+                    elif field == 3:
+                        self.nodes.finish()
+                        self._way(block, value)
+                    elif field == 4:
+                        if not relations_started:
+                            self.nodes.finish()
+                            relations_started = True
+                        self._relation(block, value)
+
+            if progress and self.stats["blocks"] % 200 == 0:
+                print(f"   … {self.stats['nodes']:,} Knoten, {self.stats['ways']:,} Ways, "
+                      f"{self.stats['relations']:,} Relationen ({time.perf_counter() - start:.0f}s)")
+
+        self.stats["seconds"] = round(time.perf_counter() - start, 1)
+        self.stats["region_nodes"] = len(self.nodes.ids)
+        return {name: {"elements": elements} for name, elements in self.results.items()}
+
+
+def _bounds_dict(lats: List[int], lons: List[int]) -> Dict[str, float]:
+    return {"minlat": _deg(min(lats)), "minlon": _deg(min(lons)),
+            "maxlat": _deg(max(lats)), "maxlon": _deg(max(lons))}
+
+
+# ═══════════════════════════════════════════════════════════════
+# Anbindung an die Scraper
+# ═══════════════════════════════════════════════════════════════
+
+def consumer_queries(names: List[str] = None) -> Dict[str, OverpassQuery]:
+    """Overpass-Abfragen der Scraper, geparst aus build_overpass_query()"""
+    sys.path.insert(0, str(DEEPSCAN_DIR / "scrapers"))
+    queries = {}
+    for name in names or CONSUMERS:
+        module_name, class_name = CONSUMERS[name]
+        scraper = getattr(importlib.import_module(module_name), class_name)()
+        queries[name] = OverpassQuery.parse(scraper.build_overpass_query())
+    return queries
+
+
+def extract(pbf_path, names: List[str] = None, margin: float = MARGIN_DEG,
+            cache_dir: Path = CACHE_DIR) -> Dict[str, Dict[str, Any]]:
+    """Ein Durchlauf für alle (oder die genannten) Scraper, Ergebnis auch im Cache"""
+    from json_writer import write_json
+
+    pbf_path = Path(pbf_path)
+    print(f"🗺️  PBF-Extrakt: {pbf_path} ({pbf_path.stat().st_size / 1e6:.1f} MB)")
+    extractor = PbfExtractor(consumer_queries(names), margin)
+
+    # tracemalloc (Telemetrie) verlangsamt den Decoder um ein Vielfaches;
+    # der Speicher-Peak bleibt über ru_maxrss erfasst
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.stop()
+    try:
+        results = extractor.run(pbf_path)
+    finally:
+        if tracing:
+            tracemalloc.start()
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    meta = {"pbf": str(pbf_path.resolve()), "pbf_mtime": pbf_path.stat().st_mtime,
+            "extracted_at": datetime.now().isoformat(), "margin_deg": margin, "stats": extractor.stats}
+    for name, data in results.items():
+        data["meta"] = meta
+        write_json(cache_dir / f"{name}.json", data, pretty=False)
+        print(f"   ✅ {name:12s} {len(data['elements']):>7,} Elemente")
+    print(f"   {extractor.stats['nodes']:,} Knoten, {extractor.stats['ways']:,} Ways, "
+          f"{extractor.stats['relations']:,} Relationen in {extractor.stats['seconds']}s")
+    return results
+
+
+def read_cache(name: str, pbf_path: Path, cache_dir: Path = CACHE_DIR) -> Optional[Dict[str, Any]]:
+    """Cache eines Scrapers, None wenn er fehlt oder zu einem anderen Extrakt gehört"""
+    import json
+
+    cache_file = cache_dir / f"{name}.json"
+    if not cache_file.exists():
+        return None
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    meta = data.get("meta", {})
+    if meta.get("pbf") != str(pbf_path) or meta.get("pbf_mtime") != pbf_path.stat().st_mtime:
+        return None
+    return data
+
+
+def is_cached(pbf_path: Path, names: List[str] = None, cache_dir: Path = CACHE_DIR) -> bool:
+    """Alle (bzw. die genannten) Scraper haben einen aktuellen Cache"""
+    pbf_path = Path(pbf_path).resolve()
+    return all(read_cache(name, pbf_path, cache_dir) is not None for name in (names or CONSUMERS))
+
+
+def _locked_extract(pbf_path: Path, name: str, cache_dir: Path = CACHE_DIR) -> Dict[str, Any]:
+    """Ein Durchlauf für alle Scraper; andere Prozesse warten und lesen danach den Cache"""
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    lock_file = cache_dir / ".extract.lock"
+    while True:
+        try:
+            fd = os.open(lock_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - lock_file.stat().st_mtime > LOCK_STALE_SECONDS:
+                    lock_file.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            time.sleep(1)
+            data = read_cache(name, pbf_path, cache_dir)
+            if data is not None:
+                return data
+
+    try:
+        os.close(fd)
+        # Während des Wartens auf die Lock-Datei kann ein anderer fertig geworden sein
+        data = read_cache(name, pbf_path, cache_dir)
+        if data is None:
+            data = extract(pbf_path, cache_dir=cache_dir)[name]
+        return data
+    finally:
+        try:
+            lock_file.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def load_extract(name: str) -> Optional[Dict[str, Any]]:
+    """
+    Overpass-Ersatz für einen Scraper, wenn DEEPSCAN_OSM_PBF gesetzt ist.
+
+    Liegt noch kein aktueller Cache zum Extrakt vor, läuft der Durchlauf
+    einmal für alle Scraper; die weiteren lesen dann nur den Cache.
+    """
+    pbf = os.environ.get("DEEPSCAN_OSM_PBF")
+    if not pbf:
+        return None
+    pbf_path = Path(pbf).resolve()
+
+    data = read_cache(name, pbf_path, CACHE_DIR)
+    if data is None:
+        data = _locked_extract(pbf_path, name, CACHE_DIR)
+
+    print(f"[PBF] {len(data['elements'])} Elemente für '{name}' aus {pbf_path.name}")
+    return data
+
+
+def main():
+    from telemetry import get_telemetry
+
+    parser = argparse.ArgumentParser(description="OSM-Scraper aus lokalem .osm.pbf bedienen")
+    parser.add_argument("pbf", nargs="?", default=os.environ.get("DEEPSCAN_OSM_PBF"),
+                        help="Pfad zum .osm.pbf-Extrakt (Standard: DEEPSCAN_OSM_PBF)")
+    parser.add_argument("--only", help=f"Kommagetrennt, Auswahl aus: {', '.join(CONSUMERS)}")
+    parser.add_argument("--margin", type=float, default=MARGIN_DEG,
+                        help="Knoten außerhalb der Bounding-Boxen halten (Grad)")
+    parser.add_argument("--force", action="store_true", help="Auch bei aktuellem Cache neu extrahieren")
+    args = parser.parse_args()
+
+    if not args.pbf:
+        print("[PBF] Kein Extrakt (DEEPSCAN_OSM_PBF nicht gesetzt), Scraper fragen Overpass")
+        return
+
+    names = args.only.split(",") if args.only else None
+    if not args.force and args.margin == MARGIN_DEG and is_cached(args.pbf, names):
+        print(f"[PBF] Cache zu {Path(args.pbf).name} ist aktuell")
+        return
+
+    telemetry = get_telemetry()
+    with telemetry.timer("extract"):
+        results = extract(args.pbf, names, args.margin)
+    telemetry.count("elements", sum(len(data["elements"]) for data in results.values()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - Pipeline Orchestrator
+
+Führt die DeepScan-Skripte als DAG aus:
+- Jede Stufe deklariert Eingaben, Ausgaben und Abhängigkeiten
+- Unabhängige Stufen (v.a. Scraper) laufen parallel
+- Stufen mit unveränderten Eingaben (Content-Hash) werden übersprungen
+- Quell-Stufen ohne Datei-Eingaben (Netzwerk) werden nach TTL neu ausgeführt
+- Jeder Lauf schreibt ein Manifest nach output/runs/
+
+Verwendung:
+    python pipeline.py                  # Alles was veraltet ist
+    python pipeline.py run_merge        # Nur diese Stufe (+ Abhängigkeiten)
+    python pipeline.py --force osm      # Stufe erzwingen
+    python pipeline.py --list           # Stufen anzeigen
+    python pipeline.py --dry-run        # Nur Plan anzeigen
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from telemetry import collect_run
+from json_writer import write_json
+
+PROJECT_ROOT = Path(__file__).parent.parent
+DEEPSCAN_DIR = Path(__file__).parent
+OUTPUT_DIR = DEEPSCAN_DIR / "output"
+RUNS_DIR = OUTPUT_DIR / "runs"
+STATE_FILE = OUTPUT_DIR / "cache" / "pipeline_state.json"
+
+HASH_CHUNK = 1 << 20
+
+
+class Stage:
+    """Eine Pipeline-Stufe (ein Skript-Aufruf)"""
+
+    def __init__(self, name: str, script: str, args: List[str] = None,
+                 inputs: List[str] = None, outputs: List[str] = None,
+                 deps: List[str] = None, cwd: str = ".", ttl_hours: float = None,
+                 manual: bool = False, description: str = ""):
+        self.name = name
+        self.script = script            # relativ zum Projekt-Root
+        self.args = args or []
+        self.inputs = inputs or []      # Globs relativ zum Projekt-Root
+        self.outputs = outputs or []    # Globs relativ zum Projekt-Root
+        self.deps = deps or []
+        self.cwd = cwd                  # Arbeitsverzeichnis relativ zum Projekt-Root
+        self.ttl_hours = ttl_hours      # Quell-Stufen: nach Ablauf neu ausführen
+        self.manual = manual            # Nur wenn explizit angefordert (z.B. Firestore-Import)
+        self.description = description
+
+    @property
+    def command(self) -> List[str]:
+        return [sys.executable, str(PROJECT_ROOT / self.script)] + self.args
+
+
+# Quell-Stufen holen Daten aus dem Netz, alle anderen arbeiten nur auf Dateien
+SCRAPER_TTL_HOURS = 24
+
+# health_scraper.py schreibt je Kategorie eine Datei; defibrillators_osm.json
+# im selben Verzeichnis gehört der aed-Stufe
+HEALTH_OSM_FILES = [f"deepscan/output/health/{name}_osm.json" for name in
+                    ("doctors", "pharmacies", "hospitals", "physiotherapy", "care_services", "medical_supply")]
+
+STAGES = [
+    # --- Quellen -----------------------------------------------------------
+    Stage("seed", "deepscan/deepscan_main.py", ["--seed"], cwd="deepscan",
+          inputs=["deepscan/msh_data_seed.json"],
+          outputs=["deepscan/output/merged/msh_complete_*.json",
+                   "deepscan/output/merged/msh_complete_*.geojson",
+                   "deepscan/output/merged/msh_firestore_2*.json",
+                   "deepscan/output/analytics/report_*"],
+          description="Seed-Daten exportieren"),
+    # Ohne DEEPSCAN_OSM_PBF ein No-op; läuft immer, baut den Cache aber nur bei neuem Extrakt.
+    # Die OSM-Scraper lesen ihren Teil als Eingabe (neuer Extrakt → neuer Lauf)
+    Stage("osm_pbf", "deepscan/osm_pbf.py", cwd="deepscan",
+          outputs=["deepscan/output/cache/osm_pbf/*.json"],
+          ttl_hours=0, description="PBF-Extrakt für alle OSM-Scraper (einmal dekodiert)"),
+    Stage("osm", "deepscan/deepscan_main.py", ["--source", "osm"], cwd="deepscan",
+          deps=["osm_pbf"],
+          inputs=["deepscan/output/cache/osm_pbf/osm.json"],
+          outputs=["deepscan/output/raw/osm_*.json"],
+          ttl_hours=SCRAPER_TTL_HOURS, description="OSM Locations (Overpass)"),
+    Stage("wikidata", "deepscan/deepscan_main.py", ["--source", "wikidata"], cwd="deepscan",
+          outputs=["deepscan/output/raw/wikidata_*.json"],
+          ttl_hours=SCRAPER_TTL_HOURS, description="Wikidata Locations (SPARQL)"),
+    Stage("health", "deepscan/scrapers/health_scraper.py", cwd="deepscan",
+          deps=["osm_pbf"],
+          inputs=["deepscan/output/cache/osm_pbf/health.json"],
+          outputs=HEALTH_OSM_FILES + ["deepscan/output/health/health_all_osm.json"],
+          ttl_hours=SCRAPER_TTL_HOURS, description="Gesundheit (OSM)"),
+    Stage("civic", "deepscan/scrapers/civic_scraper.py", cwd="deepscan",
+          deps=["osm_pbf"],
+          inputs=["deepscan/output/cache/osm_pbf/civic.json"],
+          outputs=["deepscan/output/civic/*.json",
+                   "assets/data/civic/government.json",
+                   "assets/data/civic/youth_centres.json",
+                   "assets/data/civic/social_facilities.json"],
+          ttl_hours=SCRAPER_TTL_HOURS, description="Behörden & Soziales (OSM)"),
+    Stage("aed", "deepscan/scrapers/aed_scraper.py", cwd="deepscan",
+          deps=["osm_pbf"],
+          inputs=["deepscan/output/cache/osm_pbf/aed.json"],
+          outputs=["deepscan/output/health/defibrillators_osm.json",
+                   "lib/assets/data/health/aeds.json"],
+          ttl_hours=SCRAPER_TTL_HOURS, description="Defibrillatoren (OSM)"),
+    Stage("wandernadel", "deepscan/scrapers/wandernadel_scraper.py", cwd="deepscan",
+          deps=["osm_pbf"],
+          inputs=["deepscan/output/cache/osm_pbf/wandernadel.json"],
+          outputs=["deepscan/output/outdoor/wandernadel_osm.json",
+                   "assets/data/outdoor/wandernadel.json"],
+          ttl_hours=SCRAPER_TTL_HOURS, description="Stempelstellen (OSM)"),
+    Stage("wanderwege", "deepscan/scrapers/wanderwege_scraper.py", cwd="deepscan",
+          deps=["osm_pbf"],
+          inputs=["deepscan/output/cache/osm_pbf/wanderwege.json"],
+          outputs=["deepscan/output/outdoor/wanderwege_osm.json",
+                   "lib/assets/data/outdoor/wanderwege.json"],
+          ttl_hours=SCRAPER_TTL_HOURS, description="Wanderwege (OSM)"),
+    Stage("engagement", "deepscan/scrapers/engagement_scanner.py",
+          outputs=["data/engagement/places.json"],
+          ttl_hours=SCRAPER_TTL_HOURS, description="Engagement-Orte (OSM)"),
+    Stage("gazetteer", "deepscan/scrapers/gazetteer_scraper.py", cwd="deepscan",
+          deps=["osm_pbf"],
+          inputs=["deepscan/output/cache/osm_pbf/gazetteer.json"],
+          outputs=["deepscan/output/gazetteer/osm_names.json"],
+          ttl_hours=SCRAPER_TTL_HOURS, description="Orts- und Straßennamen (OSM)"),
+    Stage("geocoder", "deepscan/scrapers/geocoder_scraper.py", cwd="deepscan",
+          deps=["osm_pbf"],
+          inputs=["deepscan/output/cache/osm_pbf/geocoder.json"],
+          outputs=["deepscan/output/geocoder/msh_addresses.json"],
+          ttl_hours=SCRAPER_TTL_HOURS, description="Adressen für lokalen Geocoder (OSM)"),
+    Stage("notices", "deepscan/scrapers/notice_scraper.py", ["--merge"], cwd="deepscan",
+          deps=["gazetteer", "geocoder"],
+          inputs=["data/notices/notices_current.json", "deepscan/output/gazetteer/osm_names.json",
+                  "deepscan/output/geocoder/msh_addresses.json"],
+          outputs=["data/notices/notices_scraped.json"],
+          ttl_hours=6, description="Sperrungen & Hinweise"),
+    Stage("og_images", "deepscan/scrapers/og_image_extractor.py", cwd="deepscan",
+          inputs=["data/events/events_current.json"],
+          outputs=["data/events/events_current.json"],
+          description="Event-Bilder (og:image)"),
+
+    # --- Verarbeitung ------------------------------------------------------
+    Stage("health_merge", "deepscan/health_merge.py", cwd="deepscan", deps=["health"],
+          inputs=HEALTH_OSM_FILES + ["assets/data/health/*.json"],
+          outputs=["assets/data/health/*.json"],
+          description="Gesundheit: OSM + manuelle Daten"),
+    Stage("coverage", "deepscan/coverage_analysis.py", cwd="deepscan",
+          deps=["health_merge", "aed", "geocoder"],
+          inputs=["assets/data/health/*.json", "lib/assets/data/health/aeds.json",
+                  "deepscan/output/geocoder/msh_addresses.json"],
+          outputs=["assets/data/health/coverage/*"],
+          description="Versorgungs-Raster Gesundheit (Heatmap + Gebiete)"),
+    # Gesundheit/Behörden ergänzen health_merge und civic selbst (ein Schreiber je Datei)
+    Stage("opening_hours", "deepscan/scrapers/opening_hours_batch.py", cwd="deepscan",
+          inputs=["assets/data/nightlife/venues.json"],
+          outputs=["assets/data/nightlife/venues.json"],
+          ttl_hours=SCRAPER_TTL_HOURS, description="Öffnungszeiten Nightlife ergänzen (OSM)"),
+    Stage("merge_export", "deepscan/merge_and_export.py", cwd="deepscan", deps=["osm"],
+          inputs=["deepscan/output/raw/osm_*.json", "deepscan/msh_data_seed.json"],
+          outputs=["deepscan/output/merged/msh_merged_*", "deepscan/output/merged/msh_firestore_merged_*",
+                   "deepscan/output/analytics/merged_stats_*"],
+          description="OSM + Seed mergen, Flutter/Firestore Export"),
+    Stage("run_merge", "addons/search_engine/deepscan/run_merge.py", deps=["seed", "osm", "wikidata"],
+          inputs=["deepscan/output/merged/msh_complete_*.json",
+                  "deepscan/output/raw/osm_*.json", "deepscan/output/raw/wikidata_*.json"],
+          outputs=["deepscan/output/merged/msh_sources_merged_*", "deepscan/output/merged/msh_search_index_*",
+                   "deepscan/output/merged/msh_duplicates_*", "deepscan/output/analytics/merge_report_*"],
+          description="Alle Quellen deduplizieren + Suchindex"),
+    Stage("validate_notices", "deepscan/tools/validate_notices.py", cwd="deepscan",
+          deps=["notices"],
+          inputs=["data/notices/notices_current.json"],
+          description="Notice-Koordinaten prüfen"),
+    Stage("validate_coordinates", "deepscan/tools/validate_notices.py", ["--all"], cwd="deepscan",
+          deps=["notices", "og_images", "civic", "wandernadel", "health_merge", "coverage", "opening_hours"],
+          inputs=["data/notices/*.json", "data/events/*.json", "assets/data/**/*.json"],
+          outputs=["deepscan/output/analytics/coordinate_report_*"],
+          manual=True, description="Koordinaten aller Daten prüfen (Bericht)"),
+
+    # --- Import (nur explizit) ---------------------------------------------
+    Stage("firestore_import", "deepscan/import_to_firestore.py", cwd="deepscan",
+          deps=["merge_export"], inputs=["deepscan/output/merged/msh_firestore_merged_*.json"],
+          manual=True, description="Firestore-Import (braucht Credentials)"),
+]
+
+
+def _glob_magic(segment: str) -> bool:
+    return any(char in segment for char in "*?[")
+
+
+def _segments_overlap(a: str, b: str) -> bool:
+    """Können zwei Pfad-Segmente (Globs) denselben Namen treffen?"""
+    if a == b:
+        return True
+    if not _glob_magic(a):
+        return fnmatch.fnmatchcase(a, b)
+    if not _glob_magic(b):
+        return fnmatch.fnmatchcase(b, a)
+    # Zwei Wildcards: feste Anfänge und Enden dürfen sich nicht widersprechen
+    parts_a, parts_b = _literal_parts(a), _literal_parts(b)
+    head_a, head_b, tail_a, tail_b = parts_a[0], parts_b[0], parts_a[-1], parts_b[-1]
+    return ((head_a.startswith(head_b) or head_b.startswith(head_a))
+            and (tail_a.endswith(tail_b) or tail_b.endswith(tail_a)))
+
+
+def _literal_parts(segment: str) -> List[str]:
+    """'msh_*_v?.json' → ['msh_', '_v', '.json'] (Text zwischen den Wildcards)"""
+    parts, current, index = [], "", 0
+    while index < len(segment):
+        char = segment[index]
+        if char in "*?[":
+            parts.append(current)
+            current = ""
+            if char == "[":
+                close = segment.find("]", index + 1)
+                index = close if close != -1 else index
+        else:
+            current += char
+        index += 1
+    parts.append(current)
+    return parts
+
+
+def patterns_overlap(a: str, b: str) -> bool:
+    """Ob zwei Globs (relativ zum Projekt-Root, auch mit **) dieselbe Datei treffen können"""
+    def match(left: List[str], right: List[str]) -> bool:
+        if not left or not right:
+            return all(segment == "**" for segment in left + right)
+        if left[0] == "**":
+            return match(left[1:], right) or match(left, right[1:])
+        if right[0] == "**":
+            return match(left, right[1:]) or match(left[1:], right)
+        return _segments_overlap(left[0], right[0]) and match(left[1:], right[1:])
+
+    return match(a.split("/"), b.split("/"))
+
+
+def _expand(patterns: List[str]) -> List[Path]:
+    """Globs relativ zum Projekt-Root → sortierte Dateiliste"""
+    files = set()
+    for pattern in patterns:
+        for path in PROJECT_ROOT.glob(pattern):
+            if path.is_file():
+                files.add(path)
+    return sorted(files)
+
+
+def _file_hash(path: Path, cache: Dict[str, Any]) -> str:
+    """SHA-256 einer Datei; Cache über (Pfad, Größe, mtime) spart erneutes Lesen"""
+    stat = path.stat()
+    key = str(path)
+    cached = cache.get(key)
+    if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    result = digest.hexdigest()
+    cache[key] = [stat.st_size, stat.st_mtime_ns, result]
+    return result
+
+
+def _relative(path: Path) -> str:
+    return path.relative_to(PROJECT_ROOT).as_posix()
+
+
+class Pipeline:
+    """Plant und führt Stufen aus"""
+
+    def __init__(self, stages: List[Stage] = None, jobs: int = 4, force: List[str] = None):
+        self.stages = {s.name: s for s in (stages or STAGES)}
+        self.jobs = jobs
+        self.force = set(force or [])
+        self.state = self._load_state()
+        self.hash_cache = self.state.setdefault("_hashes", {})
+        self.run_id = os.environ.get("DEEPSCAN_RUN_ID") or datetime.now().strftime("%Y%m%d_%H%M%S")
+
+        writers: List[tuple] = []
+        for stage in self.stages.values():
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"Stufe '{stage.name}' hängt von unbekannter Stufe '{dep}' ab")
+            # Zwei Schreiber derselben Dateien invalidieren sich gegenseitig
+            for pattern in stage.outputs:
+                for other_pattern, other in writers:
+                    if other != stage.name and patterns_overlap(pattern, other_pattern):
+                        raise ValueError(f"Ausgabe '{pattern}' ({stage.name}) überschneidet "
+                                         f"'{other_pattern}' ({other})")
+                writers.append((pattern, stage.name))
+
+    def _load_state(self) -> Dict[str, Any]:
+        if STATE_FILE.exists():
+            try:
+                with open(STATE_FILE, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (OSError, json.JSONDecodeError):
+                print("⚠️  Pipeline-State beschädigt, starte ohne Cache")
+        return {}
+
+    def _save_state(self) -> None:
+        STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        write_json(STATE_FILE, self.state)
+
+    def select(self, targets: List[str] = None) -> List[str]:
+        """Zielstufen + alle Vorgänger in topologischer Reihenfolge"""
+        if targets:
+            unknown = [t for t in targets if t not in self.stages]
+            if unknown:
+                raise ValueError(f"Unbekannte Stufe(n): {', '.join(unknown)}")
+            wanted = list(targets)
+        else:
+            wanted = [name for name, s in self.stages.items() if not s.manual]
+
+        order, visiting, done = [], set(), set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Zyklus in der Pipeline bei '{name}'")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in wanted:
+            visit(name)
+        return order
+
+    def input_hashes(self, stage: Stage) -> Dict[str, str]:
+        return {_relative(p): _file_hash(p, self.hash_cache) for p in _expand(stage.inputs)}
+
+    def cache_key(self, stage: Stage, inputs: Dict[str, str]) -> str:
+        """Hash über Skript, Argumente und alle Eingabedateien"""
+        digest = hashlib.sha256()
+        script = PROJECT_ROOT / stage.script
+        digest.update(stage.script.encode())
+        if script.exists():
+            digest.update(_file_hash(script, self.hash_cache).encode())
+        digest.update(json.dumps(stage.args).encode())
+        for path, file_hash in sorted(inputs.items()):
+            digest.update(f"{path}:{file_hash}".encode())
+        return digest.hexdigest()
+
+    def is_fresh(self, stage: Stage) -> Optional[str]:
+        """Grund warum die Stufe übersprungen werden kann, sonst None"""
+        if stage.name in self.force:
+            return None
+        previous = self.state.get(stage.name)
+        if not previous or previous.get("status") != "ok":
+            return None
+
+        if previous.get("key") != self.cache_key(stage, self.input_hashes(stage)):
+            return None
+
+        # Ausgaben müssen noch unverändert vorhanden sein
+        for path, file_hash in previous.get("outputs", {}).items():
+            full = PROJECT_ROOT / path
+            if not full.exists() or _file_hash(full, self.hash_cache) != file_hash:
+                return None
+
+        if stage.ttl_hours is not None:
+            age_hours = (time.time() - previous.get("finished", 0)) / 3600
+            if age_hours > stage.ttl_hours:
+                return None
+            return f"Quelle {age_hours:.1f}h alt (TTL {stage.ttl_hours:g}h)"
+        return "Eingaben unverändert"
+
+    def _execute(self, stage: Stage, log_dir: Path) -> Dict[str, Any]:
+        """Führt eine Stufe als Subprozess aus (läuft im Thread-Pool)"""
+        log_file = log_dir / f"{stage.name}.log"
+        env = dict(os.environ, PYTHONIOENCODING="utf-8", DEEPSCAN_RUN_ID=self.run_id,
+                   DEEPSCAN_STAGE=stage.name)
+
+        started = time.time()
+        with open(log_file, 'w', encoding='utf-8') as log:
+            try:
+                returncode = subprocess.run(
+                    stage.command, cwd=PROJECT_ROOT / stage.cwd, env=env,
+                    stdout=log, stderr=subprocess.STDOUT,
+                ).returncode
+            except OSError as e:
+                log.write(f"Start fehlgeschlagen: {e}\n")
+                returncode = -1
+        return {
+            "returncode": returncode,
+            "started": started,
+            "finished": time.time(),
+            "log": os.path.relpath(log_file, PROJECT_ROOT),
+        }
+
+    def run(self, targets: List[str] = None, dry_run: bool = False) -> Dict[str, Any]:
+        order = self.select(targets)
+        log_dir = RUNS_DIR / self.run_id
+        if not dry_run:
+            log_dir.mkdir(parents=True, exist_ok=True)
+
+        print("\n" + "=" * 70)
+        print(f"🧭 DeepScan Pipeline - Lauf {self.run_id}")
+        print("=" * 70)
+        print(f"   Stufen: {len(order)}, parallel: {self.jobs}\n")
+
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = list(order)
+        running = {}
+        run_started = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                # Alle Stufen starten, deren Abhängigkeiten fertig sind
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if any(dep in pending or dep in running for dep in stage.deps if dep in order):
+                        continue
+                    pending.remove(name)
+
+                    failed_deps = [d for d in stage.deps if results.get(d, {}).get("status") in ("failed", "blocked")]
+                    if failed_deps:
+                        results[name] = {"status": "blocked", "reason": f"Abhängigkeit fehlgeschlagen: {', '.join(failed_deps)}"}
+                        print(f"   ⛔ {name:18s} blockiert ({', '.join(failed_deps)})")
+                        continue
+
+                    reason = self.is_fresh(stage)
+                    if reason:
+                        previous = self.state[name]
+                        results[name] = {"status": "cached", "reason": reason, "key": previous["key"],
+                                         "outputs": previous.get("outputs", {})}
+                        print(f"   ♻️  {name:18s} übersprungen ({reason})")
+                        continue
+
+                    if dry_run:
+                        results[name] = {"status": "planned"}
+                        print(f"   ▶️  {name:18s} würde laufen - {stage.description}")
+                        continue
+
+                    print(f"   ▶️  {name:18s} gestartet - {stage.description}")
+                    running[name] = pool.submit(self._execute, stage, log_dir)
+
+                if not running:
+                    continue
+
+                finished, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name, future in list(running.items()):
+                    if future not in finished:
+                        continue
+                    del running[name]
+                    results[name] = self._finish(self.stages[name], future.result())
+
+        manifest = self._write_manifest(order, results, run_started, dry_run)
+        if not dry_run:
+            self._save_state()
+        return manifest
+
+    def _finish(self, stage: Stage, outcome: Dict[str, Any]) -> Dict[str, Any]:
+        """Wertet einen abgeschlossenen Subprozess aus und aktualisiert den State"""
+        duration = outcome["finished"] - outcome["started"]
+        result = dict(outcome, duration=round(duration, 2))
+
+        if outcome["returncode"] != 0:
+            result["status"] = "failed"
+            print(f"   ❌ {stage.name:18s} fehlgeschlagen (Exit {outcome['returncode']}, Log: {outcome['log']})")
+            self.state.pop(stage.name, None)
+            return result
+
+        # Ausgaben dieses Laufs (neu oder geändert seit Start)
+        outputs = {}
+        for path in _expand(stage.outputs):
+            if path.stat().st_mtime >= outcome["started"] - 1:
+                outputs[_relative(path)] = _file_hash(path, self.hash_cache)
+
+        # Key nach dem Lauf berechnen: Stufen, die ihre Eingabe selbst
+        # umschreiben (z.B. health_merge), gelten danach als aktuell
+        inputs = self.input_hashes(stage)
+        key = self.cache_key(stage, inputs)
+
+        result.update(status="ok", key=key, inputs=inputs, outputs=outputs)
+        self.state[stage.name] = {
+            "status": "ok",
+            "key": key,
+            "outputs": outputs,
+            "finished": outcome["finished"],
+            "run_id": self.run_id,
+        }
+        print(f"   ✅ {stage.name:18s} fertig in {duration:.1f}s ({len(outputs)} Ausgaben)")
+        return result
+
+    def _critical_path(self, order: List[str], results: Dict[str, Dict[str, Any]]) -> float:
+        """Längste Abhängigkeitskette (Summe der Laufzeiten)"""
+        longest: Dict[str, float] = {}
+        for name in order:
+            own = results.get(name, {}).get("duration", 0.0)
+            longest[name] = own + max((longest.get(d, 0.0) for d in self.stages[name].deps), default=0.0)
+        return max(longest.values(), default=0.0)
+
+    def _write_manifest(self, order: List[str], results: Dict[str, Dict[str, Any]],
+                        run_started: float, dry_run: bool) -> Dict[str, Any]:
+        wall = time.time() - run_started
+        counts: Dict[str, int] = {}
+        for result in results.values():
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+
+        # Metriken der Stufen (telemetry.py) für diesen Lauf zusammenfassen
+        telemetry_totals = collect_run(self.run_id) if not dry_run else {}
+
+        manifest = {
+            "run_id": self.run_id,
+            "started_at": datetime.fromtimestamp(run_started).isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "dry_run": dry_run,
+            "wall_seconds": round(wall, 2),
+            "critical_path_seconds": round(self._critical_path(order, results), 2),
+            "status_counts": counts,
+            "telemetry": telemetry_totals,
+            "stages": {name: results.get(name, {}) for name in order},
+        }
+
+        print(f"\n📊 {', '.join(f'{k}: {v}' for k, v in sorted(counts.items()))}")
+        print(f"   Laufzeit: {wall:.1f}s (kritischer Pfad: {manifest['critical_path_seconds']:.1f}s)")
+
+        if not dry_run:
+            RUNS_DIR.mkdir(parents=True, exist_ok=True)
+            manifest_file = RUNS_DIR / f"run_{self.run_id}.json"
+            write_json(manifest_file, manifest)
+            print(f"   Manifest: {manifest_file}")
+
+        return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DeepScan Pipeline (DAG mit Cache)")
+    parser.add_argument("targets", nargs="*", help="Zielstufen (Standard: alle außer manuelle)")
+    parser.add_argument("--force", nargs="*", default=None,
+                        help="Stufen erzwingen (ohne Namen: alle Ziele)")
+    parser.add_argument("--jobs", "-j", type=int, default=4, help="Parallele Stufen")
+    parser.add_argument("--dry-run", action="store_true", help="Nur Plan anzeigen")
+    parser.add_argument("--list", action="store_true", help="Stufen auflisten")
+    args = parser.parse_args()
+
+    if args.list:
+        for stage in STAGES:
+            deps = f" ← {', '.join(stage.deps)}" if stage.deps else ""
+            flags = " [manuell]" if stage.manual else ""
+            print(f"  {stage.name:18s} {stage.description}{deps}{flags}")
+        return
+
+    force = args.force
+    if force is not None and not force:
+        force = [s.name for s in STAGES]
+
+    pipeline = Pipeline(jobs=args.jobs, force=force)
+    manifest = pipeline.run(args.targets, dry_run=args.dry_run)
+
+    failed = manifest["status_counts"].get("failed", 0)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,640 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - Record/Replay für Scraper
+
+Nimmt echte HTTP-Antworten einmal auf (gzip-komprimierte Cassette) und
+spielt sie über einen lokalen HTTP-Server wieder ab. Damit lassen sich
+Scraper ohne Netzwerk end-to-end messen und vergleichen.
+
+Aufnahme und Wiedergabe hängen sich in requests.Session, urllib.request.urlopen
+und (falls installiert) aiohttp.ClientSession ein. Bei der Wiedergabe wird nur
+die URL umgeschrieben, die Requests laufen also wirklich über HTTP:
+    https://overpass-api.de/api/interpreter
+    → http://127.0.0.1:<port>/__replay__/https/overpass-api.de/api/interpreter
+
+Der Server kann Latenz, Rate-Limits (429 + Retry-After) und Fehler
+(Statuscodes oder Verbindungsabbrüche) simulieren, außerdem Overpass-Slots:
+jeder Request an /api/interpreter belegt einen Slot für --slot-seconds,
+sind alle belegt, gibt es 429; /api/status meldet die Slots wie Overpass.
+
+Verwendung:
+    python replay.py record osm scrapers/osm_scraper.py
+    python replay.py replay osm scrapers/osm_scraper.py --latency 80 --jitter 40
+    python replay.py replay osm scrapers/osm_scraper.py --rate-limit 2 --errors 503:0.05,reset:0.01
+    python replay.py replay notices scrapers/notice_scraper.py --sleep-scale 0
+    python replay.py replay osm scrapers/osm_scraper.py --overpass-slots 2 --slot-seconds 5
+    python replay.py list
+
+Cassetten liegen in output/fixtures/<name>.jsonl.gz, Messergebnisse in
+output/benchmarks/replay_<name>_<timestamp>.json.
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import gzip
+import hashlib
+import io
+import json
+import math
+import os
+import random
+import runpy
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from email.message import Message
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from json_writer import write_json
+
+try:
+    import requests
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+try:
+    import aiohttp
+    HAS_AIOHTTP = True
+except ImportError:
+    HAS_AIOHTTP = False
+
+DEEPSCAN_DIR = Path(__file__).parent
+FIXTURES_DIR = DEEPSCAN_DIR / "output" / "fixtures"
+RESULTS_DIR = DEEPSCAN_DIR / "output" / "benchmarks"
+
+REPLAY_PREFIX = "/__replay__/"
+
+# Header, die für die Wiedergabe relevant sind (Rest ist Transport)
+KEPT_HEADERS = ("content-type", "retry-after", "location", "last-modified", "etag")
+
+
+def canonical_url(url: str) -> str:
+    """URL mit sortierten Query-Parametern und dekodiertem Pfad"""
+    parts = urllib.parse.urlsplit(url)
+    query = sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True))
+    path = urllib.parse.unquote(parts.path) or "/"
+    return urllib.parse.urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path,
+                                    urllib.parse.urlencode(query), ""))
+
+
+def request_key(method: str, url: str, body: Optional[bytes]) -> str:
+    digest = hashlib.sha1(body).hexdigest() if body else "-"
+    return f"{method.upper()} {canonical_url(url)} {digest}"
+
+
+def _encode_body(data: Any) -> Optional[bytes]:
+    """Request-Body wie requests/aiohttp ihn senden (Form-Daten urlencoded)"""
+    if data is None:
+        return None
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, str):
+        return data.encode('utf-8')
+    if isinstance(data, dict):
+        return urllib.parse.urlencode(data, doseq=True).encode('utf-8')
+    return None
+
+
+class Cassette:
+    """Aufgezeichnete Antworten; mehrfach gleiche Requests werden der Reihe nach abgespielt"""
+
+    def __init__(self, name: str, directory: Path = FIXTURES_DIR):
+        self.name = name
+        self.path = directory / f"{name}.jsonl.gz"
+        self.entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> "Cassette":
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry["key"], []).append(entry)
+        return self
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            for entries in self.entries.values():
+                for entry in entries:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.path)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self.entries.values())
+
+    def record(self, method: str, url: str, body: Optional[bytes], status: int,
+               headers: Dict[str, str], content: bytes) -> None:
+        entry = {
+            "key": request_key(method, url, body),
+            "method": method.upper(),
+            "url": url,
+            "status": status,
+            "headers": {k.lower(): v for k, v in headers.items() if k.lower() in KEPT_HEADERS},
+            "body": base64.b64encode(content).decode('ascii'),
+            "recorded_at": datetime.now().isoformat(),
+        }
+        with self._lock:
+            self.entries.setdefault(entry["key"], []).append(entry)
+
+    def lookup(self, method: str, url: str, body: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        """Exakter Treffer, sonst gleiche Methode + URL mit anderem Body"""
+        key = request_key(method, url, body)
+        with self._lock:
+            entries = self.entries.get(key)
+            if not entries:
+                prefix = key.rsplit(" ", 1)[0] + " "
+                key = next((k for k in self.entries if k.startswith(prefix)), None)
+                entries = self.entries.get(key) if key else None
+            if not entries:
+                return None
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            return entries[index % len(entries)]
+
+
+class FaultConfig:
+    """Latenz, Rate-Limit und Fehlerinjektion des Replay-Servers"""
+
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0,
+                 rate_limit: float = 0, errors: Dict[str, float] = None, seed: int = 0,
+                 overpass_slots: int = 0, slot_seconds: float = 5):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit = rate_limit          # Requests pro Sekunde und Host (0 = aus)
+        self.errors = errors or {}            # {"503": 0.05, "reset": 0.01}
+        self.overpass_slots = overpass_slots  # Overpass-Slots pro Host (0 = aus)
+        self.slot_seconds = slot_seconds      # so lange bleibt ein Slot nach einem Request belegt
+        self.rng = random.Random(seed)
+        self._next_slot: Dict[str, float] = {}
+        self._busy_slots: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def parse_errors(spec: str) -> Dict[str, float]:
+        errors = {}
+        for part in (spec or "").split(","):
+            if ":" in part:
+                kind, rate = part.split(":", 1)
+                errors[kind.strip()] = float(rate)
+        return errors
+
+    def delay(self) -> float:
+        with self._lock:
+            jitter = self.rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def rate_limited(self, host: str) -> Optional[float]:
+        """Sekunden bis zum nächsten freien Slot, None wenn erlaubt"""
+        if not self.rate_limit:
+            return None
+        interval = 1 / self.rate_limit
+        now = time.monotonic()
+        with self._lock:
+            slot = self._next_slot.get(host, 0.0)
+            if now < slot:
+                return slot - now
+            self._next_slot[host] = now + interval
+        return None
+
+    def overpass_slot(self, host: str) -> Optional[float]:
+        """Belegt einen Overpass-Slot; Sekunden bis zum nächsten freien, None wenn belegt"""
+        now = time.monotonic()
+        with self._lock:
+            busy = [until for until in self._busy_slots.get(host, []) if until > now]
+            if len(busy) >= self.overpass_slots:
+                self._busy_slots[host] = busy
+                return min(busy) - now
+            busy.append(now + self.slot_seconds)
+            self._busy_slots[host] = busy
+        return None
+
+    def overpass_status(self, host: str) -> str:
+        """Text wie https://overpass-api.de/api/status"""
+        now = time.monotonic()
+        utc = datetime.now(timezone.utc).replace(microsecond=0)
+        with self._lock:
+            busy = sorted(until for until in self._busy_slots.get(host, []) if until > now)
+        lines = ["Connected as: 2130706433",
+                 f"Current time: {utc.strftime('%Y-%m-%dT%H:%M:%SZ')}",
+                 "Announced endpoint: none",
+                 f"Rate limit: {self.overpass_slots}"]
+        free = self.overpass_slots - len(busy)
+        if free > 0:
+            lines.append(f"{free} slots available now." if free > 1 else "1 slot available now.")
+        for until in busy:
+            seconds = math.ceil(until - now)
+            after = (utc + timedelta(seconds=seconds)).strftime('%Y-%m-%dT%H:%M:%SZ')
+            lines.append(f"Slot available after: {after}, in {seconds} seconds.")
+        lines.append("Currently running queries (pid, space limit, time limit, start time):")
+        return "\n".join(lines) + "\n"
+
+    def injected_error(self) -> Optional[str]:
+        with self._lock:
+            roll = self.rng.random()
+        threshold = 0.0
+        for kind, rate in self.errors.items():
+            threshold += rate
+            if roll < threshold:
+                return kind
+        return None
+
+
+class ReplayServer:
+    """Lokaler HTTP-Stand-in, der eine Cassette ausliefert"""
+
+    def __init__(self, cassette: Cassette, faults: FaultConfig = None, host: str = "127.0.0.1"):
+        self.cassette = cassette
+        self.faults = faults or FaultConfig()
+        self.stats = {"requests": 0, "served": 0, "misses": 0, "rate_limited": 0,
+                      "slots_exhausted": 0, "errors_injected": 0, "bytes": 0}
+        self.missed_urls: List[str] = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, 0), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def rewrite(self, url: str) -> str:
+        """Original-URL → URL auf dem Replay-Server"""
+        parts = urllib.parse.urlsplit(url)
+        if not parts.scheme.startswith("http") or url.startswith(self.base_url):
+            return url
+        rest = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        return f"{self.base_url}{REPLAY_PREFIX}{parts.scheme}/{parts.netloc}{rest}"
+
+    def _count(self, key: str, value: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += value
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _original_url(self) -> Optional[str]:
+                if not self.path.startswith(REPLAY_PREFIX):
+                    return None
+                scheme, _, rest = self.path[len(REPLAY_PREFIX):].partition("/")
+                netloc, _, path = rest.partition("/")
+                return f"{scheme}://{netloc}/{path}"
+
+            def _send(self, status: int, headers: Dict[str, str], body: bytes) -> None:
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+                server._count("bytes", len(body))
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else None
+                url = self._original_url()
+                server._count("requests")
+                if url is None:
+                    self._send(400, {"Content-Type": "text/plain"}, b"not a replay url")
+                    return
+
+                faults = server.faults
+                parts = urllib.parse.urlsplit(url)
+                if faults.overpass_slots and parts.path.endswith("/api/status"):
+                    status = faults.overpass_status(parts.netloc).encode('utf-8')
+                    self._send(200, {"Content-Type": "text/plain; charset=utf-8"}, status)
+                    return
+                if faults.overpass_slots and parts.path.endswith("/api/interpreter"):
+                    wait = faults.overpass_slot(parts.netloc)
+                    if wait is not None:
+                        server._count("slots_exhausted")
+                        self._send(429, {"Retry-After": str(max(1, math.ceil(wait)))}, b"rate limited")
+                        return
+
+                wait = faults.rate_limited(parts.netloc)
+                if wait is not None:
+                    server._count("rate_limited")
+                    self._send(429, {"Retry-After": str(max(1, round(wait)))}, b"rate limited")
+                    return
+
+                error = faults.injected_error()
+                if error:
+                    server._count("errors_injected")
+                    if error == "reset":
+                        self.close_connection = True
+                        with contextlib.suppress(OSError):
+                            self.connection.shutdown(socket.SHUT_RDWR)
+                        return
+                    self._send(int(error), {"Content-Type": "text/plain"}, b"injected error")
+                    return
+
+                entry = server.cassette.lookup(self.command, url, body)
+                # Latenz per Event statt time.sleep (das kann --sleep-scale verändern)
+                threading.Event().wait(faults.delay())
+                if entry is None:
+                    server._count("misses")
+                    with server._lock:
+                        server.missed_urls.append(f"{self.command} {url}")
+                    self._send(404, {"Content-Type": "text/plain"}, b"not recorded")
+                    return
+
+                server._count("served")
+                self._send(entry["status"], entry["headers"], base64.b64decode(entry["body"]))
+
+            do_GET = do_POST = do_HEAD = do_PUT = do_DELETE = _handle
+
+        return Handler
+
+
+# --- Einhängen in die HTTP-Clients -----------------------------------------
+
+class _RecordedResponse(io.BytesIO):
+    """Ersatz für die bereits gelesene urllib-Antwort"""
+
+    def __init__(self, content: bytes, status: int, url: str, headers: Message):
+        super().__init__(content)
+        self.status = self.code = status
+        self.url = url
+        self.headers = self.msg = headers
+        self.reason = ""
+
+    def getcode(self) -> int:
+        return self.status
+
+    def geturl(self) -> str:
+        return self.url
+
+    def info(self) -> Message:
+        return self.headers
+
+    def getheader(self, name: str, default=None):
+        return self.headers.get(name, default)
+
+
+def _urllib_request(url, data) -> Tuple[str, str, Optional[bytes]]:
+    if isinstance(url, urllib.request.Request):
+        body = url.data if data is None else data
+        return url.get_method(), url.full_url, _encode_body(body)
+    return ("POST" if data is not None else "GET"), url, _encode_body(data)
+
+
+@contextlib.contextmanager
+def recording(cassette: Cassette):
+    """Zeichnet alle Antworten in die Cassette auf (echtes Netzwerk)"""
+    patches = []
+
+    original_urlopen = urllib.request.urlopen
+
+    def urlopen(url, data=None, *args, **kwargs):
+        method, full_url, body = _urllib_request(url, data)
+        try:
+            response = original_urlopen(url, data, *args, **kwargs)
+        except urllib.error.HTTPError as e:
+            content = e.read()
+            cassette.record(method, full_url, body, e.code, dict(e.headers or {}), content)
+            raise urllib.error.HTTPError(e.url, e.code, e.msg, e.headers, io.BytesIO(content))
+        with response:
+            content = response.read()
+            cassette.record(method, full_url, body, response.status, dict(response.headers), content)
+            return _RecordedResponse(content, response.status, response.geturl(), response.headers)
+
+    urllib.request.urlopen = urlopen
+    patches.append((urllib.request, "urlopen", original_urlopen))
+
+    if HAS_REQUESTS:
+        original_request = requests.Session.request
+
+        def session_request(self, method, url, *args, **kwargs):
+            response = original_request(self, method, url, *args, **kwargs)
+            # Key aus dem ersten (nicht umgeleiteten) Request
+            prepared = self.prepare_request(requests.Request(
+                method, url, params=kwargs.get("params"), data=kwargs.get("data"),
+                json=kwargs.get("json")))
+            body = prepared.body.encode('utf-8') if isinstance(prepared.body, str) else prepared.body
+            cassette.record(method, prepared.url, body, response.status_code,
+                            dict(response.headers), response.content)
+            return response
+
+        requests.Session.request = session_request
+        patches.append((requests.Session, "request", original_request))
+
+    if HAS_AIOHTTP:
+        original_aio = aiohttp.ClientSession._request
+
+        async def aio_request(self, method, str_or_url, **kwargs):
+            response = await original_aio(self, method, str_or_url, **kwargs)
+            content = await response.read()
+            url = str(str_or_url)
+            if kwargs.get("params"):
+                url += ("&" if "?" in url else "?") + urllib.parse.urlencode(kwargs["params"], doseq=True)
+            cassette.record(method, url, _encode_body(kwargs.get("data")), response.status,
+                            dict(response.headers), content)
+            return response
+
+        aiohttp.ClientSession._request = aio_request
+        patches.append((aiohttp.ClientSession, "_request", original_aio))
+
+    try:
+        yield cassette
+    finally:
+        for owner, name, original in patches:
+            setattr(owner, name, original)
+
+
+@contextlib.contextmanager
+def replaying(server: ReplayServer, sleep_scale: float = 1.0):
+    """Leitet alle Requests auf den Replay-Server um"""
+    patches = []
+
+    original_urlopen = urllib.request.urlopen
+
+    def urlopen(url, data=None, *args, **kwargs):
+        if isinstance(url, urllib.request.Request):
+            url.full_url = server.rewrite(url.full_url)
+        else:
+            url = server.rewrite(url)
+        return original_urlopen(url, data, *args, **kwargs)
+
+    urllib.request.urlopen = urlopen
+    patches.append((urllib.request, "urlopen", original_urlopen))
+
+    if HAS_REQUESTS:
+        original_request = requests.Session.request
+
+        def session_request(self, method, url, *args, **kwargs):
+            return original_request(self, method, server.rewrite(url), *args, **kwargs)
+
+        requests.Session.request = session_request
+        patches.append((requests.Session, "request", original_request))
+
+    if HAS_AIOHTTP:
+        original_aio = aiohttp.ClientSession._request
+
+        async def aio_request(self, method, str_or_url, **kwargs):
+            return await original_aio(self, method, server.rewrite(str(str_or_url)), **kwargs)
+
+        aiohttp.ClientSession._request = aio_request
+        patches.append((aiohttp.ClientSession, "_request", original_aio))
+
+    # Höflichkeits-Pausen der Scraper (time.sleep(1) etc.) skalieren
+    if sleep_scale != 1.0:
+        original_sleep = time.sleep
+        original_async_sleep = asyncio.sleep
+
+        def scaled_sleep(seconds):
+            original_sleep(seconds * sleep_scale)
+
+        async def scaled_async_sleep(seconds, *args, **kwargs):
+            return await original_async_sleep(seconds * sleep_scale, *args, **kwargs)
+
+        time.sleep = scaled_sleep
+        asyncio.sleep = scaled_async_sleep
+        patches.append((time, "sleep", original_sleep))
+        patches.append((asyncio, "sleep", original_async_sleep))
+
+    try:
+        yield server
+    finally:
+        for owner, name, original in patches:
+            setattr(owner, name, original)
+
+
+def run_script(script: Path, args: List[str]) -> Tuple[int, float]:
+    """Führt ein Scraper-Skript wie `python script args` im selben Prozess aus"""
+    script = script.resolve()
+    saved_argv, saved_path = sys.argv, list(sys.path)
+    sys.argv = [str(script)] + list(args)
+    sys.path.insert(0, str(script.parent))
+    os.environ.setdefault("DEEPSCAN_STAGE", script.stem)
+
+    exit_code = 0
+    start = time.perf_counter()
+    try:
+        runpy.run_path(str(script), run_name="__main__")
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        elapsed = time.perf_counter() - start
+        sys.argv, sys.path[:] = saved_argv, saved_path
+    return exit_code, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record/Replay für DeepScan-Scraper')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help='Antworten aufzeichnen (echtes Netzwerk)')
+    rec.add_argument('cassette', help='Name der Cassette')
+    rec.add_argument('script', help='Scraper-Skript, z.B. scrapers/osm_scraper.py')
+    rec.add_argument('args', nargs=argparse.REMAINDER, help='Argumente für das Skript')
+    rec.add_argument('--append', action='store_true', help='Bestehende Cassette erweitern')
+
+    rep = sub.add_parser('replay', help='Skript gegen die Cassette ausführen')
+    rep.add_argument('cassette', help='Name der Cassette')
+    rep.add_argument('script', help='Scraper-Skript')
+    rep.add_argument('args', nargs=argparse.REMAINDER, help='Argumente für das Skript')
+    rep.add_argument('--latency', type=float, default=0, help='Latenz pro Request in ms')
+    rep.add_argument('--jitter', type=float, default=0, help='Zufällige Abweichung in ms')
+    rep.add_argument('--rate-limit', type=float, default=0, help='Requests/s pro Host, sonst 429')
+    rep.add_argument('--errors', default='', help='Fehlerinjektion, z.B. 503:0.05,reset:0.01')
+    rep.add_argument('--seed', type=int, default=0, help='Seed für Jitter und Fehler')
+    rep.add_argument('--overpass-slots', type=int, default=0,
+                     help='Overpass-Slots pro Host simulieren (/api/status, 429 wenn belegt)')
+    rep.add_argument('--slot-seconds', type=float, default=5, help='Belegung eines Slots pro Request')
+    rep.add_argument('--sleep-scale', type=float, default=1.0,
+                     help='Faktor für time.sleep der Scraper (0 = keine Pausen)')
+
+    sub.add_parser('list', help='Vorhandene Cassetten anzeigen')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for path in sorted(FIXTURES_DIR.glob("*.jsonl.gz")):
+            cassette = Cassette(path.name[:-len(".jsonl.gz")]).load()
+            print(f"{cassette.name:<25} {len(cassette):>5} Antworten  {path.stat().st_size / 1024:>8.1f} KB")
+        return 0
+
+    cassette = Cassette(args.cassette)
+
+    if args.command == 'record':
+        if args.append and cassette.path.exists():
+            cassette.load()
+        with recording(cassette):
+            exit_code, elapsed = run_script(Path(args.script), args.args)
+        cassette.save()
+        print(f"\n[REPLAY] {len(cassette)} Antworten aufgezeichnet → {cassette.path} ({elapsed:.1f}s)")
+        return exit_code
+
+    if not cassette.path.exists():
+        print(f"[REPLAY] Cassette nicht gefunden: {cassette.path}")
+        return 1
+    cassette.load()
+
+    faults = FaultConfig(args.latency, args.jitter, args.rate_limit,
+                         FaultConfig.parse_errors(args.errors), args.seed,
+                         args.overpass_slots, args.slot_seconds)
+    server = ReplayServer(cassette, faults).start()
+    try:
+        with replaying(server, args.sleep_scale):
+            exit_code, elapsed = run_script(Path(args.script), args.args)
+    finally:
+        server.stop()
+
+    result = {
+        "cassette": cassette.name,
+        "script": args.script,
+        "args": args.args,
+        "exit_code": exit_code,
+        "wall_seconds": round(elapsed, 3),
+        "requests_per_second": round(server.stats["requests"] / elapsed, 2) if elapsed else None,
+        "faults": {"latency_ms": args.latency, "jitter_ms": args.jitter, "rate_limit": args.rate_limit,
+                   "errors": faults.errors, "sleep_scale": args.sleep_scale,
+                   "overpass_slots": args.overpass_slots, "slot_seconds": args.slot_seconds},
+        "server": server.stats,
+        "missed_urls": server.missed_urls[:50],
+        "created_at": datetime.now().isoformat(),
+    }
+
+    RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+    output_file = RESULTS_DIR / f"replay_{cassette.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    write_json(output_file, result)
+
+    stats = server.stats
+    print(f"\n[REPLAY] {elapsed:.2f}s, {stats['requests']} Requests "
+          f"({stats['served']} ausgeliefert, {stats['misses']} fehlend, "
+          f"{stats['rate_limited'] + stats['slots_exhausted']} x 429, {stats['errors_injected']} Fehler)")
+    print(f"[REPLAY] Ergebnis: {output_file}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
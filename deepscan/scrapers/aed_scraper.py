@@ -7,12 +7,28 @@ Sammelt AED-Standorte aus OpenStreetMap für MSH-Region
 WICHTIG: Genaue Positionen sind bei AEDs lebensrettend!
 """
 
-import json
+import sys
 import time
 from typing import List, Dict, Any
 from pathlib import Path
 import requests
 
+# Telemetrie, JSON-Writer und PBF-Extrakt aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+from osm_pbf import load_extract
+
+try:
+    from .overpass_cache import OverpassElementCache
+except ImportError:
+    from overpass_cache import OverpassElementCache
+
+try:
+    from .overpass_rate import OverpassRateController
+except ImportError:
+    from overpass_rate import OverpassRateController
+
 
 class AEDScraper:
     """Spezialisierter Scraper für Defibrillatoren (AEDs) aus OpenStreetMap"""
@@ -36,6 +52,9 @@ class AEDScraper:
     def __init__(self, rate_limit: float = 2.0):
         self.rate_limit = rate_limit
         self.session = requests.Session()
+        get_telemetry().instrument_session(self.session)
+        # Taktung nach Serverlast (/api/status, Retry-After), rate_limit nur noch als Fallback
+        self.overpass = OverpassRateController(self.session, fallback_interval=rate_limit)
         self.session.headers.update({
             'User-Agent': 'MSH-Map-AEDScraper/1.0 (Educational Purpose; contact@kolan-systems.de)'
         })
@@ -69,7 +88,7 @@ out center tags;
         for url in self.OVERPASS_URLS:
             try:
                 print(f"   Versuche {url.split('/')[2]}...")
-                response = self.session.post(
+                response = self.overpass.post(
                     url,
                     data={"data": query},
                     timeout=self.REQUEST_TIMEOUT
@@ -253,7 +272,7 @@ out center tags;
             return "Halle (Saale)"
         return "Mansfeld-Südharz"
 
-    def scrape(self) -> List[Dict[str, Any]]:
+    def scrape(self, osm_data: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Hauptmethode: Scraped AED-Standorte"""
 
         print("\n" + "="*60)
@@ -261,13 +280,13 @@ out center tags;
         print("="*60)
         print("[INFO] Genaue Positionen sind bei AEDs lebensrettend!")
 
-        time.sleep(self.rate_limit)
-
-        # Daten holen
-        osm_data = self.fetch_aed_data()
-
-        # Parsen
-        aeds = self.parse_aed_elements(osm_data)
+        # Overpass nur ohne vorab geladene Daten (z.B. aus dem PBF-Extrakt),
+        # dann inkrementell über den Element-Cache
+        if osm_data is None:
+            aeds = OverpassElementCache("aed", self).update(
+                self.fetch_aed_data, self.parse_aed_elements)
+        else:
+            aeds = self.parse_aed_elements(osm_data)
 
         print(f"\n[OK] {len(aeds)} AED-Standorte gefunden")
 
@@ -307,7 +326,10 @@ out center tags;
 def main():
     """Hauptfunktion"""
     scraper = AEDScraper()
-    aeds = scraper.scrape()
+    telemetry = get_telemetry()
+    with telemetry.timer("scrape"):
+        aeds = scraper.scrape(load_extract("aed"))
+    telemetry.count("aeds", len(aeds))
 
     # Output-Verzeichnis
     output_dir = Path(__file__).parent.parent / "output" / "health"
@@ -315,17 +337,16 @@ def main():
 
     # Export
     output_file = output_dir / "defibrillators_osm.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "meta": {
-                "source": "openstreetmap",
-                "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "bbox": scraper.BBOX,
-                "count": len(aeds),
-                "info": "AED-Standorte (Defibrillatoren) für Notfälle"
-            },
-            "data": aeds
-        }, f, ensure_ascii=False, indent=2)
+    write_json(output_file, {
+        "meta": {
+            "source": "openstreetmap",
+            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "bbox": scraper.BBOX,
+            "count": len(aeds),
+            "info": "AED-Standorte (Defibrillatoren) für Notfälle"
+        },
+        "data": aeds
+    })
 
     print(f"\n[SAVED] Gespeichert: {output_file}")
 
@@ -334,8 +355,7 @@ def main():
     flutter_assets.mkdir(parents=True, exist_ok=True)
 
     flutter_file = flutter_assets / "aeds.json"
-    with open(flutter_file, 'w', encoding='utf-8') as f:
-        json.dump(aeds, f, ensure_ascii=False, indent=2)
+    write_json(flutter_file, aeds, pretty=False)
 
     print(f"[SAVED] Flutter-Assets: {flutter_file}")
 
@@ -5,12 +5,33 @@ Civic Scraper via Overpass API
 Sammelt Behörden, Jugendzentren, Soziale Einrichtungen aus OSM für MSH-Region
 """
 
-import json
+import sys
 import time
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 import requests
 
+# Telemetrie, JSON-Writer und PBF-Extrakt aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+from osm_pbf import load_extract
+
+try:
+    from .overpass_cache import OverpassElementCache
+except ImportError:
+    from overpass_cache import OverpassElementCache
+
+try:
+    from .overpass_rate import OverpassRateController
+except ImportError:
+    from overpass_rate import OverpassRateController
+
+try:
+    from .opening_hours import compile_to_json
+except ImportError:
+    from opening_hours import compile_to_json
+
 
 class CivicScraper:
     """Scraper für öffentliche/soziale Einrichtungen aus OpenStreetMap"""
@@ -66,6 +87,9 @@ class CivicScraper:
     def __init__(self, rate_limit: float = 2.0):
         self.rate_limit = rate_limit
         self.session = requests.Session()
+        get_telemetry().instrument_session(self.session)
+        # Taktung nach Serverlast (/api/status, Retry-After), rate_limit nur noch als Fallback
+        self.overpass = OverpassRateController(self.session, fallback_interval=rate_limit)
         self.session.headers.update({
             'User-Agent': 'MSH-Map-CivicScraper/1.0 (Educational Purpose; contact@kolan-systems.de)'
         })
@@ -99,7 +123,7 @@ out center tags;
         for url in self.OVERPASS_URLS:
             try:
                 print(f"   Versuche {url.split('/')[2]}...")
-                response = self.session.post(
+                response = self.overpass.post(
                     url,
                     data={"data": query},
                     timeout=self.REQUEST_TIMEOUT
@@ -223,6 +247,7 @@ out center tags;
                 "website": tags.get('website', tags.get('contact:website', '')),
                 "email": tags.get('email', tags.get('contact:email', '')),
                 "openingHours": tags.get('opening_hours', ''),
+                "openingHoursCompiled": compile_to_json(tags.get('opening_hours')),
                 "description": tags.get('description', ''),
 
                 # Barrierefreiheit
@@ -289,7 +314,7 @@ out center tags;
             return f"{phone[:5]} / {phone[5:7]} {phone[7:9]} {phone[9:]}"
         return phone
 
-    def scrape(self) -> List[Dict[str, Any]]:
+    def scrape(self, osm_data: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Hauptmethode: Scraped Civic-Einrichtungen"""
 
         print("\n" + "="*60)
@@ -297,13 +322,13 @@ out center tags;
         print("   Kategorien: Behörden, Jugendzentren, Soziale Einrichtungen")
         print("="*60)
 
-        time.sleep(self.rate_limit)
-
-        # Daten holen
-        osm_data = self.fetch_civic_data()
-
-        # Parsen
-        locations = self.parse_civic_elements(osm_data)
+        # Overpass nur ohne vorab geladene Daten (z.B. aus dem PBF-Extrakt),
+        # dann inkrementell über den Element-Cache
+        if osm_data is None:
+            locations = OverpassElementCache("civic", self).update(
+                self.fetch_civic_data, self.parse_civic_elements)
+        else:
+            locations = self.parse_civic_elements(osm_data)
 
         print(f"\n[OK] {len(locations)} Civic-Locations gefunden")
 
@@ -356,17 +381,16 @@ out center tags;
             filename = file_mapping.get(category, f'{category}_osm.json')
             filepath = output_dir / filename
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "meta": {
-                        "source": "openstreetmap",
-                        "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "category": category,
-                        "count": len(items),
-                        "region": "Mansfeld-Südharz"
-                    },
-                    "data": items
-                }, f, ensure_ascii=False, indent=2)
+            write_json(filepath, {
+                "meta": {
+                    "source": "openstreetmap",
+                    "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "category": category,
+                    "count": len(items),
+                    "region": "Mansfeld-Südharz"
+                },
+                "data": items
+            })
 
             print(f"   [SAVED] {filename}: {len(items)} Einträge")
 
@@ -374,7 +398,10 @@ out center tags;
 def main():
     """Hauptfunktion"""
     scraper = CivicScraper()
-    locations = scraper.scrape()
+    telemetry = get_telemetry()
+    with telemetry.timer("scrape"):
+        locations = scraper.scrape(load_extract("civic"))
+    telemetry.count("locations", len(locations))
 
     # Output-Verzeichnis
     output_dir = Path(__file__).parent.parent / "output" / "civic"
@@ -382,16 +409,15 @@ def main():
 
     # Gesamtexport
     output_file = output_dir / "civic_all_osm.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "meta": {
-                "source": "openstreetmap",
-                "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "bbox": scraper.BBOX,
-                "count": len(locations)
-            },
-            "data": locations
-        }, f, ensure_ascii=False, indent=2)
+    write_json(output_file, {
+        "meta": {
+            "source": "openstreetmap",
+            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "bbox": scraper.BBOX,
+            "count": len(locations)
+        },
+        "data": locations
+    })
 
     print(f"\n[SAVED] Gespeichert: {output_file}")
 
@@ -403,51 +429,48 @@ def main():
     assets_dir = Path(__file__).parent.parent.parent / "assets" / "data" / "civic"
     assets_dir.mkdir(parents=True, exist_ok=True)
 
-    # Zusammengefasste Dateien für Flutter erstellen
+    # Zusammengefasste Dateien für Flutter erstellen (kompakt)
     # Behörden (townhall + government_office)
     behoerden = [l for l in locations if l.get('type') in ['townhall', 'government_office']]
-    with open(assets_dir / "government.json", 'w', encoding='utf-8') as f:
-        json.dump({
-            "meta": {
-                "source": "openstreetmap",
-                "created_at": time.strftime("%Y-%m-%d"),
-                "version": "1.0",
-                "region": "Mansfeld-Südharz",
-                "total_count": len(behoerden)
-            },
-            "data": behoerden
-        }, f, ensure_ascii=False, indent=2)
+    write_json(assets_dir / "government.json", {
+        "meta": {
+            "source": "openstreetmap",
+            "created_at": time.strftime("%Y-%m-%d"),
+            "version": "1.0",
+            "region": "Mansfeld-Südharz",
+            "total_count": len(behoerden)
+        },
+        "data": behoerden
+    }, pretty=False)
     print(f"\n[ASSETS] government.json: {len(behoerden)} Behörden")
 
     # Jugendzentren
     jugend = [l for l in locations if l.get('type') in ['youth_centre', 'community_centre']
               and l.get('targetAudience') in ['jugend', 'alle']]
-    with open(assets_dir / "youth_centres.json", 'w', encoding='utf-8') as f:
-        json.dump({
-            "meta": {
-                "source": "openstreetmap",
-                "created_at": time.strftime("%Y-%m-%d"),
-                "version": "1.0",
-                "region": "Mansfeld-Südharz",
-                "total_count": len(jugend)
-            },
-            "data": jugend
-        }, f, ensure_ascii=False, indent=2)
+    write_json(assets_dir / "youth_centres.json", {
+        "meta": {
+            "source": "openstreetmap",
+            "created_at": time.strftime("%Y-%m-%d"),
+            "version": "1.0",
+            "region": "Mansfeld-Südharz",
+            "total_count": len(jugend)
+        },
+        "data": jugend
+    }, pretty=False)
     print(f"[ASSETS] youth_centres.json: {len(jugend)} Jugendzentren")
 
     # Soziale Einrichtungen (inkl. Seniorentreffs)
     sozial = [l for l in locations if l.get('type') in ['social_facility', 'senior_meeting']]
-    with open(assets_dir / "social_facilities.json", 'w', encoding='utf-8') as f:
-        json.dump({
-            "meta": {
-                "source": "openstreetmap",
-                "created_at": time.strftime("%Y-%m-%d"),
-                "version": "1.0",
-                "region": "Mansfeld-Südharz",
-                "total_count": len(sozial)
-            },
-            "data": sozial
-        }, f, ensure_ascii=False, indent=2)
+    write_json(assets_dir / "social_facilities.json", {
+        "meta": {
+            "source": "openstreetmap",
+            "created_at": time.strftime("%Y-%m-%d"),
+            "version": "1.0",
+            "region": "Mansfeld-Südharz",
+            "total_count": len(sozial)
+        },
+        "data": sozial
+    }, pretty=False)
     print(f"[ASSETS] social_facilities.json: {len(sozial)} Soziale Einrichtungen")
 
     print("\n" + "="*60)
@@ -2,16 +2,34 @@
 """
 MSH DeepScan - Engagement Scanner
 Findet Tierheime, Vereine, soziale Einrichtungen die Hilfe suchen
+
+Eine Overpass-Query je Kategorie (alle Tags als Union), parallel über
+asyncio.gather, begrenzt durch MAX_CONCURRENT und HOST_INTERVAL je Host.
+Fertige Kategorien landen sofort in places.json (JsonArrayWriter).
 """
 
 import asyncio
 import aiohttp
 import json
+import sys
+import time
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from pathlib import Path
+from urllib.parse import urlparse
 import logging
 
+# Telemetrie und JSON-Writer aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import JsonArrayWriter
+
+try:
+    from .overpass_rate import parse_retry_after
+except ImportError:
+    from overpass_rate import parse_retry_after
+
 logger = logging.getLogger('EngagementScanner')
 
 MSH_BOUNDS = {
@@ -19,6 +37,20 @@ MSH_BOUNDS = {
     'east': 11.70, 'west': 10.90,
 }
 
+OVERPASS_URL = 'https://overpass-api.de/api/interpreter'
+
+# Parallele Queries (Overpass vergibt 2 Slots pro IP)
+MAX_CONCURRENT = 2
+
+# Mindestabstand zwischen zwei Requests an denselben Host (Sekunden)
+HOST_INTERVAL = 1.0
+
+# Wiederholungen nach 429 (wartet Retry-After ab)
+MAX_RETRIES = 2
+
+# Ohne Retry-After nach 429
+DEFAULT_BACKOFF = 10
+
 ENGAGEMENT_SOURCES = {
     'animal_shelter': {
         'osm_tags': ['amenity=animal_shelter', 'amenity=animal_boarding'],
@@ -52,6 +84,38 @@ ENGAGEMENT_SOURCES = {
 }
 
 
+def tag_filter(tag: str) -> str:
+    """'amenity=animal_shelter' → '["amenity"="animal_shelter"]', 'club=*' → '["club"]'"""
+    key, _, value = tag.partition('=')
+    if value in ('', '*'):
+        return f'["{key}"]'
+    return f'["{key}"="{value}"]'
+
+
+class HostRateLimiter:
+    """Mindestabstand je Host für parallele aiohttp-Requests"""
+
+    def __init__(self, interval: float = HOST_INTERVAL):
+        self.interval = interval
+        self._next: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def wait(self, url: str) -> None:
+        host = urlparse(url).netloc
+        async with self._locks[host]:
+            loop = asyncio.get_running_loop()
+            delay = self._next.get(host, 0.0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next[host] = loop.time() + self.interval
+
+    def block(self, url: str, seconds: float) -> None:
+        """Nach 429: Host bis Retry-After sperren"""
+        host = urlparse(url).netloc
+        until = asyncio.get_running_loop().time() + seconds
+        self._next[host] = max(self._next.get(host, 0.0), until)
+
+
 class EngagementScanner:
     """Scanner für Engagement-Möglichkeiten in MSH"""
 
@@ -59,6 +123,7 @@ class EngagementScanner:
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.session = None
+        self.limiter = HostRateLimiter()
         self.results = {'places': [], 'statistics': {}}
 
     async def __aenter__(self):
@@ -76,37 +141,67 @@ class EngagementScanner:
         """Hauptscan-Funktion"""
         logger.info("🤝 Engagement Scanner gestartet")
 
-        # OSM scannen
-        for category, config in ENGAGEMENT_SOURCES.items():
-            for tag in config.get('osm_tags', []):
-                places = await self._query_overpass(tag, category)
+        # OSM scannen: eine Union-Query je Kategorie, parallel; Ergebnisse
+        # werden in Reihenfolge der Fertigstellung gestreamt
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT)
+        with JsonArrayWriter(self.output_dir / 'places.json', header={}, key='places') as writer:
+
+            async def scan_category(category: str, tags: List[str]) -> None:
+                async with semaphore:
+                    places = await self._query_overpass(tags, category)
+                writer.extend(places)
                 self.results['places'].extend(places)
-                await asyncio.sleep(1)
+
+            await asyncio.gather(*(
+                scan_category(category, config['osm_tags'])
+                for category, config in ENGAGEMENT_SOURCES.items()
+                if config.get('osm_tags')
+            ))
 
         # Statistiken
         self._calculate_statistics()
 
-        # Speichern
-        await self._save_results()
-
+        get_telemetry().count("places", len(self.results['places']))
         logger.info(f"✓ {len(self.results['places'])} Orte gefunden")
 
-    async def _query_overpass(self, tag: str, category: str) -> List[Dict]:
-        query = f"""[out:json][timeout:60];
-        (node[{tag}]({MSH_BOUNDS['south']},{MSH_BOUNDS['west']},{MSH_BOUNDS['north']},{MSH_BOUNDS['east']});
-        way[{tag}]({MSH_BOUNDS['south']},{MSH_BOUNDS['west']},{MSH_BOUNDS['north']},{MSH_BOUNDS['east']}););
-        out center;"""
-
-        try:
-            async with self.session.post(
-                'https://overpass-api.de/api/interpreter',
-                data={'data': query}
-            ) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    return self._parse_elements(data.get('elements', []), category)
-        except Exception as e:
-            logger.error(f"Error: {e}")
+    def _build_query(self, tags: List[str]) -> str:
+        """Union aller Tags einer Kategorie (nodes und ways)"""
+        bbox = f"{MSH_BOUNDS['south']},{MSH_BOUNDS['west']},{MSH_BOUNDS['north']},{MSH_BOUNDS['east']}"
+        parts = "\n".join(
+            f"  {kind}{tag_filter(tag)}({bbox});"
+            for tag in tags for kind in ('node', 'way')
+        )
+        return f"[out:json][timeout:60];\n(\n{parts}\n);\nout center;"
+
+    async def _query_overpass(self, tags: List[str], category: str) -> List[Dict]:
+        query = self._build_query(tags)
+        url = OVERPASS_URL
+        telemetry = get_telemetry()
+
+        for attempt in range(MAX_RETRIES + 1):
+            await self.limiter.wait(url)
+            start = time.perf_counter()
+            try:
+                async with self.session.post(url, data={'data': query}) as resp:
+                    body = await resp.read()
+                    elapsed = time.perf_counter() - start
+                    telemetry.record_request(url, resp.status, len(body), elapsed)
+                    telemetry.count(f"query_seconds_{category}", round(elapsed, 3))
+                    if resp.status == 429 and attempt < MAX_RETRIES:
+                        retry = parse_retry_after(resp.headers.get('Retry-After'))
+                        self.limiter.block(url, DEFAULT_BACKOFF if retry is None else retry)
+                        logger.warning(f"{category}: 429, neuer Versuch")
+                        continue
+                    if resp.status == 200:
+                        data = json.loads(body)
+                        places = self._parse_elements(data.get('elements', []), category)
+                        logger.info(f"{category}: {len(places)} Orte in {elapsed:.1f}s")
+                        return places
+                    logger.error(f"{category}: HTTP {resp.status}")
+            except Exception as e:
+                telemetry.record_request(url, None, 0, time.perf_counter() - start, error=True)
+                logger.error(f"{category}: {e}")
+            break
         return []
 
     def _parse_elements(self, elements: List[Dict], category: str) -> List[Dict]:
@@ -144,10 +239,6 @@ class EngagementScanner:
             'timestamp': datetime.now().isoformat(),
         }
 
-    async def _save_results(self):
-        with open(self.output_dir / 'places.json', 'w', encoding='utf-8') as f:
-            json.dump({'places': self.results['places']}, f, ensure_ascii=False, indent=2)
-
 
 async def run_engagement_scan():
     async with EngagementScanner() as scanner:
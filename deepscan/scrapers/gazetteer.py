@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH Gazetteer - Orts- und Straßennamen in Freitext finden
+
+Alle Orte, Ortsteile und Straßen der Region (KNOWN_LOCATIONS/KNOWN_ROADS
+des Notice-Scrapers plus eine aus OSM abgeleitete Namensliste) stecken in
+einem Aho-Corasick-Automaten. find() liefert in einem Durchlauf alle
+Erwähnungen mit Offsets, statt je Name den ganzen Text zu durchsuchen.
+
+- Wortgrenzen: "L 72" trifft nicht in "L 720", "Horn" nicht in "Hornburg"
+- Flexion: Endungen -s, -es, -er, -ern, -ers ("Sangerhausens", "Mansfelder")
+- Schreibvarianten: "B 180" / "B180" / "B-180", "...straße" / "...str." / "...strasse"
+- Überlappungen: der längste Treffer gewinnt ("Lutherstadt Eisleben" vor "Eisleben")
+
+Backends: pyahocorasick (falls installiert), sonst ein Automat in Python
+(ein Dict-Lookup je Zeichen, unabhängig von der Anzahl der Namen).
+
+Namensliste aus OSM bauen (Overpass oder PBF-Extrakt):
+    python gazetteer_scraper.py          # → output/gazetteer/osm_names.json
+
+Verwendung:
+    gazetteer = Gazetteer.from_sources(KNOWN_LOCATIONS, KNOWN_ROADS)
+    for mention in gazetteer.find("Vollsperrung der B 180 zwischen Hettstedt und Walbeck"):
+        mention.start, mention.end, mention.name, mention.kind, mention.lat, mention.lon
+"""
+
+import json
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+OSM_NAMES_FILE = Path(__file__).parent.parent / "output" / "gazetteer" / "osm_names.json"
+
+# Arten in der Reihenfolge ihrer Priorität (Geocoding nimmt den ersten Ort)
+KINDS = ("place", "district", "road")
+
+# Endungen, die an Orts- und Ortsteilnamen noch als Treffer zählen
+INFLECTIONS = ("ers", "ern", "er", "es", "s")
+
+# Kürzere Namen sind als Freitext-Treffer zu unsicher ("Au", "Ost")
+MIN_LENGTH = 3
+
+
+class GazetteerEntry(NamedTuple):
+    name: str
+    kind: str                   # place | district | road
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+
+
+class Mention(NamedTuple):
+    """Eine Erwähnung im Text; entries = alle gleichnamigen Einträge"""
+    start: int
+    end: int
+    text: str
+    entries: Tuple[GazetteerEntry, ...]
+
+    @property
+    def name(self) -> str:
+        return self.entries[0].name
+
+    @property
+    def kind(self) -> str:
+        return self.entries[0].kind
+
+    @property
+    def lat(self) -> Optional[float]:
+        return self.entries[0].lat
+
+    @property
+    def lon(self) -> Optional[float]:
+        return self.entries[0].lon
+
+
+def _lower(text: str) -> str:
+    """Kleinschreibung mit gleicher Länge (Offsets bleiben gültig)"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def normalize_road(ref: str) -> str:
+    """'b180', 'B-180' → 'B 180'"""
+    ref = ref.strip().upper().replace('-', ' ')
+    if len(ref) > 1 and ref[0].isalpha() and ref[1].isdigit():
+        ref = f"{ref[0]} {ref[1:]}"
+    return ' '.join(ref.split())
+
+
+def variants(entry: GazetteerEntry) -> List[str]:
+    """Schreibweisen eines Namens, kleingeschrieben"""
+    name = _lower(entry.name.strip())
+    forms = {name}
+    if entry.kind == "road":
+        compact = name.replace(' ', '')
+        if len(compact) > 1 and compact[0].isalpha() and compact[1:].isdigit():
+            forms |= {f"{compact[0]} {compact[1:]}", compact, f"{compact[0]}-{compact[1:]}"}
+    for suffix in ("straße", "strasse"):
+        if name.endswith(suffix):
+            stem = name[:-len(suffix)]
+            forms |= {stem + "straße", stem + "strasse", stem + "str.", stem + "str"}
+    return [form for form in forms if len(form) >= MIN_LENGTH]
+
+
+class _Automaton:
+    """Aho-Corasick in Python: goto/fail/output je Zustand"""
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.output: List[List[str]] = [[]]
+
+    def add_word(self, word: str, value: str) -> None:
+        state = 0
+        for char in word:
+            nxt = self.goto[state].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[state][char] = nxt
+            state = nxt
+        self.output[state].append(value)
+
+    def make_automaton(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def iter(self, text: str) -> Iterator[Tuple[int, str]]:
+        """(Index des letzten Zeichens, Wert) wie pyahocorasick"""
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for value in output[state]:
+                yield index, value
+
+
+class Gazetteer:
+    """Namen der Region, einmal kompiliert; find() sucht alle in einem Durchlauf"""
+
+    def __init__(self, entries: Iterable[GazetteerEntry]):
+        forms: Dict[str, Dict[GazetteerEntry, None]] = {}
+        for entry in entries:
+            if not entry.name or entry.kind not in KINDS:
+                continue
+            for form in variants(entry):
+                forms.setdefault(form, {})[entry] = None
+        # Orte vor Ortsteilen vor Straßen, sonst Reihenfolge der Quellen
+        self.entries: Dict[str, Tuple[GazetteerEntry, ...]] = {
+            form: tuple(sorted(bucket, key=lambda e: KINDS.index(e.kind)))
+            for form, bucket in forms.items()
+        }
+
+        self._automaton = ahocorasick.Automaton() if HAS_AHOCORASICK else _Automaton()
+        for form in self.entries:
+            self._automaton.add_word(form, form)
+        if self.entries:
+            self._automaton.make_automaton()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def from_sources(cls, known_locations: Dict[str, Tuple[float, float]] = None,
+                     known_roads: Dict[str, Dict[str, Any]] = None,
+                     osm_file: Path = OSM_NAMES_FILE) -> "Gazetteer":
+        """Kuratierte Listen zuerst (deren Koordinaten gewinnen), dann OSM"""
+        entries = [GazetteerEntry(name, "place", *coords)
+                   for name, coords in (known_locations or {}).items()]
+        entries += [GazetteerEntry(normalize_road(ref), "road", road.get("lat"), road.get("lon"))
+                    for ref, road in (known_roads or {}).items()]
+        entries += load_osm_names(osm_file)
+        return cls(entries)
+
+    def _boundary_end(self, text: str, end: int, kind: str) -> Optional[int]:
+        """Ende des Treffers inkl. Flexionsendung, None wenn mitten im Wort"""
+        if end == len(text) or not text[end].isalnum():
+            return end
+        if kind != "road":
+            for suffix in INFLECTIONS:
+                after = end + len(suffix)
+                if text.startswith(suffix, end) and (after == len(text) or not text[after].isalnum()):
+                    return after
+        return None
+
+    def find(self, text: Optional[str]) -> List[Mention]:
+        """Alle Erwähnungen ohne Überlappung, sortiert nach Position"""
+        if not text or not self.entries:
+            return []
+        lowered = _lower(text)
+
+        candidates = []
+        for last, form in self._automaton.iter(lowered):
+            start = last + 1 - len(form)
+            if start > 0 and lowered[start - 1].isalnum():
+                continue
+            entries = self.entries[form]
+            end = self._boundary_end(lowered, last + 1, entries[0].kind)
+            if end is None:
+                continue
+            candidates.append((start, -(last + 1 - start), end, form))
+
+        # Längster Treffer zuerst, danach keine Überlappung mehr
+        mentions = []
+        covered = -1
+        for start, _, end, form in sorted(candidates):
+            if start < covered:
+                continue
+            mentions.append(Mention(start, end, text[start:end], self.entries[form]))
+            covered = end
+        return mentions
+
+    def places(self, text: Optional[str]) -> List[Mention]:
+        return [m for m in self.find(text) if m.kind != "road"]
+
+    def roads(self, text: Optional[str]) -> List[Mention]:
+        return [m for m in self.find(text) if m.kind == "road"]
+
+
+def load_osm_names(path: Path = OSM_NAMES_FILE) -> List[GazetteerEntry]:
+    """OSM-Namensliste (gazetteer_scraper.py), leer wenn noch nicht gebaut"""
+    if not path.exists():
+        return []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [GazetteerEntry(item["name"], item["kind"], item.get("lat"), item.get("lon"))
+            for item in data.get("data", [])]
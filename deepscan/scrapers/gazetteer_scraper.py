@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gazetteer Scraper via Overpass API
+Sammelt Orts-, Ortsteil- und Straßennamen der MSH-Region für den Gazetteer
+(output/gazetteer/osm_names.json, gelesen von gazetteer.load_osm_names)
+"""
+
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import requests
+
+# Telemetrie, JSON-Writer und PBF-Extrakt aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+from osm_pbf import load_extract
+
+try:
+    from .overpass_cache import OverpassElementCache
+except ImportError:
+    from overpass_cache import OverpassElementCache
+
+try:
+    from .overpass_rate import OverpassRateController
+except ImportError:
+    from overpass_rate import OverpassRateController
+
+try:
+    from .gazetteer import KINDS, OSM_NAMES_FILE, normalize_road
+except ImportError:
+    from gazetteer import KINDS, OSM_NAMES_FILE, normalize_road
+
+# place=* Werte, die als Ort gelten (der Rest als Ortsteil)
+PLACE_TOWNS = {"city", "town", "village", "hamlet", "isolated_dwelling"}
+
+
+class GazetteerScraper:
+    """Orts-, Ortsteil- und Straßennamen der MSH-Region aus OpenStreetMap"""
+
+    # Wie MSH_BOUNDS im Notice-Scraper
+    BBOX = {
+        "south": 51.35,
+        "west": 10.90,
+        "north": 51.80,
+        "east": 11.85
+    }
+
+    OVERPASS_URLS = [
+        "https://overpass-api.de/api/interpreter",
+        "https://overpass.kumi.systems/api/interpreter",
+    ]
+    REQUEST_TIMEOUT = 180
+
+    def __init__(self, rate_limit: float = 2.0):
+        self.session = requests.Session()
+        get_telemetry().instrument_session(self.session)
+        self.overpass = OverpassRateController(self.session, fallback_interval=rate_limit)
+        self.session.headers.update({
+            'User-Agent': 'MSH-Map-Gazetteer/1.0 (Educational Purpose; contact@kolan-systems.de)'
+        })
+
+    def build_overpass_query(self) -> str:
+        bbox = f"{self.BBOX['south']},{self.BBOX['west']},{self.BBOX['north']},{self.BBOX['east']}"
+        return f"""
+[out:json][timeout:{self.REQUEST_TIMEOUT}];
+(
+  node["place"~"^(city|town|village|hamlet|isolated_dwelling|suburb|quarter|neighbourhood|locality)$"]({bbox});
+  way["highway"]["name"]({bbox});
+  way["highway"]["ref"]({bbox});
+  relation["boundary"="administrative"]["admin_level"~"^(8|9|10)$"]({bbox});
+);
+out center;
+"""
+
+    def fetch_names_data(self) -> Dict[str, Any]:
+        query = self.build_overpass_query()
+        for url in self.OVERPASS_URLS:
+            host = url.split('/')[2]
+            try:
+                print(f"   Versuche {host}...")
+                response = self.overpass.post(url, data={"data": query}, timeout=self.REQUEST_TIMEOUT)
+                response.raise_for_status()
+                data = response.json()
+                print(f"   [OK] {len(data.get('elements', []))} Elemente")
+                return data
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"   [ERROR] {host}: {type(e).__name__}")
+        print("   [WARN] Alle Server fehlgeschlagen")
+        return {"elements": []}
+
+    def parse_name_elements(self, osm_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Ein Eintrag je Name (Straßen mit ref zusätzlich je Straßennummer)"""
+        names = []
+        for element in osm_data.get('elements', []):
+            tags = element.get('tags', {})
+            center = element.get('center', {})
+            lat = element.get('lat', center.get('lat'))
+            lon = element.get('lon', center.get('lon'))
+            if lat is None or lon is None:
+                continue
+
+            if element['type'] == 'way':
+                kind = "road"
+            elif 'place' in tags:
+                kind = "place" if tags['place'] in PLACE_TOWNS else "district"
+            else:
+                kind = "place" if tags.get('admin_level') == "8" else "district"
+
+            found = [tags.get('name', '')]
+            if kind == "road":
+                found += [normalize_road(ref) for ref in tags.get('ref', '').split(';')]
+            for name in found:
+                if name:
+                    names.append({"name": name, "kind": kind,
+                                  "lat": round(lat, 5), "lon": round(lon, 5)})
+        return names
+
+    def scrape(self, osm_data: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        print("\n" + "="*60)
+        print("[GAZETTEER] Orts- und Straßennamen aus OpenStreetMap")
+        print("="*60)
+
+        if osm_data is None:
+            names = OverpassElementCache("gazetteer", self).update(
+                self.fetch_names_data, self.parse_name_elements)
+        else:
+            names = self.parse_name_elements(osm_data)
+
+        # Straßen bestehen aus vielen Ways: ein Eintrag je Name und ~1 km
+        unique = {}
+        for item in names:
+            key = (item["name"], item["kind"], round(item["lat"], 2), round(item["lon"], 2))
+            unique.setdefault(key, item)
+        names = sorted(unique.values(), key=lambda x: (KINDS.index(x["kind"]), x["name"]))
+
+        counts = {kind: sum(1 for item in names if item["kind"] == kind) for kind in KINDS}
+        print(f"[OK] {len(names)} Namen: " + ", ".join(f"{kind} {count}" for kind, count in counts.items()))
+        return names
+
+
+def main():
+    scraper = GazetteerScraper()
+    telemetry = get_telemetry()
+    with telemetry.timer("scrape"):
+        names = scraper.scrape(load_extract("gazetteer"))
+    telemetry.count("names", len(names))
+
+    OSM_NAMES_FILE.parent.mkdir(parents=True, exist_ok=True)
+    write_json(OSM_NAMES_FILE, {
+        "meta": {
+            "source": "openstreetmap",
+            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "bbox": scraper.BBOX,
+            "count": len(names),
+        },
+        "data": names
+    })
+    print(f"\n[SAVED] {OSM_NAMES_FILE}")
+
+
+if __name__ == "__main__":
+    main()
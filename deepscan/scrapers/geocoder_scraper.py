@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Geocoder Scraper via Overpass API
+Sammelt Orte, Straßen, Hausnummern und benannte POIs der MSH-Region für den
+lokalen Geocoder (output/geocoder/msh_addresses.json, gelesen von local_geocoder.py)
+"""
+
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+# Telemetrie, JSON-Writer und PBF-Extrakt aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+from osm_pbf import load_extract
+
+try:
+    from .overpass_cache import OverpassElementCache
+except ImportError:
+    from overpass_cache import OverpassElementCache
+
+try:
+    from .overpass_rate import OverpassRateController
+except ImportError:
+    from overpass_rate import OverpassRateController
+
+try:
+    from .overpass_planner import OverpassPlanner
+except ImportError:
+    from overpass_planner import OverpassPlanner
+
+try:
+    from .local_geocoder import GEOCODER_FILE, KINDS, distance_km
+except ImportError:
+    from local_geocoder import GEOCODER_FILE, KINDS, distance_km
+
+# place=* Werte, die als Ort gelten (der Rest als Ortsteil)
+PLACE_TOWNS = {"city", "town", "village", "hamlet", "isolated_dwelling"}
+
+# Rasterweite für die Zuordnung zum nächsten Ort (~5 km)
+CELL_DEG = 0.05
+
+
+class GeocoderScraper:
+    """Orte, Straßen, Adressen und POIs der MSH-Region aus OpenStreetMap"""
+
+    # Wie MSH_BOUNDS im Notice-Scraper
+    BBOX = {
+        "south": 51.35,
+        "west": 10.90,
+        "north": 51.80,
+        "east": 11.85
+    }
+
+    OVERPASS_URLS = [
+        "https://overpass-api.de/api/interpreter",
+        "https://overpass.kumi.systems/api/interpreter",
+    ]
+    REQUEST_TIMEOUT = 180
+
+    def __init__(self, rate_limit: float = 2.0):
+        self.session = requests.Session()
+        get_telemetry().instrument_session(self.session)
+        self.overpass = OverpassRateController(self.session, fallback_interval=rate_limit)
+        self.session.headers.update({
+            'User-Agent': 'MSH-Map-Geocoder/1.0 (Educational Purpose; contact@kolan-systems.de)'
+        })
+
+    def build_overpass_query(self, bbox: Dict[str, float] = None) -> str:
+        """Overpass Query für alle Geocoder-Daten (optional für eine Kachel der BBOX)"""
+        bbox = bbox or self.BBOX
+        bbox_str = f"{bbox['south']},{bbox['west']},{bbox['north']},{bbox['east']}"
+        return f"""
+[out:json][timeout:{self.REQUEST_TIMEOUT}];
+(
+  node["place"~"^(city|town|village|hamlet|isolated_dwelling|suburb|quarter|neighbourhood|locality)$"]({bbox_str});
+  way["highway"]["name"]({bbox_str});
+  nwr["addr:housenumber"]["addr:street"]({bbox_str});
+  nwr["addr:housenumber"]["addr:place"]({bbox_str});
+  nwr["tourism"]["name"]({bbox_str});
+  nwr["historic"]["name"]({bbox_str});
+  nwr["amenity"]["name"]({bbox_str});
+  nwr["leisure"]["name"]({bbox_str});
+);
+out center tags;
+"""
+
+    def fetch_geocoder_data(self) -> Dict[str, Any]:
+        print(f"[GEOCODER] Frage Overpass API nach Orten, Straßen und Adressen ab...")
+
+        # Adressen sind viele Elemente: bei Timeouts wird kachelweise abgefragt
+        data = OverpassPlanner("geocoder", self).fetch("geocoder", self.build_overpass_query)
+
+        if data['incomplete']:
+            print(f"   [WARN] Nicht alle Kacheln abgefragt, {len(data['elements'])} Elemente (unvollständig)")
+        else:
+            print(f"   [OK] {len(data['elements'])} Elemente gefunden")
+        return data
+
+    def parse_geocoder_elements(self, osm_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Ein Eintrag je Ort, Straßenabschnitt, Adresse und POI"""
+        items = []
+        for element in osm_data.get('elements', []):
+            tags = element.get('tags', {})
+            center = element.get('center', {})
+            lat = element.get('lat', center.get('lat'))
+            lon = element.get('lon', center.get('lon'))
+            if lat is None or lon is None:
+                continue
+            lat, lon = round(lat, 6), round(lon, 6)
+            towns = [tags.get(key) for key in ('addr:city', 'addr:suburb', 'addr:place') if tags.get(key)]
+
+            street = tags.get('addr:street') or tags.get('addr:place')
+            if tags.get('addr:housenumber') and street:
+                items.append({"kind": "address", "name": f"{street} {tags['addr:housenumber']}",
+                              "street": street, "housenumber": tags['addr:housenumber'],
+                              "lat": lat, "lon": lon, "towns": towns})
+
+            name = tags.get('name')
+            if not name:
+                continue
+            if element['type'] == 'node' and 'place' in tags:
+                items.append({"kind": "place", "name": name, "place": tags['place'],
+                              "lat": lat, "lon": lon, "towns": [name]})
+            elif element['type'] == 'way' and 'highway' in tags:
+                items.append({"kind": "street", "name": name, "lat": lat, "lon": lon, "towns": towns})
+            elif any(key in tags for key in ('tourism', 'historic', 'amenity', 'leisure')):
+                items.append({"kind": "poi", "name": name, "lat": lat, "lon": lon, "towns": towns})
+        return items
+
+    @staticmethod
+    def assign_towns(items: List[Dict[str, Any]]) -> None:
+        """Nächsten Ort und nächsten Ortsteil als Ortsangabe ergänzen (Raster statt O(n²))"""
+        grids = {"town": defaultdict(list), "district": defaultdict(list)}
+        for item in items:
+            if item["kind"] == "place":
+                level = "town" if item.get("place") in PLACE_TOWNS else "district"
+                cell = (int(item["lat"] // CELL_DEG), int(item["lon"] // CELL_DEG))
+                grids[level][cell].append(item)
+
+        def nearest(grid, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+            cy, cx = int(lat // CELL_DEG), int(lon // CELL_DEG)
+            candidates = [place for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+                          for place in grid.get((cy + dy, cx + dx), ())]
+            if not candidates:
+                return None
+            return min(candidates, key=lambda p: distance_km((lat, lon), (p["lat"], p["lon"])))
+
+        for item in items:
+            if item["kind"] == "place":
+                continue
+            for grid in grids.values():
+                place = nearest(grid, item["lat"], item["lon"])
+                if place and place["name"] not in item["towns"]:
+                    item["towns"].append(place["name"])
+
+    def scrape(self, osm_data: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+        print("\n" + "="*60)
+        print("[GEOCODER] Orte, Straßen und Adressen aus OpenStreetMap")
+        print("="*60)
+
+        if osm_data is None:
+            items = OverpassElementCache("geocoder", self).update(
+                self.fetch_geocoder_data, self.parse_geocoder_elements)
+        else:
+            items = self.parse_geocoder_elements(osm_data)
+
+        # Straßen bestehen aus vielen Ways: ein Eintrag je Name und ~1 km
+        unique: Dict[Tuple, Dict[str, Any]] = {}
+        for item in items:
+            if item["kind"] == "street":
+                key = (item["kind"], item["name"], round(item["lat"], 2), round(item["lon"], 2))
+            else:
+                key = (item["kind"], item["name"], item["lat"], item["lon"])
+            unique.setdefault(key, item)
+        items = sorted(unique.values(), key=lambda x: (KINDS.index(x["kind"]), x["name"]))
+
+        self.assign_towns(items)
+
+        counts = {kind: sum(1 for item in items if item["kind"] == kind) for kind in KINDS}
+        print(f"[OK] {len(items)} Einträge: " + ", ".join(f"{kind} {count}" for kind, count in counts.items()))
+        return items
+
+
+def main():
+    scraper = GeocoderScraper()
+    telemetry = get_telemetry()
+    with telemetry.timer("scrape"):
+        items = scraper.scrape(load_extract("geocoder"))
+    telemetry.count("entries", len(items))
+
+    GEOCODER_FILE.parent.mkdir(parents=True, exist_ok=True)
+    write_json(GEOCODER_FILE, {
+        "meta": {
+            "source": "openstreetmap",
+            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "bbox": scraper.BBOX,
+            "count": len(items),
+        },
+        "data": items
+    }, pretty=False)
+    print(f"\n[SAVED] {GEOCODER_FILE}")
+
+
+if __name__ == "__main__":
+    main()
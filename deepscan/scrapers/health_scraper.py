@@ -5,12 +5,34 @@ Health Scraper via Overpass API
 Sammelt Ärzte, Apotheken, Krankenhäuser, Physiotherapeuten aus OSM für MSH-Region
 """
 
-import json
+import sys
 import time
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 import requests
 
+# Telemetrie, JSON-Writer, Keyword-Matcher und PBF-Extrakt aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+from keyword_matcher import KeywordMatcher
+from osm_pbf import load_extract
+
+try:
+    from .overpass_cache import OverpassElementCache
+except ImportError:
+    from overpass_cache import OverpassElementCache
+
+try:
+    from .overpass_rate import OverpassRateController
+except ImportError:
+    from overpass_rate import OverpassRateController
+
+try:
+    from .overpass_planner import OverpassPlanner
+except ImportError:
+    from overpass_planner import OverpassPlanner
+
 
 class HealthScraper:
     """Scraper für Gesundheitseinrichtungen aus OpenStreetMap"""
@@ -95,16 +117,41 @@ class HealthScraper:
         "gp": "allgemein",
     }
 
+    # Fachrichtung aus dem Namen (erste passende gewinnt, "neuro" vor "uro")
+    NAME_SPECIALIZATION = {
+        "zahn": ["zahnarzt", "dental"],
+        "hno": ["hno", "hals-nasen"],
+        "augen": ["augen", "ophthalmolog"],
+        "ortho": ["orthop"],
+        "kinder": ["kinder", "pädia"],
+        "gyn": ["frauen", "gynäko"],
+        "haut": ["haut", "dermato"],
+        "neuro": ["neuro"],
+        "kardio": ["kardio", "herz"],
+        "innere": ["innere", "intern"],
+        "psycho": ["psychi", "psycho"],
+        "uro": ["uro"],
+    }
+
+    SPECIALIZATION_KEYWORDS = KeywordMatcher({
+        "speciality": list(SPECIALIZATION_MAP),
+        "name": NAME_SPECIALIZATION,
+    })
+
     def __init__(self, rate_limit: float = 2.0):
         self.rate_limit = rate_limit
         self.session = requests.Session()
+        get_telemetry().instrument_session(self.session)
+        # Taktung nach Serverlast (/api/status, Retry-After), rate_limit nur noch als Fallback
+        self.overpass = OverpassRateController(self.session, fallback_interval=rate_limit)
         self.session.headers.update({
             'User-Agent': 'MSH-Map-HealthScraper/1.0 (Educational Purpose; contact@kolan-systems.de)'
         })
 
-    def build_overpass_query(self) -> str:
-        """Erstellt Overpass Query für alle Health-Tags"""
-        bbox_str = f"{self.BBOX['south']},{self.BBOX['west']},{self.BBOX['north']},{self.BBOX['east']}"
+    def build_overpass_query(self, bbox: Dict[str, float] = None) -> str:
+        """Erstellt Overpass Query für alle Health-Tags (optional für eine Kachel der BBOX)"""
+        bbox = bbox or self.BBOX
+        bbox_str = f"{bbox['south']},{bbox['west']},{bbox['north']},{bbox['east']}"
 
         tag_queries = []
         for (key, value) in self.HEALTH_TAGS.keys():
@@ -126,32 +173,14 @@ out center tags;
         print(f"[HEALTH] Frage Overpass API nach Gesundheitseinrichtungen ab...")
         print(f"   Bounding Box: {self.BBOX}")
 
-        query = self.build_overpass_query()
-
-        for url in self.OVERPASS_URLS:
-            try:
-                print(f"   Versuche {url.split('/')[2]}...")
-                response = self.session.post(
-                    url,
-                    data={"data": query},
-                    timeout=self.REQUEST_TIMEOUT
-                )
-                response.raise_for_status()
-
-                data = response.json()
-                elements = data.get('elements', [])
-                print(f"   [OK] {len(elements)} Elemente gefunden")
-                return data
-
-            except requests.exceptions.Timeout:
-                print(f"   [TIMEOUT] bei {url.split('/')[2]}")
-                continue
-            except requests.exceptions.RequestException as e:
-                print(f"   [ERROR] {type(e).__name__}")
-                continue
+        # Bei Timeouts auf allen Servern wird die BBOX kachelweise abgefragt
+        data = OverpassPlanner("health", self).fetch("health", self.build_overpass_query)
 
-        print("   [WARN] Alle Server fehlgeschlagen")
-        return {"elements": []}
+        if data['incomplete']:
+            print(f"   [WARN] Nicht alle Kacheln abgefragt, {len(data['elements'])} Elemente (unvollständig)")
+        else:
+            print(f"   [OK] {len(data['elements'])} Elemente gefunden")
+        return data
 
     def extract_coordinates(self, element: Dict[str, Any]) -> tuple:
         """Extrahiert Koordinaten aus OSM Element"""
@@ -172,43 +201,16 @@ out center tags;
         """Extrahiert Fachrichtung aus OSM Tags"""
 
         # healthcare:speciality Tag prüfen
-        speciality = tags.get('healthcare:speciality', '')
-        for osm_spec, msh_spec in self.SPECIALIZATION_MAP.items():
-            if osm_spec in speciality.lower():
-                return msh_spec
+        osm_spec = self.SPECIALIZATION_KEYWORDS.first('speciality', tags.get('healthcare:speciality', ''))
+        if osm_spec:
+            return self.SPECIALIZATION_MAP[osm_spec]
 
         # Zahnarzt erkennen
         if tags.get('amenity') == 'dentist' or tags.get('healthcare') == 'dentist':
             return 'zahn'
 
         # Name-basierte Erkennung
-        name = tags.get('name', '').lower()
-        if 'zahnarzt' in name or 'dental' in name:
-            return 'zahn'
-        if 'hno' in name or 'hals-nasen' in name:
-            return 'hno'
-        if 'augen' in name or 'ophthalmolog' in name:
-            return 'augen'
-        if 'orthop' in name:
-            return 'ortho'
-        if 'kinder' in name or 'pädia' in name:
-            return 'kinder'
-        if 'frauen' in name or 'gynäko' in name:
-            return 'gyn'
-        if 'haut' in name or 'dermato' in name:
-            return 'haut'
-        if 'neuro' in name:
-            return 'neuro'
-        if 'kardio' in name or 'herz' in name:
-            return 'kardio'
-        if 'innere' in name or 'intern' in name:
-            return 'innere'
-        if 'psychi' in name or 'psycho' in name:
-            return 'psycho'
-        if 'uro' in name:
-            return 'uro'
-
-        return None
+        return self.SPECIALIZATION_KEYWORDS.first('name', tags.get('name', ''))
 
     def parse_health_elements(self, osm_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Konvertiert OSM Elemente zu Health Location Format"""
@@ -321,20 +323,20 @@ out center tags;
             return f"{phone[:5]} / {phone[5:7]} {phone[7:9]} {phone[9:]}"
         return phone
 
-    def scrape(self) -> List[Dict[str, Any]]:
+    def scrape(self, osm_data: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Hauptmethode: Scraped Health-Einrichtungen"""
 
         print("\n" + "="*60)
         print("[HEALTH] Health Scraper fuer MSH-Region")
         print("="*60)
 
-        time.sleep(self.rate_limit)
-
-        # Daten holen
-        osm_data = self.fetch_health_data()
-
-        # Parsen
-        locations = self.parse_health_elements(osm_data)
+        # Overpass nur ohne vorab geladene Daten (z.B. aus dem PBF-Extrakt),
+        # dann inkrementell über den Element-Cache
+        if osm_data is None:
+            locations = OverpassElementCache("health", self).update(
+                self.fetch_health_data, self.parse_health_elements)
+        else:
+            locations = self.parse_health_elements(osm_data)
 
         print(f"\n[OK] {len(locations)} Health-Locations gefunden")
 
@@ -387,17 +389,16 @@ out center tags;
             filename = file_mapping.get(category, f'{category}_osm.json')
             filepath = output_dir / filename
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump({
-                    "meta": {
-                        "source": "openstreetmap",
-                        "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                        "category": category,
-                        "count": len(items),
-                        "region": "Mansfeld-Südharz"
-                    },
-                    "data": items
-                }, f, ensure_ascii=False, indent=2)
+            write_json(filepath, {
+                "meta": {
+                    "source": "openstreetmap",
+                    "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "category": category,
+                    "count": len(items),
+                    "region": "Mansfeld-Südharz"
+                },
+                "data": items
+            })
 
             print(f"   [SAVED] {filename}: {len(items)} Eintraege")
 
@@ -405,7 +406,10 @@ out center tags;
 def main():
     """Hauptfunktion"""
     scraper = HealthScraper()
-    locations = scraper.scrape()
+    telemetry = get_telemetry()
+    with telemetry.timer("scrape"):
+        locations = scraper.scrape(load_extract("health"))
+    telemetry.count("locations", len(locations))
 
     # Output-Verzeichnis
     output_dir = Path(__file__).parent.parent / "output" / "health"
@@ -413,16 +417,15 @@ def main():
 
     # Gesamtexport
     output_file = output_dir / "health_all_osm.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "meta": {
-                "source": "openstreetmap",
-                "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "bbox": scraper.BBOX,
-                "count": len(locations)
-            },
-            "data": locations
-        }, f, ensure_ascii=False, indent=2)
+    write_json(output_file, {
+        "meta": {
+            "source": "openstreetmap",
+            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "bbox": scraper.BBOX,
+            "count": len(locations)
+        },
+        "data": locations
+    })
 
     print(f"\n[SAVED] Gespeichert: {output_file}")
 
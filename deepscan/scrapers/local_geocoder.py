@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - Lokaler Geocoder
+
+Forward-Geocoding ohne Netz aus OSM-Daten der Region (Orte, Straßen,
+Hausnummern, benannte POIs; gebaut von geocoder_scraper.py). Jede
+Nominatim-Anfrage kostet mindestens eine Sekunde Rate-Limit, hier sind
+es Dict-Lookups im Mikrosekunden-Bereich. Nominatim bleibt nur Fallback.
+
+- Normalisierung: Kleinschreibung, ß/Umlaute, "Str."/"str" → "strasse",
+  Satzzeichen und Bindestriche → Leerzeichen
+- Index: normalisierter Name → Einträge, (Straße, Hausnummer) → Adressen;
+  Präfixsuche über die sortierten Schlüssel (wie ein Trie) für
+  abgeschnittene Eingaben ("Lutherstadt Eisl")
+- Ortsnamen gehen vor: "Sangerhausen" oder "Eisleben" allein ist der Ort,
+  nicht ein gleichnamiger POI
+- Ort-Disambiguierung: "Hauptstraße 5, Wippra" nimmt die Hauptstraße,
+  deren Orte (addr:city, addr:suburb, nächster Ort) Wippra enthalten;
+  ohne Ort nur eindeutige Treffer (alle innerhalb AMBIGUOUS_KM)
+
+Verwendung:
+    from local_geocoder import get_local_geocoder
+    result = get_local_geocoder().geocode("Göpenstraße 12, Sangerhausen")
+    if result:
+        result.lat, result.lon, result.kind    # address | street | poi | place
+"""
+
+import json
+import re
+from bisect import bisect_left
+from functools import lru_cache
+from math import cos, radians
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+GEOCODER_FILE = Path(__file__).parent.parent / "output" / "geocoder" / "msh_addresses.json"
+
+# Treffer ohne Ortsangabe gelten nur, wenn alle so nah beieinander liegen
+AMBIGUOUS_KM = 2.0
+
+# Ort genannt, aber kein Eintrag mit diesem Ort: nächster Kandidat bis zu dieser Distanz
+TOWN_RADIUS_KM = 5.0
+
+# Präfixsuche erst ab dieser Länge und nur bei wenigen Kandidaten
+MIN_PREFIX = 5
+MAX_PREFIX_KEYS = 8
+
+# Region/Land am Ende von Anfragen ("..., Mansfeld-Südharz, Deutschland")
+REGION_WORDS = {"mansfeld suedharz", "landkreis mansfeld suedharz", "sachsen anhalt",
+                "deutschland", "germany", "msh"}
+
+KINDS = ("address", "poi", "street", "place")
+
+# Namenszusätze, ohne die ein Ort ebenfalls gefunden wird ("Eisleben")
+TOWN_PREFIXES = ("lutherstadt ",)
+
+_UMLAUTS = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue", "ß": "ss"})
+_STREET_ABBR = re.compile(r'(str|straße)\.?(?=\s|\d|$)')
+_NON_WORD = re.compile(r'[^\w]+')
+_HOUSENUMBER = re.compile(r'^(.*\D)\s+(\d+\s*[a-z]?(?:\s*[-/]\s*\d+\s*[a-z]?)?)$')
+_POSTCODE = re.compile(r'\b0\d{4}\b')
+
+
+def normalize(text: str) -> str:
+    """'Göpenstr. 12' → 'goepenstrasse 12'"""
+    text = _STREET_ABBR.sub('strasse ', text.lower())
+    text = text.translate(_UMLAUTS)
+    text = _NON_WORD.sub(' ', text).replace('_', ' ')
+    return ' '.join(text.split())
+
+
+def normalize_housenumber(number: str) -> str:
+    return re.sub(r'\s+', '', number.lower())
+
+
+class GeocodeResult(NamedTuple):
+    lat: float
+    lon: float
+    kind: str
+    name: str
+    town: Optional[str] = None
+
+
+class _Record(NamedTuple):
+    kind: str
+    name: str
+    lat: float
+    lon: float
+    towns: Tuple[str, ...]          # normalisiert
+    town: Optional[str]             # Anzeigename des ersten Orts
+
+    def result(self) -> GeocodeResult:
+        return GeocodeResult(self.lat, self.lon, self.kind, self.name, self.town)
+
+
+def distance_km(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Equirectangular reicht für Distanzen innerhalb des Landkreises"""
+    dlat = (a[0] - b[0]) * 111.2
+    dlon = (a[1] - b[1]) * 111.2 * cos(radians((a[0] + b[0]) / 2))
+    return (dlat * dlat + dlon * dlon) ** 0.5
+
+
+class LocalGeocoder:
+    """Index über Orte, Straßen, Adressen und POIs; alle Lookups ohne Netz"""
+
+    def __init__(self, items: Iterable[Dict[str, Any]]):
+        self.names: Dict[str, List[_Record]] = {}
+        self.addresses: Dict[Tuple[str, str], List[_Record]] = {}
+        self.towns: Dict[str, _Record] = {}
+
+        for item in items:
+            kind = item.get("kind")
+            if kind not in KINDS or item.get("lat") is None or item.get("lon") is None:
+                continue
+            towns = [town for town in item.get("towns", []) if town]
+            record = _Record(kind, item["name"], item["lat"], item["lon"],
+                             tuple(dict.fromkeys(normalize(town) for town in towns)),
+                             towns[0] if towns else None)
+            if kind == "address":
+                key = (normalize(item["street"]), normalize_housenumber(item["housenumber"]))
+                self.addresses.setdefault(key, []).append(record)
+                continue
+            key = normalize(item["name"])
+            self.names.setdefault(key, []).append(record)
+            if kind == "place":
+                self.towns.setdefault(key, record)
+                for prefix in TOWN_PREFIXES:
+                    if key.startswith(prefix):
+                        self.towns.setdefault(key[len(prefix):], record)
+
+        self._keys = sorted(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names) + len(self.addresses)
+
+    @classmethod
+    def load(cls, path: Path = GEOCODER_FILE) -> "LocalGeocoder":
+        """Leerer Geocoder, wenn die Daten noch nicht gebaut sind"""
+        if not path.exists():
+            return cls([])
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls([])
+        return cls(data.get("data", []))
+
+    # --- Lookup ------------------------------------------------------------
+
+    def _prefix(self, key: str) -> List[_Record]:
+        """Einträge, deren Name mit `key` beginnt (nur bei wenigen Schlüsseln)"""
+        if len(key) < MIN_PREFIX:
+            return []
+        start = bisect_left(self._keys, key)
+        keys = []
+        for candidate in self._keys[start:start + MAX_PREFIX_KEYS + 1]:
+            if not candidate.startswith(key):
+                break
+            keys.append(candidate)
+        if not keys or len(keys) > MAX_PREFIX_KEYS:
+            return []
+        return [record for candidate in keys for record in self.names[candidate]]
+
+    def _pick(self, records: List[_Record], town: Optional[_Record]) -> Optional[_Record]:
+        """Ort-Disambiguierung; None wenn mehrdeutig"""
+        if not records:
+            return None
+        records = sorted(records, key=lambda r: KINDS.index(r.kind))
+        if town is not None:
+            town_key = normalize(town.name)
+            in_town = [r for r in records if town_key in r.towns]
+            if in_town:
+                return in_town[0]
+            nearest = min(records, key=lambda r: distance_km((r.lat, r.lon), (town.lat, town.lon)))
+            if distance_km((nearest.lat, nearest.lon), (town.lat, town.lon)) <= TOWN_RADIUS_KM:
+                return nearest
+            return None
+        first = records[0]
+        if all(distance_km((r.lat, r.lon), (first.lat, first.lon)) <= AMBIGUOUS_KM for r in records[1:]):
+            return first
+        return None
+
+    def _lookup(self, text: str, town: Optional[_Record]) -> Optional[_Record]:
+        key = normalize(text)
+        if not key:
+            return None
+
+        match = _HOUSENUMBER.match(key)
+        if match:
+            street, number = match.group(1).strip(), normalize_housenumber(match.group(2))
+            found = self._pick(self.addresses.get((street, number), []), town)
+            if found:
+                return found
+            key = street      # Hausnummer unbekannt: Straße reicht
+
+        # Genau ein Ortsname: der Ort selbst, nicht ein gleichnamiger POI
+        if key in self.towns:
+            return self.towns[key]
+
+        records = self.names.get(key)
+        if records is None:
+            records = self._prefix(key)
+        return self._pick(records, town)
+
+    def geocode(self, query: Optional[str]) -> Optional[GeocodeResult]:
+        """
+        "Straße Nr, Ort", "Name, Ort", "Ort" oder ein einzelner Name;
+        None wenn nichts oder nichts Eindeutiges gefunden wurde
+        """
+        if not query:
+            return None
+        parts = [part.strip() for part in _POSTCODE.sub(' ', query).split(',')]
+        parts = [part for part in parts if part and normalize(part) not in REGION_WORDS]
+        if not parts:
+            return None
+
+        # Ortsangabe: letzter Teil, der ein bekannter Ort ist
+        town = None
+        for index in range(len(parts) - 1, -1, -1):
+            candidate = self.towns.get(normalize(parts[index]))
+            if candidate is not None and len(parts) > 1:
+                town = candidate
+                del parts[index]
+                break
+
+        for part in parts:
+            found = self._lookup(part, town)
+            if found:
+                return found.result()
+        return town.result() if town else None
+
+
+@lru_cache(maxsize=1)
+def get_local_geocoder() -> LocalGeocoder:
+    """Einmal je Prozess geladen"""
+    return LocalGeocoder.load()
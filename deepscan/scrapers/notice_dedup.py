@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Notice Dedup Engine
+
+Duplikat-Erkennung für Notices ohne paarweisen Vollvergleich:
+- Titel werden einmal normalisiert und tokenisiert (gecacht)
+- Präfix-Filter: Wörter global nach Häufigkeit sortiert (seltenste zuerst).
+  Jaccard > 0.7 verlangt mehr als 0.7·|Titel| gemeinsame Wörter, also
+  teilen zwei ähnliche Titel mindestens ein Wort aus ihren Präfixen der
+  Länge |Titel| - floor(0.7·|Titel|). Indiziert werden nur diese seltenen
+  Präfix-Wörter, häufige Wörter ("in", "der", Ortsnamen) erzeugen keine
+  Kandidaten mehr
+- Größenfilter: Jaccard > 0.7 ist nur möglich, wenn die Wortanzahlen nah beieinander liegen
+- Präfix-Matches (erste 30 Zeichen) über eine Hash-Map
+
+Ergebnis ist identisch zum bisherigen paarweisen Vergleich
+(tests/test_notice_dedup.py).
+"""
+
+import math
+import re
+from collections import Counter, defaultdict
+from typing import Iterable, Optional
+
+
+# Jaccard-Schwelle für Titel-Duplikate (strikt größer)
+JACCARD_THRESHOLD = 0.7
+
+# Länge des Titel-Präfix für den Abgleich mit bestehenden Notices
+PREFIX_LENGTH = 30
+
+
+def normalize_title(title: str) -> str:
+    """Kleinschreibung, Whitespace zusammenfassen"""
+    return re.sub(r'\s+', ' ', title.lower().strip())
+
+
+def title_words(notice: dict) -> frozenset:
+    return frozenset(normalize_title(notice["title"]).split())
+
+
+def title_prefix(notice: dict) -> str:
+    """Präfix-Key für merge_with_existing"""
+    return notice.get("title", "").lower()[:PREFIX_LENGTH]
+
+
+class TitleIndex:
+    """Präfix-gefilterter Inverted Index über Titel-Wortmengen für Jaccard-Kandidaten"""
+
+    def __init__(self, threshold: float = JACCARD_THRESHOLD,
+                 frequencies: Optional[Counter] = None):
+        self.threshold = threshold
+        # Globale Wortreihenfolge; unbekannte Wörter gelten als selten
+        self.frequencies = frequencies if frequencies is not None else Counter()
+        self.word_sets: list[frozenset] = []
+        self.postings: dict[str, list[int]] = defaultdict(list)
+
+    @classmethod
+    def for_titles(cls, word_sets: Iterable[frozenset],
+                   threshold: float = JACCARD_THRESHOLD) -> "TitleIndex":
+        """Index mit Wort-Häufigkeiten aus allen Titeln, die später abgefragt werden"""
+        frequencies = Counter()
+        for words in word_sets:
+            frequencies.update(words)
+        return cls(threshold, frequencies)
+
+    def prefix(self, words: frozenset) -> list[str]:
+        """Seltenste Wörter; jeder Titel mit Jaccard > threshold teilt eins davon"""
+        needed = math.floor(self.threshold * len(words)) + 1
+        ordered = sorted(words, key=lambda word: (self.frequencies[word], word))
+        return ordered[:len(words) - needed + 1]
+
+    def add(self, words: frozenset) -> None:
+        entry = len(self.word_sets)
+        self.word_sets.append(words)
+        for word in self.prefix(words):
+            self.postings[word].append(entry)
+
+    def has_similar(self, words: frozenset) -> bool:
+        """True wenn ein gespeicherter Titel Jaccard > threshold hat"""
+        if not words:
+            return False
+
+        size = len(words)
+        checked = set()
+        for word in self.prefix(words):
+            for entry in self.postings.get(word, ()):
+                if entry in checked:
+                    continue
+                checked.add(entry)
+                other = self.word_sets[entry]
+                other_size = len(other)
+                # Jaccard ≤ min/max der Mengengrößen
+                if min(size, other_size) / max(size, other_size) <= self.threshold:
+                    continue
+                shared = len(words & other)
+                if shared / (size + other_size - shared) > self.threshold:
+                    return True
+        return False
+
+
+def deduplicate_notices(notices: list[dict]) -> list[dict]:
+    """Entfernt Duplikate basierend auf Titel-Ähnlichkeit"""
+    word_sets = [title_words(notice) for notice in notices]
+    index = TitleIndex.for_titles(word_sets)
+    unique = []
+
+    for notice, words in zip(notices, word_sets):
+        if not index.has_similar(words):
+            unique.append(notice)
+            index.add(words)
+
+    return unique
+
+
+def merge_notices(manual_notices: list[dict], new_notices: list[dict]) -> list[dict]:
+    """Merged neue in manuelle Notices (Präfix-Match, Manuelle haben Priorität)"""
+    merged = manual_notices.copy()
+
+    # Präfix → erster Eintrag mit diesem Präfix (wie die bisherige lineare Suche)
+    by_prefix: dict[str, dict] = {}
+    for existing in merged:
+        by_prefix.setdefault(title_prefix(existing), existing)
+
+    for new in new_notices:
+        existing = by_prefix.get(title_prefix(new))
+        if existing is not None:
+            # Update source_urls wenn neue Quelle gefunden
+            if new.get("source_url"):
+                existing_urls = existing.get("source_urls", [])
+                if existing.get("source_url"):
+                    existing_urls.append(existing["source_url"])
+                if new["source_url"] not in existing_urls:
+                    existing_urls.append(new["source_url"])
+                    existing["source_urls"] = list(set(existing_urls))
+            continue
+
+        merged.append(new)
+        by_prefix[title_prefix(new)] = new
+
+    return merged
@@ -19,6 +19,7 @@ Usage:
 
 import json
 import re
+import sys
 import time
 import argparse
 from datetime import datetime, timedelta
@@ -36,6 +37,27 @@ except ImportError:
     HAS_REQUESTS = False
     print("HINWEIS: requests/beautifulsoup4 nicht installiert - nutze urllib")
 
+try:
+    from . import notice_dedup
+except ImportError:
+    import notice_dedup
+
+try:
+    from .gazetteer import KINDS, Gazetteer, normalize_road
+except ImportError:
+    from gazetteer import KINDS, Gazetteer, normalize_road
+
+try:
+    from .local_geocoder import get_local_geocoder
+except ImportError:
+    from local_geocoder import get_local_geocoder
+
+# Telemetrie, JSON-Writer und HTML-Parsing aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+from html_parsing import parse_html, parse_listing
+
 # Pfade
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent.parent
@@ -51,6 +73,11 @@ HEADERS = {
 TIMEOUT = 15
 DELAY_BETWEEN_REQUESTS = 1.5  # Sekunden
 
+# Listen-Container je Quelle (Tags, Klassen-Muster); nur diese werden geparst
+SANGERHAUSEN_LISTING = (["article", "div"], re.compile(r"news|meldung|article"))
+EISLEBEN_LISTING = (["article", "div", "li"], re.compile(r"news|item|meldung"))
+BLOG_LISTING = (["article", "div"], re.compile(r"post|entry"))
+
 # Bounding Box für MSH (erweitert für Randgebiete wie Walbeck)
 MSH_BOUNDS = {
     "min_lat": 51.35,
@@ -93,31 +120,71 @@ KNOWN_LOCATIONS = {
     "Arnstein": (51.6500, 11.4000),
 }
 
+# Gazetteer-Arten nach Priorität fürs Geocoding
+KINDS_PRIORITY = {kind: index for index, kind in enumerate(KINDS)}
+
+# Bundes-, Landes- und Kreisstraßen ("B 180", "L 224", "K 2123")
+ROAD_REF = re.compile(r'^[BLK] \d+$')
+
+
+_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """KNOWN_LOCATIONS, KNOWN_ROADS und OSM-Namensliste, einmal kompiliert"""
+    global _gazetteer
+    if _gazetteer is None:
+        _gazetteer = Gazetteer.from_sources(KNOWN_LOCATIONS, KNOWN_ROADS)
+    return _gazetteer
+
 
 def fetch_url(url: str) -> Optional[str]:
     """Holt HTML-Content von einer URL"""
+    telemetry = get_telemetry()
+    start = time.perf_counter()
+    recorded = False
     try:
         if HAS_REQUESTS:
             response = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
+            telemetry.record_request(url, response.status_code, len(response.content),
+                                     time.perf_counter() - start)
+            recorded = True
             response.raise_for_status()
             return response.text
         else:
             req = urllib.request.Request(url, headers=HEADERS)
             with urllib.request.urlopen(req, timeout=TIMEOUT) as response:
-                return response.read().decode('utf-8')
+                body = response.read()
+                telemetry.record_request(url, response.status, len(body), time.perf_counter() - start)
+                recorded = True
+                return body.decode('utf-8')
     except Exception as e:
+        if not recorded:
+            telemetry.record_request(url, None, 0, time.perf_counter() - start, error=True)
         print(f"  Fehler beim Abrufen von {url}: {e}")
         return None
 
 
 def geocode_location(query: str) -> Optional[tuple[float, float]]:
-    """Geocodiert einen Ort via Nominatim"""
-    # Zuerst in bekannten Orten suchen
-    for name, coords in KNOWN_LOCATIONS.items():
-        if name.lower() in query.lower():
-            return coords
-
-    # Nominatim API
+    """Geocodiert einen Ort: Gazetteer, lokaler Geocoder, zuletzt Nominatim"""
+    # Zuerst im Gazetteer suchen (Orte vor Ortsteilen vor Straßen)
+    telemetry = get_telemetry()
+    # Straßennamen ohne Ort sind mehrdeutig ("Bahnhofstraße"), nur eindeutige zählen
+    mentions = [m for m in get_gazetteer().find(query)
+                if m.lat is not None and (m.kind != "road" or len(m.entries) == 1)]
+    if mentions:
+        best = min(mentions, key=lambda m: KINDS_PRIORITY[m.kind])
+        telemetry.cache("geocode_known_locations", hit=True)
+        return (best.lat, best.lon)
+    telemetry.cache("geocode_known_locations", hit=False)
+
+    # Straßen, Adressen und POIs aus den lokalen OSM-Daten
+    result = get_local_geocoder().geocode(query)
+    telemetry.cache("geocode_local", hit=result is not None)
+    if result:
+        return (result.lat, result.lon)
+
+    # Nominatim API (nur noch Fallback)
     try:
         time.sleep(1)  # Rate limiting
         params = {
@@ -131,8 +198,11 @@ def geocode_location(query: str) -> Optional[tuple[float, float]]:
         req = urllib.request.Request(url, headers={
             "User-Agent": "MSH-Map-Notice-Scraper/1.0"
         })
+        start = time.perf_counter()
         with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
+            body = response.read()
+            telemetry.record_request(url, response.status, len(body), time.perf_counter() - start)
+            data = json.loads(body.decode())
             if data:
                 lat = float(data[0]["lat"])
                 lon = float(data[0]["lon"])
@@ -178,19 +248,30 @@ def extract_road_and_locations(text: str) -> dict:
     result = {
         "road": None,
         "locations": [],
+        "mentions": [],
         "start": None,
         "end": None
     }
 
-    # Straßenbezeichnung finden (B 180, L 224, K 2123, etc.)
-    road_match = re.search(r'([BLK]\s?\d+)', text, re.IGNORECASE)
-    if road_match:
-        result["road"] = road_match.group(1).upper().replace(" ", " ")
+    # Orte und Straßen in einem Durchlauf (mit Offsets)
+    mentions = get_gazetteer().find(text)
+    result["mentions"] = [
+        {"name": m.name, "kind": m.kind, "start": m.start, "end": m.end} for m in mentions
+    ]
+
+    # Straßenbezeichnung finden (B 180, L 224, K 2123, etc.), unbekannte per Regex
+    roads = [m.name for m in mentions if m.kind == "road" and ROAD_REF.match(m.name)]
+    if roads:
+        result["road"] = roads[0]
+    else:
+        road_match = re.search(r'\b([BLK]\s?\d+)\b', text, re.IGNORECASE)
+        if road_match:
+            result["road"] = normalize_road(road_match.group(1))
 
-    # Orte finden
-    for location in KNOWN_LOCATIONS.keys():
-        if location.lower() in text.lower():
-            result["locations"].append(location)
+    # Orte finden (Reihenfolge im Text, ohne Wiederholungen)
+    for mention in mentions:
+        if mention.kind != "road" and mention.name not in result["locations"]:
+            result["locations"].append(mention.name)
 
     # Start/Ende ermitteln (oft durch "-" oder "zwischen" getrennt)
     between_match = re.search(
@@ -253,7 +334,8 @@ def scrape_msh_baustellenservice() -> list[dict]:
         print("  BeautifulSoup nicht verfügbar - überspringe HTML-Parsing")
         return notices
 
-    soup = BeautifulSoup(html, "html.parser")
+    # Kompletter Baum, die Überschriften werden über Geschwister ausgewertet
+    soup = parse_html(html)
 
     # Suche nach Tabellen oder Listen mit Baustelleninfos
     # Die Struktur variiert - hier ein generischer Ansatz
@@ -335,10 +417,12 @@ def scrape_sangerhausen() -> list[dict]:
         if not html or not HAS_REQUESTS:
             continue
 
-        soup = BeautifulSoup(html, "html.parser")
+        # Nur die Meldungs-Container aufbauen
+        tags, class_ = SANGERHAUSEN_LISTING
+        soup = parse_listing(html, tags, class_)
 
         # Suche nach Meldungen
-        for article in soup.find_all(["article", "div"], class_=re.compile(r"news|meldung|article")):
+        for article in soup.find_all(tags, class_=class_):
             title_elem = article.find(["h2", "h3", "a"])
             if not title_elem:
                 continue
@@ -392,10 +476,11 @@ def scrape_eisleben() -> list[dict]:
         print("  Konnte Seite nicht laden oder BeautifulSoup fehlt")
         return notices
 
-    soup = BeautifulSoup(html, "html.parser")
+    tags, class_ = EISLEBEN_LISTING
+    soup = parse_listing(html, tags, class_)
 
     # Ähnliche Logik wie Sangerhausen
-    for item in soup.find_all(["article", "div", "li"], class_=re.compile(r"news|item|meldung")):
+    for item in soup.find_all(tags, class_=class_):
         title_elem = item.find(["h2", "h3", "a", "strong"])
         if not title_elem:
             continue
@@ -456,9 +541,10 @@ def scrape_local_blogs() -> list[dict]:
                 print(f"  Gefunden (Regex): {match[0]} {match[1]}")
             continue
 
-        soup = BeautifulSoup(html, "html.parser")
+        tags, class_ = BLOG_LISTING
+        soup = parse_listing(html, tags, class_)
 
-        for post in soup.find_all(["article", "div"], class_=re.compile(r"post|entry")):
+        for post in soup.find_all(tags, class_=class_):
             title_elem = post.find(["h2", "h3", "a"], class_=re.compile(r"title|entry-title"))
             if not title_elem:
                 continue
@@ -490,31 +576,8 @@ def scrape_local_blogs() -> list[dict]:
 
 
 def deduplicate_notices(notices: list[dict]) -> list[dict]:
-    """Entfernt Duplikate basierend auf Titel-Ähnlichkeit"""
-    unique = []
-    seen_titles = set()
-
-    for notice in notices:
-        # Normalisierter Titel für Vergleich
-        norm_title = re.sub(r'\s+', ' ', notice["title"].lower().strip())
-
-        # Prüfe auf ähnliche Titel
-        is_duplicate = False
-        for seen in seen_titles:
-            # Jaccard-Ähnlichkeit der Wörter
-            words1 = set(norm_title.split())
-            words2 = set(seen.split())
-            if words1 and words2:
-                similarity = len(words1 & words2) / len(words1 | words2)
-                if similarity > 0.7:
-                    is_duplicate = True
-                    break
-
-        if not is_duplicate:
-            unique.append(notice)
-            seen_titles.add(norm_title)
-
-    return unique
+    """Entfernt Duplikate basierend auf Titel-Ähnlichkeit (Jaccard > 0.7)"""
+    return notice_dedup.deduplicate_notices(notices)
 
 
 def merge_with_existing(new_notices: list[dict], existing_path: Path) -> list[dict]:
@@ -543,28 +606,7 @@ def merge_with_existing(new_notices: list[dict], existing_path: Path) -> list[di
             notice["id"] = f"notice_{max_id:03d}"
 
     # Merge: Manuelle haben Priorität
-    merged = manual_notices.copy()
-
-    for new in new_notices:
-        # Prüfe ob ähnlicher Eintrag bereits existiert
-        exists = False
-        for existing in merged:
-            if existing.get("title", "").lower()[:30] == new.get("title", "").lower()[:30]:
-                exists = True
-                # Update source_urls wenn neue Quelle gefunden
-                if new.get("source_url"):
-                    existing_urls = existing.get("source_urls", [])
-                    if existing.get("source_url"):
-                        existing_urls.append(existing["source_url"])
-                    if new["source_url"] not in existing_urls:
-                        existing_urls.append(new["source_url"])
-                        existing["source_urls"] = list(set(existing_urls))
-                break
-
-        if not exists:
-            merged.append(new)
-
-    return merged
+    return notice_dedup.merge_notices(manual_notices, new_notices)
 
 
 def main():
@@ -600,13 +642,18 @@ def main():
     # Deduplizieren
     print(f"\n[Deduplizierung]")
     print(f"  Vorher: {len(all_notices)} Einträge")
-    all_notices = deduplicate_notices(all_notices)
+    telemetry = get_telemetry()
+    telemetry.count("notices_scraped", len(all_notices))
+    with telemetry.timer("deduplicate"):
+        all_notices = deduplicate_notices(all_notices)
+    telemetry.count("notices_unique", len(all_notices))
     print(f"  Nachher: {len(all_notices)} Einträge")
 
     # Optional: Mit bestehenden Notices mergen
     if args.merge and NOTICES_FILE.exists():
         print(f"\n[Merge mit bestehenden Notices]")
-        all_notices = merge_with_existing(all_notices, NOTICES_FILE)
+        with telemetry.timer("merge"):
+            all_notices = merge_with_existing(all_notices, NOTICES_FILE)
         print(f"  Gesamt: {len(all_notices)} Einträge")
 
     # Ergebnis
@@ -634,8 +681,7 @@ def main():
     }
 
     OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, ensure_ascii=False, indent=2)
+    write_json(OUTPUT_FILE, output_data)
 
     print(f"\nGespeichert: {OUTPUT_FILE}")
 
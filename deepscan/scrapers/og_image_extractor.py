@@ -11,12 +11,18 @@ Usage:
 
 import json
 import re
+import sys
 import time
 from pathlib import Path
 from urllib.parse import urljoin, urlparse
 
 import requests
-from bs4 import BeautifulSoup
+
+# Telemetrie, JSON-Writer und HTML-Parsing aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+from html_parsing import find_meta
 
 # Pfade
 SCRIPT_DIR = Path(__file__).parent
@@ -33,6 +39,13 @@ HEADERS = {
 TIMEOUT = 10
 DELAY_BETWEEN_REQUESTS = 1.0  # Sekunden
 
+# Meta-Tags in Prioritätsreihenfolge: og:image, twitter:image, og:image:url
+IMAGE_META = [
+    ("property", "og:image"),
+    ("name", "twitter:image"),
+    ("property", "og:image:url"),
+]
+
 
 def extract_og_image(url: str) -> str | None:
     """
@@ -45,30 +58,14 @@ def extract_og_image(url: str) -> str | None:
         Die Bild-URL oder None
     """
     try:
+        start = time.perf_counter()
         response = requests.get(url, headers=HEADERS, timeout=TIMEOUT, allow_redirects=True)
+        get_telemetry().record_request(url, response.status_code, len(response.content),
+                                       time.perf_counter() - start)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Versuche verschiedene Meta-Tags
-        og_image = None
-
-        # 1. Standard og:image
-        meta = soup.find("meta", property="og:image")
-        if meta and meta.get("content"):
-            og_image = meta["content"]
-
-        # 2. Fallback: twitter:image
-        if not og_image:
-            meta = soup.find("meta", {"name": "twitter:image"})
-            if meta and meta.get("content"):
-                og_image = meta["content"]
-
-        # 3. Fallback: og:image:url
-        if not og_image:
-            meta = soup.find("meta", property="og:image:url")
-            if meta and meta.get("content"):
-                og_image = meta["content"]
+        # Nur die Meta-Tags parsen, der Body wird im Normalfall nicht angefasst
+        og_image = find_meta(response.text, IMAGE_META)
 
         # Relative URLs auflösen
         if og_image and not og_image.startswith(("http://", "https://")):
@@ -180,8 +177,7 @@ def main():
     # Speichern
     data["events"] = enriched_events
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_json(OUTPUT_FILE, data)
 
     print("\n" + "=" * 60)
     print(f"Fertig! Bilder gefunden: {found_count}/{len(events)}")
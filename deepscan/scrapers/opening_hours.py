@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Kompilierte Öffnungszeiten
+
+Übersetzt OSM opening_hours einmal in eine Wochen-Bitmap: je Wochentag
+96 Bits (Viertelstunden, Bit 0 = 00:00-00:15) plus optional eine eigene
+Bitmap für Feiertage (PH). "Jetzt geöffnet?" ist danach ein Bit-Test.
+
+Unterstützt (deckt die MSH-Daten fast vollständig ab):
+- 24/7, Wochentage und -bereiche (Mo-Fr, Fr-Mo, Mo,We), PH
+- Zeitspannen, auch mehrere und über Mitternacht (22:00-02:00)
+- off/closed, Kommentare in "...", zusätzliche Regeln mit ","
+- spätere Regeln ersetzen frühere für dieselben Tage
+
+Monate, Datumsbereiche, Schulferien (SH), Sonnenzeiten, "+" usw. lassen
+sich nicht als Woche darstellen → compile_opening_hours() gibt None zurück,
+der Rohstring bleibt die Quelle.
+
+Export neben dem Rohstring (Hex, da 96 Bit für JSON/Dart-Integer zu groß):
+    "openingHours": "Mo-Fr 08:00-18:00; PH off",
+    "openingHoursCompiled": {"week": ["<24 Hex-Zeichen>", ...7], "ph": "0"}
+
+Batch-Abfrage für viele POIs:
+    index = OpeningHoursIndex(compile_opening_hours(p.get("openingHours")) for p in pois)
+    open_now = index.open_at(datetime.now())      # Indizes der geöffneten POIs
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+SLOTS_PER_DAY = 96
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+
+WEEKDAYS = {"Mo": 0, "Tu": 1, "We": 2, "Th": 3, "Fr": 4, "Sa": 5, "Su": 6}
+
+_DAY = r'(?:Mo|Tu|We|Th|Fr|Sa|Su|PH)'
+_DAY_ITEM = rf'{_DAY}(?:\s*-\s*{_DAY})?'
+_SELECTOR = re.compile(rf'^{_DAY_ITEM}(?:\s*,\s*{_DAY_ITEM})*(?=\s|:|$)')
+_SPAN = re.compile(r'^(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})')
+_MODIFIER = re.compile(r'^(off|closed|open)\b', re.IGNORECASE)
+_COMMENT = re.compile(r'"[^"]*"')
+
+
+class CompiledHours(NamedTuple):
+    """Wochen-Bitmap: week[0] = Montag; ph None = Feiertage wie Wochentage"""
+    week: Tuple[int, ...]
+    ph: Optional[int] = None
+
+    def bits_for(self, day: date, holiday: Optional[bool] = None) -> int:
+        if holiday is None:
+            holiday = is_public_holiday(day)
+        if holiday and self.ph is not None:
+            return self.ph
+        return self.week[day.weekday()]
+
+    def is_open(self, when: datetime, holiday: Optional[bool] = None) -> bool:
+        return bool(self.bits_for(when.date(), holiday) >> slot_of(when) & 1)
+
+    def open_on(self, weekday: int) -> bool:
+        return bool(self.week[weekday])
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            "week": [format(bits, "x") for bits in self.week],
+            "ph": format(self.ph, "x") if self.ph is not None else None,
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "CompiledHours":
+        ph = data.get("ph")
+        return cls(tuple(int(bits, 16) for bits in data["week"]),
+                   int(ph, 16) if ph is not None else None)
+
+
+def slot_of(when: datetime) -> int:
+    """Viertelstunde des Tages (0-95)"""
+    return when.hour * 4 + when.minute // 15
+
+
+def _span_bits(start: int, end: int) -> int:
+    """Bits für [start, end) in Minuten, angebrochene Viertelstunden zählen als offen"""
+    first = start // 15
+    last = min(-(-end // 15), SLOTS_PER_DAY)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def _parse_days(selector: str) -> Tuple[Set[int], bool]:
+    """'Mo-Fr,Su,PH' → ({0,1,2,3,4,6}, True)"""
+    days: Set[int] = set()
+    holiday = False
+    for item in selector.split(','):
+        item = item.strip()
+        if item == "PH":
+            holiday = True
+            continue
+        if '-' in item:
+            first, last = (WEEKDAYS.get(part.strip()) for part in item.split('-'))
+            if first is None or last is None:
+                raise ValueError(item)
+            day = first
+            days.add(day)
+            while day != last:
+                day = (day + 1) % 7
+                days.add(day)
+        else:
+            days.add(WEEKDAYS[item])
+    return days, holiday
+
+
+def _parse_rule(rule: str) -> Optional[List[Tuple[Set[int], bool, Optional[int], int, Optional[str], bool]]]:
+    """
+    Eine Regel (zwischen ';') in (Tage, PH, Zeit-Bits, Bits nach Mitternacht,
+    Modifier, additiv) zerlegen; mit ',' angehängte Regeln folgen als additiv.
+    None wenn die Syntax nicht unterstützt wird.
+    """
+    parsed = []
+    additive = False
+    text = _COMMENT.sub('', rule).strip()
+    while text:
+        # Ohne Tage gilt die Regel für die ganze Woche
+        days: Set[int] = set(range(7))
+        holiday = False
+        selector = _SELECTOR.match(text)
+        if selector:
+            try:
+                days, holiday = _parse_days(selector.group(0))
+            except (KeyError, ValueError):
+                return None
+            text = text[selector.end():].lstrip(' :')
+
+        bits = None
+        spill = 0
+        while True:
+            span = _SPAN.match(text)
+            if not span:
+                break
+            h1, m1, h2, m2 = (int(value) for value in span.groups())
+            if h1 > 24 or h2 > 48 or m1 > 59 or m2 > 59:
+                return None
+            start, end = h1 * 60 + m1, h2 * 60 + m2
+            if end <= start:
+                end += 24 * 60          # über Mitternacht
+            bits = (bits or 0) | _span_bits(start, min(end, 24 * 60))
+            if end > 24 * 60:
+                spill |= _span_bits(0, end - 24 * 60)
+            text = text[span.end():].lstrip()
+            if text.startswith(',') and _SPAN.match(text[1:].lstrip()):
+                text = text[1:].lstrip()
+                continue
+            break
+
+        modifier = None
+        match = _MODIFIER.match(text)
+        if match:
+            modifier = match.group(1).lower()
+            text = text[match.end():].lstrip()
+
+        if not selector and bits is None and modifier is None:
+            return None  # weder Tage noch Zeiten erkannt
+        parsed.append((days, holiday, bits, spill, modifier, additive))
+
+        if text.startswith(','):
+            text = text[1:].lstrip()
+            additive = True
+            continue
+        if text:
+            return None
+    return parsed
+
+
+@lru_cache(maxsize=4096)
+def compile_opening_hours(raw: Optional[str]) -> Optional[CompiledHours]:
+    """OSM opening_hours → CompiledHours, None wenn leer oder nicht darstellbar"""
+    if not raw or not isinstance(raw, str):
+        return None
+    text = raw.strip()
+    if text == "24/7":
+        return CompiledHours((FULL_DAY,) * 7)
+    if '||' in text:
+        return None
+
+    week = [0] * 7
+    spill = [0] * 7      # Stunden nach Mitternacht, je Ursprungstag
+    ph: Optional[int] = None
+    rules = [rule.strip() for rule in text.split(';') if rule.strip()]
+    if not rules:
+        return None
+
+    for rule in rules:
+        if rule == "24/7":
+            week, spill = [FULL_DAY] * 7, [0] * 7
+            continue
+        parsed = _parse_rule(rule)
+        if parsed is None:
+            return None
+        for days, holiday, bits, extra, modifier, additive in parsed:
+            closed = modifier in ("off", "closed")
+            whole_day = bits is None
+            if whole_day:
+                bits = FULL_DAY
+
+            for day in sorted(days):
+                if closed:
+                    week[day] &= ~bits
+                    if whole_day:
+                        spill[day] = 0
+                elif additive:
+                    week[day] |= bits
+                    spill[day] |= extra
+                else:
+                    week[day] = bits
+                    spill[day] = extra
+            if holiday:
+                if closed:
+                    ph = (ph or 0) & ~bits
+                elif additive and ph is not None:
+                    ph |= bits
+                else:
+                    ph = bits
+
+    for day in range(7):
+        week[(day + 1) % 7] |= spill[day]
+    return CompiledHours(tuple(week), ph)
+
+
+def compile_to_json(raw: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Export-Form für openingHoursCompiled, None wenn nicht kompilierbar"""
+    compiled = compile_opening_hours(raw)
+    return compiled.to_json() if compiled else None
+
+
+# --- Feiertage Sachsen-Anhalt ------------------------------------------------
+
+def _easter(year: int) -> date:
+    """Ostersonntag (Gauß/Anonymer Gregorianischer Algorithmus)"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+@lru_cache(maxsize=16)
+def public_holidays(year: int) -> Set[date]:
+    """Gesetzliche Feiertage in Sachsen-Anhalt"""
+    easter = _easter(year)
+    return {
+        date(year, 1, 1),                   # Neujahr
+        date(year, 1, 6),                   # Heilige Drei Könige
+        easter - timedelta(days=2),         # Karfreitag
+        easter + timedelta(days=1),         # Ostermontag
+        date(year, 5, 1),                   # Tag der Arbeit
+        easter + timedelta(days=39),        # Christi Himmelfahrt
+        easter + timedelta(days=50),        # Pfingstmontag
+        date(year, 10, 3),                  # Tag der Deutschen Einheit
+        date(year, 10, 31),                 # Reformationstag
+        date(year, 12, 25),
+        date(year, 12, 26),
+    }
+
+
+def is_public_holiday(day: date) -> bool:
+    return day in public_holidays(day.year)
+
+
+# --- Batch-Abfragen ------------------------------------------------------------
+
+def _mask(indices: Iterable[int], size: int) -> int:
+    """Indizes → Integer-Bitmaske über alle POIs"""
+    buffer = bytearray(size // 8 + 1)
+    for index in indices:
+        buffer[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _indices(mask: int) -> List[int]:
+    result = []
+    while mask:
+        low = mask & -mask
+        result.append(low.bit_length() - 1)
+        mask ^= low
+    return result
+
+
+class OpeningHoursIndex:
+    """
+    Transponierte Bitmaps: je Wochentag und Viertelstunde eine Bitmaske
+    über alle POIs. open_at() ist damit ein Lookup plus zwei Bit-Operationen,
+    unabhängig von der Anzahl der POIs.
+    """
+
+    def __init__(self, hours: Iterable[Optional[CompiledHours]]):
+        # Gleiche Öffnungszeiten teilen sich eine Maske ("Mo-Fr 08:00-18:00"
+        # kommt hundertfach vor), jede Bitmap wird nur einmal zerlegt
+        groups: Dict[CompiledHours, List[int]] = {}
+        self.size = 0
+        for index, compiled in enumerate(hours):
+            self.size = index + 1
+            if compiled is not None:
+                groups.setdefault(compiled, []).append(index)
+
+        self.known = 0
+        self.has_ph = 0
+        self.slots = [[0] * SLOTS_PER_DAY for _ in range(7)]
+        self.ph_slots = [0] * SLOTS_PER_DAY
+        self.open_days = [0] * 7
+
+        for compiled, indices in groups.items():
+            members = _mask(indices, self.size)
+            self.known |= members
+            for day, bits in enumerate(compiled.week):
+                if bits:
+                    self.open_days[day] |= members
+                for slot in _indices(bits):
+                    self.slots[day][slot] |= members
+            if compiled.ph is not None:
+                self.has_ph |= members
+                for slot in _indices(compiled.ph):
+                    self.ph_slots[slot] |= members
+
+    def open_mask(self, when: datetime, holiday: Optional[bool] = None) -> int:
+        """Bitmaske der POIs, die zu `when` geöffnet sind"""
+        if holiday is None:
+            holiday = is_public_holiday(when.date())
+        slot = slot_of(when)
+        mask = self.slots[when.weekday()][slot]
+        if holiday:
+            mask = (mask & ~self.has_ph) | self.ph_slots[slot]
+        return mask
+
+    def open_at(self, when: datetime, holiday: Optional[bool] = None) -> List[int]:
+        """Indizes der geöffneten POIs"""
+        return _indices(self.open_mask(when, holiday))
+
+    def open_on(self, weekday: int) -> List[int]:
+        """Indizes der POIs, die an diesem Wochentag (0 = Montag) irgendwann öffnen"""
+        return _indices(self.open_days[weekday])
+
+    def unknown(self) -> List[int]:
+        """POIs ohne (kompilierbare) Öffnungszeiten"""
+        return _indices(~self.known & ((1 << self.size) - 1))
@@ -3,15 +3,31 @@
 """
 Opening Hours Batch Scraper
 Holt ALLE Öffnungszeiten aus MSH in einer Abfrage und matched mit bestehenden POIs.
+
+Nur für Dateien ohne eigenen Scraper (Nightlife). Gesundheit und Behörden
+bekommen ihre Öffnungszeiten in health_merge.py bzw. civic_scraper.py,
+damit jede Datei genau einen Schreiber hat.
 """
 
 import json
+import sys
 import os
 import time
 from typing import Dict, List, Any
+from pathlib import Path
 from math import radians, sin, cos, sqrt, atan2
 import requests
 
+# Telemetrie und JSON-Writer aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+
+try:
+    from .opening_hours import compile_to_json
+except ImportError:
+    from opening_hours import compile_to_json
+
 
 class OpeningHoursBatch:
     """Batch-Scraper für Öffnungszeiten"""
@@ -30,6 +46,7 @@ class OpeningHoursBatch:
 
     def __init__(self):
         self.session = requests.Session()
+        get_telemetry().instrument_session(self.session)
         self.session.headers.update({
             'User-Agent': 'MSH-Map-OpeningHours/1.0 (Educational; contact@kolan-systems.de)'
         })
@@ -123,12 +140,16 @@ out center tags;
 
         enriched = 0
         already_has = 0
+        compiled = 0    # nur kompilierte Form ergänzt
 
         for item in items:
             # Hat bereits Öffnungszeiten?
             existing = item.get('openingHours') or item.get('opening_hours') or item.get('openingHoursRaw')
             if existing and str(existing).strip():
                 already_has += 1
+                if 'openingHoursCompiled' not in item:
+                    item['openingHoursCompiled'] = compile_to_json(existing)
+                    compiled += 1
                 continue
 
             # Koordinaten
@@ -166,21 +187,22 @@ out center tags;
                         item['openingHours'] = hours
                     else:
                         item['opening_hours'] = hours
+                    item['openingHoursCompiled'] = compile_to_json(hours)
                     enriched += 1
 
         # Speichern
-        if enriched > 0:
+        if enriched > 0 or compiled > 0:
             output_data = wrapper if wrapper else items
             if wrapper:
                 wrapper['data'] = items
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, ensure_ascii=False, indent=2)
+            write_json(filepath, output_data)
 
         return {
             'total': len(items),
             'enriched': enriched,
             'already_has': already_has,
+            'compiled': compiled,
             'missing': len(items) - enriched - already_has
         }
 
@@ -190,14 +212,6 @@ out center tags;
         base_path = os.path.join(os.path.dirname(__file__), '..', '..', 'assets', 'data')
 
         files = [
-            os.path.join(base_path, 'health', 'doctors.json'),
-            os.path.join(base_path, 'health', 'pharmacies.json'),
-            os.path.join(base_path, 'health', 'hospitals.json'),
-            os.path.join(base_path, 'health', 'physiotherapy.json'),
-            os.path.join(base_path, 'health', 'care_services.json'),
-            os.path.join(base_path, 'civic', 'government.json'),
-            os.path.join(base_path, 'civic', 'youth_centres.json'),
-            os.path.join(base_path, 'civic', 'social_facilities.json'),
             os.path.join(base_path, 'nightlife', 'venues.json'),
         ]
 
@@ -234,6 +248,8 @@ out center tags;
                 total_enriched += result['enriched']
                 print(f"  {filename:30} +{result['enriched']:3} new (had: {result['already_has']}, missing: {result['missing']})")
 
+        get_telemetry().count("opening_hours_added", total_enriched)
+
         print("\n" + "="*60)
         print(f"DONE - {total_enriched} opening hours added")
         print("="*60)
@@ -6,12 +6,28 @@ Reichert bestehende POI-Daten mit Öffnungszeiten aus OSM an.
 """
 
 import json
+import sys
 import os
-import time
 from typing import Dict, List, Any, Optional
+from pathlib import Path
 from math import radians, sin, cos, sqrt, atan2
 import requests
 
+# Telemetrie und JSON-Writer aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+
+try:
+    from .overpass_rate import OverpassRateController
+except ImportError:
+    from overpass_rate import OverpassRateController
+
+try:
+    from .opening_hours import compile_to_json
+except ImportError:
+    from opening_hours import compile_to_json
+
 
 class OpeningHoursEnricher:
     """Reichert POIs mit Öffnungszeiten aus OSM an"""
@@ -23,6 +39,9 @@ class OpeningHoursEnricher:
     def __init__(self, rate_limit: float = 1.0):
         self.rate_limit = rate_limit
         self.session = requests.Session()
+        get_telemetry().instrument_session(self.session)
+        # Taktung nach Serverlast (/api/status, Retry-After), rate_limit nur noch als Fallback
+        self.overpass = OverpassRateController(self.session, fallback_interval=rate_limit)
         self.session.headers.update({
             'User-Agent': 'MSH-Map-OpeningHours/1.0 (Educational; contact@kolan-systems.de)'
         })
@@ -61,7 +80,7 @@ out tags;
 """
 
         try:
-            response = self.session.post(
+            response = self.overpass.post(
                 self.OVERPASS_URL,
                 data={"data": query},
                 timeout=self.REQUEST_TIMEOUT
@@ -119,6 +138,7 @@ out tags;
         enriched_count = 0
         already_has_count = 0
         not_found_count = 0
+        compiled_count = 0    # nur kompilierte Form ergänzt
 
         for i, item in enumerate(items):
             name = item.get('name', 'Unknown')
@@ -140,13 +160,15 @@ out tags;
 
             if existing and str(existing).strip():
                 already_has_count += 1
+                if 'openingHoursCompiled' not in item:
+                    item['openingHoursCompiled'] = compile_to_json(existing)
+                    compiled_count += 1
                 continue
 
             # OSM abfragen
             print(f"  [{i+1}/{len(items)}] {name[:30]:30}", end=" ", flush=True)
 
             if not dry_run:
-                time.sleep(self.rate_limit)
                 hours = self.query_osm_opening_hours(lat, lon, name)
             else:
                 hours = None
@@ -157,6 +179,7 @@ out tags;
                     item['openingHours'] = hours
                 else:
                     item['opening_hours'] = hours
+                item['openingHoursCompiled'] = compile_to_json(hours)
 
                 enriched_count += 1
                 print(f"[FOUND] {hours[:40]}...")
@@ -171,13 +194,12 @@ out tags;
         self.stats['not_found'] += not_found_count
 
         # Speichern
-        if not dry_run and enriched_count > 0:
+        if not dry_run and (enriched_count > 0 or compiled_count > 0):
             output_data = wrapper if wrapper else items
             if wrapper:
                 wrapper['data'] = items
 
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, ensure_ascii=False, indent=2)
+            write_json(filepath, output_data)
 
             print(f"\n[SAVED] {enriched_count} new opening hours added")
 
@@ -185,7 +207,8 @@ out tags;
             'total': len(items),
             'enriched': enriched_count,
             'already_has': already_has_count,
-            'not_found': not_found_count
+            'not_found': not_found_count,
+            'compiled': compiled_count
         }
 
     def enrich_all(self, base_path: str = None, dry_run: bool = False):
@@ -5,11 +5,38 @@ OpenStreetMap Scraper via Overpass API
 Sammelt POIs aus der erweiterten MSH-Region
 """
 
-import json
+import sys
 import time
 from typing import List, Dict, Any
+from pathlib import Path
 import requests
 
+# Telemetrie, JSON-Writer und PBF-Extrakt aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+from osm_pbf import load_extract
+
+try:
+    from .overpass_cache import OverpassElementCache
+except ImportError:
+    from overpass_cache import OverpassElementCache
+
+try:
+    from .overpass_rate import OverpassRateController
+except ImportError:
+    from overpass_rate import OverpassRateController
+
+try:
+    from .overpass_planner import OverpassPlanner
+except ImportError:
+    from overpass_planner import OverpassPlanner
+
+try:
+    from .opening_hours import compile_to_json
+except ImportError:
+    from opening_hours import compile_to_json
+
 
 class OSMScraper:
     """Scraper für OpenStreetMap Daten via Overpass API"""
@@ -98,21 +125,26 @@ class OSMScraper:
     def __init__(self, rate_limit: float = 2.0):
         """
         Args:
-            rate_limit: Sekunden zwischen Requests (Overpass empfiehlt >1s)
+            rate_limit: Sekunden zwischen Requests, falls /api/status nicht verfügbar (Overpass empfiehlt >1s)
         """
         self.rate_limit = rate_limit
         self.session = requests.Session()
+        get_telemetry().instrument_session(self.session)
+        # Taktung nach Serverlast (/api/status, Retry-After), rate_limit nur noch als Fallback
+        self.overpass = OverpassRateController(self.session, fallback_interval=rate_limit)
         self.session.headers.update({
             'User-Agent': 'MSH-Map-Scraper/2.0 (Educational Purpose; contact@kolan-systems.de)'
         })
 
-    def build_overpass_query(self, tag_subset: List[tuple] = None) -> str:
+    def build_overpass_query(self, tag_subset: List[tuple] = None, bbox: Dict[str, float] = None) -> str:
         """Erstellt Overpass QL Query für POI-Typen
 
         Args:
             tag_subset: Optional Liste von (key, value) Tuples für Teil-Query
+            bbox: Optional Ausschnitt der BBOX (Kachel des Query-Planers)
         """
-        bbox_str = f"{self.BBOX['south']},{self.BBOX['west']},{self.BBOX['north']},{self.BBOX['east']}"
+        bbox = bbox or self.BBOX
+        bbox_str = f"{bbox['south']},{bbox['west']},{bbox['north']},{bbox['east']}"
 
         # Sammle OSM Tags (alle oder Subset)
         tags_to_query = tag_subset if tag_subset else list(self.TAG_MAPPING.keys())
@@ -169,46 +201,28 @@ out center tags;
         print(f"   Timeout: {self.REQUEST_TIMEOUT}s pro Query")
 
         all_elements = []
+        incomplete = False
         tag_groups = self.get_tag_groups()
+        # Bei Timeouts auf allen Servern wird die BBOX kachelweise abgefragt
+        planner = OverpassPlanner("osm", self)
 
         for group_name, tags in tag_groups.items():
             print(f"\n   📦 Gruppe '{group_name}' ({len(tags)} Tags)...")
 
-            query = self.build_overpass_query(tags)
-            success = False
-
-            # Versuche verschiedene Server
-            for url in self.OVERPASS_URLS:
-                try:
-                    response = self.session.post(
-                        url,
-                        data={"data": query},
-                        timeout=self.REQUEST_TIMEOUT
-                    )
-                    response.raise_for_status()
-
-                    data = response.json()
-                    elements = data.get('elements', [])
-                    all_elements.extend(elements)
-                    print(f"      ✅ {len(elements)} Elemente von {url.split('/')[2]}")
-                    success = True
-                    break
-
-                except requests.exceptions.Timeout:
-                    print(f"      ⏱️  Timeout bei {url.split('/')[2]}")
-                    continue
-                except requests.exceptions.RequestException as e:
-                    print(f"      ❌ Fehler bei {url.split('/')[2]}: {type(e).__name__}")
-                    continue
-
-            if not success:
-                print(f"      ⚠️  Gruppe '{group_name}' fehlgeschlagen")
-
-            # Rate limiting zwischen Gruppen
-            time.sleep(self.rate_limit)
+            data = planner.fetch(group_name, lambda bbox: self.build_overpass_query(tags, bbox))
+            elements = data['elements']
+            all_elements.extend(elements)
+
+            if data['incomplete']:
+                incomplete = True
+                print(f"      ⚠️  Gruppe '{group_name}' unvollständig ({len(elements)} Elemente)")
+            else:
+                print(f"      ✅ {len(elements)} Elemente")
 
         print(f"\n✅ Gesamt: {len(all_elements)} OSM-Elemente gefunden")
-        return {"elements": all_elements}
+        if incomplete:
+            print("⚠️  Nicht alle Kacheln abgefragt, Datensatz unvollständig")
+        return {"elements": all_elements, "incomplete": incomplete}
 
     def map_category(self, tags: Dict[str, str]) -> str:
         """Mappt OSM Tags zu MSH Kategorie"""
@@ -270,8 +284,13 @@ out center tags;
                 "website": tags.get('website', tags.get('contact:website', '')),
                 "phone": tags.get('phone', tags.get('contact:phone', '')),
                 "openingHours": tags.get('opening_hours', ''),
+                "openingHoursCompiled": compile_to_json(tags.get('opening_hours')),
                 "description": tags.get('description', ''),
 
+                # Identifikatoren für den ID-Join beim Merge
+                "wikidata": tags.get('wikidata', ''),
+                "ref": tags.get('ref', ''),
+
                 # Tags
                 "tags": [
                     tags.get('tourism', ''),
@@ -304,21 +323,20 @@ out center tags;
         else:
             return ''
 
-    def scrape(self) -> List[Dict[str, Any]]:
+    def scrape(self, osm_data: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Hauptmethode: Scraped OSM und gibt Locations zurück"""
 
         print("\n" + "="*60)
         print("🌍 OpenStreetMap Scraper")
         print("="*60)
 
-        # Rate Limiting
-        time.sleep(self.rate_limit)
-
-        # OSM Daten holen
-        osm_data = self.fetch_osm_data()
-
-        # Parsen
-        locations = self.parse_osm_elements(osm_data)
+        # Overpass nur ohne vorab geladene Daten (z.B. aus dem PBF-Extrakt),
+        # dann inkrementell über den Element-Cache
+        if osm_data is None:
+            locations = OverpassElementCache("osm", self).update(
+                self.fetch_osm_data, self.parse_osm_elements)
+        else:
+            locations = self.parse_osm_elements(osm_data)
 
         print(f"\n✅ {len(locations)} Locations erfolgreich geparst")
 
@@ -338,19 +356,21 @@ out center tags;
 def main():
     """Test-Funktion"""
     scraper = OSMScraper()
-    locations = scraper.scrape()
+    telemetry = get_telemetry()
+    with telemetry.timer("scrape"):
+        locations = scraper.scrape(load_extract("osm"))
+    telemetry.count("locations", len(locations))
 
     # Als JSON speichern
     output_file = "output/raw/osm_data.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "meta": {
-                "source": "openstreetmap",
-                "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "bbox": scraper.BBOX
-            },
-            "data": locations
-        }, f, ensure_ascii=False, indent=2)
+    write_json(output_file, {
+        "meta": {
+            "source": "openstreetmap",
+            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "bbox": scraper.BBOX
+        },
+        "data": locations
+    })
 
     print(f"\n💾 Gespeichert: {output_file}")
 
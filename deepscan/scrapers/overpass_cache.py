@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Overpass Element-Cache mit inkrementellem Refresh
+
+Die OSM-Scraper laden bei jedem Lauf ihre komplette Kategorie, obwohl sich
+pro Woche nur wenige Elemente ändern. Der Cache hält die Elemente des
+letzten Laufs (Schlüssel type/id, mit version) samt geparsten Ergebnissen
+und holt danach nur noch die Änderungen:
+
+- Refresh über eine Augmented Diff ([adiff:"<Zeitpunkt>"]) mit der Query
+  des Scrapers: create/modify ersetzen das Element, delete entfernt es
+  (auch wenn ein Element nur aus dem Filter fällt, z.B. Tag entfernt)
+- Nur geänderte Elemente laufen erneut durch parse_*_elements
+- Vollabruf beim ersten Lauf, bei geänderter Query, nach FULL_REFRESH_DAYS
+  oder mit DEEPSCAN_OVERPASS_FULL=1
+
+Verwendung in scrape():
+    cache = OverpassElementCache("aed", self)
+    aeds = cache.update(self.fetch_aed_data, self.parse_aed_elements)
+
+Umgebungsvariablen:
+    DEEPSCAN_OVERPASS_CACHE=0   Cache aus, immer Vollabruf wie bisher
+    DEEPSCAN_OVERPASS_FULL=1    Vollabruf erzwingen (Cache wird neu aufgebaut)
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+
+CACHE_DIR = Path(__file__).parent.parent / "output" / "cache" / "overpass"
+
+# Spätestens dann wieder ein Vollabruf (fängt Abweichungen ab, z.B. nach Server-Wechsel)
+FULL_REFRESH_DAYS = 30
+
+# Startzeitpunkt eines Vollabrufs wird so weit zurückdatiert (Overpass-Daten hängen nach)
+SINCE_MARGIN = timedelta(hours=1)
+
+CACHE_VERSION = 1
+
+# out-Anweisung (nicht das [out:json]-Setting) und ihre Detailstufe
+_OUT = re.compile(r'(?<!\[)\bout\b(?!\s*:)([^;]*);')
+_VERBOSITY = {"ids", "skel", "body", "tags", "meta"}
+_SETTINGS = re.compile(r'^\s*((?:\[[^\]]*\]\s*)+);', re.MULTILINE)
+_TIMEOUT = re.compile(r'\[timeout:(\d+)\]')
+
+_TYPE_ORDER = {"node": 0, "way": 1, "relation": 2}
+
+
+def element_key(element: Dict[str, Any]) -> str:
+    return f"{element['type']}/{element['id']}"
+
+
+def _sort_key(key: str) -> Tuple[int, int]:
+    osm_type, osm_id = key.split("/")
+    return (_TYPE_ORDER.get(osm_type, 3), int(osm_id))
+
+
+def query_hash(query: str) -> str:
+    """Hash über die Query ohne Whitespace-Unterschiede"""
+    return hashlib.sha1(" ".join(query.split()).encode("utf-8")).hexdigest()[:16]
+
+
+def parser_hash(scraper) -> str:
+    """Hash über den Quelltext des Scraper-Moduls (parse_* samt Hilfsfunktionen)"""
+    source = Path(inspect.getsourcefile(type(scraper))).read_bytes()
+    return hashlib.sha1(source).hexdigest()[:16]
+
+
+def diff_query(query: str, since: str) -> str:
+    """
+    Query des Scrapers als Augmented Diff seit `since`.
+
+    adiff liefert nur XML; out bekommt die Detailstufe meta (version).
+    """
+    match = _SETTINGS.search(query)
+    timeout = _TIMEOUT.search(match.group(1)) if match else None
+    body = query[match.end():] if match else query
+
+    def with_meta(out: re.Match) -> str:
+        modes = [m for m in out.group(1).split() if m not in _VERBOSITY]
+        return "out " + " ".join(modes + ["meta"]) + ";"
+
+    body = _OUT.sub(with_meta, body)
+    settings = f'[out:xml][timeout:{timeout.group(1) if timeout else 180}][adiff:"{since}"];'
+    return settings + body
+
+
+# XML (adiff) → Overpass-JSON-Elemente
+
+def _coord(node: ET.Element) -> Dict[str, float]:
+    return {"lat": float(node.get("lat")), "lon": float(node.get("lon"))}
+
+
+def _bounds(node: ET.Element) -> Dict[str, float]:
+    return {key: float(node.get(key)) for key in ("minlat", "minlon", "maxlat", "maxlon")}
+
+
+def xml_element(node: ET.Element) -> Dict[str, Any]:
+    """<node>/<way>/<relation> im Format der Overpass-JSON-Ausgabe"""
+    element: Dict[str, Any] = {"type": node.tag, "id": int(node.get("id"))}
+    if node.tag == "node" and node.get("lat") is not None:
+        element.update(_coord(node))
+    for attr in ("version", "changeset", "uid"):
+        if node.get(attr) is not None:
+            element[attr] = int(node.get(attr))
+    for attr in ("timestamp", "user"):
+        if node.get(attr) is not None:
+            element[attr] = node.get(attr)
+
+    tags = {}
+    nodes, geometry, members = [], [], []
+    for child in node:
+        if child.tag == "tag":
+            tags[child.get("k")] = child.get("v")
+        elif child.tag == "center":
+            element["center"] = _coord(child)
+        elif child.tag == "bounds":
+            element["bounds"] = _bounds(child)
+        elif child.tag == "nd":
+            if child.get("ref") is not None:
+                nodes.append(int(child.get("ref")))
+            if child.get("lat") is not None:
+                geometry.append(_coord(child))
+        elif child.tag == "member":
+            member: Dict[str, Any] = {"type": child.get("type"), "ref": int(child.get("ref")),
+                                      "role": child.get("role", "")}
+            if child.get("lat") is not None:
+                member.update(_coord(child))
+            member_geometry = [_coord(nd) for nd in child if nd.tag == "nd" and nd.get("lat") is not None]
+            if member_geometry:
+                member["geometry"] = member_geometry
+            members.append(member)
+
+    if nodes:
+        element["nodes"] = nodes
+    if geometry:
+        element["geometry"] = geometry
+    if members:
+        element["members"] = members
+    if tags:
+        element["tags"] = tags
+    return element
+
+
+def parse_adiff(xml: bytes) -> Tuple[Dict[str, Optional[Dict[str, Any]]], Optional[str]]:
+    """
+    Augmented Diff → ({type/id: Element oder None für gelöscht}, osm_base)
+    """
+    root = ET.fromstring(xml)
+    remark = root.find("remark")
+    if remark is not None and "error" in (remark.text or ""):
+        # Overpass meldet Laufzeitfehler (Timeout, Speicher) mit HTTP 200
+        raise ValueError(remark.text.strip())
+    meta = root.find("meta")
+    osm_base = meta.get("osm_base") if meta is not None else None
+
+    changes: Dict[str, Optional[Dict[str, Any]]] = {}
+    for action in root.iter("action"):
+        kind = action.get("type")
+        if kind == "delete":
+            old = action.find("old")
+            source = old[0] if old is not None and len(old) else None
+            if source is not None:
+                changes[f"{source.tag}/{source.get('id')}"] = None
+            continue
+        new = action.find("new")
+        source = new[0] if new is not None and len(new) else (action[0] if len(action) else None)
+        if source is None:
+            continue
+        if source.get("visible") == "false":
+            changes[f"{source.tag}/{source.get('id')}"] = None
+        else:
+            element = xml_element(source)
+            changes[element_key(element)] = element
+    return changes, osm_base
+
+
+class OverpassElementCache:
+    """Elemente und geparste Ergebnisse eines Scrapers zwischen zwei Läufen"""
+
+    def __init__(self, name: str, scraper, cache_dir: Path = CACHE_DIR):
+        self.name = name
+        self.query = scraper.build_overpass_query()
+        self.urls = scraper.OVERPASS_URLS
+        self.overpass = scraper.overpass
+        self.timeout = scraper.REQUEST_TIMEOUT
+        self.path = cache_dir / f"{name}.json"
+        self.parser = parser_hash(scraper)
+
+        self.enabled = os.environ.get("DEEPSCAN_OVERPASS_CACHE", "1") != "0"
+        self.since: Optional[str] = None
+        self.full_at: Optional[str] = None
+        self.elements: Dict[str, Dict[str, Any]] = {}
+        self.parsed: Dict[str, List[Dict[str, Any]]] = {}
+        self.changed: set = set()
+
+    def load(self) -> bool:
+        """True wenn ein passender Cache für diese Query vorliegt"""
+        if not self.path.exists():
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        meta = data.get("meta", {})
+        if meta.get("version") != CACHE_VERSION or meta.get("query") != query_hash(self.query):
+            return False
+        self.since = meta.get("since")
+        self.full_at = meta.get("full_at")
+        self.elements = data.get("elements", {})
+        # Parse-Ergebnisse nur, solange der Scraper-Code unverändert ist
+        self.parsed = data.get("parsed", {}) if meta.get("parser") == self.parser else {}
+        return bool(self.since)
+
+    def needs_full(self) -> bool:
+        if os.environ.get("DEEPSCAN_OVERPASS_FULL") == "1" or not self.full_at:
+            return True
+        full_at = datetime.fromisoformat(self.full_at.replace("Z", "+00:00"))
+        return datetime.now(timezone.utc) - full_at > timedelta(days=FULL_REFRESH_DAYS)
+
+    def fetch_diff(self) -> Optional[Tuple[Dict[str, Optional[Dict[str, Any]]], Optional[str]]]:
+        """Augmented Diff seit dem letzten Lauf, None wenn alle Server scheitern"""
+        query = diff_query(self.query, self.since)
+        for url in self.urls:
+            try:
+                response = self.overpass.post(url, data={"data": query}, timeout=self.timeout)
+                response.raise_for_status()
+                return parse_adiff(response.content)
+            except requests.exceptions.RequestException as e:
+                print(f"   [CACHE] adiff bei {url.split('/')[2]} fehlgeschlagen: {type(e).__name__}")
+            except (ET.ParseError, ValueError) as e:
+                print(f"   [CACHE] adiff bei {url.split('/')[2]} nicht lesbar: {str(e)[:80]}")
+        return None
+
+    def apply_full(self, data: Dict[str, Any], started: datetime) -> None:
+        """Vollabruf übernehmen; unveränderte Elemente behalten ihr Parse-Ergebnis"""
+        elements = {}
+        for element in data.get("elements", []):
+            key = element_key(element)
+            if key in elements:
+                continue
+            elements[key] = element
+            if self.elements.get(key) != element:
+                self.changed.add(key)
+        if data.get("incomplete"):
+            # Lücken (fehlgeschlagene Kacheln): bekannte Elemente behalten, nächster Lauf wieder voll
+            for key, element in self.elements.items():
+                elements.setdefault(key, element)
+            self.full_at = None
+        else:
+            self.full_at = started.strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.elements = elements
+        self.since = (started - SINCE_MARGIN).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    def apply_diff(self, changes: Dict[str, Optional[Dict[str, Any]]], osm_base: Optional[str]) -> int:
+        """Änderungen einspielen, gibt die Zahl der Löschungen zurück"""
+        deleted = 0
+        for key, element in changes.items():
+            if element is None:
+                if self.elements.pop(key, None) is not None:
+                    deleted += 1
+                self.parsed.pop(key, None)
+            elif self.elements.get(key) != element:
+                self.elements[key] = element
+                self.changed.add(key)
+        if osm_base:
+            self.since = osm_base
+        return deleted
+
+    def refresh(self, fetch_full: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Aktueller Stand aller Elemente, möglichst über die Diff"""
+        telemetry = get_telemetry()
+        started = datetime.now(timezone.utc)
+        incremental = self.load() and not self.needs_full()
+
+        if incremental:
+            print(f"   [CACHE] {len(self.elements)} Elemente im Cache, Änderungen seit {self.since}")
+            with telemetry.timer("overpass_adiff"):
+                result = self.fetch_diff()
+            if result is not None:
+                changes, osm_base = result
+                deleted = self.apply_diff(changes, osm_base)
+                print(f"   [CACHE] {len(changes)} Änderungen: {len(self.changed)} neu/geändert, "
+                      f"{deleted} gelöscht")
+                telemetry.cache("overpass_elements", True)
+                telemetry.count("overpass_cache_changed", len(self.changed))
+                telemetry.count("overpass_cache_deleted", deleted)
+                return self.current()
+            print("   [CACHE] Diff fehlgeschlagen, Vollabruf")
+
+        telemetry.cache("overpass_elements", False)
+        data = fetch_full()
+        if not data.get("elements") and self.elements:
+            # Alle Server fehlgeschlagen: alter Stand ist besser als keiner
+            print(f"   [CACHE] Vollabruf leer, nutze {len(self.elements)} Elemente aus dem Cache")
+            self.since = None
+            return self.current()
+        self.apply_full(data, started)
+        return self.current()
+
+    def current(self) -> Dict[str, Any]:
+        return {"elements": [self.elements[key] for key in sorted(self.elements, key=_sort_key)]}
+
+    def parse(self, parse_fn: Callable[[Dict[str, Any]], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        parse_fn nur für neue/geänderte Elemente, je Element einzeln
+        (die parse_*-Funktionen arbeiten pro Element, Duplikate über type/id).
+        """
+        results = []
+        reparsed = 0
+        for key in sorted(self.elements, key=_sort_key):
+            if key in self.changed or key not in self.parsed:
+                self.parsed[key] = parse_fn({"elements": [self.elements[key]]})
+                reparsed += 1
+            results.extend(self.parsed[key])
+        for key in set(self.parsed) - set(self.elements):
+            del self.parsed[key]
+        get_telemetry().count("overpass_cache_reparsed", reparsed)
+        print(f"   [CACHE] {reparsed} von {len(self.elements)} Elementen neu geparst")
+        return results
+
+    def save(self) -> None:
+        if not self.since:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        write_json(self.path, {
+            "meta": {
+                "version": CACHE_VERSION,
+                "query": query_hash(self.query),
+                "parser": self.parser,
+                "since": self.since,
+                "full_at": self.full_at,
+                "elements": len(self.elements),
+            },
+            "elements": self.elements,
+            "parsed": self.parsed,
+        }, pretty=False)
+
+    def update(self, fetch_full: Callable[[], Dict[str, Any]],
+               parse_fn: Callable[[Dict[str, Any]], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Refresh + Parsen + Speichern; ohne Cache wie bisher parse_fn(fetch_full())"""
+        if not self.enabled:
+            return parse_fn(fetch_full())
+        self.refresh(fetch_full)
+        results = self.parse(parse_fn)
+        self.save()
+        return results
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Overpass Query-Planer mit adaptiver Kachelung
+
+Läuft eine Query auf allen Servern in einen Timeout, wurde sie bisher
+verworfen ("Gruppe fehlgeschlagen") und der Datensatz war stillschweigend
+unvollständig. Der Planer teilt die Bounding Box dann rekursiv in
+Quadranten (Quadtree):
+
+- Split, wenn alle Server mit Timeout, HTTP 504 oder einem Overpass-
+  Laufzeitfehler (timed out / out of memory) antworten
+- Sind alle Server nur gesperrt (Circuit Breaker, Retry-After), wartet die
+  Kachel die Sperre ab (höchstens MAX_BLOCKED_WAIT) und versucht es erneut
+- Antworten über MAX_ELEMENTS werden übernommen, der nächste Lauf
+  startet für die Gruppe aber eine Stufe feiner
+- Kacheln laufen parallel (MAX_WORKERS, Overpass vergibt 2 Slots pro IP),
+  getaktet über den OverpassRateController des Scrapers
+- Elemente aus mehreren Kacheln (z.B. Ways über Kachelgrenzen) werden
+  über type/id dedupliziert
+- Die erfolgreiche Kachel-Tiefe je Gruppe liegt in
+  output/cache/overpass/tiles_<scraper>.json und ist Startpunkt der
+  nächsten Läufe (nach RELAX_DAYS ohne Split wieder eine Stufe gröber)
+
+Verwendung:
+    planner = OverpassPlanner("osm", self)
+    data = planner.fetch("gastro", lambda bbox: self.build_overpass_query(tags, bbox))
+    data["incomplete"]   # True wenn Kacheln auch auf MAX_DEPTH fehlschlugen
+"""
+
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import requests
+
+try:
+    from .overpass_rate import CircuitOpen
+except ImportError:
+    from overpass_rate import CircuitOpen
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+
+STATE_DIR = Path(__file__).parent.parent / "output" / "cache" / "overpass"
+
+# Tiefste Stufe: 4^4 = 256 Kacheln
+MAX_DEPTH = 4
+
+# Parallele Requests (Overpass: 2 Slots pro IP)
+MAX_WORKERS = 2
+
+# Ab so vielen Elementen pro Kachel startet der nächste Lauf eine Stufe feiner
+MAX_ELEMENTS = 20000
+
+# Nach so vielen Tagen auf derselben Stufe wird wieder eine Stufe gröber versucht
+RELAX_DAYS = 14
+
+# Overpass meldet Abbrüche mit HTTP 200 und einer remark
+SPLIT_REMARKS = ("timed out", "out of memory")
+
+# Längste Wartezeit, wenn alle Server gesperrt sind (danach gilt die Kachel als fehlgeschlagen)
+MAX_BLOCKED_WAIT = 120
+
+
+class Tile(NamedTuple):
+    """Ausschnitt einer Bounding Box im Quadtree"""
+    south: float
+    west: float
+    north: float
+    east: float
+    depth: int = 0
+
+    @classmethod
+    def from_bbox(cls, bbox: Dict[str, float]) -> "Tile":
+        return cls(bbox["south"], bbox["west"], bbox["north"], bbox["east"])
+
+    def bbox(self) -> Dict[str, float]:
+        # Gerundet, damit die Query-Strings stabil bleiben
+        return {"south": round(self.south, 6), "west": round(self.west, 6),
+                "north": round(self.north, 6), "east": round(self.east, 6)}
+
+    def split(self) -> List["Tile"]:
+        lat = (self.south + self.north) / 2
+        lon = (self.west + self.east) / 2
+        depth = self.depth + 1
+        return [
+            Tile(self.south, self.west, lat, lon, depth),
+            Tile(self.south, lon, lat, self.east, depth),
+            Tile(lat, self.west, self.north, lon, depth),
+            Tile(lat, lon, self.north, self.east, depth),
+        ]
+
+    def descend(self, depth: int) -> List["Tile"]:
+        """Alle Kacheln der Stufe `depth` unterhalb dieser Kachel"""
+        tiles = [self]
+        while tiles[0].depth < depth:
+            tiles = [sub for tile in tiles for sub in tile.split()]
+        return tiles
+
+
+class OverpassPlanner:
+    """Führt eine Query kachelweise aus und teilt bei Timeouts weiter"""
+
+    def __init__(self, name: str, scraper, max_depth: int = MAX_DEPTH,
+                 max_workers: int = MAX_WORKERS, state_dir: Path = STATE_DIR):
+        self.urls = scraper.OVERPASS_URLS
+        self.overpass = scraper.overpass
+        self.timeout = scraper.REQUEST_TIMEOUT
+        self.bbox = scraper.BBOX
+        self.max_depth = max_depth
+        self.max_workers = max_workers
+        self.state_file = state_dir / f"tiles_{name}.json"
+        self.state = self.load_state()
+
+    def load_state(self) -> Dict[str, Dict[str, Any]]:
+        if not self.state_file.exists():
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self) -> None:
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        write_json(self.state_file, self.state)
+
+    def fetch_tile(self, query: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Query auf allen Servern versuchen.
+
+        Returns:
+            ("ok", data), ("split", None) wenn die Kachel zu groß war,
+            ("failed", None) bei anderen Fehlern auf allen Servern
+        """
+        waited = 0.0
+        while True:
+            too_large = False
+            blocked = []
+            for url in self.urls:
+                host = url.split('/')[2]
+                try:
+                    response = self.overpass.post(url, data={"data": query}, timeout=self.timeout)
+                    if response.status_code == 504:
+                        too_large = True
+                        continue
+                    response.raise_for_status()
+                    data = response.json()
+                except requests.exceptions.Timeout:
+                    too_large = True
+                    continue
+                except CircuitOpen:
+                    blocked.append(url)
+                    continue
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    print(f"      [TILES] Fehler bei {host}: {type(e).__name__}")
+                    continue
+
+                remark = data.get("remark", "")
+                if any(marker in remark for marker in SPLIT_REMARKS):
+                    too_large = True
+                    continue
+                return "ok", data
+
+            if too_large:
+                return "split", None
+            if len(blocked) < len(self.urls):
+                return "failed", None
+
+            # Alle Server gesperrt: nicht die Kachel ist schuld, Sperre abwarten
+            delay = min(self.overpass.blocked_for(url) for url in blocked)
+            if waited + delay > MAX_BLOCKED_WAIT:
+                return "failed", None
+            print(f"      [TILES] Alle Server gesperrt, warte {delay:.0f}s")
+            time.sleep(delay)
+            waited += delay
+
+    def fetch(self, group: str, build_query: Callable[[Dict[str, float]], str]) -> Dict[str, Any]:
+        """Alle Elemente der Gruppe, dedupliziert; incomplete=True bei Lücken"""
+        telemetry = get_telemetry()
+        start_depth = min(self.state.get(group, {}).get("depth", 0), self.max_depth)
+        plan = Tile.from_bbox(self.bbox).descend(start_depth)
+        if start_depth:
+            print(f"      [TILES] Starte mit {len(plan)} Kacheln (Stufe {start_depth})")
+
+        results: Dict[Tile, List[Dict[str, Any]]] = {}
+        failed: List[Tile] = []
+        splits = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {pool.submit(self.fetch_tile, build_query(tile.bbox())): tile for tile in plan}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    tile = pending.pop(future)
+                    status, data = future.result()
+                    if status == "ok":
+                        results[tile] = data.get("elements", [])
+                    elif status == "split" and tile.depth < self.max_depth:
+                        splits += 1
+                        print(f"      [TILES] Timeout, teile Kachel {tile.bbox()} (Stufe {tile.depth + 1})")
+                        for sub in tile.split():
+                            pending[pool.submit(self.fetch_tile, build_query(sub.bbox()))] = sub
+                    else:
+                        failed.append(tile)
+                        print(f"      [TILES] Kachel {tile.bbox()} fehlgeschlagen")
+
+        elements = self.merge(results)
+        telemetry.count("overpass_tiles", len(results) + len(failed))
+        telemetry.count("overpass_tile_splits", splits)
+        telemetry.count("overpass_tiles_failed", len(failed))
+        if len(results) > 1:
+            print(f"      [TILES] {len(results)} Kacheln, {len(elements)} Elemente nach Deduplizierung")
+
+        self.remember(group, start_depth, results, failed)
+        return {"elements": elements, "incomplete": bool(failed)}
+
+    @staticmethod
+    def merge(results: Dict[Tile, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Kacheln in fester Reihenfolge (nach Lage) zusammenführen, Duplikate über type/id"""
+        seen = set()
+        elements = []
+        for tile in sorted(results):
+            for element in results[tile]:
+                key = (element.get("type"), element.get("id"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                elements.append(element)
+        return elements
+
+    def remember(self, group: str, start_depth: int, results: Dict[Tile, List[Dict[str, Any]]],
+                 failed: List[Tile]) -> None:
+        """Kachel-Tiefe für den nächsten Lauf festhalten"""
+        if not results:
+            return
+        depth = max(tile.depth for tile in results)
+        largest = max(len(elements) for elements in results.values())
+        if largest > MAX_ELEMENTS or failed:
+            depth += 1
+        elif depth == start_depth and depth > 0 and largest < MAX_ELEMENTS // 4:
+            # Seit RELAX_DAYS ohne Split und mit kleinen Antworten: wieder gröber versuchen
+            updated = self.state.get(group, {}).get("updated")
+            if updated and datetime.now() - datetime.fromisoformat(updated) > timedelta(days=RELAX_DAYS):
+                depth -= 1
+        depth = min(depth, self.max_depth)
+
+        if self.state.get(group, {}).get("depth", 0) != depth:
+            self.state[group] = {"depth": depth, "updated": datetime.now().isoformat()}
+            self.save_state()
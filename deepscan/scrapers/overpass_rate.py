@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Overpass Rate-Controller
+
+Ersetzt die festen time.sleep(rate_limit)-Pausen der Overpass-Scraper:
+
+- Frei, wenn der letzte Request an den Endpoint länger als
+  fallback_interval her ist (kein Warten bei ruhigem Server)
+- Sonst /api/status fragen: "N slots available now" → sofort,
+  "Slot available after: ..., in N seconds" → genau so lange warten
+- Endpoints ohne /api/status (404) werden mit fallback_interval getaktet
+- 429 mit Retry-After (Sekunden oder HTTP-Datum) sperrt den Endpoint
+  bis dahin, der Aufrufer weicht auf den nächsten Mirror aus
+- Circuit Breaker je Endpoint: nach BREAKER_THRESHOLD Fehlern in Folge
+  (Verbindungsfehler, 5xx) wird er BREAKER_COOLDOWN Sekunden
+  übersprungen (verdoppelt sich bei erneutem Fehler, bis BREAKER_MAX).
+  Timeouts und 504 zählen nicht: sie heißen "Query zu groß", darauf
+  teilt der OverpassPlanner die Kachel, der Server selbst ist erreichbar
+
+Alle Entscheidungen landen als Zähler in den Run-Metriken (overpass_rate_*).
+Testen gegen den lokalen Stand-in:
+    python replay.py replay osm scrapers/osm_scraper.py --overpass-slots 2 --slot-seconds 5
+
+Verwendung:
+    self.overpass = OverpassRateController(self.session, fallback_interval=rate_limit)
+    response = self.overpass.post(url, data={"data": query}, timeout=...)
+"""
+
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+
+# Kurzer Abstand, wenn /api/status freie Slots meldet
+MIN_INTERVAL = 0.2
+
+# Längste Wartezeit auf einen Slot; darüber lieber den nächsten Mirror
+MAX_WAIT = 60
+
+# Ohne Retry-After nach 429
+DEFAULT_BACKOFF = 10
+
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 60
+BREAKER_MAX = 900
+
+STATUS_TIMEOUT = 10
+
+# Antworten, die die Query betreffen und nicht den Server (kein Breaker-Fehler)
+QUERY_TOO_LARGE_STATUS = 504
+
+_RATE_LIMIT = re.compile(r'^Rate limit:\s*(\d+)', re.MULTILINE)
+_AVAILABLE = re.compile(r'^(\d+) slots? available now', re.MULTILINE)
+_SLOT_AFTER = re.compile(r'^Slot available after: \S+, in (-?\d+) seconds?', re.MULTILINE)
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    """Endpoint ist vorübergehend gesperrt (Circuit Breaker oder Retry-After)"""
+
+
+class SlotStatus(NamedTuple):
+    rate_limit: int
+    available: int
+    wait: float      # Sekunden bis zum nächsten freien Slot (0 wenn verfügbar)
+
+
+def parse_status(text: str) -> Optional[SlotStatus]:
+    """Antwort von /api/status, None wenn das Format unbekannt ist"""
+    limit = _RATE_LIMIT.search(text)
+    if not limit:
+        return None
+    available = _AVAILABLE.search(text)
+    if available:
+        return SlotStatus(int(limit.group(1)), int(available.group(1)), 0.0)
+    waits = [max(0, int(seconds)) for seconds in _SLOT_AFTER.findall(text)]
+    if int(limit.group(1)) == 0:
+        # Rate limit 0 = keine Begrenzung für diese IP
+        return SlotStatus(0, 1, 0.0)
+    return SlotStatus(int(limit.group(1)), 0, float(min(waits)) if waits else float(DEFAULT_BACKOFF))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After als Sekunden oder HTTP-Datum"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def status_url(url: str) -> str:
+    """.../api/interpreter → .../api/status"""
+    return url.rsplit("/", 1)[0] + "/status"
+
+
+class _Endpoint:
+    def __init__(self):
+        self.last_request = 0.0       # time.monotonic()
+        self.blocked_until = 0.0      # Retry-After oder offener Breaker
+        self.failures = 0
+        self.cooldown = BREAKER_COOLDOWN
+        self.has_status = True
+        self.lock = threading.Lock()  # ein Request gleichzeitig je Endpoint in wait()
+
+
+class OverpassRateController:
+    """Taktet Requests je Overpass-Endpoint nach Serverlast (thread-sicher)"""
+
+    def __init__(self, session: requests.Session, fallback_interval: float = 2.0):
+        self.session = session
+        self.fallback_interval = fallback_interval
+        self._endpoints: Dict[str, _Endpoint] = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, url: str) -> _Endpoint:
+        with self._lock:
+            if url not in self._endpoints:
+                self._endpoints[url] = _Endpoint()
+            return self._endpoints[url]
+
+    def _decision(self, name: str, seconds: float = 0) -> None:
+        telemetry = get_telemetry()
+        telemetry.count(f"overpass_rate_{name}")
+        if seconds:
+            telemetry.count("overpass_rate_wait_seconds", round(seconds, 3))
+
+    def check_status(self, url: str, endpoint: _Endpoint) -> Optional[SlotStatus]:
+        if not endpoint.has_status:
+            return None
+        try:
+            response = self.session.get(status_url(url), timeout=STATUS_TIMEOUT)
+        except requests.exceptions.RequestException:
+            return None
+        status = parse_status(response.text) if response.status_code == 200 else None
+        if status is None:
+            # Mirror ohne /api/status: ab jetzt nur noch fallback_interval
+            endpoint.has_status = False
+        return status
+
+    def blocked_for(self, url: str) -> float:
+        """Sekunden, bis `url` wieder angefragt wird (0 wenn frei)"""
+        endpoint = self._endpoint(url)
+        return max(0.0, endpoint.blocked_until - time.monotonic())
+
+    def wait(self, url: str) -> None:
+        """Wartet, bis ein Request an `url` sinnvoll ist; CircuitOpen wenn gesperrt"""
+        endpoint = self._endpoint(url)
+        host = url.split('/')[2]
+        with endpoint.lock:
+            now = time.monotonic()
+            if endpoint.blocked_until > now:
+                remaining = endpoint.blocked_until - now
+                if remaining > MAX_WAIT or endpoint.failures >= BREAKER_THRESHOLD:
+                    self._decision("skipped")
+                    raise CircuitOpen(f"{host} gesperrt für {remaining:.0f}s")
+                self._decision("retry_after", remaining)
+                time.sleep(remaining)
+                now = time.monotonic()
+
+            delay = 0.0
+            if now - endpoint.last_request < self.fallback_interval:
+                status = self.check_status(url, endpoint)
+                if status is None:
+                    delay = self.fallback_interval - (now - endpoint.last_request)
+                    self._decision("fallback", delay)
+                elif status.available:
+                    delay = max(0.0, MIN_INTERVAL - (now - endpoint.last_request))
+                    self._decision("slot_free", delay)
+                elif status.wait > MAX_WAIT:
+                    endpoint.blocked_until = now + status.wait
+                    self._decision("skipped")
+                    raise CircuitOpen(f"{host}: nächster Slot in {status.wait:.0f}s")
+                else:
+                    delay = status.wait
+                    self._decision("slot_wait", delay)
+                    print(f"   [RATE] {host}: kein freier Slot, warte {delay:.0f}s")
+            else:
+                self._decision("idle")
+
+            if delay:
+                time.sleep(delay)
+            endpoint.last_request = time.monotonic()
+
+    def record(self, url: str, response: Optional[requests.Response] = None,
+               error: Optional[BaseException] = None) -> None:
+        """Ergebnis eines Requests: Retry-After und Circuit Breaker nachführen"""
+        endpoint = self._endpoint(url)
+        host = url.split('/')[2]
+        now = time.monotonic()
+        with self._lock:
+            endpoint.last_request = now
+            if response is not None and response.status_code == 429:
+                retry = parse_retry_after(response.headers.get("Retry-After"))
+                retry = DEFAULT_BACKOFF if retry is None else retry
+                endpoint.blocked_until = max(endpoint.blocked_until, now + retry)
+                self._decision("429")
+                print(f"   [RATE] {host}: 429, Retry-After {retry:.0f}s")
+                return
+            if error is None and response is not None and response.status_code < 500:
+                endpoint.failures = 0
+                endpoint.cooldown = BREAKER_COOLDOWN
+                return
+            if isinstance(error, requests.exceptions.ReadTimeout) or (
+                    response is not None and response.status_code == QUERY_TOO_LARGE_STATUS):
+                # Server hat geantwortet bzw. gerechnet: kein Ausfall, Zähler unverändert
+                self._decision("query_timeout")
+                return
+
+            endpoint.failures += 1
+            if endpoint.failures >= BREAKER_THRESHOLD:
+                endpoint.blocked_until = now + endpoint.cooldown
+                self._decision("breaker_open")
+                print(f"   [RATE] {host}: {endpoint.failures} Fehler in Folge, "
+                      f"gesperrt für {endpoint.cooldown:.0f}s")
+                endpoint.cooldown = min(endpoint.cooldown * 2, BREAKER_MAX)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """session.post mit Taktung; wirft CircuitOpen (eine RequestException) bei Sperre"""
+        self.wait(url)
+        try:
+            response = self.session.post(url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self.record(url, error=e)
+            raise
+        self.record(url, response)
+        return response
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trail Elevation
+Höhenprofile für Wanderwege aus einem lokalen Höhenmodell (DEM).
+
+Unterstützt:
+- SRTM .hgt Kacheln (z.B. N51E011.hgt, 1" oder 3")
+- Unkomprimierte GeoTIFFs (SRTM/Copernicus) per Memory-Map
+- Komprimierte GeoTIFFs, falls rasterio installiert ist
+
+Alle Wanderwege werden in einem Durchgang abgetastet: Punkte verdichten,
+gemeinsam bilinear interpolieren, dann Auf-/Abstieg pro Weg summieren.
+"""
+
+import math
+import re
+import struct
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    import rasterio
+    HAS_RASTERIO = True
+except ImportError:
+    HAS_RASTERIO = False
+
+
+Point = Tuple[float, float]
+
+EARTH_RADIUS_M = 6371000.0
+
+# Abstand der Abtastpunkte entlang des Weges (≈ Auflösung Copernicus GLO-30)
+SAMPLE_SPACING_M = 30.0
+# Gleitender Mittelwert gegen DEM-Rauschen (Anzahl Abtastpunkte)
+SMOOTHING_WINDOW = 5
+# Anzahl Punkte im exportierten Profil
+PROFILE_POINTS = 100
+
+DEM_SUFFIXES = {'.hgt', '.tif', '.tiff'}
+
+# GeoTIFF Tags
+_TIFF_TAGS = {
+    256: 'width', 257: 'height', 258: 'bits', 259: 'compression',
+    273: 'strip_offsets', 279: 'strip_counts', 322: 'tile_width',
+    339: 'sample_format', 33550: 'pixel_scale', 33922: 'tiepoint',
+    42113: 'nodata',
+}
+_TIFF_TYPES = {1: 'B', 2: 's', 3: 'H', 4: 'I', 11: 'f', 12: 'd', 16: 'Q'}
+_TIFF_DTYPES = {(1, 8): 'u1', (1, 16): 'u2', (2, 16): 'i2', (2, 32): 'i4', (3, 32): 'f4', (3, 64): 'f8'}
+
+
+class DEMTile:
+    """
+    Eine Raster-Kachel im geografischen Koordinatensystem (EPSG:4326).
+
+    Pixel-Zentren liegen bei west + (col + offset) * dx bzw.
+    north - (row + offset) * dy.
+    """
+
+    def __init__(self, data, west: float, north: float, dx: float, dy: float,
+                 nodata: Optional[float] = None, pixel_offset: float = 0.5, name: str = ''):
+        self.data = data
+        self.west = west
+        self.north = north
+        self.dx = dx
+        self.dy = dy
+        self.nodata = nodata
+        self.pixel_offset = pixel_offset
+        self.name = name
+        self.rows, self.cols = data.shape
+
+    @property
+    def south(self) -> float:
+        return self.north - self.rows * self.dy
+
+    @property
+    def east(self) -> float:
+        return self.west + self.cols * self.dx
+
+    @classmethod
+    def from_hgt(cls, path: Path) -> 'DEMTile':
+        """SRTM .hgt: quadratisch, big-endian int16, Name = SW-Ecke"""
+        match = re.match(r'([NS])(\d{2})([EW])(\d{3})', path.stem.upper())
+        if not match:
+            raise ValueError(f"Unbekannter HGT-Dateiname: {path.name}")
+        lat = int(match.group(2)) * (1 if match.group(1) == 'N' else -1)
+        lon = int(match.group(4)) * (1 if match.group(3) == 'E' else -1)
+
+        size = int(math.sqrt(path.stat().st_size // 2))
+        data = np.memmap(path, dtype='>i2', mode='r', shape=(size, size))
+        step = 1.0 / (size - 1)
+        # HGT-Pixel liegen genau auf den Gradlinien (kein Halbpixel-Versatz)
+        return cls(data, west=lon, north=lat + 1, dx=step, dy=step,
+                   nodata=-32768, pixel_offset=0.0, name=path.name)
+
+    @classmethod
+    def from_geotiff(cls, path: Path) -> 'DEMTile':
+        """Unkomprimiertes GeoTIFF per Memory-Map, sonst über rasterio"""
+        try:
+            return cls._memmap_geotiff(path)
+        except ValueError as e:
+            if not HAS_RASTERIO:
+                raise ValueError(f"{path.name}: {e} (rasterio nicht installiert)")
+        return cls._rasterio_geotiff(path)
+
+    @classmethod
+    def _memmap_geotiff(cls, path: Path) -> 'DEMTile':
+        tags = _read_tiff_tags(path)
+
+        if tags.get('compression', (1,))[0] != 1:
+            raise ValueError("komprimiert")
+        if 'tile_width' in tags:
+            raise ValueError("gekachelt")
+        if 'pixel_scale' not in tags or 'tiepoint' not in tags:
+            raise ValueError("keine Georeferenz")
+
+        width, height = tags['width'][0], tags['height'][0]
+        bits = tags['bits'][0]
+        fmt = tags.get('sample_format', (1,))[0]
+        dtype = _TIFF_DTYPES.get((fmt, bits))
+        if dtype is None:
+            raise ValueError(f"Datentyp {fmt}/{bits} nicht unterstützt")
+
+        # Memory-Map nur wenn alle Strips direkt hintereinander liegen
+        offsets, counts = tags['strip_offsets'], tags['strip_counts']
+        for i in range(1, len(offsets)):
+            if offsets[i] != offsets[i - 1] + counts[i - 1]:
+                raise ValueError("Strips nicht zusammenhängend")
+
+        data = np.memmap(path, dtype=tags['_byteorder'] + dtype, mode='r',
+                         offset=offsets[0], shape=(height, width))
+
+        sx, sy = tags['pixel_scale'][0], tags['pixel_scale'][1]
+        _, _, _, west, north, _ = tags['tiepoint'][:6]
+        nodata = None
+        if 'nodata' in tags:
+            try:
+                nodata = float(tags['nodata'].strip('\x00 '))
+            except ValueError:
+                pass
+        return cls(data, west=west, north=north, dx=sx, dy=sy,
+                   nodata=nodata, name=path.name)
+
+    @classmethod
+    def _rasterio_geotiff(cls, path: Path) -> 'DEMTile':
+        with rasterio.open(path) as src:
+            data = src.read(1)
+            transform = src.transform
+            return cls(data, west=transform.c, north=transform.f,
+                       dx=transform.a, dy=-transform.e,
+                       nodata=src.nodata, name=path.name)
+
+    def sample(self, lats, lons):
+        """
+        Bilineare Interpolation für Punkt-Arrays.
+
+        Returns:
+            (Höhen, Maske der Punkte innerhalb der Kachel); NaN bei Nodata
+        """
+        col = (lons - self.west) / self.dx - self.pixel_offset
+        row = (self.north - lats) / self.dy - self.pixel_offset
+
+        inside = (col >= 0) & (row >= 0) & (col <= self.cols - 1) & (row <= self.rows - 1)
+        result = np.full(lats.shape, np.nan)
+        if not inside.any():
+            return result, inside
+
+        c, r = col[inside], row[inside]
+        c0 = np.minimum(np.floor(c).astype(np.int64), self.cols - 2)
+        r0 = np.minimum(np.floor(r).astype(np.int64), self.rows - 2)
+        fc, fr = c - c0, r - r0
+
+        # Gather der vier Nachbarn (bei memmap werden nur diese Seiten gelesen)
+        z00 = self.data[r0, c0].astype(np.float64)
+        z01 = self.data[r0, c0 + 1].astype(np.float64)
+        z10 = self.data[r0 + 1, c0].astype(np.float64)
+        z11 = self.data[r0 + 1, c0 + 1].astype(np.float64)
+
+        if self.nodata is not None:
+            for z in (z00, z01, z10, z11):
+                z[z == self.nodata] = np.nan
+
+        values = (z00 * (1 - fc) * (1 - fr) + z01 * fc * (1 - fr)
+                  + z10 * (1 - fc) * fr + z11 * fc * fr)
+        result[inside] = values
+        return result, inside
+
+
+def _read_tiff_tags(path: Path) -> Dict[str, Any]:
+    """Liest die benötigten Tags aus dem ersten IFD (klassisches TIFF, kein BigTIFF)"""
+    with open(path, 'rb') as f:
+        header = f.read(8)
+        if header[:2] == b'II':
+            order = '<'
+        elif header[:2] == b'MM':
+            order = '>'
+        else:
+            raise ValueError("kein TIFF")
+        magic, ifd_offset = struct.unpack(order + 'HI', header[2:8])
+        if magic != 42:
+            raise ValueError("BigTIFF nicht unterstützt")
+
+        f.seek(ifd_offset)
+        (count,) = struct.unpack(order + 'H', f.read(2))
+        entries = [struct.unpack(order + 'HHI4s', f.read(12)) for _ in range(count)]
+
+        tags = {'_byteorder': order}
+        for tag, typ, n, raw in entries:
+            name = _TIFF_TAGS.get(tag)
+            code = _TIFF_TYPES.get(typ)
+            if name is None or code is None:
+                continue
+            size = struct.calcsize(code) * n
+            if size <= 4:
+                payload = raw[:size]
+            else:
+                f.seek(struct.unpack(order + 'I', raw)[0])
+                payload = f.read(size)
+            if code == 's':
+                tags[name] = payload.decode('ascii', errors='ignore')
+            else:
+                tags[name] = struct.unpack(order + code * n, payload)
+        return tags
+
+
+class ElevationModel:
+    """Mosaik aus mehreren DEM-Kacheln"""
+
+    def __init__(self, tiles: List[DEMTile]):
+        self.tiles = tiles
+
+    @classmethod
+    def open(cls, paths: List[str]) -> 'ElevationModel':
+        """Öffnet Dateien oder alle DEM-Dateien in Verzeichnissen"""
+        if not HAS_NUMPY:
+            raise RuntimeError("numpy wird für das Höhenmodell benötigt")
+
+        files = []
+        for p in paths:
+            path = Path(p)
+            if path.is_dir():
+                files.extend(sorted(f for f in path.iterdir() if f.suffix.lower() in DEM_SUFFIXES))
+            else:
+                files.append(path)
+
+        tiles = []
+        for path in files:
+            try:
+                if path.suffix.lower() == '.hgt':
+                    tiles.append(DEMTile.from_hgt(path))
+                else:
+                    tiles.append(DEMTile.from_geotiff(path))
+            except (OSError, ValueError) as e:
+                print(f"   [WARN] DEM übersprungen: {e}")
+
+        return cls(tiles)
+
+    def sample(self, lats, lons):
+        """Höhen für alle Punkte; erste Kachel mit gültigem Wert gewinnt"""
+        result = np.full(lats.shape, np.nan)
+        for tile in self.tiles:
+            todo = np.isnan(result)
+            if not todo.any():
+                break
+            values, _ = tile.sample(lats[todo], lons[todo])
+            result[todo] = values
+        return result
+
+
+def _densify(line: List[Point], spacing_m: float):
+    """Verdichtet eine Linie auf gleichmäßige Abstände; gibt (lat, lon, dist_m) zurück"""
+    coords = np.asarray(line, dtype=np.float64)
+    lat, lon = coords[:, 0], coords[:, 1]
+
+    kx = math.cos(math.radians(float(lat.mean()))) * EARTH_RADIUS_M * math.pi / 180
+    ky = EARTH_RADIUS_M * math.pi / 180
+    step = np.hypot(np.diff(lon) * kx, np.diff(lat) * ky)
+    dist = np.concatenate(([0.0], np.cumsum(step)))
+
+    if dist[-1] <= 0:
+        return lat[:1], lon[:1], dist[:1]
+
+    grid = np.append(np.arange(0.0, dist[-1], spacing_m), dist[-1])
+    return np.interp(grid, dist, lat), np.interp(grid, dist, lon), grid
+
+
+def _smooth(values, window: int):
+    """Gleitender Mittelwert, NaN-tolerant, Randwerte bleiben erhalten"""
+    if window <= 1 or len(values) < window:
+        return values
+    valid = ~np.isnan(values)
+    kernel = np.ones(window)
+    sums = np.convolve(np.where(valid, values, 0.0), kernel, mode='same')
+    counts = np.convolve(valid.astype(np.float64), kernel, mode='same')
+    with np.errstate(invalid='ignore', divide='ignore'):
+        smoothed = sums / counts
+    smoothed[~valid] = np.nan
+    return smoothed
+
+
+def compute_elevation_profiles(trail_lines: List[List[List[Point]]],
+                               model: ElevationModel,
+                               spacing_m: float = SAMPLE_SPACING_M,
+                               profile_points: int = PROFILE_POINTS) -> List[Dict[str, Any]]:
+    """
+    Höhenstatistik für viele Wege in einem Durchgang.
+
+    Args:
+        trail_lines: pro Weg die verknüpften Linien aus trail_geometry
+        model: geöffnetes Höhenmodell
+
+    Returns:
+        pro Weg {} (keine Daten) oder {"elevationGain", "elevationLoss",
+        "maxElevation", "minElevation", "elevationProfile": [[km, m], ...]}
+    """
+    lat_parts, lon_parts, dist_parts = [], [], []
+    trail_ids, line_ids = [], []
+    line_counter = 0
+
+    # 1. Alle Linien verdichten und aneinanderhängen
+    for trail_idx, lines in enumerate(trail_lines):
+        offset = 0.0
+        for line in lines:
+            if len(line) < 2:
+                continue
+            lat, lon, dist = _densify(line, spacing_m)
+            lat_parts.append(lat)
+            lon_parts.append(lon)
+            # Lücken zwischen Teilstücken zählen nicht zur Profil-Distanz
+            dist_parts.append(dist + offset)
+            offset += float(dist[-1])
+            trail_ids.append(np.full(len(lat), trail_idx))
+            line_ids.append(np.full(len(lat), line_counter))
+            line_counter += 1
+
+    results = [{} for _ in trail_lines]
+    if not lat_parts:
+        return results
+
+    lats = np.concatenate(lat_parts)
+    lons = np.concatenate(lon_parts)
+    dists = np.concatenate(dist_parts)
+    trail_of = np.concatenate(trail_ids)
+    line_of = np.concatenate(line_ids)
+
+    # 2. Ein gemeinsamer Abtast-Durchgang über das DEM
+    raw = model.sample(lats, lons)
+
+    # 3. Glätten pro Linie (DEM-Rauschen würde den Anstieg sonst aufblähen)
+    bounds = np.flatnonzero(np.diff(line_of)) + 1
+    elevation = np.concatenate([_smooth(part, SMOOTHING_WINDOW) for part in np.split(raw, bounds)])
+
+    # 4. Auf-/Abstieg: Differenzen innerhalb derselben Linie aufsummieren
+    diff = np.diff(elevation)
+    diff[line_of[1:] != line_of[:-1]] = 0.0
+    diff = np.nan_to_num(diff)
+    n_trails = len(trail_lines)
+    gain = np.bincount(trail_of[1:], weights=np.clip(diff, 0, None), minlength=n_trails)
+    loss = np.bincount(trail_of[1:], weights=np.clip(-diff, 0, None), minlength=n_trails)
+
+    # 5. Min/Max und Profil pro Weg (Punkte sind nach Weg sortiert)
+    starts = np.flatnonzero(np.diff(trail_of)) + 1
+    for part_ele, part_dist, part_raw, idx in zip(
+            np.split(elevation, starts), np.split(dists, starts),
+            np.split(raw, starts), trail_of[np.concatenate(([0], starts))]):
+        valid = ~np.isnan(part_raw)
+        if not valid.any():
+            continue
+
+        grid = np.linspace(part_dist[0], part_dist[-1], min(profile_points, len(part_dist)))
+        profile_ele = np.interp(grid, part_dist[valid], part_raw[valid])
+
+        results[idx] = {
+            "elevationGain": int(round(gain[idx])),
+            "elevationLoss": int(round(loss[idx])),
+            "maxElevation": int(round(float(np.nanmax(part_raw)))),
+            "minElevation": int(round(float(np.nanmin(part_raw)))),
+            "elevationProfile": [
+                [round(float(d) / 1000, 2), int(round(float(e)))]
+                for d, e in zip(grid, profile_ele)
+            ],
+        }
+
+    return results
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trail Geometry Pipeline
+Verknüpft die Member-Ways einer Wanderroute zu geordneten Linien,
+berechnet Längen, vereinfacht pro Zoomstufe (Douglas-Peucker)
+und kodiert das Ergebnis als Encoded Polyline für die App.
+"""
+
+import math
+from typing import List, Dict, Any, Tuple, Optional
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+Point = Tuple[float, float]
+
+EARTH_RADIUS_KM = 6371.0
+EARTH_RADIUS_M = 6371000.0
+
+# Douglas-Peucker Toleranz in Metern je Zoomstufe der Karte
+ZOOM_TOLERANCES_M = {
+    10: 60.0,   # Übersicht Landkreis
+    13: 12.0,   # Stadt / Region
+    16: 2.0,    # Detailansicht
+}
+
+# Endpunkte gelten als verbunden wenn sie auf 7 Nachkommastellen gleich sind
+# (OSM-Ways teilen sich Knoten, die Koordinaten sind also identisch)
+ENDPOINT_PRECISION = 7
+
+
+def extract_way_segments(element: Dict[str, Any]) -> List[List[Point]]:
+    """Liest die Geometrie jedes Member-Ways einer Relation (out geom)"""
+    segments = []
+    for member in element.get('members', []):
+        if member.get('type') != 'way':
+            continue
+        segment = [
+            (point['lat'], point['lon'])
+            for point in member.get('geometry', [])
+            if point and 'lat' in point and 'lon' in point
+        ]
+        if len(segment) >= 2:
+            segments.append(segment)
+    return segments
+
+
+def _endpoint_key(point: Point) -> Tuple[float, float]:
+    return (round(point[0], ENDPOINT_PRECISION), round(point[1], ENDPOINT_PRECISION))
+
+
+def stitch_segments(segments: List[List[Point]]) -> List[List[Point]]:
+    """
+    Verknüpft Way-Segmente über gemeinsame Endpunkte zu geordneten Linien.
+
+    Segmente werden bei Bedarf umgedreht. Nicht verbundene Teilstücke
+    ergeben eigene Linien, damit keine Sprünge zwischen ihnen entstehen.
+    Laufzeit O(n) über einen Endpunkt-Index.
+    """
+    if not segments:
+        return []
+
+    # Endpunkt -> [(Segment-Index, ist_Ende)]
+    endpoints: Dict[Tuple[float, float], List[Tuple[int, bool]]] = {}
+    for idx, segment in enumerate(segments):
+        endpoints.setdefault(_endpoint_key(segment[0]), []).append((idx, False))
+        endpoints.setdefault(_endpoint_key(segment[-1]), []).append((idx, True))
+
+    used = [False] * len(segments)
+
+    def take_next(point: Point) -> Optional[List[Point]]:
+        """Holt ein unbenutztes Segment, das an diesem Punkt anschließt"""
+        for idx, at_end in endpoints.get(_endpoint_key(point), []):
+            if used[idx]:
+                continue
+            used[idx] = True
+            segment = segments[idx]
+            # Segment so ausrichten, dass es am Anschlusspunkt beginnt
+            return list(reversed(segment)) if at_end else list(segment)
+        return None
+
+    lines = []
+    for idx, segment in enumerate(segments):
+        if used[idx]:
+            continue
+        used[idx] = True
+        line = list(segment)
+
+        # Vorwärts verlängern
+        while True:
+            nxt = take_next(line[-1])
+            if nxt is None:
+                break
+            line.extend(nxt[1:])
+
+        # Rückwärts verlängern
+        while True:
+            prev = take_next(line[0])
+            if prev is None:
+                break
+            prev.reverse()
+            line[:0] = prev[:-1]
+
+        lines.append(line)
+
+    return lines
+
+
+def line_lengths_km(lines: List[List[Point]]) -> List[float]:
+    """Haversine-Länge jeder Linie in km (vektorisiert wenn numpy verfügbar)"""
+    if not lines:
+        return []
+
+    if HAS_NUMPY:
+        counts = np.array([len(line) for line in lines])
+        coords = np.radians(np.array([p for line in lines for p in line], dtype=np.float64))
+        lat, lon = coords[:, 0], coords[:, 1]
+
+        dlat = lat[1:] - lat[:-1]
+        dlon = lon[1:] - lon[:-1]
+        a = np.sin(dlat / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(dlon / 2) ** 2
+        dist = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+        # Übergänge zwischen zwei Linien nicht mitzählen
+        boundaries = np.cumsum(counts)[:-1] - 1
+        dist[boundaries] = 0.0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        starts = np.minimum(starts, max(len(dist) - 1, 0))
+        totals = np.add.reduceat(dist, starts) if len(dist) else np.zeros(len(lines))
+        return [float(t) if n >= 2 else 0.0 for t, n in zip(totals, counts)]
+
+    lengths = []
+    for line in lines:
+        total = 0.0
+        for (lat1, lon1), (lat2, lon2) in zip(line, line[1:]):
+            phi1, phi2 = math.radians(lat1), math.radians(lat2)
+            dphi = phi2 - phi1
+            dlmb = math.radians(lon2 - lon1)
+            a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+            total += 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+        lengths.append(total)
+    return lengths
+
+
+def _project(points: List[Point]) -> Tuple[List[float], List[float]]:
+    """Lokale equirektanguläre Projektion in Meter (ausreichend für Regionen)"""
+    lat0 = math.radians(sum(p[0] for p in points) / len(points))
+    kx = math.cos(lat0) * EARTH_RADIUS_M * math.pi / 180
+    ky = EARTH_RADIUS_M * math.pi / 180
+    return [p[1] * kx for p in points], [p[0] * ky for p in points]
+
+
+def douglas_peucker(points: List[Point], tolerance_m: float) -> List[Point]:
+    """Vereinfacht eine Linie (iterativ, ohne Rekursionslimit)"""
+    if len(points) < 3 or tolerance_m <= 0:
+        return list(points)
+
+    xs, ys = _project(points)
+    if HAS_NUMPY:
+        xs, ys = np.array(xs), np.array(ys)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        x1, y1, x2, y2 = xs[first], ys[first], xs[last], ys[last]
+        dx, dy = x2 - x1, y2 - y1
+        seg_len_sq = dx * dx + dy * dy
+
+        if HAS_NUMPY:
+            px = xs[first + 1:last] - x1
+            py = ys[first + 1:last] - y1
+            if seg_len_sq > 0:
+                t = np.clip((px * dx + py * dy) / seg_len_sq, 0.0, 1.0)
+                dist_sq = (px - t * dx) ** 2 + (py - t * dy) ** 2
+            else:
+                dist_sq = px * px + py * py
+            rel = int(np.argmax(dist_sq))
+            max_dist_sq = float(dist_sq[rel])
+            index = first + 1 + rel
+        else:
+            max_dist_sq, index = -1.0, first
+            for i in range(first + 1, last):
+                px, py = xs[i] - x1, ys[i] - y1
+                if seg_len_sq > 0:
+                    t = max(0.0, min(1.0, (px * dx + py * dy) / seg_len_sq))
+                    px, py = px - t * dx, py - t * dy
+                dist_sq = px * px + py * py
+                if dist_sq > max_dist_sq:
+                    max_dist_sq, index = dist_sq, i
+
+        if max_dist_sq > tolerance_m * tolerance_m:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+
+    return [p for p, k in zip(points, keep) if k]
+
+
+def encode_polyline(points: List[Point], precision: int = 5) -> str:
+    """Kodiert Punkte im Encoded Polyline Format (Google, precision 5)"""
+    factor = 10 ** precision
+    result = []
+    prev_lat = prev_lon = 0
+
+    for lat, lon in points:
+        ilat, ilon = int(round(lat * factor)), int(round(lon * factor))
+        for delta in (ilat - prev_lat, ilon - prev_lon):
+            value = ~(delta << 1) if delta < 0 else (delta << 1)
+            while value >= 0x20:
+                result.append(chr((0x20 | (value & 0x1f)) + 63))
+                value >>= 5
+            result.append(chr(value + 63))
+        prev_lat, prev_lon = ilat, ilon
+
+    return ''.join(result)
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[Point]:
+    """Dekodiert eine Encoded Polyline (Gegenstück zu encode_polyline)"""
+    factor = 10 ** precision
+    points = []
+    index = lat = lon = 0
+
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            shift = value = 0
+            while True:
+                byte = ord(encoded[index]) - 63
+                index += 1
+                value |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        lat += deltas[0]
+        lon += deltas[1]
+        points.append((lat / factor, lon / factor))
+
+    return points
+
+
+def build_trail_geometry(element: Dict[str, Any],
+                         zoom_tolerances: Dict[int, float] = None) -> Dict[str, Any]:
+    """
+    Komplette Geometrie-Stufe für eine Routen-Relation.
+
+    Returns:
+        {
+            "lines": [[(lat, lon), ...], ...],     # verknüpfte Rohlinien
+            "lengthKm": float,
+            "center": {"lat", "lon"},
+            "bounds": {"south", "west", "north", "east"},
+            "simplified": {zoom: [[(lat, lon), ...], ...]},
+            "polylines": {"z<zoom>": ["<encoded>", ...]},
+        }
+        oder {} wenn die Relation keine Way-Geometrie hat.
+    """
+    zoom_tolerances = zoom_tolerances or ZOOM_TOLERANCES_M
+
+    lines = stitch_segments(extract_way_segments(element))
+    if not lines:
+        return {}
+
+    lengths = line_lengths_km(lines)
+    all_points = [p for line in lines for p in line]
+    lats = [p[0] for p in all_points]
+    lons = [p[1] for p in all_points]
+
+    simplified = {
+        zoom: [douglas_peucker(line, tolerance) for line in lines]
+        for zoom, tolerance in sorted(zoom_tolerances.items())
+    }
+
+    return {
+        "lines": lines,
+        "lengthKm": round(sum(lengths), 1),
+        "center": {"lat": sum(lats) / len(lats), "lon": sum(lons) / len(lons)},
+        "bounds": {
+            "south": min(lats), "west": min(lons),
+            "north": max(lats), "east": max(lons),
+        },
+        "simplified": simplified,
+        "polylines": {
+            f"z{zoom}": [encode_polyline(line) for line in zoom_lines]
+            for zoom, zoom_lines in simplified.items()
+        },
+    }
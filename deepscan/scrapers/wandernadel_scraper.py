@@ -7,12 +7,28 @@ Sammelt alle Stempelstellen der Harzer Wandernadel in der MSH-Region
 WICHTIG: Genaue Positionen sind für Wanderer essentiell!
 """
 
-import json
+import sys
 import time
 from typing import List, Dict, Any
 from pathlib import Path
 import requests
 
+# Telemetrie, JSON-Writer und PBF-Extrakt aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+from osm_pbf import load_extract
+
+try:
+    from .overpass_cache import OverpassElementCache
+except ImportError:
+    from overpass_cache import OverpassElementCache
+
+try:
+    from .overpass_rate import OverpassRateController
+except ImportError:
+    from overpass_rate import OverpassRateController
+
 
 class WandernadelScraper:
     """Spezialisierter Scraper für Harzer Wandernadel Stempelstellen aus OpenStreetMap"""
@@ -44,6 +60,9 @@ class WandernadelScraper:
     def __init__(self, rate_limit: float = 2.0):
         self.rate_limit = rate_limit
         self.session = requests.Session()
+        get_telemetry().instrument_session(self.session)
+        # Taktung nach Serverlast (/api/status, Retry-After), rate_limit nur noch als Fallback
+        self.overpass = OverpassRateController(self.session, fallback_interval=rate_limit)
         self.session.headers.update({
             'User-Agent': 'MSH-Map-WandernadelScraper/1.0 (Educational Purpose; contact@kolan-systems.de)'
         })
@@ -95,7 +114,7 @@ out body;
         for url in self.OVERPASS_URLS:
             try:
                 print(f"   Versuche {url.split('/')[2]}...")
-                response = self.session.post(
+                response = self.overpass.post(
                     url,
                     data={"data": query},
                     timeout=self.REQUEST_TIMEOUT
@@ -250,7 +269,7 @@ out body;
 
         return "Mansfeld-Südharz"
 
-    def scrape(self) -> List[Dict[str, Any]]:
+    def scrape(self, osm_data: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Hauptmethode: Scraped Wandernadel-Stempelstellen"""
 
         print("\n" + "="*60)
@@ -258,13 +277,13 @@ out body;
         print("="*60)
         print("[INFO] Genaue Positionen sind für Wanderer essentiell!")
 
-        time.sleep(self.rate_limit)
-
-        # Daten holen
-        osm_data = self.fetch_wandernadel_data()
-
-        # Parsen
-        stamps = self.parse_wandernadel_elements(osm_data)
+        # Overpass nur ohne vorab geladene Daten (z.B. aus dem PBF-Extrakt),
+        # dann inkrementell über den Element-Cache
+        if osm_data is None:
+            stamps = OverpassElementCache("wandernadel", self).update(
+                self.fetch_wandernadel_data, self.parse_wandernadel_elements)
+        else:
+            stamps = self.parse_wandernadel_elements(osm_data)
 
         # Nach Stempelnummer sortieren
         stamps.sort(key=lambda x: x.get('stampNumber', 'ZZZ'))
@@ -292,7 +311,10 @@ out body;
 def main():
     """Hauptfunktion"""
     scraper = WandernadelScraper()
-    stamps = scraper.scrape()
+    telemetry = get_telemetry()
+    with telemetry.timer("scrape"):
+        stamps = scraper.scrape(load_extract("wandernadel"))
+    telemetry.count("stamps", len(stamps))
 
     # Output-Verzeichnis
     output_dir = Path(__file__).parent.parent / "output" / "outdoor"
@@ -300,17 +322,16 @@ def main():
 
     # Export
     output_file = output_dir / "wandernadel_osm.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "meta": {
-                "source": "openstreetmap",
-                "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "bbox": scraper.BBOX_HARZ,
-                "count": len(stamps),
-                "info": "Harzer Wandernadel Stempelstellen"
-            },
-            "data": stamps
-        }, f, ensure_ascii=False, indent=2)
+    write_json(output_file, {
+        "meta": {
+            "source": "openstreetmap",
+            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "bbox": scraper.BBOX_HARZ,
+            "count": len(stamps),
+            "info": "Harzer Wandernadel Stempelstellen"
+        },
+        "data": stamps
+    })
 
     print(f"\n[SAVED] Gespeichert: {output_file}")
 
@@ -319,8 +340,7 @@ def main():
     flutter_assets.mkdir(parents=True, exist_ok=True)
 
     flutter_file = flutter_assets / "wandernadel.json"
-    with open(flutter_file, 'w', encoding='utf-8') as f:
-        json.dump(stamps, f, ensure_ascii=False, indent=2)
+    write_json(flutter_file, stamps, pretty=False)
 
     print(f"[SAVED] Flutter-Assets: {flutter_file}")
 
@@ -9,12 +9,40 @@ WICHTIG:
 - Markiert ungeprüfte Wege entsprechend
 """
 
-import json
+import sys
 import time
 from typing import List, Dict, Any, Tuple
 from pathlib import Path
 import requests
 
+# Telemetrie, JSON-Writer und PBF-Extrakt aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+from osm_pbf import load_extract
+
+try:
+    from .trail_geometry import (build_trail_geometry, extract_way_segments, stitch_segments,
+                                 line_lengths_km, ZOOM_TOLERANCES_M)
+except ImportError:
+    from trail_geometry import (build_trail_geometry, extract_way_segments, stitch_segments,
+                                line_lengths_km, ZOOM_TOLERANCES_M)
+
+try:
+    from .trail_elevation import ElevationModel, compute_elevation_profiles, HAS_NUMPY
+except ImportError:
+    from trail_elevation import ElevationModel, compute_elevation_profiles, HAS_NUMPY
+
+try:
+    from .overpass_cache import OverpassElementCache
+except ImportError:
+    from overpass_cache import OverpassElementCache
+
+try:
+    from .overpass_rate import OverpassRateController
+except ImportError:
+    from overpass_rate import OverpassRateController
+
 
 class WanderwegeScraper:
     """Spezialisierter Scraper für Wanderwege aus OpenStreetMap"""
@@ -74,9 +102,13 @@ class WanderwegeScraper:
         },
     }
 
-    def __init__(self, rate_limit: float = 2.0):
+    def __init__(self, rate_limit: float = 2.0, dem_paths: List[str] = None):
         self.rate_limit = rate_limit
+        self.dem_paths = dem_paths or []
         self.session = requests.Session()
+        get_telemetry().instrument_session(self.session)
+        # Taktung nach Serverlast (/api/status, Retry-After), rate_limit nur noch als Fallback
+        self.overpass = OverpassRateController(self.session, fallback_interval=rate_limit)
         self.session.headers.update({
             'User-Agent': 'MSH-Map-WanderwegeScraper/1.0 (Educational Purpose; contact@kolan-systems.de)'
         })
@@ -116,7 +148,7 @@ out body geom;
         for url in self.OVERPASS_URLS:
             try:
                 print(f"   Versuche {url.split('/')[2]}...")
-                response = self.session.post(
+                response = self.overpass.post(
                     url,
                     data={"data": query},
                     timeout=self.REQUEST_TIMEOUT
@@ -139,17 +171,9 @@ out body geom;
         return {"elements": []}
 
     def extract_route_points(self, element: Dict[str, Any]) -> List[Tuple[float, float]]:
-        """Extrahiert GPS-Punkte aus Relation-Geometrie"""
-        points = []
-
-        # Direkte Geometrie in members
-        members = element.get('members', [])
-        for member in members:
-            if member.get('type') == 'way':
-                geometry = member.get('geometry', [])
-                for point in geometry:
-                    if 'lat' in point and 'lon' in point:
-                        points.append((point['lat'], point['lon']))
+        """Extrahiert GPS-Punkte aus Relation-Geometrie (verknüpfte Linien hintereinander)"""
+        lines = stitch_segments(extract_way_segments(element))
+        points = [p for line in lines for p in line]
 
         # Falls keine Geometrie, bounds als Fallback
         if not points and 'bounds' in element:
@@ -164,21 +188,21 @@ out body geom;
         """Berechnet ungefähre Routenlänge in km"""
         if len(points) < 2:
             return 0.0
-
-        total = 0.0
-        for i in range(len(points) - 1):
-            lat1, lon1 = points[i]
-            lat2, lon2 = points[i + 1]
-            # Vereinfachte Haversine-Formel
-            import math
-            R = 6371  # Erdradius in km
-            dlat = math.radians(lat2 - lat1)
-            dlon = math.radians(lon2 - lon1)
-            a = math.sin(dlat/2)**2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon/2)**2
-            c = 2 * math.asin(math.sqrt(a))
-            total += R * c
-
-        return round(total, 1)
+        return round(line_lengths_km([points])[0], 1)
+
+    def _fallback_geometry(self, element: Dict[str, Any]) -> Dict[str, Any]:
+        """Minimal-Geometrie aus den Relation-Bounds (nur Zentrum, keine Linie)"""
+        points = self.extract_route_points(element)
+        if not points:
+            return {}
+        lat, lon = points[0]
+        return {
+            "lengthKm": 0.0,
+            "center": {"lat": lat, "lon": lon},
+            "bounds": None,
+            "simplified": {zoom: [points] for zoom in ZOOM_TOLERANCES_M},
+            "polylines": {},
+        }
 
     def identify_known_trail(self, name: str) -> Tuple[str, Dict[str, Any]]:
         """Identifiziert bekannten Wanderweg anhand des Namens"""
@@ -254,9 +278,11 @@ out body geom;
             # Bekannten Weg identifizieren
             known_id, known_info = self.identify_known_trail(name)
 
-            # GPS-Punkte extrahieren
-            points = self.extract_route_points(element)
-            if not points:
+            # Geometrie: Ways verknüpfen, Länge berechnen, je Zoomstufe vereinfachen
+            geometry = build_trail_geometry(element)
+            if not geometry:
+                geometry = self._fallback_geometry(element)
+            if not geometry:
                 print(f"   [SKIP] Keine Geometrie: {name}")
                 continue
 
@@ -271,7 +297,7 @@ out body geom;
                     pass
 
             if not length_km:
-                length_km = self.calculate_route_length(points)
+                length_km = geometry['lengthKm']
 
             # Schwierigkeit
             difficulty = "leicht"
@@ -307,14 +333,9 @@ out body geom;
             # Sicherheitsbewertung
             safety = self.assess_trail_safety(tags, known_info)
 
-            # Zentrum berechnen
-            center_lat = sum(p[0] for p in points) / len(points)
-            center_lon = sum(p[1] for p in points) / len(points)
-
-            # Route vereinfachen (max 500 Punkte)
-            if len(points) > 500:
-                step = len(points) // 500
-                points = points[::step]
+            # Detailstufe als Punktliste für Review, alle Stufen als Encoded Polylines
+            detail_zoom = max(ZOOM_TOLERANCES_M)
+            points = [p for line in geometry['simplified'][detail_zoom] for p in line]
 
             trail = {
                 "id": known_id or osm_id,
@@ -330,8 +351,12 @@ out body geom;
                 "elevationGain": elevation_gain,
 
                 # Koordinaten
-                "center": {"lat": center_lat, "lon": center_lon},
+                "center": geometry['center'],
+                "bounds": geometry['bounds'],
                 "routePoints": [{"lat": p[0], "lon": p[1]} for p in points],
+                "routePolylines": geometry['polylines'],
+                # Verknüpfte Rohlinien nur für die Höhenstufe (wird vor Export entfernt)
+                "_lines": geometry.get('lines', []),
 
                 # Sicherheit
                 "status": safety["status"],
@@ -356,7 +381,40 @@ out body geom;
 
         return trails
 
-    def scrape(self) -> List[Dict[str, Any]]:
+    def add_elevation(self, trails: List[Dict[str, Any]]) -> int:
+        """Ergänzt Höhenprofile aus dem lokalen DEM (alle Wege in einem Durchgang)"""
+        if not self.dem_paths:
+            return 0
+        if not HAS_NUMPY:
+            print("   [WARN] numpy fehlt - Höhenprofile übersprungen")
+            return 0
+
+        print(f"\n[HOEHE] Lade Höhenmodell ({len(self.dem_paths)} Pfad(e))...")
+        model = ElevationModel.open(self.dem_paths)
+        if not model.tiles:
+            print("   [WARN] Keine DEM-Kacheln gefunden")
+            return 0
+
+        with get_telemetry().timer("elevation"):
+            profiles = compute_elevation_profiles([t.get('_lines', []) for t in trails], model)
+
+        enriched = 0
+        for trail, profile in zip(trails, profiles):
+            if not profile:
+                continue
+            # Höhenmeter aus OSM-Tags haben Vorrang
+            if trail.get('elevationGain') is None:
+                trail['elevationGain'] = profile['elevationGain']
+            trail['elevationLoss'] = profile['elevationLoss']
+            trail['maxElevation'] = profile['maxElevation']
+            trail['minElevation'] = profile['minElevation']
+            trail['elevationProfile'] = profile['elevationProfile']
+            enriched += 1
+
+        print(f"   [OK] {enriched}/{len(trails)} Wege mit Höhenprofil ({len(model.tiles)} Kacheln)")
+        return enriched
+
+    def scrape(self, osm_data: Dict[str, Any] = None) -> List[Dict[str, Any]]:
         """Hauptmethode: Scraped Wanderwege"""
 
         print("\n" + "="*60)
@@ -365,13 +423,18 @@ out body geom;
         print("[INFO] Pruefe Sicherheit/Begehbarkeit so weit moeglich")
         print("[WARN] Ungepruefte Wege werden entsprechend markiert!")
 
-        time.sleep(self.rate_limit)
+        # Overpass nur ohne vorab geladene Daten (z.B. aus dem PBF-Extrakt),
+        # dann inkrementell über den Element-Cache
+        if osm_data is None:
+            trails = OverpassElementCache("wanderwege", self).update(
+                self.fetch_trail_data, self.parse_trail_elements)
+        else:
+            trails = self.parse_trail_elements(osm_data)
 
-        # Daten holen
-        osm_data = self.fetch_trail_data()
-
-        # Parsen
-        trails = self.parse_trail_elements(osm_data)
+        # Höhenprofile (optional, nur mit --dem)
+        self.add_elevation(trails)
+        for trail in trails:
+            trail.pop('_lines', None)
 
         # Nach Länge sortieren
         trails.sort(key=lambda x: x.get('lengthKm', 0), reverse=True)
@@ -407,8 +470,18 @@ out body geom;
 
 def main():
     """Hauptfunktion"""
-    scraper = WanderwegeScraper()
-    trails = scraper.scrape()
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Wanderwege aus OSM für die MSH-Region')
+    parser.add_argument('--dem', nargs='+', default=[],
+                        help='DEM-Dateien oder Verzeichnisse (.hgt / GeoTIFF) für Höhenprofile')
+    args = parser.parse_args()
+
+    scraper = WanderwegeScraper(dem_paths=args.dem)
+    telemetry = get_telemetry()
+    with telemetry.timer("scrape"):
+        trails = scraper.scrape(load_extract("wanderwege"))
+    telemetry.count("trails", len(trails))
 
     # Output-Verzeichnis
     output_dir = Path(__file__).parent.parent / "output" / "outdoor"
@@ -416,17 +489,16 @@ def main():
 
     # Export
     output_file = output_dir / "wanderwege_osm.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "meta": {
-                "source": "openstreetmap",
-                "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "bbox": scraper.BBOX_MSH,
-                "count": len(trails),
-                "info": "Wanderwege in MSH-Region"
-            },
-            "data": trails
-        }, f, ensure_ascii=False, indent=2)
+    write_json(output_file, {
+        "meta": {
+            "source": "openstreetmap",
+            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "bbox": scraper.BBOX_MSH,
+            "count": len(trails),
+            "info": "Wanderwege in MSH-Region"
+        },
+        "data": trails
+    })
 
     print(f"\n[SAVED] Gespeichert: {output_file}")
 
@@ -447,17 +519,23 @@ def main():
             "lengthKm": trail.get('lengthKm'),
             "isCircular": trail.get('isCircular', False),
             "elevationGain": trail.get('elevationGain'),
+            "elevationLoss": trail.get('elevationLoss'),
+            "maxElevation": trail.get('maxElevation'),
+            "minElevation": trail.get('minElevation'),
+            "elevationProfile": trail.get('elevationProfile'),
             "status": trail.get('status'),
             "safetyWarning": trail.get('safetyWarning'),
             "seasonalInfo": trail.get('seasonalInfo'),
             "website": trail.get('website'),
             "center": trail.get('center'),
-            "routePoints": trail.get('routePoints', []),
+            "bounds": trail.get('bounds'),
+            # Encoded Polylines je Zoomstufe statt roher Punktlisten
+            "routePolylines": trail.get('routePolylines', {}),
         })
 
+    # Kompakt schreiben - die Datei wird nur von der App gelesen
     flutter_file = flutter_dir / "wanderwege.json"
-    with open(flutter_file, 'w', encoding='utf-8') as f:
-        json.dump(flutter_trails, f, ensure_ascii=False, indent=2)
+    write_json(flutter_file, flutter_trails, pretty=False)
 
     print(f"[SAVED] Flutter-Assets: {flutter_file}")
 
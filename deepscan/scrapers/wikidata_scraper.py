@@ -3,13 +3,28 @@
 """
 Wikidata Scraper via SPARQL
 Sammelt kulturelle Sehenswürdigkeiten und historische Orte
+
+Die Abfrage ist nach Klasse und Teil-BBOX partitioniert (mit LIMIT/OFFSET-
+Paginierung), läuft mit wenigen parallelen Requests und wird über die QID
+zusammengeführt. Antworten liegen in output/cache/wikidata/; scheitert eine
+Partition, fehlt nur sie (bzw. kommt aus dem letzten Cache-Stand).
 """
 
+import hashlib
 import json
+import sys
+import threading
 import time
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from pathlib import Path
 import requests
 
+# Telemetrie und JSON-Writer aus deepscan/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from telemetry import get_telemetry
+from json_writer import write_json
+
 
 class WikidataScraper:
     """Scraper für Wikidata über SPARQL Endpoint"""
@@ -40,36 +55,54 @@ class WikidataScraper:
         "Q191992": "nature",     # Nationalpark
     }
 
+    # Partitionierung: je Klasse GRID x GRID Teil-Boxen, Seiten à PAGE_SIZE
+    GRID = 2
+    PAGE_SIZE = 500
+
+    # WDQS-Etikette: wenige gleichzeitige Queries pro IP, Retry-After beachten
+    MAX_WORKERS = 2
+    MAX_RETRIES = 3
+    REQUEST_TIMEOUT = 60
+
+    # Antworten zwischen Läufen; ältere Einträge nur noch als Ersatz bei Fehlern
+    CACHE_DIR = Path(__file__).parent.parent / "output" / "cache" / "wikidata"
+    CACHE_TTL_HOURS = 24
+
     def __init__(self, rate_limit: float = 1.5):
         """
         Args:
-            rate_limit: Sekunden zwischen Requests
+            rate_limit: Sekunden zwischen zwei Request-Starts
         """
         self.rate_limit = rate_limit
+        self._lock = threading.Lock()
+        self._next_request = 0.0
         self.session = requests.Session()
+        get_telemetry().instrument_session(self.session)
         self.session.headers.update({
             'User-Agent': 'MSH-Map-Scraper/2.0 (Educational; contact@kolan-systems.de)',
             'Accept': 'application/sparql-results+json'
         })
 
-    def build_sparql_query(self) -> str:
-        """Erstellt SPARQL Query für kulturelle POIs in der Region"""
+    def build_sparql_query(self, class_ids: List[str] = None, bbox: Dict[str, float] = None,
+                           offset: int = 0) -> str:
+        """Erstellt SPARQL Query für kulturelle POIs in der Region (bzw. einer Partition)"""
 
         # Alle relevanten Wikidata Classes
-        classes = " ".join([f"wd:{qid}" for qid in self.WIKIDATA_MAPPING.keys()])
+        classes = " ".join([f"wd:{qid}" for qid in (class_ids or self.WIKIDATA_MAPPING.keys())])
+        bbox = bbox or self.BBOX
 
         query = f"""
 SELECT DISTINCT ?item ?itemLabel ?itemDescription ?coord ?class ?classLabel ?image ?website
 WHERE {{
   VALUES ?class {{ {classes} }}
-  ?item wdt:P31 ?class.
-  ?item wdt:P625 ?coord.
 
-  # Bounding Box Filter
-  FILTER(
-    ?coord >= "Point({self.BBOX['west']} {self.BBOX['south']})"^^geo:wktLiteral &&
-    ?coord <= "Point({self.BBOX['east']} {self.BBOX['north']})"^^geo:wktLiteral
-  )
+  # Bounding Box über den Geo-Index (ein FILTER auf ?coord vergleicht nur Strings)
+  SERVICE wikibase:box {{
+    ?item wdt:P625 ?coord.
+    bd:serviceParam wikibase:cornerSouthWest "Point({bbox['west']} {bbox['south']})"^^geo:wktLiteral.
+    bd:serviceParam wikibase:cornerNorthEast "Point({bbox['east']} {bbox['north']})"^^geo:wktLiteral.
+  }}
+  ?item wdt:P31 ?class.
 
   # Optionale Felder
   OPTIONAL {{ ?item wdt:P18 ?image. }}
@@ -77,35 +110,140 @@ WHERE {{
 
   SERVICE wikibase:label {{ bd:serviceParam wikibase:language "de,en". }}
 }}
-LIMIT 500
+# Eindeutige Reihenfolge auch innerhalb eines Items (mehrere Bilder/Websites/Koordinaten),
+# sonst verschieben sich Zeilen zwischen den Seiten
+ORDER BY ?item ?class ?coord ?image ?website
+LIMIT {self.PAGE_SIZE}
+OFFSET {offset}
 """
         return query
 
+    def partitions(self) -> List[Tuple[str, Dict[str, float]]]:
+        """(Klasse, Teil-BBOX) in fester Reihenfolge: Klassen wie WIKIDATA_MAPPING"""
+        lat_step = (self.BBOX['north'] - self.BBOX['south']) / self.GRID
+        lon_step = (self.BBOX['east'] - self.BBOX['west']) / self.GRID
+        tiles = []
+        for row in range(self.GRID):
+            for col in range(self.GRID):
+                tiles.append({
+                    "south": round(self.BBOX['south'] + row * lat_step, 6),
+                    "west": round(self.BBOX['west'] + col * lon_step, 6),
+                    "north": round(self.BBOX['south'] + (row + 1) * lat_step, 6),
+                    "east": round(self.BBOX['west'] + (col + 1) * lon_step, 6),
+                })
+        return [(qid, tile) for qid in self.WIKIDATA_MAPPING for tile in tiles]
+
+    def _cache_file(self, query: str) -> Path:
+        return self.CACHE_DIR / f"{hashlib.sha1(query.encode('utf-8')).hexdigest()[:20]}.json"
+
+    def _read_cache(self, query: str, max_age_hours: float = None) -> Optional[List[Dict[str, Any]]]:
+        cache_file = self._cache_file(query)
+        if not cache_file.exists():
+            return None
+        if max_age_hours is not None and time.time() - cache_file.stat().st_mtime > max_age_hours * 3600:
+            return None
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)["bindings"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _wait_turn(self) -> None:
+        """Mindestabstand rate_limit zwischen zwei Request-Starts, über alle Threads"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_request)
+            self._next_request = start + self.rate_limit
+        if start > now:
+            time.sleep(start - now)
+
+    def fetch_page(self, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Bindings einer Seite: Cache, sonst Endpoint; None wenn beides fehlt"""
+        telemetry = get_telemetry()
+        cached = self._read_cache(query, self.CACHE_TTL_HOURS)
+        telemetry.cache("wikidata_pages", cached is not None)
+        if cached is not None:
+            return cached
+
+        for attempt in range(self.MAX_RETRIES):
+            self._wait_turn()
+            try:
+                response = self.session.get(
+                    self.SPARQL_ENDPOINT,
+                    params={'query': query, 'format': 'json'},
+                    timeout=self.REQUEST_TIMEOUT
+                )
+                if response.status_code in (429, 500, 502, 503, 504):
+                    retry_after = response.headers.get('Retry-After', '')
+                    wait = int(retry_after) if retry_after.isdigit() else 5 * (attempt + 1)
+                    time.sleep(min(wait, 60))
+                    continue
+                response.raise_for_status()
+                bindings = response.json().get('results', {}).get('bindings', [])
+            except requests.exceptions.Timeout:
+                # Zu schwere Query: Wiederholen hilft nicht
+                break
+            except (requests.exceptions.RequestException, ValueError) as e:
+                print(f"   ❌ Fehler bei Wikidata: {type(e).__name__}")
+                continue
+
+            self.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            write_json(self._cache_file(query), {"query": query, "bindings": bindings}, pretty=False)
+            return bindings
+
+        # Letzter bekannter Stand ist besser als eine Lücke
+        stale = self._read_cache(query)
+        if stale is not None:
+            print("   ⚠️  Wikidata-Seite aus älterem Cache")
+        return stale
+
+    def fetch_partition(self, qid: str, bbox: Dict[str, float]) -> Optional[List[Dict[str, Any]]]:
+        """Alle Seiten einer Partition, None wenn eine Seite fehlschlägt"""
+        bindings = []
+        offset = 0
+        while True:
+            page = self.fetch_page(self.build_sparql_query([qid], bbox, offset))
+            if page is None:
+                return None
+            bindings.extend(page)
+            if len(page) < self.PAGE_SIZE:
+                return bindings
+            offset += self.PAGE_SIZE
+
     def fetch_wikidata(self) -> Dict[str, Any]:
-        """Führt SPARQL Query aus"""
+        """Führt die partitionierten SPARQL Queries aus und führt sie über die QID zusammen"""
 
-        query = self.build_sparql_query()
+        partitions = self.partitions()
 
         print(f"📚 Frage Wikidata SPARQL Endpoint ab...")
         print(f"   Bounding Box: {self.BBOX}")
-
-        try:
-            response = self.session.get(
-                self.SPARQL_ENDPOINT,
-                params={'query': query, 'format': 'json'},
-                timeout=60
-            )
-            response.raise_for_status()
-
-            data = response.json()
-            results = data.get('results', {}).get('bindings', [])
-
-            print(f"✅ {len(results)} Wikidata-Einträge gefunden")
-            return data
-
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Fehler bei Wikidata: {e}")
-            return {"results": {"bindings": []}}
+        print(f"   {len(partitions)} Partitionen ({len(self.WIKIDATA_MAPPING)} Klassen x "
+              f"{self.GRID * self.GRID} Teil-Boxen), {self.MAX_WORKERS} parallel")
+
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as pool:
+            results = list(pool.map(lambda partition: self.fetch_partition(*partition), partitions))
+
+        # Duplikate: Mehrfachklassen, Items auf Teil-Box-Grenzen, mehrere Bilder/Websites
+        bindings = []
+        seen = set()
+        failed = 0
+        for (qid, bbox), rows in zip(partitions, results):
+            if rows is None:
+                failed += 1
+                print(f"   ⚠️  Partition {qid} {bbox} fehlgeschlagen")
+                continue
+            for row in rows:
+                item = row['item']['value']
+                if item in seen:
+                    continue
+                seen.add(item)
+                bindings.append(row)
+
+        get_telemetry().count("wikidata_partitions_failed", failed)
+        if failed:
+            print(f"⚠️  {failed} von {len(partitions)} Partitionen fehlgeschlagen")
+        print(f"✅ {len(bindings)} Wikidata-Einträge gefunden")
+        return {"results": {"bindings": bindings}}
 
     def parse_wkt_point(self, wkt: str) -> tuple:
         """
@@ -145,6 +283,9 @@ LIMIT 500
             lat, lon = self.parse_wkt_point(coord_wkt)
             if not lat or not lon:
                 continue
+            if not (self.BBOX['south'] <= lat <= self.BBOX['north'] and
+                    self.BBOX['west'] <= lon <= self.BBOX['east']):
+                continue  # z.B. zweite Koordinate eines Items außerhalb
 
             # Kategorie
             wikidata_class = item.get('class', {}).get('value', '')
@@ -183,9 +324,6 @@ LIMIT 500
         print("📚 Wikidata Scraper")
         print("="*60)
 
-        # Rate Limiting
-        time.sleep(self.rate_limit)
-
         # Wikidata abfragen
         wikidata = self.fetch_wikidata()
 
@@ -210,19 +348,21 @@ LIMIT 500
 def main():
     """Test-Funktion"""
     scraper = WikidataScraper()
-    locations = scraper.scrape()
+    telemetry = get_telemetry()
+    with telemetry.timer("scrape"):
+        locations = scraper.scrape()
+    telemetry.count("locations", len(locations))
 
     # Als JSON speichern
     output_file = "output/raw/wikidata_data.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            "meta": {
-                "source": "wikidata",
-                "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "bbox": scraper.BBOX
-            },
-            "data": locations
-        }, f, ensure_ascii=False, indent=2)
+    write_json(output_file, {
+        "meta": {
+            "source": "wikidata",
+            "scraped_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "bbox": scraper.BBOX
+        },
+        "data": locations
+    })
 
     print(f"\n💾 Gespeichert: {output_file}")
 
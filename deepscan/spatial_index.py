@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - Räumlicher Index
+
+KD-Tree über (lat, lon)-Punkten für "nächster Punkt" und "alle Punkte im
+Umkreis". Ersetzt Schleifen, die für jede Abfrage alle Punkte mit
+Haversine vergleichen: Aufbau einmal O(n log n), Abfrage O(log n).
+
+Die Punkte werden dafür auf eine Ebene in km projiziert (equirectangular um
+die mittlere Breite). Innerhalb des Landkreises weicht das weniger als 0,5 %
+von Haversine ab; wer exakte Distanzen braucht, rechnet den Treffer nach.
+
+Backends: scipy.spatial.cKDTree (falls installiert), sonst ein KD-Tree in
+Python (implizit über eine Permutation der Indizes, Blätter mit LEAF_SIZE
+Punkten werden linear durchsucht).
+
+Verwendung:
+    from spatial_index import KDTree
+    tree = KDTree([(51.47, 11.30), (51.53, 11.55)])
+    index, km = tree.nearest(51.50, 11.40)
+    tree.nearest_many([(51.5, 11.4), (51.6, 11.5)])   # [(index, km), ...]
+    tree.within(51.50, 11.40, 10.0)                  # Indizes im Umkreis von 10 km
+"""
+
+import math
+from typing import List, Sequence, Tuple
+
+try:
+    from scipy.spatial import cKDTree
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+Point = Tuple[float, float]
+
+KM_PER_DEG_LAT = 110.574
+KM_PER_DEG_LON = 111.320
+
+# Ab dieser Größe wird ein Teilbaum linear durchsucht
+LEAF_SIZE = 8
+
+
+class KDTree:
+    """Statischer 2D-KD-Tree über (lat, lon); Distanzen in km"""
+
+    def __init__(self, points: Sequence[Point]):
+        self.points = [(float(lat), float(lon)) for lat, lon in points]
+        mean_lat = sum(lat for lat, _ in self.points) / len(self.points) if self.points else 51.5
+        self._lon_scale = KM_PER_DEG_LON * math.cos(math.radians(mean_lat))
+        self._xy = [self._project(lat, lon) for lat, lon in self.points]
+
+        if HAS_SCIPY and self._xy:
+            self._tree = cKDTree(self._xy)
+        else:
+            self._tree = None
+            self._perm = list(range(len(self._xy)))
+            self._build(0, len(self._perm), 0)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _project(self, lat: float, lon: float) -> Point:
+        return (lon * self._lon_scale, lat * KM_PER_DEG_LAT)
+
+    def _build(self, lo: int, hi: int, axis: int) -> None:
+        """Median-Split: perm[mid] teilt [lo, mid) und (mid, hi) entlang axis"""
+        stack = [(lo, hi, axis)]
+        xy = self._xy
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                continue
+            self._perm[lo:hi] = sorted(self._perm[lo:hi], key=lambda i: xy[i][axis])
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, 1 - axis))
+            stack.append((mid + 1, hi, 1 - axis))
+
+    # --- Abfragen ----------------------------------------------------------
+
+    def nearest(self, lat: float, lon: float) -> Tuple[int, float]:
+        """(Index, km) des nächsten Punkts; (-1, inf) bei leerem Baum"""
+        if not self.points:
+            return -1, math.inf
+        x, y = self._project(lat, lon)
+        if self._tree is not None:
+            dist, index = self._tree.query((x, y))
+            return int(index), float(dist)
+
+        xy, perm = self._xy, self._perm
+        best_d2, best = math.inf, -1
+        stack = [(0, len(perm), 0, 0.0)]
+        while stack:
+            lo, hi, axis, bound = stack.pop()
+            if bound >= best_d2:
+                continue
+            if hi - lo <= LEAF_SIZE:
+                for i in perm[lo:hi]:
+                    px, py = xy[i]
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if d2 < best_d2:
+                        best_d2, best = d2, i
+                continue
+            mid = (lo + hi) // 2
+            i = perm[mid]
+            px, py = xy[i]
+            d2 = (px - x) ** 2 + (py - y) ** 2
+            if d2 < best_d2:
+                best_d2, best = d2, i
+            diff = (x - px) if axis == 0 else (y - py)
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # Fernen Teilbaum zuerst ablegen, damit der nahe zuerst durchsucht wird
+            stack.append((far[0], far[1], 1 - axis, diff * diff))
+            stack.append((near[0], near[1], 1 - axis, 0.0))
+        return best, math.sqrt(best_d2)
+
+    def nearest_many(self, points: Sequence[Point]) -> List[Tuple[int, float]]:
+        """nearest() für viele Punkte (mit scipy vektorisiert)"""
+        if self._tree is not None and points:
+            dists, indices = self._tree.query([self._project(lat, lon) for lat, lon in points])
+            return [(int(i), float(d)) for i, d in zip(indices, dists)]
+        return [self.nearest(lat, lon) for lat, lon in points]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[int]:
+        """Indizes aller Punkte im Umkreis von radius_km"""
+        if not self.points:
+            return []
+        x, y = self._project(lat, lon)
+        if self._tree is not None:
+            return sorted(int(i) for i in self._tree.query_ball_point((x, y), radius_km))
+
+        xy, perm = self._xy, self._perm
+        r2 = radius_km * radius_km
+        found = []
+        stack = [(0, len(perm), 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo <= LEAF_SIZE:
+                found.extend(i for i in perm[lo:hi]
+                             if (xy[i][0] - x) ** 2 + (xy[i][1] - y) ** 2 <= r2)
+                continue
+            mid = (lo + hi) // 2
+            i = perm[mid]
+            px, py = xy[i]
+            if (px - x) ** 2 + (py - y) ** 2 <= r2:
+                found.append(i)
+            diff = (x - px) if axis == 0 else (y - py)
+            if diff - radius_km <= 0:
+                stack.append((lo, mid, 1 - axis))
+            if diff + radius_km >= 0:
+                stack.append((mid + 1, hi, 1 - axis))
+        return sorted(found)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MSH DeepScan - Telemetrie
+
+Maschinenlesbare Metriken pro Stufe (Scraper, Merge, Export):
+- Timer (Sekunden + Anzahl Aufrufe)
+- HTTP-Requests, Bytes, Statuscodes, Latenz pro Host
+- Cache-Hits/-Misses
+- Element-Zähler (z.B. Locations, Duplikate)
+- Peak-Speicher (tracemalloc + ru_maxrss)
+
+Beim Prozessende werden geschrieben:
+- output/analytics/metrics/<run_id>/<stage>.json
+- output/analytics/metrics/<stage>.prom (Prometheus Textfile, letzter Lauf)
+
+Verwendung:
+    from telemetry import get_telemetry
+    telemetry = get_telemetry()
+    telemetry.instrument_session(self.session)
+    with telemetry.timer("fetch"):
+        ...
+    telemetry.count("locations", len(locations))
+
+Umgebungsvariablen:
+    DEEPSCAN_RUN_ID       gemeinsame Lauf-ID (setzt pipeline.py)
+    DEEPSCAN_STAGE        Stufenname (Standard: Skriptname)
+    DEEPSCAN_TRACEMALLOC  "1" misst zusätzlich den Python-Peak-Speicher mit
+                          tracemalloc (Standard aus: verlangsamt rechenlastige
+                          Stufen um ein Vielfaches; ru_maxrss gibt es immer)
+    DEEPSCAN_TELEMETRY    "0" schaltet das Schreiben der Dateien (und tracemalloc) ab
+"""
+
+import atexit
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+
+from json_writer import write_json
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Windows
+    HAS_RESOURCE = False
+
+METRICS_DIR = Path(__file__).parent / "output" / "analytics" / "metrics"
+METRIC_PREFIX = "deepscan"
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r'[^a-zA-Z0-9_]', '_', name).strip('_').lower()
+
+
+class Telemetry:
+    """Sammelt Metriken einer Stufe (thread-sicher)"""
+
+    def __init__(self, stage: str, run_id: str):
+        self.stage = stage
+        self.run_id = run_id
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+        self.timers: Dict[str, Dict[str, float]] = defaultdict(lambda: {"seconds": 0.0, "calls": 0})
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.gauges: Dict[str, float] = {}
+        self.http: Dict[str, Dict[str, float]] = defaultdict(
+            lambda: {"requests": 0, "bytes": 0, "errors": 0, "seconds": 0.0})
+        self.status_codes: Dict[str, int] = defaultdict(int)
+        self.caches: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+        self.tracing = (os.environ.get("DEEPSCAN_TRACEMALLOC", "0") == "1"
+                        and os.environ.get("DEEPSCAN_TELEMETRY", "1") != "0")
+        if self.tracing and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    # --- Erfassung ---------------------------------------------------------
+
+    @contextmanager
+    def timer(self, name: str):
+        """Misst die Dauer eines Blocks (mehrfach aufrufbar, summiert)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self.timers[name]
+                entry["seconds"] += elapsed
+                entry["calls"] += 1
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += value
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def cache(self, name: str, hit: bool) -> None:
+        with self._lock:
+            self.caches[name]["hits" if hit else "misses"] += 1
+
+    def record_request(self, url: str, status: Optional[int], nbytes: int,
+                       seconds: float, error: bool = False) -> None:
+        """Ein HTTP-Request (für urllib/aiohttp, requests über instrument_session)"""
+        host = urlparse(url).netloc or "unknown"
+        with self._lock:
+            entry = self.http[host]
+            entry["requests"] += 1
+            entry["bytes"] += nbytes
+            entry["seconds"] += seconds
+            if error or (status is not None and status >= 400):
+                entry["errors"] += 1
+            self.status_codes[str(status) if status is not None else "error"] += 1
+
+    def instrument_session(self, session) -> None:
+        """Hängt einen Response-Hook an eine requests.Session"""
+        def on_response(response, *args, **kwargs):
+            # Content-Length fehlt bei chunked Antworten, dann echte Länge
+            length = response.headers.get("Content-Length")
+            nbytes = int(length) if length and length.isdigit() else len(response.content)
+            self.record_request(response.url, response.status_code, nbytes,
+                                response.elapsed.total_seconds())
+            return response
+
+        session.hooks.setdefault("response", []).append(on_response)
+
+    # --- Export ------------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            peak_traced = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+            max_rss = None
+            if HAS_RESOURCE:
+                rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                # Linux: KB, macOS: Bytes
+                max_rss = rss if sys.platform == "darwin" else rss * 1024
+
+            http_total = {
+                "requests": sum(h["requests"] for h in self.http.values()),
+                "bytes": sum(h["bytes"] for h in self.http.values()),
+                "errors": sum(h["errors"] for h in self.http.values()),
+                "seconds": round(sum(h["seconds"] for h in self.http.values()), 3),
+            }
+
+            return {
+                "stage": self.stage,
+                "run_id": self.run_id,
+                "started_at": datetime.fromtimestamp(self.started).isoformat(),
+                "duration_seconds": round(time.time() - self.started, 3),
+                "timers": {k: {"seconds": round(v["seconds"], 3), "calls": v["calls"]}
+                           for k, v in self.timers.items()},
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "http": {"total": http_total, "by_host": {k: dict(v) for k, v in self.http.items()},
+                         "status_codes": dict(self.status_codes)},
+                "caches": {k: dict(v, hit_rate=round(v["hits"] / (v["hits"] + v["misses"]), 3)
+                                   if v["hits"] + v["misses"] else None)
+                           for k, v in self.caches.items()},
+                "memory": {"tracemalloc_peak_bytes": peak_traced, "max_rss_bytes": max_rss},
+            }
+
+    def write(self, directory: Path = METRICS_DIR) -> Path:
+        snapshot = self.snapshot()
+        run_dir = directory / self.run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+
+        json_file = run_dir / f"{_metric_name(self.stage)}.json"
+        write_json(json_file, snapshot)
+
+        _write_text(directory / f"{_metric_name(self.stage)}.prom", to_prometheus([snapshot]))
+        return json_file
+
+
+def _write_text(path: Path, text: str) -> None:
+    """Atomar schreiben (Temp-Datei + os.replace), wie write_json"""
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _peak_memory(snapshot: Dict[str, Any]) -> int:
+    """tracemalloc-Peak falls aktiv, sonst max RSS des Prozesses"""
+    memory = snapshot.get("memory", {})
+    return memory.get("tracemalloc_peak_bytes") or memory.get("max_rss_bytes") or 0
+
+
+def to_prometheus(snapshots) -> str:
+    """Prometheus Textformat für eine oder mehrere Stufen"""
+    lines = []
+    declared = set()
+
+    def metric(metric_name: str, kind: str, value, labels: Dict[str, str]):
+        if value is None:
+            return
+        full = f"{METRIC_PREFIX}_{metric_name}"
+        if full not in declared:
+            lines.append(f"# TYPE {full} {kind}")
+            declared.add(full)
+        label_str = ",".join(f'{k}="{str(v)}"' for k, v in labels.items())
+        lines.append(f"{full}{{{label_str}}} {value}")
+
+    # Nach Metrik sortieren, damit jede TYPE-Zeile nur einmal vorkommt
+    rows = []
+    for snap in snapshots:
+        stage = snap["stage"]
+        rows.append(("stage_duration_seconds", "gauge", snap["duration_seconds"], {"stage": stage}))
+        for name, t in snap["timers"].items():
+            rows.append(("timer_seconds", "gauge", t["seconds"], {"stage": stage, "timer": name}))
+            rows.append(("timer_calls", "gauge", t["calls"], {"stage": stage, "timer": name}))
+        for name, value in snap["counters"].items():
+            rows.append(("count", "gauge", value, {"stage": stage, "name": _metric_name(name)}))
+        for name, value in snap["gauges"].items():
+            rows.append(("gauge", "gauge", value, {"stage": stage, "name": _metric_name(name)}))
+        for host, h in snap["http"]["by_host"].items():
+            for key in ("requests", "bytes", "errors", "seconds"):
+                rows.append((f"http_{key}", "gauge", h[key], {"stage": stage, "host": host}))
+        for name, c in snap["caches"].items():
+            rows.append(("cache_hits", "gauge", c["hits"], {"stage": stage, "cache": name}))
+            rows.append(("cache_misses", "gauge", c["misses"], {"stage": stage, "cache": name}))
+        memory = snap["memory"]
+        rows.append(("tracemalloc_peak_bytes", "gauge", memory["tracemalloc_peak_bytes"], {"stage": stage}))
+        rows.append(("max_rss_bytes", "gauge", memory["max_rss_bytes"], {"stage": stage}))
+
+    for name, kind, value, labels in sorted(rows, key=lambda r: r[0]):
+        metric(name, kind, value, labels)
+    return "\n".join(lines) + "\n"
+
+
+_instance: Optional[Telemetry] = None
+_instance_lock = threading.Lock()
+
+
+def get_telemetry(stage: str = None) -> Telemetry:
+    """Telemetrie der aktuellen Stufe (eine Instanz pro Prozess)"""
+    global _instance
+    with _instance_lock:
+        if _instance is None:
+            name = stage or os.environ.get("DEEPSCAN_STAGE") or Path(sys.argv[0]).stem or "interactive"
+            run_id = os.environ.get("DEEPSCAN_RUN_ID") or datetime.now().strftime("%Y%m%d_%H%M%S")
+            _instance = Telemetry(name, run_id)
+            if os.environ.get("DEEPSCAN_TELEMETRY", "1") != "0":
+                atexit.register(_write_on_exit)
+        return _instance
+
+
+def _write_on_exit() -> None:
+    if _instance is None:
+        return
+    try:
+        path = _instance.write()
+        print(f"[TELEMETRY] {path}")
+    except OSError as e:
+        print(f"[TELEMETRY] Schreiben fehlgeschlagen: {e}")
+
+
+def collect_run(run_id: str, directory: Path = METRICS_DIR) -> Dict[str, Any]:
+    """Liest alle Stufen-Metriken eines Laufs (für pipeline.py)"""
+    run_dir = directory / run_id
+    snapshots = []
+    if run_dir.exists():
+        for path in sorted(run_dir.glob("*.json")):
+            if path.name == "run.json":
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    snapshots.append(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                continue
+
+    totals = {
+        "stages": len(snapshots),
+        "http_requests": sum(s["http"]["total"]["requests"] for s in snapshots),
+        "http_bytes": sum(s["http"]["total"]["bytes"] for s in snapshots),
+        "peak_memory_bytes": max((_peak_memory(s) for s in snapshots), default=0),
+    }
+
+    if snapshots:
+        write_json(run_dir / "run.json", {"run_id": run_id, "totals": totals, "stages": snapshots})
+        _write_text(directory / "deepscan_run.prom", to_prometheus(snapshots))
+
+    return totals
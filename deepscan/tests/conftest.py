@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""Tests für deepscan/: Module wie in den Skripten über sys.path importierbar"""
+
+import os
+import sys
+from pathlib import Path
+
+# Keine Metrik-Dateien und kein tracemalloc aus Testläufen
+os.environ.setdefault("DEEPSCAN_TELEMETRY", "0")
+os.environ.setdefault("DEEPSCAN_TRACEMALLOC", "0")
+
+DEEPSCAN_DIR = Path(__file__).parent.parent
+for path in (DEEPSCAN_DIR, DEEPSCAN_DIR / "scrapers", DEEPSCAN_DIR / "tools"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""gazetteer: Treffer gegenüber der bisherigen Substring-Suche in notice_scraper"""
+
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+from gazetteer import Gazetteer, normalize_road
+from notice_scraper import KNOWN_LOCATIONS, KNOWN_ROADS
+
+NOTICE_FILES = sorted((Path(__file__).resolve().parents[2] / "data" / "notices").glob("*.json"))
+
+TEXTS = [
+    "Vollsperrung der B 180 zwischen Hettstedt und Walbeck",
+    "Bauarbeiten in der Lutherstadt Eisleben, Umleitung über Wolferode und Neckendorf",
+    "Sangerhausens Innenstadt: Halbseitige Sperrung der B86 bis Freitag",
+    "Mansfelder Straße in Siersleben wegen Kanalbau gesperrt",
+    "L 224 Eisleben - Friedeburg: Deckenerneuerung, Sperrung ab Montag",
+    "Ampelregelung auf der K 2123 bei Freist",
+    "Sperrung L 720 bei Arnsteinbach",
+    "Quenstedt, Sylda und Mehringen: Wasserabstellung",
+    "Baustelle auf der b-185 Richtung Aschersleben",
+    "Keine Orte in diesem Text",
+]
+
+
+def notice_texts():
+    texts = []
+    for path in NOTICE_FILES:
+        with open(path, encoding="utf-8") as f:
+            for notice in json.load(f).get("notices", []):
+                texts.append(f"{notice.get('title', '')} {notice.get('description', '')}")
+    return texts
+
+
+CORPUS = TEXTS + notice_texts()
+
+
+def old_locations(text):
+    """Bisherige Ortssuche: Substring je bekanntem Ort"""
+    return [location for location in KNOWN_LOCATIONS if location.lower() in text.lower()]
+
+
+def old_road(text):
+    """Bisherige Straßensuche: erster Regex-Treffer"""
+    match = re.search(r'([BLK]\s?\d+)', text, re.IGNORECASE)
+    return match.group(1).upper() if match else None
+
+
+@pytest.fixture(scope="module")
+def gazetteer(tmp_path_factory):
+    missing = tmp_path_factory.mktemp("gazetteer") / "osm_names.json"
+    return Gazetteer.from_sources(KNOWN_LOCATIONS, KNOWN_ROADS, osm_file=missing)
+
+
+def is_explained(text, location, mentions):
+    """Alter Treffer ohne neuen: jedes Vorkommen mitten im Wort oder Teil eines längeren Namens"""
+    lowered = text.lower()
+    for match in re.finditer(re.escape(location.lower()), lowered):
+        start, end = match.span()
+        inside_word = (start > 0 and lowered[start - 1].isalnum()) or \
+                      (end < len(lowered) and lowered[end].isalnum())
+        covered = any(m.start <= start and end <= m.end and m.name != location for m in mentions)
+        if not (inside_word or covered):
+            return False
+    return True
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_locations_match_old_extraction(gazetteer, text):
+    mentions = gazetteer.places(text)
+    new = {m.name for m in mentions}
+    old = set(old_locations(text))
+    # Keine neuen Orte; jeder weggefallene ist ein Teilwort- oder Überlappungstreffer
+    assert new <= old
+    for location in old - new:
+        assert is_explained(text, location, mentions), location
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_roads_match_old_extraction(gazetteer, text):
+    old = old_road(text)
+    roads = [m.name for m in gazetteer.roads(text) if m.name in KNOWN_ROADS]
+    # Bekannte Straße als ganzes Wort: gleiches Ergebnis (normalisiert)
+    if old and normalize_road(old) in KNOWN_ROADS and re.search(rf'\b{re.escape(old)}\b', text, re.I):
+        assert roads[0] == normalize_road(old)
+    # Zusätzlich gefunden wird nur die Schreibweise mit Bindestrich ("B-185")
+    if roads and old is None:
+        assert re.search(r'\b[BLK]-\d+\b', text, re.IGNORECASE)
+
+
+def test_word_boundaries_and_longest_match(gazetteer):
+    assert gazetteer.roads("Sperrung L 720 bei Arnsteinbach") == []
+    assert gazetteer.places("Sperrung L 720 bei Arnsteinbach") == []
+    assert [m.name for m in gazetteer.places("in der Lutherstadt Eisleben")] == ["Lutherstadt Eisleben"]
+    assert [m.name for m in gazetteer.places("Eisleben und Hettstedt")] == ["Eisleben", "Hettstedt"]
+
+
+def test_inflections_and_spellings(gazetteer):
+    assert [m.name for m in gazetteer.places("Sangerhausens Innenstadt")] == ["Sangerhausen"]
+    assert [m.text for m in gazetteer.places("Mansfelder Land")] == ["Mansfelder"]
+    for spelling in ("B 180", "B180", "b-180"):
+        assert [m.name for m in gazetteer.roads(f"Sperrung {spelling} heute")] == ["B 180"]
+
+
+def test_offsets_point_into_text(gazetteer):
+    text = "Vollsperrung der B 180 zwischen Hettstedt und Walbeck"
+    mentions = gazetteer.find(text)
+    assert [(m.name, m.kind) for m in mentions] == [
+        ("B 180", "road"), ("Hettstedt", "place"), ("Walbeck", "place")]
+    assert all(text[m.start:m.end] == m.text for m in mentions)
+    assert mentions[0].lat == KNOWN_ROADS["B 180"]["lat"]
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""local_geocoder: Orte, Eintragsarten und Ort-Disambiguierung"""
+
+import pytest
+
+from local_geocoder import LocalGeocoder, normalize
+
+ITEMS = [
+    {"kind": "place", "name": "Sangerhausen", "lat": 51.4727, "lon": 11.2975, "towns": ["Sangerhausen"]},
+    {"kind": "place", "name": "Lutherstadt Eisleben", "lat": 51.5276, "lon": 11.5486,
+     "towns": ["Lutherstadt Eisleben"]},
+    {"kind": "place", "name": "Wippra", "lat": 51.5700, "lon": 11.2780, "towns": ["Wippra"]},
+    # POI mit dem Namen eines Orts
+    {"kind": "poi", "name": "Sangerhausen", "lat": 51.4800, "lon": 11.3100, "towns": ["Sangerhausen"]},
+    {"kind": "street", "name": "Hauptstraße", "lat": 51.5710, "lon": 11.2790, "towns": ["Wippra"]},
+    {"kind": "street", "name": "Hauptstraße", "lat": 51.4730, "lon": 11.2980, "towns": ["Sangerhausen"]},
+    {"kind": "street", "name": "Göpenstraße", "lat": 51.4700, "lon": 11.2990, "towns": ["Sangerhausen"]},
+    {"kind": "address", "name": "Göpenstraße 12", "street": "Göpenstraße", "housenumber": "12",
+     "lat": 51.4701, "lon": 11.2991, "towns": ["Sangerhausen"]},
+    {"kind": "poi", "name": "Rosarium", "lat": 51.4770, "lon": 11.3050, "towns": ["Sangerhausen"]},
+]
+
+
+@pytest.fixture(scope="module")
+def geocoder():
+    return LocalGeocoder(ITEMS)
+
+
+@pytest.mark.parametrize("query", ["Sangerhausen", "sangerhausen", "06526 Sangerhausen",
+                                   "Sangerhausen, Mansfeld-Südharz, Deutschland"])
+def test_town_name_returns_place(geocoder, query):
+    result = geocoder.geocode(query)
+    assert result.kind == "place" and result.name == "Sangerhausen"
+
+
+@pytest.mark.parametrize("query", ["Eisleben", "Lutherstadt Eisleben", "Lutherstadt Eisl"])
+def test_town_prefixes(geocoder, query):
+    result = geocoder.geocode(query)
+    assert result.kind == "place" and result.name == "Lutherstadt Eisleben"
+
+
+def test_address_beats_street(geocoder):
+    result = geocoder.geocode("Göpenstr. 12, Sangerhausen")
+    assert (result.kind, result.lat) == ("address", 51.4701)
+
+
+def test_unknown_housenumber_falls_back_to_street(geocoder):
+    assert geocoder.geocode("Göpenstraße 99, Sangerhausen").kind == "street"
+
+
+def test_ambiguous_street_needs_town(geocoder):
+    assert geocoder.geocode("Hauptstraße") is None
+    assert geocoder.geocode("Hauptstraße 5, Wippra").lat == 51.5710
+    assert geocoder.geocode("Hauptstraße, Sangerhausen").lat == 51.4730
+
+
+def test_poi_with_town(geocoder):
+    result = geocoder.geocode("Rosarium, Sangerhausen")
+    assert (result.kind, result.name) == ("poi", "Rosarium")
+
+
+def test_unknown_name_with_town_returns_town(geocoder):
+    result = geocoder.geocode("Unbekannter Weg, Wippra")
+    assert (result.kind, result.name) == ("place", "Wippra")
+
+
+def test_empty_queries(geocoder):
+    assert geocoder.geocode(None) is None
+    assert geocoder.geocode("") is None
+    assert geocoder.geocode("Deutschland") is None
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Göpenstr. 12", "goepenstrasse 12"),
+    ("Karl-Marx-Str.5", "karl marx strasse 5"),
+    ("Straße des Friedens", "strasse des friedens"),
+])
+def test_normalize(text, expected):
+    assert normalize(text) == expected
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""MergeAndExport.deduplicate_by_location: Ketten-Filialen bleiben erhalten"""
+
+import io
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# merge_and_export ersetzt beim Import sys.stdout (UTF-8 für Windows-Konsolen);
+# ohne Umweg würde der Wrapper pytests Capture-Puffer schließen
+_stdout = sys.stdout
+sys.stdout = SimpleNamespace(buffer=io.BytesIO())
+try:
+    from merge_and_export import MergeAndExport
+finally:
+    sys.stdout = _stdout
+
+
+def entry(name, lat=None, lon=None, city="Sangerhausen", category="baeckerei"):
+    return {"name": name, "latitude": lat, "longitude": lon, "city": city, "category": category}
+
+
+@pytest.fixture
+def merger():
+    return MergeAndExport()
+
+
+def test_chain_branches_with_coordinates_are_kept(merger):
+    branches = [entry("Backhaus Hennig", 51.470 + i * 0.01, 11.300) for i in range(8)]
+    assert merger.deduplicate_by_location(branches) == branches
+
+
+def test_same_name_nearby_is_duplicate(merger):
+    first = entry("Backhaus Hennig", 51.4700, 11.3000)
+    second = entry("Backhaus Hennig", 51.4710, 11.3000)     # ~110 m
+    assert merger.deduplicate_by_location([first, second]) == [first]
+
+
+def test_same_name_near_other_category_is_kept(merger):
+    first = entry("Steinecke", 51.4700, 11.3000)
+    second = entry("Steinecke", 51.4701, 11.3000, category="cafe")
+    assert merger.deduplicate_by_location([first, second]) == [first, second]
+
+
+def test_reference_without_coordinates_matches_by_name(merger):
+    seed = [entry("Backhaus Hennig")]
+    osm = [entry("Backhaus Hennig", 51.47, 11.30), entry("Steinecke", 51.48, 11.30)]
+    assert merger.deduplicate_by_location(osm, reference=seed) == [osm[1]]
+
+
+def test_reference_with_coordinates_needs_distance(merger):
+    seed = [entry("Backhaus Hennig", 51.47, 11.30)]
+    far = entry("Backhaus Hennig", 51.55, 11.30)
+    near = entry("Backhaus Hennig", 51.4705, 11.30)
+    assert merger.deduplicate_by_location([far, near], reference=seed) == [far]
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""notice_dedup: Ergebnis identisch zum bisherigen paarweisen Vergleich"""
+
+import json
+import random
+import re
+from pathlib import Path
+
+import pytest
+
+from notice_dedup import TitleIndex, deduplicate_notices, merge_notices
+
+NOTICES_DIR = Path(__file__).parent.parent.parent / "data" / "notices"
+
+
+def pairwise_deduplicate(notices):
+    """Bisherige Implementierung aus notice_scraper.py (O(n²))"""
+    unique = []
+    seen_titles = set()
+    for notice in notices:
+        norm_title = re.sub(r'\s+', ' ', notice["title"].lower().strip())
+        is_duplicate = False
+        for seen in seen_titles:
+            words1 = set(norm_title.split())
+            words2 = set(seen.split())
+            if words1 and words2:
+                similarity = len(words1 & words2) / len(words1 | words2)
+                if similarity > 0.7:
+                    is_duplicate = True
+                    break
+        if not is_duplicate:
+            unique.append(notice)
+            seen_titles.add(norm_title)
+    return unique
+
+
+def pairwise_merge(manual_notices, new_notices):
+    """Bisheriges merge_with_existing (lineare Suche über Präfixe)"""
+    merged = manual_notices.copy()
+    for new in new_notices:
+        exists = False
+        for existing in merged:
+            if existing.get("title", "").lower()[:30] == new.get("title", "").lower()[:30]:
+                exists = True
+                if new.get("source_url"):
+                    existing_urls = existing.get("source_urls", [])
+                    if existing.get("source_url"):
+                        existing_urls.append(existing["source_url"])
+                    if new["source_url"] not in existing_urls:
+                        existing_urls.append(new["source_url"])
+                        existing["source_urls"] = list(set(existing_urls))
+                break
+        if not exists:
+            merged.append(new)
+    return merged
+
+
+def load_fixture(name):
+    path = NOTICES_DIR / name
+    if not path.exists():
+        pytest.skip(f"{path} fehlt")
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["notices"]
+
+
+def perturbed(notices, count, seed):
+    """Varianten echter Titel: Wörter weglassen, tauschen, ergänzen, Großschreibung"""
+    rng = random.Random(seed)
+    vocabulary = [word for notice in notices for word in notice["title"].split()]
+    variants = []
+    for _ in range(count):
+        words = rng.choice(notices)["title"].split()
+        operation = rng.randrange(4)
+        if operation == 0 and len(words) > 1:
+            del words[rng.randrange(len(words))]
+        elif operation == 1:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(vocabulary))
+        elif operation == 2:
+            rng.shuffle(words)
+        else:
+            words = [word.upper() if rng.random() < 0.3 else word for word in words]
+        variants.append({"title": "  ".join(words), "source_url": f"https://example.org/{len(variants)}"})
+    return variants
+
+
+@pytest.mark.parametrize("fixture", ["notices_current.json", "notices_scraped.json"])
+def test_dedup_matches_pairwise_on_fixtures(fixture):
+    notices = load_fixture(fixture)
+    assert deduplicate_notices(notices) == pairwise_deduplicate(notices)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_dedup_matches_pairwise_on_variants(seed):
+    notices = load_fixture("notices_current.json") + load_fixture("notices_scraped.json")
+    variants = perturbed(notices, 400, seed)
+    assert deduplicate_notices(variants) == pairwise_deduplicate(variants)
+
+
+def test_dedup_edge_cases():
+    notices = [{"title": ""}, {"title": "   "}, {"title": "a"}, {"title": "A"},
+               {"title": "a b c d e f g h i j"}, {"title": "a b c d e f g h i"},
+               {"title": "a b c d e f g"}, {"title": "x y z"}]
+    assert deduplicate_notices(notices) == pairwise_deduplicate(notices)
+
+
+def test_common_words_are_not_indexed():
+    titles = [frozenset(f"sperrung sangerhausen {i}".split()) for i in range(50)]
+    index = TitleIndex.for_titles(titles)
+    for words in titles:
+        index.add(words)
+    assert set(index.postings) == {str(i) for i in range(50)}
+
+
+def test_merge_matches_linear_search():
+    manual = load_fixture("notices_current.json")
+    new = load_fixture("notices_scraped.json") + perturbed(manual, 100, 7)
+    expected = pairwise_merge(json.loads(json.dumps(manual)), json.loads(json.dumps(new)))
+    assert merge_notices(json.loads(json.dumps(manual)), json.loads(json.dumps(new))) == expected
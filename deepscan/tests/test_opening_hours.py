@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""opening_hours: Kompilierte Wochen-Bitmaps, Feiertage und Batch-Index"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from opening_hours import (CompiledHours, OpeningHoursIndex, compile_opening_hours,
+                           compile_to_json, public_holidays)
+
+MONDAY = datetime(2026, 10, 19)          # kein Feiertag
+EASTER_MONDAY = datetime(2026, 4, 6)     # Ostermontag
+
+
+def at(day: datetime, clock: str) -> datetime:
+    hour, minute = (int(part) for part in clock.split(":"))
+    return day + timedelta(hours=hour, minutes=minute)
+
+
+def weekday(offset: int) -> datetime:
+    """MONDAY + offset Tage (0 = Montag … 6 = Sonntag)"""
+    return MONDAY + timedelta(days=offset)
+
+
+@pytest.mark.parametrize("raw, offset, clock, expected", [
+    ("Mo-Fr 08:00-18:00", 0, "08:00", True),
+    ("Mo-Fr 08:00-18:00", 0, "07:59", False),
+    ("Mo-Fr 08:00-18:00", 0, "17:45", True),
+    ("Mo-Fr 08:00-18:00", 0, "18:00", False),
+    ("Mo-Fr 08:00-18:00", 5, "12:00", False),
+    ("Mo-Fr 08:00-12:00,14:00-18:00", 2, "13:00", False),
+    ("Mo-Fr 08:00-12:00,14:00-18:00", 2, "15:00", True),
+    ("Fr-Mo 10:00-16:00", 6, "12:00", True),
+    ("Fr-Mo 10:00-16:00", 1, "12:00", False),
+    ("Mo,We 09:00-11:00", 2, "10:00", True),
+    ("Mo,We 09:00-11:00", 1, "10:00", False),
+    # über Mitternacht: Freitagnacht gehört zum Samstagmorgen
+    ("Fr 22:00-02:00", 4, "23:30", True),
+    ("Fr 22:00-02:00", 5, "01:30", True),
+    ("Fr 22:00-02:00", 5, "02:00", False),
+    ("Fr 22:00-02:00", 4, "01:30", False),
+    # spätere Regeln ersetzen frühere
+    ("Mo-Sa 08:00-18:00; Sa 08:00-12:00", 5, "14:00", False),
+    ("Mo-Sa 08:00-18:00; Sa 08:00-12:00", 4, "14:00", True),
+    ("Mo-Su 10:00-20:00; We off", 2, "12:00", False),
+    # ohne Tage: ganze Woche; Kommentare werden ignoriert
+    ("10:00-20:00", 6, "19:00", True),
+    ('Mo-Fr 08:00-16:00 "nach Vereinbarung"', 3, "09:00", True),
+    # additive Regel mit ","
+    ("Mo-Fr 08:00-12:00, Sa 10:00-14:00", 5, "11:00", True),
+    ("24/7", 6, "03:00", True),
+])
+def test_is_open(raw, offset, clock, expected):
+    compiled = compile_opening_hours(raw)
+    assert compiled is not None
+    assert compiled.is_open(at(weekday(offset), clock)) is expected
+
+
+@pytest.mark.parametrize("raw", [
+    None, "", "   ", "Jan-Mar Mo-Fr 08:00-16:00", "Mo-Fr sunrise-sunset",
+    "SH off", "Mo-Fr 08:00-18:00 || \"nach Vereinbarung\"", "Mo-Fr 08:00+", "nach Absprache",
+])
+def test_unsupported_returns_none(raw):
+    assert compile_opening_hours(raw) is None
+    assert compile_to_json(raw) is None
+
+
+def test_partial_quarter_hours_count_as_open():
+    compiled = compile_opening_hours("Mo 08:10-08:20")
+    assert compiled.is_open(at(MONDAY, "08:00"))
+    assert compiled.is_open(at(MONDAY, "08:15"))
+    assert not compiled.is_open(at(MONDAY, "08:30"))
+
+
+def test_public_holiday_rules():
+    closed = compile_opening_hours("Mo-Fr 08:00-18:00; PH off")
+    assert closed.is_open(at(MONDAY, "10:00"))
+    assert not closed.is_open(at(EASTER_MONDAY, "10:00"))
+    # Ohne PH-Regel gelten Feiertage wie der Wochentag
+    plain = compile_opening_hours("Mo-Fr 08:00-18:00")
+    assert plain.ph is None
+    assert plain.is_open(at(EASTER_MONDAY, "10:00"))
+    # Eigene Zeiten an Feiertagen, explizites holiday übersteuert den Kalender
+    special = compile_opening_hours("Mo-Fr 08:00-18:00; PH 10:00-12:00")
+    assert not special.is_open(at(EASTER_MONDAY, "09:00"))
+    assert special.is_open(at(EASTER_MONDAY, "11:00"))
+    assert not special.is_open(at(MONDAY, "09:00"), holiday=True)
+
+
+def test_public_holidays_saxony_anhalt():
+    holidays = public_holidays(2026)
+    assert date(2026, 4, 3) in holidays       # Karfreitag
+    assert date(2026, 4, 6) in holidays       # Ostermontag
+    assert date(2026, 5, 14) in holidays      # Christi Himmelfahrt
+    assert date(2026, 5, 25) in holidays      # Pfingstmontag
+    assert date(2026, 1, 6) in holidays       # Heilige Drei Könige
+    assert date(2026, 10, 31) in holidays     # Reformationstag
+    assert date(2026, 11, 18) not in holidays  # Buß- und Bettag nur in Sachsen
+    assert len(holidays) == 11
+
+
+def test_json_roundtrip():
+    for raw in ("Mo-Fr 08:00-18:00; PH off", "Fr 22:00-02:00", "24/7"):
+        compiled = compile_opening_hours(raw)
+        data = compile_to_json(raw)
+        assert len(data["week"]) == 7
+        assert all(isinstance(bits, str) for bits in data["week"])
+        assert CompiledHours.from_json(data) == compiled
+    assert compile_to_json("24/7")["ph"] is None
+    assert compile_to_json("Mo-Fr 08:00-18:00; PH off")["ph"] == "0"
+
+
+def test_index_matches_single_lookups():
+    raws = ["Mo-Fr 08:00-18:00", None, "Fr 22:00-02:00; PH off", "24/7", "Jan-Mar 10:00-12:00",
+            "Mo-Fr 08:00-18:00", "Sa,Su 10:00-16:00; PH 10:00-14:00", "Mo-Su 10:00-20:00; We off"]
+    hours = [compile_opening_hours(raw) for raw in raws]
+    index = OpeningHoursIndex(hours)
+
+    assert index.unknown() == [1, 4]
+    for day in range(7):
+        assert index.open_on(day) == [i for i, c in enumerate(hours) if c and c.open_on(day)]
+        for holiday in (False, True):
+            for slot in range(0, 96, 3):
+                when = weekday(day) + timedelta(minutes=15 * slot)
+                expected = [i for i, c in enumerate(hours) if c and c.is_open(when, holiday)]
+                assert index.open_at(when, holiday) == expected
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""osm_pbf: paralleler Cache-Aufbau dekodiert den Extrakt nur einmal"""
+
+import threading
+import time
+
+import osm_pbf
+from json_writer import write_json
+
+
+def test_parallel_load_extract_decodes_once(tmp_path, monkeypatch):
+    pbf = tmp_path / "region.osm.pbf"
+    pbf.write_bytes(b"")
+    cache_dir = tmp_path / "cache"
+    calls = []
+
+    def fake_extract(pbf_path, names=None, margin=osm_pbf.MARGIN_DEG, cache_dir=cache_dir):
+        calls.append(pbf_path)
+        time.sleep(0.2)
+        meta = {"pbf": str(pbf_path), "pbf_mtime": pbf_path.stat().st_mtime}
+        results = {name: {"elements": [{"type": "node", "id": 1}], "meta": meta} for name in osm_pbf.CONSUMERS}
+        for name, data in results.items():
+            write_json(cache_dir / f"{name}.json", data)
+        return results
+
+    monkeypatch.setattr(osm_pbf, "CACHE_DIR", cache_dir)
+    monkeypatch.setattr(osm_pbf, "extract", fake_extract)
+    monkeypatch.setenv("DEEPSCAN_OSM_PBF", str(pbf))
+
+    results = {}
+
+    def load(name):
+        results[name] = osm_pbf.load_extract(name)
+
+    threads = [threading.Thread(target=load, args=(name,)) for name in osm_pbf.CONSUMERS]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(len(data["elements"]) == 1 for data in results.values())
+    assert osm_pbf.is_cached(pbf, cache_dir=cache_dir)
+    assert not (cache_dir / ".extract.lock").exists()
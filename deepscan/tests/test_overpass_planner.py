@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""OverpassPlanner und OverpassRateController zusammen bei Timeouts"""
+
+import json
+import re
+
+import pytest
+import requests
+
+import overpass_planner
+import overpass_rate
+from overpass_planner import OverpassPlanner
+from overpass_rate import OverpassRateController
+
+BBOX = {"south": 51.0, "west": 11.0, "north": 52.0, "east": 12.0}
+_BBOX = re.compile(r'\(([\d.]+),([\d.]+),([\d.]+),([\d.]+)\)')
+
+
+def _response(status: int, body=None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body or {}).encode()
+    return response
+
+
+class FakeMirrors(requests.Session):
+    """Overpass-Mirrors, die nur Kacheln bis zu einer Kantenlänge beantworten"""
+
+    def __init__(self, max_size: float, mode: str = "timeout"):
+        super().__init__()
+        self.max_size = max_size
+        self.mode = mode
+        self.posts = 0
+
+    def get(self, url, **kwargs):
+        return _response(404)      # kein /api/status: nur fallback_interval
+
+    def post(self, url, data=None, **kwargs):
+        self.posts += 1
+        south, west, north, east = map(float, _BBOX.search(data["data"]).groups())
+        if north - south > self.max_size:
+            if self.mode == "timeout":
+                raise requests.exceptions.ReadTimeout("read timed out")
+            return _response(504)
+        element = {"type": "node", "id": int(south * 1000) * 10000 + int(west * 1000)}
+        return _response(200, {"elements": [element]})
+
+
+class Scraper:
+    OVERPASS_URLS = [f"https://mirror{i}.example/api/interpreter" for i in range(3)]
+    REQUEST_TIMEOUT = 5
+    BBOX = BBOX
+
+    def __init__(self, session):
+        self.overpass = OverpassRateController(session, fallback_interval=0)
+
+
+def query(bbox):
+    return f"node({bbox['south']},{bbox['west']},{bbox['north']},{bbox['east']});out;"
+
+
+@pytest.mark.parametrize("mode", ["timeout", "504"])
+def test_planner_recovers_all_tiles_at_depth_two(tmp_path, mode):
+    session = FakeMirrors(max_size=0.3, mode=mode)
+    planner = OverpassPlanner("test", Scraper(session), max_depth=3, state_dir=tmp_path)
+
+    data = planner.fetch("group", query)
+
+    assert data["incomplete"] is False
+    assert len(data["elements"]) == 16
+    # Stufe 0 und die vier Kacheln der Stufe 1 je auf allen drei Mirrors
+    assert session.posts == 3 + 4 * 3 + 16
+
+
+def test_timeouts_do_not_open_breaker():
+    session = FakeMirrors(max_size=0)
+    controller = OverpassRateController(session, fallback_interval=0)
+    url = Scraper.OVERPASS_URLS[0]
+    for _ in range(overpass_rate.BREAKER_THRESHOLD + 1):
+        with pytest.raises(requests.exceptions.Timeout):
+            controller.post(url, data={"data": query(BBOX)})
+    assert controller.blocked_for(url) == 0
+
+
+def test_connection_errors_open_breaker():
+    controller = OverpassRateController(FakeMirrors(max_size=1), fallback_interval=0)
+    url = Scraper.OVERPASS_URLS[0]
+    for _ in range(overpass_rate.BREAKER_THRESHOLD):
+        controller.record(url, error=requests.exceptions.ConnectionError())
+    assert controller.blocked_for(url) > 0
+    with pytest.raises(overpass_rate.CircuitOpen):
+        controller.wait(url)
+
+
+def test_blocked_mirrors_are_waited_out(tmp_path, monkeypatch):
+    session = FakeMirrors(max_size=1)
+    scraper = Scraper(session)
+    for url in scraper.OVERPASS_URLS:
+        for _ in range(overpass_rate.BREAKER_THRESHOLD):
+            scraper.overpass.record(url, error=requests.exceptions.ConnectionError())
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        for endpoint in scraper.overpass._endpoints.values():
+            endpoint.blocked_until = 0.0
+
+    monkeypatch.setattr(overpass_planner.time, "sleep", fake_sleep)
+    planner = OverpassPlanner("test", scraper, state_dir=tmp_path)
+
+    status, data = planner.fetch_tile(query(BBOX))
+
+    assert status == "ok"
+    assert len(sleeps) == 1
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Pipeline-DAG: Abhängigkeiten und eindeutige Schreiber"""
+
+import pytest
+
+from pipeline import STAGES, Pipeline, Stage, patterns_overlap
+
+
+def test_stages_are_consistent():
+    pipeline = Pipeline(STAGES)
+    order = pipeline.select()
+    assert len(order) == len({s.name for s in STAGES if not s.manual})
+
+
+def test_each_output_pattern_has_one_writer():
+    outputs = [(pattern, stage.name) for stage in STAGES for pattern in stage.outputs]
+    for index, (pattern, name) in enumerate(outputs):
+        for other_pattern, other in outputs[index + 1:]:
+            assert other == name or not patterns_overlap(pattern, other_pattern), (pattern, other_pattern)
+
+
+def test_readers_depend_on_writers():
+    """Eine Stufe, die Ausgaben einer anderen liest, muss nach ihr laufen"""
+    stages = {s.name: s for s in STAGES}
+    pipeline = Pipeline(STAGES)
+    for stage in STAGES:
+        before = set(pipeline.select([stage.name])) - {stage.name}
+        for pattern in stage.inputs:
+            for other in STAGES:
+                if other is not stage and any(patterns_overlap(pattern, out) for out in other.outputs):
+                    assert other.name in before, f"{stage.name} liest {pattern} von {other.name}"
+    assert {"gazetteer", "geocoder"} <= set(stages["notices"].deps)
+
+
+def test_duplicate_output_is_rejected():
+    stages = [Stage("a", "a.py", outputs=["out/*.json"]), Stage("b", "b.py", outputs=["out/*.json"])]
+    with pytest.raises(ValueError):
+        Pipeline(stages)
+
+
+def test_overlapping_output_globs_are_rejected():
+    stages = [Stage("a", "a.py", outputs=["out/*_osm.json"]), Stage("b", "b.py", outputs=["out/aed_osm.json"])]
+    with pytest.raises(ValueError):
+        Pipeline(stages)
+
+
+@pytest.mark.parametrize("a, b, expected", [
+    ("out/*_osm.json", "out/defibrillators_osm.json", True),
+    ("out/msh_*.json", "out/msh_merged_*", True),
+    ("out/msh_firestore_2*.json", "out/msh_firestore_merged_*", False),
+    ("out/*.json", "out/sub/*.json", False),
+    ("out/**/*.json", "out/sub/deeper/x.json", True),
+    ("out/*.json", "out/*.geojson", False),
+])
+def test_patterns_overlap(a, b, expected):
+    assert patterns_overlap(a, b) is expected
+    assert patterns_overlap(b, a) is expected
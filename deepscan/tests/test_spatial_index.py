@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""spatial_index.KDTree gegen Brute Force"""
+
+import math
+import random
+
+import pytest
+
+import spatial_index
+from spatial_index import KDTree
+
+
+def planar_km(tree, a, b):
+    """Distanz in derselben Projektion wie der Baum"""
+    ax, ay = tree._project(*a)
+    bx, by = tree._project(*b)
+    return math.hypot(ax - bx, ay - by)
+
+
+@pytest.fixture(params=["python", "scipy"])
+def backend(request, monkeypatch):
+    if request.param == "scipy" and not spatial_index.HAS_SCIPY:
+        pytest.skip("scipy nicht installiert")
+    monkeypatch.setattr(spatial_index, "HAS_SCIPY", request.param == "scipy")
+    return request.param
+
+
+def random_points(rng, count):
+    return [(rng.uniform(51.3, 51.8), rng.uniform(10.9, 11.9)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("size", [1, 5, 8, 9, 100, 2000])
+def test_nearest_matches_brute_force(backend, size):
+    rng = random.Random(size)
+    points = random_points(rng, size)
+    tree = KDTree(points)
+    for query in random_points(rng, 200):
+        index, km = tree.nearest(*query)
+        expected = min(planar_km(tree, query, p) for p in points)
+        assert km == pytest.approx(expected, abs=1e-9)
+        assert planar_km(tree, query, points[index]) == pytest.approx(expected, abs=1e-9)
+
+
+def test_nearest_many_matches_nearest(backend):
+    rng = random.Random(1)
+    tree = KDTree(random_points(rng, 500))
+    queries = random_points(rng, 50)
+    assert [i for i, _ in tree.nearest_many(queries)] == [tree.nearest(*q)[0] for q in queries]
+
+
+@pytest.mark.parametrize("radius", [0.5, 3.0, 20.0])
+def test_within_matches_brute_force(backend, radius):
+    rng = random.Random(int(radius * 10))
+    points = random_points(rng, 1000)
+    tree = KDTree(points)
+    for query in random_points(rng, 50):
+        expected = [i for i, p in enumerate(points) if planar_km(tree, query, p) <= radius]
+        assert tree.within(*query, radius) == expected
+
+
+def test_duplicate_points_and_empty_tree(backend):
+    tree = KDTree([(51.5, 11.3)] * 20)
+    index, km = tree.nearest(51.5, 11.3)
+    assert km == 0 and 0 <= index < 20
+    assert tree.within(51.5, 11.3, 0.1) == list(range(20))
+    assert KDTree([]).nearest(51.5, 11.3) == (-1, math.inf)
+    assert KDTree([]).within(51.5, 11.3, 5) == []
+
+
+def test_projection_close_to_haversine():
+    tree = KDTree([(51.47, 11.30), (51.53, 11.55)])
+    lat1, lon1, lat2, lon2 = map(math.radians, (51.47, 11.30, 51.53, 11.55))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    haversine = 2 * 6371.0 * math.asin(math.sqrt(a))
+    assert planar_km(tree, (51.47, 11.30), (51.53, 11.55)) == pytest.approx(haversine, rel=0.005)
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""telemetry: Stufen-Metriken schreiben und pro Lauf zusammenfassen"""
+
+from telemetry import HAS_RESOURCE, Telemetry, collect_run
+
+
+def test_collect_run_without_tracemalloc(tmp_path):
+    telemetry = Telemetry("health", "run1")
+    assert not telemetry.tracing
+    telemetry.record_request("https://overpass-api.de/api/interpreter", 200, 1000, 0.5)
+    telemetry.write(tmp_path)
+
+    totals = collect_run("run1", tmp_path)
+    assert totals["stages"] == 1
+    assert totals["http_requests"] == 1
+    # Ohne tracemalloc zählt max RSS der Stufe
+    assert (totals["peak_memory_bytes"] > 0) == HAS_RESOURCE
+    assert (tmp_path / "run1" / "run.json").exists()
+    assert (tmp_path / "deepscan_run.prom").exists()
+    assert (tmp_path / "health.prom").exists()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_collect_run_empty(tmp_path):
+    assert collect_run("missing", tmp_path)["peak_memory_bytes"] == 0
+    assert not (tmp_path / "deepscan_run.prom").exists()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""validate_notices --all --fix: nur Notices und Events werden geändert"""
+
+import json
+
+import validate_notices
+
+
+def write(path, records):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({"meta": {}, "data": records}), encoding='utf-8')
+
+
+def test_fix_all_leaves_asset_files_untouched(tmp_path, monkeypatch):
+    monkeypatch.setattr(validate_notices, "PROJECT_ROOT", tmp_path)
+    monkeypatch.setattr(validate_notices, "REPORT_DIR", tmp_path / "reports")
+    monkeypatch.setattr(validate_notices, "geocode_address", lambda query: (51.47, 11.30))
+
+    outside = {"id": "x1", "name": "Kyffhäuser", "latitude": 51.41, "longitude": 11.10 - 1.0}
+    notice = tmp_path / "data" / "notices" / "notices_current.json"
+    asset = tmp_path / "assets" / "data" / "outdoor" / "wandernadel.json"
+    write(notice, [dict(outside)])
+    write(asset, [dict(outside)])
+    asset_before = asset.read_text(encoding='utf-8')
+
+    validate_notices.validate_all(validate_notices.batch_files(), fix=True, workers=1)
+
+    assert asset.read_text(encoding='utf-8') == asset_before
+    fixed = json.loads(notice.read_text(encoding='utf-8'))["data"][0]
+    assert (fixed["latitude"], fixed["longitude"]) == (51.47, 11.30)
+
+
+def test_is_fixable(tmp_path, monkeypatch):
+    monkeypatch.setattr(validate_notices, "PROJECT_ROOT", tmp_path)
+    assert validate_notices.is_fixable(tmp_path / "data" / "events" / "events_current.json")
+    assert not validate_notices.is_fixable(tmp_path / "assets" / "data" / "locations.json")
+    assert not validate_notices.is_fixable(tmp_path.parent / "elsewhere.json")
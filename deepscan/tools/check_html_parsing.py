@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+HTML-Parsing Gleichheitsprüfung
+
+Vergleicht die Extraktion über html_parsing (lxml/selectolax, SoupStrainer,
+<head>-Ausschnitt) mit der bisherigen BeautifulSoup(html, "html.parser")-
+Variante auf echten Seiten und misst die Parse-Zeit:
+
+1. og:image / twitter:image / og:image:url (og_image_extractor)
+2. Listen-Container der Notice-Quellen (notice_scraper)
+
+Seiten kommen aus den Replay-Cassettes (output/fixtures/*.jsonl.gz, siehe
+replay.py) oder aus einem Verzeichnis mit *.html-Dateien.
+
+Verwendung:
+    python check_html_parsing.py                      # alle Cassettes
+    python check_html_parsing.py --cassette notices   # eine Cassette
+    python check_html_parsing.py --dir seiten/        # *.html-Dateien
+    python check_html_parsing.py --parser html.parser # Backend erzwingen
+"""
+
+import argparse
+import base64
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+# HTML-Parsing und Replay aus deepscan/, Listen-Definitionen aus scrapers/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scrapers"))
+import html_parsing
+from html_parsing import find_meta, parse_listing
+from replay import FIXTURES_DIR, Cassette
+from og_image_extractor import IMAGE_META
+from notice_scraper import BLOG_LISTING, EISLEBEN_LISTING, SANGERHAUSEN_LISTING
+
+LISTINGS = {
+    "sangerhausen": SANGERHAUSEN_LISTING,
+    "eisleben": EISLEBEN_LISTING,
+    "blog": BLOG_LISTING,
+}
+
+
+def load_pages(args) -> List[Tuple[str, str]]:
+    """(Name, HTML) aller Seiten"""
+    pages = []
+    if args.dir:
+        for path in sorted(Path(args.dir).glob("*.html")):
+            pages.append((path.name, path.read_text(encoding="utf-8", errors="replace")))
+        return pages
+
+    names = [args.cassette] if args.cassette else [p.name[:-len(".jsonl.gz")]
+                                                     for p in sorted(FIXTURES_DIR.glob("*.jsonl.gz"))]
+    for name in names:
+        for entries in Cassette(name).load().entries.values():
+            for entry in entries:
+                content_type = entry["headers"].get("content-type", "")
+                if entry["status"] == 200 and "html" in content_type:
+                    html = base64.b64decode(entry["body"]).decode("utf-8", errors="replace")
+                    pages.append((entry["url"], html))
+    return pages
+
+
+def legacy_meta(html: str) -> str:
+    """Bisherige Logik aus og_image_extractor"""
+    soup = html_parsing.BeautifulSoup(html, "html.parser")
+    for attr, value in IMAGE_META:
+        meta = soup.find("meta", attrs={attr: value})
+        if meta and meta.get("content"):
+            return meta["content"]
+    return None
+
+
+def legacy_listing(html: str, tags, class_) -> List[str]:
+    soup = html_parsing.BeautifulSoup(html, "html.parser")
+    return [el.get_text(" ", strip=True) for el in soup.find_all(tags, class_=class_)]
+
+
+def new_listing(html: str, tags, class_, parser: str) -> List[str]:
+    soup = parse_listing(html, tags, class_, parser=parser)
+    return [el.get_text(" ", strip=True) for el in soup.find_all(tags, class_=class_)]
+
+
+def timed(func, *args) -> Tuple[object, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML-Parsing Gleichheitsprüfung")
+    parser.add_argument("--cassette", help="Name der Cassette in output/fixtures/")
+    parser.add_argument("--dir", help="Verzeichnis mit *.html-Dateien")
+    parser.add_argument("--parser", help="bs4-Builder für die neue Variante (Standard: html_parsing.PARSER)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Abweichungen im Detail")
+    args = parser.parse_args()
+
+    if not html_parsing.HAS_BS4:
+        print("❌ beautifulsoup4 nicht installiert")
+        sys.exit(2)
+
+    new_parser = args.parser or html_parsing.PARSER
+    pages = load_pages(args)
+    if not pages:
+        print("❌ Keine HTML-Seiten gefunden (erst mit replay.py record aufzeichnen)")
+        sys.exit(2)
+
+    print(f"📄 {len(pages)} Seiten, Parser: {new_parser}"
+          f"{', selectolax für Meta-Tags' if html_parsing.HAS_SELECTOLAX and not args.parser else ''}\n")
+
+    times: Dict[str, List[float]] = {"meta_alt": [], "meta_neu": [], "listing_alt": [], "listing_neu": []}
+    mismatches = []
+    for name, html in pages:
+        old, t_old = timed(legacy_meta, html)
+        new, t_new = timed(find_meta, html, IMAGE_META, args.parser)
+        times["meta_alt"].append(t_old)
+        times["meta_neu"].append(t_new)
+        if old != new:
+            mismatches.append((name, "og:image", old, new))
+
+        for label, (tags, class_) in LISTINGS.items():
+            old, t_old = timed(legacy_listing, html, tags, class_)
+            new, t_new = timed(new_listing, html, tags, class_, new_parser)
+            times["listing_alt"].append(t_old)
+            times["listing_neu"].append(t_new)
+            if old != new:
+                diff = next((i for i, (a, b) in enumerate(zip(old, new)) if a != b), min(len(old), len(new)))
+                mismatches.append((name, label,
+                                   f"{len(old)} Container, #{diff}: {old[diff][:80] if diff < len(old) else '-'}",
+                                   f"{len(new)} Container, #{diff}: {new[diff][:80] if diff < len(new) else '-'}"))
+
+    for kind in ("meta", "listing"):
+        old, new = sum(times[f"{kind}_alt"]), sum(times[f"{kind}_neu"])
+        speedup = old / new if new else 0
+        print(f"  {kind:<8} bisher {old:8.3f}s   neu {new:8.3f}s   {speedup:5.1f}x")
+
+    if mismatches:
+        print(f"\n⚠️  {len(mismatches)} Abweichungen")
+        for name, what, old, new in mismatches[:50 if args.verbose else 10]:
+            print(f"  {what:<13} {name[:70]}")
+            if args.verbose:
+                print(f"      bisher: {old!r}\n      neu:    {new!r}")
+        sys.exit(1)
+
+    print("\n✅ Extraktion identisch")
+
+
+if __name__ == "__main__":
+    main()
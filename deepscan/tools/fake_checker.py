@@ -24,6 +24,13 @@ import time
 from datetime import datetime
 from pathlib import Path
 
+# JSON-Writer und Keyword-Matcher aus deepscan/, lokaler Geocoder aus deepscan/scrapers/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scrapers"))
+from json_writer import write_json
+from keyword_matcher import KeywordMatcher
+from local_geocoder import get_local_geocoder
+
 # Vertrauenswürdige Datenquellen
 TRUSTED_SOURCES = ['openstreetmap', 'wikidata', 'osm']
 
@@ -81,6 +88,7 @@ SUSPICIOUS_PATTERNS = [
     'lorem', 'ipsum', 'placeholder', 'xxx', '123', 'abc',
     'mustermann', 'max muster', 'john doe', 'jane doe'
 ]
+SUSPICIOUS_KEYWORDS = KeywordMatcher({'suspicious': SUSPICIOUS_PATTERNS})
 
 # Verdächtige Kategorien ohne OSM-Quelle
 HIGH_RISK_CATEGORIES = [
@@ -98,24 +106,29 @@ def load_json(filepath: str) -> dict:
 
 def save_json(filepath: str, data: dict):
     """Speichert JSON-Datei."""
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    write_json(filepath, data)
 
 
 def check_suspicious_patterns(text: str) -> list:
     """Prüft Text auf verdächtige Muster."""
-    if not text:
-        return []
-    text_lower = text.lower()
-    found = []
-    for pattern in SUSPICIOUS_PATTERNS:
-        if pattern in text_lower:
-            found.append(pattern)
-    return found
+    return SUSPICIOUS_KEYWORDS.keywords('suspicious', text)
 
 
 def verify_with_nominatim(name: str, city: str, lat: float, lon: float) -> dict:
-    """Verifiziert Ort mittels Nominatim Geocoding API."""
+    """Verifiziert Ort mittels lokaler OSM-Daten, sonst Nominatim Geocoding API."""
+    # Lokaler Geocoder: gleiche Toleranz, kein Rate-Limit; ohne Treffer weiter mit Nominatim
+    local = get_local_geocoder().geocode(f"{name}, {city}")
+    if local and local.kind != 'place':
+        lat_diff = abs(local.lat - lat)
+        lon_diff = abs(local.lon - lon)
+        if lat_diff < 0.05 and lon_diff < 0.05:
+            return {
+                'verified': True,
+                'method': 'local',
+                'confidence': 'high' if lat_diff < 0.01 else 'medium',
+                'match': local.name
+            }
+
     try:
         import requests
 
@@ -2,26 +2,67 @@
 """
 Notice Koordinaten-Validator
 
-Validiert die Koordinaten in notices_current.json:
+Validiert die Koordinaten in notices_current.json (oder mit --all in allen
+Notice-, Event- und assets/data-Dateien):
 1. Prüft ob alle Koordinaten im Landkreis MSH Bounding Box liegen
 2. Prüft ob Koordinaten plausibel sind (nicht 0, nicht vertauscht)
-3. Optional: Schlägt Korrekturen vor mittels Nominatim Geocoding
+3. Optional: Schlägt Korrekturen vor (lokaler Geocoder, Nominatim als Fallback)
+
+Der nächste bekannte Ort kommt aus einem KD-Tree über KNOWN_LOCATIONS und
+den Orten des lokalen Geocoders, der einmal je Lauf gebaut wird. Mit --all
+werden die Dateien parallel geprüft und in einem Bericht zusammengefasst
+(output/analytics/coordinate_report_*.json). --fix ändert dabei nur Notices
+und Events (FIX_SOURCES): assets/data enthält absichtlich Einträge außerhalb
+von MSH_BOUNDS (z.B. Wandernadel, Ziele im Umland), die würden per Name auf
+gleichnamige Orte in MSH verschoben.
 
 Verwendung:
     python validate_notices.py                    # Nur validieren
     python validate_notices.py --fix              # Versuche Koordinaten zu korrigieren
     python validate_notices.py --verbose          # Detaillierte Ausgabe
+    python validate_notices.py --all              # Notices, Events und assets/data/**
+    python validate_notices.py --all --fix        # Korrigiert nur Notices und Events
 """
 
 import json
 import sys
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from math import radians, sin, cos, sqrt, atan2
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 import urllib.request
 import urllib.parse
 import time
 
+# JSON-Writer und räumlicher Index aus deepscan/, lokaler Geocoder aus deepscan/scrapers/
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / "scrapers"))
+from json_writer import write_json
+from spatial_index import KDTree
+from local_geocoder import get_local_geocoder
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+REPORT_DIR = Path(__file__).parent.parent / "output" / "analytics"
+
+# Dateien für --all (Globs relativ zum Projekt-Root)
+BATCH_SOURCES = ["data/notices/*.json", "data/events/*.json", "assets/data/**/*.json"]
+
+# Nur diese Dateien korrigiert --all --fix (MSH_BOUNDS gilt nur für sie)
+FIX_SOURCES = ["data/notices/*.json", "data/events/*.json"]
+
+# Schlüssel der Eintragsliste in den Dateien (sonst ist die Datei selbst die Liste)
+RECORD_KEYS = ("notices", "events", "places", "data")
+
+# Weiter entfernt vom nächsten bekannten Ort gibt eine Warnung
+WARN_DISTANCE_KM = 15
+
+MAX_WORKERS = 4
+
+# Mit --all ohne --verbose: so viele Fehler je Datei ausgeben, der Rest steht im Bericht
+ERRORS_PER_FILE = 5
+
 # Bounding Box für Landkreis Mansfeld-Südharz (erweitert für Randgebiete)
 MSH_BOUNDS = {
     "min_lat": 51.35,   # Südgrenze (Kyffhäuser)
@@ -68,8 +109,13 @@ def validate_coordinate_format(lat: float, lon: float) -> Tuple[bool, str]:
 
     return True, "OK"
 
+@lru_cache(maxsize=None)
 def geocode_address(address: str) -> Optional[Tuple[float, float]]:
-    """Geocodiert eine Adresse via Nominatim (OSM)"""
+    """Geocodiert eine Adresse aus lokalen OSM-Daten, sonst via Nominatim (je Lauf gecacht)"""
+    result = get_local_geocoder().geocode(address)
+    if result:
+        return result.lat, result.lon
+
     try:
         # Rate limiting respektieren
         time.sleep(1)
@@ -94,101 +140,128 @@ def geocode_address(address: str) -> Optional[Tuple[float, float]]:
 
     return None
 
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    R = 6371  # Erdradius in km
+    dlat = radians(lat2 - lat1)
+    dlon = radians(lon2 - lon1)
+    a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1-a))
+    return R * c
+
+@lru_cache(maxsize=1)
+def known_location_index() -> Tuple[List[str], KDTree]:
+    """KNOWN_LOCATIONS plus Orte des lokalen Geocoders als KD-Tree (einmal je Lauf)"""
+    places = dict(KNOWN_LOCATIONS)
+    for record in get_local_geocoder().towns.values():
+        places.setdefault(record.name, (record.lat, record.lon))
+    names = list(places)
+    return names, KDTree([places[name] for name in names])
+
 def find_nearest_known_location(lat: float, lon: float) -> Tuple[str, float]:
     """Findet den nächsten bekannten Ort und berechnet Distanz"""
-    from math import radians, sin, cos, sqrt, atan2
-
-    def haversine(lat1, lon1, lat2, lon2):
-        R = 6371  # Erdradius in km
-        dlat = radians(lat2 - lat1)
-        dlon = radians(lon2 - lon1)
-        a = sin(dlat/2)**2 + cos(radians(lat1)) * cos(radians(lat2)) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        return R * c
-
-    nearest = None
-    min_dist = float('inf')
-
-    for name, (known_lat, known_lon) in KNOWN_LOCATIONS.items():
-        dist = haversine(lat, lon, known_lat, known_lon)
-        if dist < min_dist:
-            min_dist = dist
-            nearest = name
-
-    return nearest, min_dist
-
-def validate_notices(notices_path: Path, fix: bool = False, verbose: bool = False) -> bool:
-    """Validiert alle Notices und gibt Ergebnis zurück"""
-
-    if not notices_path.exists():
-        print(f"Fehler: {notices_path} nicht gefunden")
-        return False
-
-    with open(notices_path, 'r', encoding='utf-8') as f:
+    names, tree = known_location_index()
+    index, _ = tree.nearest(lat, lon)
+    if index < 0:
+        return None, float('inf')
+    known_lat, known_lon = tree.points[index]
+    return names[index], haversine(lat, lon, known_lat, known_lon)
+
+def fix_query(record: Dict[str, Any]) -> str:
+    """Suchtext für Korrekturen: betroffenes Gebiet bzw. Adresse und Ort des Eintrags"""
+    if record.get("affected_area"):
+        return record["affected_area"]
+    place = record.get("street") or record.get("location_name") or record.get("name")
+    return ", ".join(part for part in (place, record.get("city")) if part)
+
+def get_records(data: Any) -> List[Dict[str, Any]]:
+    """Eintragsliste einer Datei ({"notices": [...]}, {"data": [...]} oder [...])"""
+    if isinstance(data, list):
+        return data
+    for key in RECORD_KEYS:
+        if isinstance(data.get(key), list):
+            return data[key]
+    return []
+
+class FileResult(NamedTuple):
+    path: Path
+    data: Any
+    records: int
+    errors: List[str]
+    warnings: List[str]
+    out_of_bounds: List[Dict[str, Any]]     # Einträge für --fix
+
+def check_file(path: Path, verbose: bool = False) -> FileResult:
+    """Prüft alle Einträge einer Datei"""
+    with open(path, 'r', encoding='utf-8') as f:
         data = json.load(f)
 
-    notices = data.get("notices", [])
+    records = [r for r in get_records(data) if isinstance(r, dict)]
     errors = []
     warnings = []
-    fixed = []
+    out_of_bounds = []
 
-    print(f"\n{'='*60}")
-    print(f"Validiere {len(notices)} Notices")
-    print(f"{'='*60}\n")
-
-    for notice in notices:
-        notice_id = notice.get("id", "???")
-        title = notice.get("title", "???")
-        lat = notice.get("latitude")
-        lon = notice.get("longitude")
-        affected_area = notice.get("affected_area", "")
+    for record in records:
+        record_id = record.get("id", "???")
+        lat = record.get("latitude")
+        lon = record.get("longitude")
 
         if verbose:
-            print(f"Prüfe: {notice_id} - {title}")
+            print(f"Prüfe: {record_id} - {record.get('title') or record.get('name', '???')}")
 
         # Pflichtfelder prüfen
         if lat is None or lon is None:
-            errors.append(f"{notice_id}: Keine Koordinaten angegeben")
+            errors.append(f"{record_id}: Keine Koordinaten angegeben")
             continue
 
         # Format prüfen
         is_valid, msg = validate_coordinate_format(lat, lon)
         if not is_valid:
-            errors.append(f"{notice_id}: {msg} (lat={lat}, lon={lon})")
+            errors.append(f"{record_id}: {msg} (lat={lat}, lon={lon})")
             continue
 
         # MSH Bounds prüfen
+        nearest, dist = find_nearest_known_location(lat, lon)
         if not is_in_msh_bounds(lat, lon):
-            nearest, dist = find_nearest_known_location(lat, lon)
-            errors.append(f"{notice_id}: Außerhalb MSH (lat={lat}, lon={lon})")
-            errors.append(f"          Nächster bekannter Ort: {nearest} ({dist:.1f} km entfernt)")
-
-            if fix:
-                # Versuche Geocoding
-                new_coords = geocode_address(affected_area)
-                if new_coords and is_in_msh_bounds(*new_coords):
-                    notice["latitude"] = round(new_coords[0], 4)
-                    notice["longitude"] = round(new_coords[1], 4)
-                    fixed.append(f"{notice_id}: Korrigiert zu {new_coords}")
+            errors.append(f"{record_id}: Außerhalb MSH (lat={lat}, lon={lon}), "
+                          f"nächster bekannter Ort: {nearest} ({dist:.1f} km entfernt)")
+            out_of_bounds.append(record)
             continue
 
         # Distanz-Warnung wenn weit von bekannten Orten
-        nearest, dist = find_nearest_known_location(lat, lon)
-        if dist > 15:
-            warnings.append(f"{notice_id}: {dist:.1f} km von {nearest} entfernt - bitte prüfen")
+        if dist > WARN_DISTANCE_KM:
+            warnings.append(f"{record_id}: {dist:.1f} km von {nearest} entfernt - bitte prüfen")
 
         if verbose:
             print(f"  OK - Nächster Ort: {nearest} ({dist:.1f} km)")
 
-    # Ergebnis ausgeben
-    print(f"\n{'='*60}")
-    print("ERGEBNIS")
-    print(f"{'='*60}")
+    return FileResult(path, data, len(records), errors, warnings, out_of_bounds)
 
+def apply_fixes(result: FileResult) -> List[str]:
+    """Geocodiert Einträge außerhalb MSH neu und speichert die Datei bei Änderungen"""
+    fixed = []
+    for record in result.out_of_bounds:
+        query = fix_query(record)
+        new_coords = geocode_address(query) if query else None
+        if new_coords and is_in_msh_bounds(*new_coords):
+            record["latitude"] = round(new_coords[0], 4)
+            record["longitude"] = round(new_coords[1], 4)
+            fixed.append(f"{record.get('id', '???')}: Korrigiert zu {new_coords}")
+
+    if fixed:
+        data = result.data
+        if isinstance(data, dict) and isinstance(data.get("meta"), dict):
+            data["meta"]["last_verification"] = time.strftime("%Y-%m-%d")
+            data["meta"]["coordinates_verified"] = True
+        write_json(result.path, data)
+    return fixed
+
+def print_messages(errors: List[str], warnings: List[str], fixed: List[str], limit: int = None) -> None:
     if errors:
         print(f"\n{len(errors)} FEHLER:")
-        for err in errors:
+        for err in errors[:limit]:
             print(f"  {err}")
+        if limit is not None and len(errors) > limit:
+            print(f"  ... {len(errors) - limit} weitere (siehe Bericht)")
 
     if warnings:
         print(f"\n{len(warnings)} WARNUNGEN:")
@@ -200,30 +273,126 @@ def validate_notices(notices_path: Path, fix: bool = False, verbose: bool = Fals
         for fix_msg in fixed:
             print(f"  {fix_msg}")
 
-        # Speichern
-        data["meta"]["last_verification"] = time.strftime("%Y-%m-%d")
-        data["meta"]["coordinates_verified"] = True
-        with open(notices_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+def validate_notices(notices_path: Path, fix: bool = False, verbose: bool = False) -> bool:
+    """Validiert alle Notices und gibt Ergebnis zurück"""
+
+    if not notices_path.exists():
+        print(f"Fehler: {notices_path} nicht gefunden")
+        return False
+
+    print(f"\n{'='*60}")
+    print(f"Validiere {notices_path.name}")
+    print(f"{'='*60}\n")
+
+    result = check_file(notices_path, verbose)
+    fixed = apply_fixes(result) if fix else []
+
+    # Ergebnis ausgeben
+    print(f"\n{'='*60}")
+    print(f"ERGEBNIS ({result.records} Notices)")
+    print(f"{'='*60}")
+
+    print_messages(result.errors, result.warnings, fixed)
+    if fixed:
         print(f"\nÄnderungen gespeichert in {notices_path}")
 
-    if not errors and not warnings:
+    if not result.errors and not result.warnings:
         print("\n Alle Koordinaten sind korrekt!")
 
     print(f"\n{'='*60}\n")
 
-    return len(errors) == 0
+    return len(result.errors) == 0
+
+def batch_files(patterns: List[str] = BATCH_SOURCES) -> List[Path]:
+    files = set()
+    for pattern in patterns:
+        files.update(path for path in PROJECT_ROOT.glob(pattern) if path.is_file())
+    return sorted(files)
+
+def is_fixable(path: Path) -> bool:
+    """Liegt die Datei in FIX_SOURCES?"""
+    try:
+        relative = path.resolve().relative_to(PROJECT_ROOT.resolve())
+    except ValueError:
+        return False
+    return any(relative.match(pattern) for pattern in FIX_SOURCES)
+
+def validate_all(paths: List[Path], fix: bool = False, verbose: bool = False,
+                 workers: int = MAX_WORKERS) -> bool:
+    """Prüft alle Dateien parallel, Korrekturen danach seriell (ein Geocoder-Cache für alle)"""
+    print(f"\n{'='*60}")
+    print(f"Validiere {len(paths)} Dateien")
+    print(f"{'='*60}\n")
+
+    # Index vor den Threads bauen
+    names, _ = known_location_index()
+    print(f"Bekannte Orte im KD-Tree: {len(names)}")
+
+    def check(path: Path):
+        try:
+            return check_file(path, verbose)
+        except (OSError, ValueError) as e:
+            return FileResult(path, None, 0, [f"Datei nicht lesbar: {e}"], [], [])
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(check, paths))
+
+    report = {
+        "checked_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "files": [],
+        "totals": {"files": len(results), "records": 0, "errors": 0, "warnings": 0, "fixed": 0},
+    }
+    for result in results:
+        fixed = apply_fixes(result) if fix and result.out_of_bounds and is_fixable(result.path) else []
+        try:
+            name = str(result.path.relative_to(PROJECT_ROOT))
+        except ValueError:
+            name = str(result.path)
+
+        print(f"{'✗' if result.errors else '✓'} {name}: {result.records} Einträge, "
+              f"{len(result.errors)} Fehler, {len(result.warnings)} Warnungen"
+              + (f", {len(fixed)} korrigiert" if fixed else ""))
+        if verbose or result.errors or fixed:
+            print_messages(result.errors, result.warnings if verbose else [], fixed,
+                           limit=None if verbose else ERRORS_PER_FILE)
+
+        report["files"].append({"file": name, "records": result.records, "errors": result.errors,
+                                "warnings": result.warnings, "fixed": fixed})
+        report["totals"]["records"] += result.records
+        report["totals"]["errors"] += len(result.errors)
+        report["totals"]["warnings"] += len(result.warnings)
+        report["totals"]["fixed"] += len(fixed)
+
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = REPORT_DIR / f"coordinate_report_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    write_json(report_path, report)
+
+    totals = report["totals"]
+    print(f"\n{'='*60}")
+    print(f"ERGEBNIS: {totals['records']} Einträge in {totals['files']} Dateien, "
+          f"{totals['errors']} Fehler, {totals['warnings']} Warnungen, {totals['fixed']} korrigiert")
+    print(f"Bericht: {report_path}")
+    print(f"{'='*60}\n")
+
+    return totals["errors"] == 0
 
 def main():
     parser = argparse.ArgumentParser(description="Validiert Notice-Koordinaten")
-    parser.add_argument("--fix", action="store_true", help="Versuche Koordinaten zu korrigieren")
+    parser.add_argument("--fix", action="store_true",
+                        help="Versuche Koordinaten zu korrigieren (mit --all nur Notices und Events)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Detaillierte Ausgabe")
     parser.add_argument("--file", type=str, help="Pfad zur notices JSON Datei")
+    parser.add_argument("--all", action="store_true",
+                        help="Notices, Events und alle assets/data-Dateien parallel prüfen")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Parallele Dateien (--all)")
     args = parser.parse_args()
 
+    if args.all:
+        success = validate_all(batch_files(), fix=args.fix, verbose=args.verbose, workers=args.workers)
+        sys.exit(0 if success else 1)
+
     # Standard-Pfad
-    script_dir = Path(__file__).parent.parent.parent
-    notices_path = script_dir / "data" / "notices" / "notices_current.json"
+    notices_path = PROJECT_ROOT / "data" / "notices" / "notices_current.json"
 
     if args.file:
         notices_path = Path(args.file)